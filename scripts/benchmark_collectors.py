@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+収集バックエンドのベンチマークスクリプト
+
+一時ディレクトリに合成した /proc ツリー（多数のプロセス）を作成し、
+PsutilBackend と ProcfsBackend のプロセステーブル走査時間を比較します。
+
+使い方:
+    python scripts/benchmark_collectors.py --processes 2000 --rounds 10
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import psutil
+
+from komon.monitor import ProcfsBackend, PsutilBackend
+
+BOOT_TIME = 1700000000
+
+MEMINFO = """MemTotal:       16384000 kB
+MemFree:         4096000 kB
+MemAvailable:    8192000 kB
+Buffers:          512000 kB
+Cached:          3072000 kB
+SwapCached:            0 kB
+Active:          6144000 kB
+Inactive:        2048000 kB
+Shmem:            128000 kB
+SReclaimable:     256000 kB
+SwapTotal:       2048000 kB
+SwapFree:        2048000 kB
+"""
+
+
+def build_proc_tree(root: str, count: int):
+    """合成した /proc ツリーを作成"""
+    with open(os.path.join(root, "stat"), "w") as f:
+        f.write("cpu  10000 200 3000 50000 400 0 100 0 0 0\n")
+        f.write("cpu0 10000 200 3000 50000 400 0 100 0 0 0\n")
+        f.write(f"btime {BOOT_TIME}\n")
+    with open(os.path.join(root, "meminfo"), "w") as f:
+        f.write(MEMINFO)
+
+    for i in range(count):
+        pid = 1000 + i
+        name = f"worker-{i % 50}"
+        pid_dir = os.path.join(root, str(pid))
+        os.mkdir(pid_dir)
+        with open(os.path.join(pid_dir, "stat"), "w") as f:
+            f.write(
+                f"{pid} ({name}) S 1 {pid} {pid} 0 -1 4194560 100 0 0 0 "
+                f"{i * 3} {i} 0 0 20 0 1 0 {1000 + i} 104857600 {2560 + i} "
+                "18446744073709551615 1 1 0 0 0 0 0 0 0 0 0 0 17 0 0 0 0 0 0\n"
+            )
+        with open(os.path.join(pid_dir, "statm"), "w") as f:
+            f.write(f"25600 {2560 + i} 512 100 0 3000 0\n")
+        with open(os.path.join(pid_dir, "cmdline"), "wb") as f:
+            f.write(f"/usr/bin/python3\0/opt/app/{name}.py\0--serve\0".encode())
+
+
+def time_rounds(func, rounds: int) -> list:
+    """funcをrounds回実行し、各回の所要時間（秒）を返す"""
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="収集バックエンドのベンチマーク")
+    parser.add_argument("--processes", type=int, default=2000, help="合成するプロセス数")
+    parser.add_argument("--rounds", type=int, default=10, help="計測回数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        build_proc_tree(root, args.processes)
+
+        procfs = ProcfsBackend(proc_root=root)
+        psutil_backend = PsutilBackend()
+
+        original_procfs_path = psutil.PROCFS_PATH
+        psutil.PROCFS_PATH = root
+        try:
+            results = {
+                "psutil": time_rounds(lambda: list(psutil_backend.iter_processes()), args.rounds),
+                "procfs": time_rounds(lambda: list(procfs.iter_processes()), args.rounds),
+            }
+        finally:
+            psutil.PROCFS_PATH = original_procfs_path
+
+    print(f"📊 プロセス数: {args.processes} / 計測回数: {args.rounds}")
+    for name, timings in results.items():
+        print(
+            f"  {name:<7} 中央値 {statistics.median(timings) * 1000:8.2f} ms"
+            f"  最小 {min(timings) * 1000:8.2f} ms"
+        )
+    speedup = statistics.median(results["psutil"]) / statistics.median(results["procfs"])
+    print(f"⚡ procfs は psutil の {speedup:.1f} 倍の速度です")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+使用率予測のベンチマークスクリプト
+
+合成したマウントポイントごとの日次使用率（既定は365日分 × 48マウント、途中に一時的な削除を含む）を
+forecast_batch() で予測し、系列ごとに Python で計算する方法と
+NumPy で全系列を一度に計算する方法の時間を、予測方法ごとに比較します。
+
+使い方:
+    python scripts/benchmark_forecast.py --days 365 --mounts 48
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from komon.forecast import FORECAST_METHODS, NUMPY_AVAILABLE, forecast_batch
+
+
+def build_series(days: int, mounts: int, seed: int = 0) -> dict:
+    """マウントごとに増加傾向・ノイズ・欠けた日・一時的な削除を含む日次使用率を作成"""
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=days)
+    series = {}
+    for m in range(mounts):
+        base = rng.uniform(10.0, 60.0)
+        slope = rng.uniform(-0.02, 0.15)
+        cleanup = rng.randrange(days)
+        points = []
+        for n in range(days):
+            if rng.random() < 0.05:
+                continue
+            usage = base + slope * n + rng.gauss(0.0, 0.5)
+            if n == cleanup:
+                usage -= 15.0
+            points.append((start + timedelta(days=n), min(max(usage, 0.0), 100.0)))
+        series[f"/mnt/volume{m:02d}"] = points
+    return series
+
+
+def time_rounds(func, rounds: int) -> list:
+    """funcをrounds回実行し、各回の所要時間（秒）を返す"""
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="使用率予測のベンチマーク")
+    parser.add_argument("--days", type=int, default=365, help="合成する日数")
+    parser.add_argument("--mounts", type=int, default=48, help="マウントポイントの数")
+    parser.add_argument("--rounds", type=int, default=5, help="計測回数")
+    args = parser.parse_args()
+
+    if not NUMPY_AVAILABLE:
+        print("⚠️ NumPy がインストールされていません（pip install numpy）")
+        return
+
+    series = build_series(args.days, args.mounts)
+    print(f"📊 系列数: {args.mounts} × {args.days}日分 / 計測回数: {args.rounds}")
+    for method in FORECAST_METHODS:
+        python = time_rounds(lambda: forecast_batch(series, method, vectorize=False), args.rounds)
+        numpy = time_rounds(lambda: forecast_batch(series, method, vectorize=True), args.rounds)
+        speedup = statistics.median(python) / statistics.median(numpy)
+        print(
+            f"  {method:<9} python 中央値 {statistics.median(python) * 1000:8.2f} ms"
+            f"  numpy 中央値 {statistics.median(numpy) * 1000:8.2f} ms  ({speedup:.1f} 倍)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+履歴分析のベンチマークスクリプト
+
+一時ディレクトリの時系列ストアに合成したサンプル（既定は90日分・1分間隔）を書き込み、
+ディスク使用率の日次平均の計算時間を次の3つの方法で比較します。
+    python: サンプルを読み込み、タプルを Python でループして集計
+    numpy: サンプルを読み込み、timeseries_array.daily_means のベクトル演算で集計
+    aggregate: 時系列ストアが書き込み時に更新している日ごとの合計から求める（daily_average）
+
+使い方:
+    python scripts/benchmark_history.py --days 90 --interval 60
+"""
+
+import argparse
+import math
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from komon.timeseries import Sample, TimeSeriesStore
+from komon.timeseries_array import NUMPY_AVAILABLE, daily_means
+
+
+def build_store(root: str, days: int, interval: int) -> tuple:
+    """合成したサンプルを日ごとのパーティションに書き込み、(ストア, 開始, 終了, 件数) を返す"""
+    store = TimeSeriesStore(root)
+    end = datetime.combine(date.today(), datetime.min.time())
+    start = end - timedelta(days=days)
+    total = 0
+    for n in range(days):
+        day_start = (start + timedelta(days=n)).timestamp()
+        samples = []
+        for i in range(86400 // interval):
+            ts = day_start + i * interval
+            minute = ts / 60
+            samples.append(Sample(
+                ts,
+                40.0 + 30.0 * math.sin(minute / 180.0),
+                55.0 + 10.0 * math.cos(minute / 720.0),
+                50.0 + (n + i / (86400 / interval)) * 0.2,
+            ))
+        store.write_partition((start + timedelta(days=n)).date(), samples)
+        total += len(samples)
+    # 常駐モード・cron と同じく集計段を作成しておく（aggregate で使用）
+    store.rollup(now=end)
+    return store, start, end, total
+
+
+def daily_python(store: TimeSeriesStore, start: datetime, end: datetime) -> list:
+    """タプルのリストに対する Python のループで集計"""
+    daily = {}
+    for s in store.query(start, end):
+        daily.setdefault(datetime.fromtimestamp(s.timestamp).date(), []).append(s.disk)
+    return sorted((day, sum(v) / len(v)) for day, v in daily.items())
+
+
+def daily_numpy(store: TimeSeriesStore, start: datetime, end: datetime) -> list:
+    """読み込んだサンプルをベクトル演算で集計"""
+    samples = list(store.query(start, end))
+    return daily_means([s.timestamp for s in samples], [s.disk for s in samples])
+
+
+def time_rounds(func, rounds: int) -> list:
+    """funcをrounds回実行し、各回の所要時間（秒）を返す"""
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="履歴分析のベンチマーク")
+    parser.add_argument("--days", type=int, default=90, help="合成する日数")
+    parser.add_argument("--interval", type=int, default=60, help="サンプル間隔（秒）")
+    parser.add_argument("--rounds", type=int, default=5, help="計測回数")
+    args = parser.parse_args()
+
+    if not NUMPY_AVAILABLE:
+        print("⚠️ NumPy がインストールされていません（pip install numpy）")
+        return
+
+    with tempfile.TemporaryDirectory() as root:
+        store, start, end, total = build_store(root, args.days, args.interval)
+        results = {
+            "python": time_rounds(lambda: daily_python(store, start, end), args.rounds),
+            "numpy": time_rounds(lambda: daily_numpy(store, start, end), args.rounds),
+            "aggregate": time_rounds(lambda: store.daily_average("disk", start, end), args.rounds),
+        }
+
+    print(f"📊 サンプル数: {total}（{args.days}日分・{args.interval}秒間隔） / 計測回数: {args.rounds}")
+    for name, timings in results.items():
+        print(
+            f"  {name:<9} 中央値 {statistics.median(timings) * 1000:8.2f} ms"
+            f"  最小 {min(timings) * 1000:8.2f} ms"
+        )
+    python = statistics.median(results["python"])
+    print(f"⚡ NumPy は Python ループの {python / statistics.median(results['numpy']):.1f} 倍、"
+          f"日ごとの合計は {python / statistics.median(results['aggregate']):.0f} 倍の速度です")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@
 """
 
 import yaml
+from komon.timeseries import get_timeseries_store
 from komon.weekly_data import collect_weekly_data
 from komon.report_formatter import format_weekly_report
 from komon.notification import send_slack_alert, send_email_alert, send_discord_alert, send_teams_alert, send_notification_with_fallback
@@ -55,7 +56,8 @@ def generate_weekly_report(config: dict) -> str:
         str: レポートメッセージ
     """
     try:
-        # データ収集
+        # データ収集（history.storage_engine で選択した保存方式から読み込む）
+        get_timeseries_store(config)
         data = collect_weekly_data()
         
         # メッセージフォーマット
@@ -29,6 +29,10 @@ setup(
         "PyYAML>=6.0",
         "requests>=2.31.0",
     ],
+    extras_require={
+        # 長期間のサンプルの日次平均・まとめての予測をベクトル演算で行う（komon.timeseries_array, komon.forecast）
+        "numpy": ["numpy>=1.22"],
+    },
     entry_points={
         "console_scripts": [
             "komon=komon.cli:main",
@@ -10,8 +10,19 @@ from .settings_validator import (
     ThresholdLevel
 )
 from .progressive_message import get_notification_count, generate_progressive_message
+from .anomaly import DEFAULT_MIN_VALUE, AnomalyDetector
 
 
+# メトリクスタイプ別の表示名
+METRIC_LABELS = {
+    "cpu": "CPU",
+    "memory": "メモリ",
+    "disk": "ディスク",
+}
+
+# 閾値レベルの順序（低い順）
+_LEVEL_ORDER = list(ThresholdLevel)
+
 # レベル別メッセージテンプレート
 MESSAGE_TEMPLATES = {
     ThresholdLevel.WARNING: {
@@ -159,6 +170,11 @@ def analyze_usage_with_levels(usage: dict, thresholds: dict) -> tuple:
     """
     リソース使用率を分析し、アラートと閾値レベル情報を返します。
     
+    thresholds に "anomaly"（統計的な異常検知の設定）がある場合、対象のメトリクスは
+    週の中の同じ時間帯のいつもの水準からの外れ具合でもレベルを判定し、固定閾値のレベルと高い方を使います
+    （学習中の時間帯と、値が anomaly.min_value 未満の場合は固定閾値で判定。
+    anomaly.allow_downgrade が有効な場合は、緊急以外の固定閾値のレベルを外れ具合のレベルで置き換えます）。
+    
     Args:
         usage: リソース使用率データ
         thresholds: 閾値設定（3段階形式）
@@ -170,13 +186,19 @@ def analyze_usage_with_levels(usage: dict, thresholds: dict) -> tuple:
     alerts = []
     levels = {}
     
+    anomaly = thresholds.get("anomaly")
+    detector = AnomalyDetector(anomaly) if anomaly else None
+    
     # CPU使用率のチェック
     cpu_value = usage.get("cpu", 0)
     cpu_thresholds = thresholds.get("cpu", {})
     if isinstance(cpu_thresholds, dict):
         cpu_level = determine_threshold_level(cpu_value, cpu_thresholds)
+        note = ""
+        if detector and "cpu" in anomaly["metrics"]:
+            cpu_level, note = _apply_anomaly(detector, anomaly, "cpu", cpu_value, cpu_level)
         if cpu_level != ThresholdLevel.NORMAL:
-            alerts.append(_generate_message("CPU", cpu_value, cpu_level))
+            alerts.append(_generate_message("CPU", cpu_value, cpu_level) + note)
             levels["cpu"] = (cpu_level.value, cpu_value)
     
     # メモリ使用率のチェック
@@ -184,8 +206,11 @@ def analyze_usage_with_levels(usage: dict, thresholds: dict) -> tuple:
     mem_thresholds = thresholds.get("mem", {})
     if isinstance(mem_thresholds, dict):
         mem_level = determine_threshold_level(mem_value, mem_thresholds)
+        note = ""
+        if detector and "mem" in anomaly["metrics"]:
+            mem_level, note = _apply_anomaly(detector, anomaly, "mem", mem_value, mem_level)
         if mem_level != ThresholdLevel.NORMAL:
-            alerts.append(_generate_message("メモリ", mem_value, mem_level))
+            alerts.append(_generate_message("メモリ", mem_value, mem_level) + note)
             levels["memory"] = (mem_level.value, mem_value)
     
     # ディスク使用率のチェック
@@ -193,13 +218,86 @@ def analyze_usage_with_levels(usage: dict, thresholds: dict) -> tuple:
     disk_thresholds = thresholds.get("disk", {})
     if isinstance(disk_thresholds, dict):
         disk_level = determine_threshold_level(disk_value, disk_thresholds)
+        note = ""
+        if detector and "disk" in anomaly["metrics"]:
+            disk_level, note = _apply_anomaly(detector, anomaly, "disk", disk_value, disk_level)
         if disk_level != ThresholdLevel.NORMAL:
-            alerts.append(_generate_message("ディスク", disk_value, disk_level))
+            alerts.append(_generate_message("ディスク", disk_value, disk_level) + note)
             levels["disk"] = (disk_level.value, disk_value)
     
+    if detector:
+        detector.save()
+    
+    # cgroup（サービス/コンテナ）ごとのチェック
+    cgroup_thresholds = thresholds.get("cgroup", {})
+    for cgroup in usage.get("cgroups", []):
+        for resource, metric in (("cpu", "cpu"), ("mem", "memory")):
+            value = cgroup.get(resource)
+            resource_thresholds = cgroup_thresholds.get(resource)
+            if value is None or not isinstance(resource_thresholds, dict):
+                continue
+            level = determine_threshold_level(value, resource_thresholds)
+            if level != ThresholdLevel.NORMAL:
+                metric_type = f"cgroup:{cgroup['name']}:{metric}"
+                alerts.append(_generate_message(metric_label(metric_type), value, level))
+                levels[metric_type] = (level.value, value)
+    
     return alerts, levels
 
 
+def _apply_anomaly(detector: AnomalyDetector, anomaly: dict, metric: str, value: float,
+                   static_level: ThresholdLevel) -> tuple:
+    """
+    異常検知によるレベルと、アラートメッセージに追加する説明を返す。
+    
+    固定閾値のレベルと外れ具合のレベルの高い方を使う。
+    学習中の時間帯、値が下限（anomaly.min_value、未指定の場合は DEFAULT_MIN_VALUE）未満の場合、
+    固定閾値で緊急レベルの場合は、固定閾値のレベルをそのまま使う
+    （普段ほぼ使われていないホストで、わずかな増加を通知しないため）。
+    anomaly.allow_downgrade が有効な場合のみ、外れ具合のレベルが低ければそちらを使う
+    （毎晩のバッチなど、いつも高い時間帯の警告・警戒を抑える）。
+    
+    Args:
+        detector: 異常検知
+        anomaly: 正規化済みの異常検知の設定
+        metric: メトリクス名（cpu, mem, disk）
+        value: 現在の値
+        static_level: 固定閾値によるレベル
+        
+    Returns:
+        tuple: (閾値レベル, 説明（固定閾値のレベルを使う場合は空文字列）)
+    """
+    level, info = detector.observe(metric, value)
+    floor = anomaly.get("min_value")
+    if floor is None:
+        floor = DEFAULT_MIN_VALUE
+    if level is None or value < floor or static_level == ThresholdLevel.CRITICAL:
+        return static_level, ""
+    if level == ThresholdLevel.NORMAL or _LEVEL_ORDER.index(level) < _LEVEL_ORDER.index(static_level):
+        return (level if anomaly.get("allow_downgrade") else static_level), ""
+    note = (
+        f"\n📈 いつもの同じ曜日・時間帯（{info['baseline']:.1f}%）より"
+        f"大きく高い状態です（{info['score']:+.1f}σ）"
+    )
+    return level, note
+
+
+def metric_label(metric_type: str) -> str:
+    """
+    メトリクスタイプからアラートメッセージで使う表示名を返す。
+    
+    Args:
+        metric_type: メトリクスタイプ（cpu, memory, disk, cgroup:<名前>:<cpu|memory>）
+        
+    Returns:
+        str: 表示名（例: "CPU"、"nginx.service のCPU"）
+    """
+    if metric_type.startswith("cgroup:"):
+        name, _, resource = metric_type[len("cgroup:"):].rpartition(":")
+        return f"{name} の{METRIC_LABELS.get(resource, resource)}"
+    return METRIC_LABELS.get(metric_type, "")
+
+
 def _generate_message(metric_name: str, value: float, level: ThresholdLevel) -> str:
     """
     レベルに応じたアラートメッセージを生成する。
@@ -0,0 +1,218 @@
+"""
+統計的な異常検知モジュール
+
+固定の閾値（％）の代わりに、メトリクスごと・週の中の時間（168区間）ごとの
+いつもの水準（ベースライン）からの外れ具合で閾値レベルを判定します。
+毎晩のバッチで CPU が高くなるサーバーでも、その時間帯の「いつもの高さ」を超えた場合だけ通知します。
+
+ベースラインは次のどちらかの方法でサンプルごとに O(1) で更新します。
+- ewma: 指数加重移動平均・分散（平均からの外れを標準偏差の何倍かで評価）
+- mad: 中央値・中央絶対偏差（MAD）の逐次近似（外れ値に強い）
+
+状態は区間ごとに [中心, ばらつき, サンプル数, 週の数, 最後の週] の5つの値で、
+メトリクスあたり 168 × 5 個の値を data/state/anomaly.json に保存します。
+区間の判定は、異なる MIN_WEEKS 週以上のサンプルがそろってから始めます
+（1週分だけでは、たまたまその週の同じ時間帯に起きたことがいつもの水準になるため）。
+判定は settings_validator.ThresholdLevel で返すため、通知の抑制や表示はそのまま使えます。
+"""
+
+import logging
+import math
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from komon import storage
+from .settings_validator import ThresholdLevel, determine_threshold_level
+
+logger = logging.getLogger(__name__)
+
+ANOMALY_STATE_FILE = "data/state/anomaly.json"
+ANOMALY_METHODS = ("ewma", "mad")
+WEEK_HOURS = 168
+
+# 外れ具合（標準偏差の何倍か）の既定の3段階閾値
+DEFAULT_ANOMALY_THRESHOLDS = {"warning": 3.0, "alert": 4.0, "critical": 5.0}
+
+EWMA_ALPHA = 0.05  # 平均・分散の更新の反映率
+MAD_RATE = 0.1  # 中央値・MAD の1回の更新幅（ばらつきに対する割合）
+MAD_SCALE = 1.4826  # MAD を標準偏差に換算する係数（正規分布）
+# ばらつきの下限（ほぼ一定の区間での過敏な判定を防ぐ）。％ポイントの下限と中心に対する割合の大きい方
+MIN_SPREAD = 3.0
+RELATIVE_SPREAD = 0.1
+MIN_SAMPLES = 5  # 判定に使うまでに区間ごとに必要なサンプル数
+MIN_WEEKS = 3  # 判定に使うまでに区間ごとに必要な、サンプルのある週の数
+# 異常とみなす値の下限（％）の既定値（thresholds.anomaly.min_value 未指定の場合）
+DEFAULT_MIN_VALUE = 20.0
+CLIP_SIGMA = 5.0  # ベースラインの更新に使う値の外れ具合の上限（スパイクに引きずられないため）
+
+
+def _hour_of_week(timestamp: float) -> int:
+    """ローカル時刻の週の中の時間（月曜0時が0）"""
+    when = datetime.fromtimestamp(timestamp)
+    return when.weekday() * 24 + when.hour
+
+
+def _week_index(timestamp: float) -> int:
+    """ローカル時刻の週の通し番号（月曜始まり）"""
+    return (datetime.fromtimestamp(timestamp).toordinal() - 1) // 7
+
+
+def _new_buckets() -> List[List[float]]:
+    return [[0.0, 0.0, 0, 0, -1] for _ in range(WEEK_HOURS)]
+
+
+def _valid_buckets(buckets) -> bool:
+    return (
+        isinstance(buckets, list) and len(buckets) == WEEK_HOURS
+        and all(isinstance(bucket, list) and len(bucket) == 5 for bucket in buckets)
+    )
+
+
+def _spread_floor(center: float) -> float:
+    """区間の中心に応じたばらつきの下限"""
+    return max(MIN_SPREAD, RELATIVE_SPREAD * abs(center))
+
+
+def anomaly_score(bucket: List[float], value: float, method: str = "ewma") -> float:
+    """
+    区間のベースラインに対する外れ具合（標準偏差の何倍か、いつもより高い方が正）を返します。
+
+    Args:
+        bucket: [中心, ばらつき, サンプル数, ...]
+        value: 判定する値
+        method: "ewma" または "mad"
+
+    Returns:
+        float: 外れ具合
+    """
+    center, spread = bucket[0], bucket[1]
+    if method == "ewma":
+        sigma = math.sqrt(spread)
+    else:
+        sigma = MAD_SCALE * spread
+    return (value - center) / max(sigma, _spread_floor(center))
+
+
+def update_bucket(bucket: List[float], value: float, method: str = "ewma") -> List[float]:
+    """
+    区間のベースラインを1つの値で更新します（bucket の先頭3つの値をその場で更新）。
+
+    ewma は平均と分散を指数加重で、mad は中央値と MAD を符号による逐次近似で更新します。
+    いずれも外れ具合が CLIP_SIGMA を超える値は、その位置まで丸めてから反映します。
+
+    Args:
+        bucket: [中心, ばらつき, サンプル数, ...]
+        value: 値
+        method: "ewma" または "mad"
+
+    Returns:
+        list: 更新した bucket
+    """
+    center, spread, count = bucket[:3]
+    if count == 0:
+        bucket[:3] = [value, 0.0, 1]
+        return bucket
+
+    if method == "ewma":
+        limit = CLIP_SIGMA * max(math.sqrt(spread), _spread_floor(center))
+        diff = min(max(value - center, -limit), limit)
+        center += EWMA_ALPHA * diff
+        spread = (1 - EWMA_ALPHA) * (spread + EWMA_ALPHA * diff * diff)
+    else:
+        scale = max(MAD_SCALE * spread, _spread_floor(center))
+        value = min(max(value, center - CLIP_SIGMA * scale), center + CLIP_SIGMA * scale)
+        step = MAD_RATE * scale
+        if value != center:
+            center += step if value > center else -step
+        deviation = abs(value - center)
+        spread = max(spread + (MAD_RATE * scale if deviation > spread else -MAD_RATE * scale), 0.0)
+
+    bucket[:3] = [center, spread, count + 1]
+    return bucket
+
+
+class AnomalyDetector:
+    """
+    メトリクスごと・週の中の時間ごとのベースラインによる異常検知
+
+    observe() で値を判定してからベースラインを更新し、save() で状態を保存します。
+    """
+
+    def __init__(self, config: Optional[dict] = None, state_file: Optional[str] = None):
+        """
+        Args:
+            config: 正規化済みの異常検知の設定（thresholds.anomaly）
+            state_file: 状態の保存先（Noneの場合は ANOMALY_STATE_FILE）
+        """
+        config = config or {}
+        self.method = config.get("method", "ewma")
+        self.thresholds = {key: config.get(key, value) for key, value in DEFAULT_ANOMALY_THRESHOLDS.items()}
+        self.state_file = state_file or ANOMALY_STATE_FILE
+        self.metrics = self._load()
+
+    def _load(self) -> Dict[str, List[List[float]]]:
+        """保存済みの状態を読み込む（ない・壊れている・方法が違う場合は空、形式の違うメトリクスは学習し直す）"""
+        try:
+            state = storage.read_json(self.state_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to load anomaly state: %s", e)
+            return {}
+        if not isinstance(state, dict) or state.get("method") != self.method:
+            return {}
+        metrics = state.get("metrics")
+        if not isinstance(metrics, dict):
+            return {}
+        return {metric: buckets for metric, buckets in metrics.items() if _valid_buckets(buckets)}
+
+    def save(self) -> None:
+        """状態を保存する"""
+        try:
+            storage.write_json(
+                self.state_file,
+                {"method": self.method, "metrics": self.metrics},
+                separators=(",", ":")
+            )
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Failed to save anomaly state: %s", e)
+
+    def observe(
+        self,
+        metric: str,
+        value: float,
+        timestamp: Optional[float] = None
+    ) -> Tuple[Optional[ThresholdLevel], Dict[str, Any]]:
+        """
+        値を現在の区間のベースラインで判定してから、ベースラインを更新します。
+
+        いつもより低い値は異常として扱いません。
+        区間のサンプル数が MIN_SAMPLES 未満か、サンプルのある週が MIN_WEEKS 未満の間は判定しません。
+
+        Args:
+            metric: メトリクス名（cpu, mem, disk）
+            value: 値
+            timestamp: 値の時刻（Noneの場合は現在時刻）
+
+        Returns:
+            tuple: (閾値レベル, {"baseline": 区間の中心, "score": 外れ具合})
+                学習中の区間の場合は (None, {})
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        buckets = self.metrics.setdefault(metric, _new_buckets())
+        bucket = buckets[_hour_of_week(timestamp)]
+
+        level, info = None, {}
+        if bucket[2] >= MIN_SAMPLES and bucket[3] >= MIN_WEEKS:
+            score = anomaly_score(bucket, value, self.method)
+            level = determine_threshold_level(score, self.thresholds)
+            info = {"baseline": bucket[0], "score": score}
+
+        update_bucket(bucket, value, self.method)
+        week = _week_index(timestamp)
+        if bucket[4] != week:
+            bucket[3] += 1
+            bucket[4] = week
+        return level, info
@@ -0,0 +1,249 @@
+"""
+cgroup監視モジュール
+
+cgroup v2 の階層から systemd サービスやコンテナ単位のリソース使用量を収集します。
+
+各cgroupの cpu.stat・memory.current・io.stat を直接読むため、
+プロセスを1つずつ走査する必要がありません。CPU時間とI/Oバイト数の
+カウンタは状態ファイルに保存し、前回実行との差分から使用率を計算します。
+"""
+
+import fnmatch
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from komon import storage
+
+logger = logging.getLogger(__name__)
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+CGROUP_STATE_FILE = "data/state/cgroup_counters.json"
+
+# 監視対象のcgroup（ルートからの相対パスのパターン）
+DEFAULT_INCLUDE = [
+    "system.slice/*.service",
+    "system.slice/docker-*.scope",
+    "machine.slice/*",
+]
+
+# 前回カウンタを差分計算に使う最大経過時間（秒）
+CGROUP_SAMPLE_MAX_AGE = 3600
+
+
+def is_cgroup_v2(root: str = CGROUP_ROOT) -> bool:
+    """指定パスが cgroup v2（unified）階層かを判定"""
+    return os.path.exists(os.path.join(root, "cgroup.controllers"))
+
+
+def _read_file(path: str) -> Optional[str]:
+    """cgroupファイルを読み込む（存在しない・読めない場合は None）"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _read_cpu_usage_usec(cgroup_path: str) -> Optional[int]:
+    """cpu.stat の usage_usec を読み込む"""
+    text = _read_file(os.path.join(cgroup_path, "cpu.stat"))
+    if text is None:
+        return None
+    for line in text.splitlines():
+        key, _, value = line.partition(" ")
+        if key == "usage_usec":
+            return int(value)
+    return None
+
+
+def _read_int(path: str) -> Optional[int]:
+    """数値1つのcgroupファイルを読み込む（"max" は None）"""
+    text = _read_file(path)
+    if text is None:
+        return None
+    text = text.strip()
+    return int(text) if text.isdigit() else None
+
+
+def _read_io_bytes(cgroup_path: str) -> Optional[Dict[str, int]]:
+    """io.stat の rbytes / wbytes を全デバイス分合計する"""
+    text = _read_file(os.path.join(cgroup_path, "io.stat"))
+    if text is None:
+        return None
+    totals = {'rbytes': 0, 'wbytes': 0}
+    for line in text.splitlines():
+        for field in line.split()[1:]:
+            key, _, value = field.partition("=")
+            if key in totals and value.isdigit():
+                totals[key] += int(value)
+    return totals
+
+
+def _host_memory_total() -> int:
+    """ホストの物理メモリ量（バイト）"""
+    try:
+        return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError):
+        return 0
+
+
+class CgroupCollector:
+    """cgroup v2 のリソース使用量を収集するクラス"""
+    
+    def __init__(
+        self,
+        root: str = CGROUP_ROOT,
+        include: Optional[List[str]] = None,
+        state_file: str = CGROUP_STATE_FILE
+    ):
+        """
+        Args:
+            root: cgroup v2 のマウント位置
+            include: 監視対象cgroupのパターン（ルートからの相対パス、fnmatch形式）
+            state_file: カウンタの保存先
+        """
+        self.root = root
+        self.include = include if include is not None else list(DEFAULT_INCLUDE)
+        self.state_file = state_file
+        self.cpu_count = os.cpu_count() or 1
+        self.memory_total = _host_memory_total()
+    
+    def discover(self) -> List[str]:
+        """
+        監視対象のcgroupを探します。
+        
+        パターンの階層数までしか降りないため、階層全体は走査しません。
+        
+        Returns:
+            list: ルートからの相対パスのリスト
+        """
+        found = set()
+        for pattern in self.include:
+            parts = pattern.strip("/").split("/")
+            candidates = [""]
+            for part in parts:
+                next_candidates = []
+                for base in candidates:
+                    base_path = os.path.join(self.root, base)
+                    if not any(c in part for c in "*?["):
+                        if os.path.isdir(os.path.join(base_path, part)):
+                            next_candidates.append(os.path.join(base, part))
+                        continue
+                    try:
+                        with os.scandir(base_path) as entries:
+                            for entry in entries:
+                                if entry.is_dir(follow_symlinks=False) and fnmatch.fnmatch(entry.name, part):
+                                    next_candidates.append(os.path.join(base, entry.name))
+                    except OSError:
+                        continue
+                candidates = next_candidates
+            found.update(candidates)
+        return sorted(found)
+    
+    def collect(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        監視対象cgroupの使用量を収集します。
+        
+        Args:
+            now: 取得時刻（UNIX時間、テスト用）
+        
+        Returns:
+            list: cgroupごとの使用量
+                [{'name', 'path', 'cpu', 'mem', 'mem_bytes',
+                  'io_read_bps', 'io_write_bps'}, ...]
+                cpu / io_* は前回カウンタがない場合 None
+        """
+        if not is_cgroup_v2(self.root):
+            logger.debug("cgroup v2 hierarchy not found at %s", self.root)
+            return []
+        
+        if now is None:
+            now = time.time()
+        previous = self._load_counters()
+        elapsed = now - previous.get("timestamp", 0)
+        usable = 0 < elapsed <= CGROUP_SAMPLE_MAX_AGE
+        prev_counters = previous.get("cgroups", {}) if usable else {}
+        
+        results = []
+        counters = {}
+        for rel_path in self.discover():
+            path = os.path.join(self.root, rel_path)
+            usage_usec = _read_cpu_usage_usec(path)
+            if usage_usec is None:
+                # 走査中に削除されたcgroup
+                continue
+            io = _read_io_bytes(path)
+            mem_bytes = _read_int(os.path.join(path, "memory.current"))
+            mem_limit = _read_int(os.path.join(path, "memory.max")) or self.memory_total
+            
+            current = {'usage_usec': usage_usec}
+            if io is not None:
+                current.update(io)
+            counters[rel_path] = current
+            
+            entry = {
+                'name': os.path.basename(rel_path),
+                'path': rel_path,
+                'cpu': None,
+                'mem': round(mem_bytes / mem_limit * 100, 1) if mem_bytes is not None and mem_limit else None,
+                'mem_bytes': mem_bytes,
+                'io_read_bps': None,
+                'io_write_bps': None,
+            }
+            
+            prev = prev_counters.get(rel_path)
+            # サービス再起動などでカウンタが戻った場合は差分を使わない
+            if prev and usage_usec >= prev.get('usage_usec', 0):
+                cpu_seconds = (usage_usec - prev['usage_usec']) / 1_000_000
+                entry['cpu'] = round(min(100.0, cpu_seconds / elapsed / self.cpu_count * 100), 1)
+                if io is not None and 'rbytes' in prev:
+                    entry['io_read_bps'] = max(0.0, (io['rbytes'] - prev['rbytes']) / elapsed)
+                    entry['io_write_bps'] = max(0.0, (io['wbytes'] - prev['wbytes']) / elapsed)
+            
+            results.append(entry)
+        
+        self._save_counters(now, counters)
+        return results
+    
+    def _load_counters(self) -> dict:
+        """前回のカウンタを読み込む"""
+        try:
+            data = json.loads(storage.read_text(self.state_file))
+            return data if isinstance(data, dict) else {}
+        except (FileNotFoundError, json.JSONDecodeError, OSError):
+            return {}
+    
+    def _save_counters(self, timestamp: float, counters: dict):
+        """今回のカウンタを保存する"""
+        try:
+            storage.write_text(self.state_file, json.dumps({"timestamp": timestamp, "cgroups": counters}))
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Failed to save cgroup counters: %s", e)
+
+
+def collect_cgroup_usage(config: dict) -> List[Dict[str, Any]]:
+    """
+    設定に従ってcgroupごとの使用量を収集します。
+    
+    Args:
+        config: 設定辞書（cgroup_monitor セクションを参照）
+    
+    Returns:
+        list: cgroupごとの使用量（無効・非対応環境では空リスト）
+    """
+    cgroup_config = config.get("cgroup_monitor", {}) or {}
+    if not cgroup_config.get("enabled", False):
+        return []
+    
+    collector = CgroupCollector(
+        root=cgroup_config.get("root", CGROUP_ROOT),
+        include=cgroup_config.get("include"),
+    )
+    try:
+        return collector.collect()
+    except Exception as e:
+        logger.warning("Failed to collect cgroup usage: %s", e)
+        return []
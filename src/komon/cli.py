@@ -65,6 +65,7 @@ def main():
     # status コマンド
     status_parser = subparsers.add_parser("status", help="現在のステータスを表示")
     status_parser.add_argument("--verbose", action="store_true", help="詳細表示")
+    status_parser.add_argument("--timings", action="store_true", help="Komon自身の処理時間（ステージ別 p50/p95/最大）を表示")
     
     # advise コマンド
     advise_parser = subparsers.add_parser("advise", help="対話型アドバイザーを実行")
@@ -79,6 +80,31 @@ def main():
     # guide コマンド
     guide_parser = subparsers.add_parser("guide", help="ガイドメニューを表示")
     
+    # daemon コマンド
+    subparsers.add_parser("daemon", help="常駐モードで監視を定期実行")
+    
+    # migrate-history コマンド
+    migrate_parser = subparsers.add_parser("migrate-history", help="旧形式のCSV履歴を時系列ストアに取り込む")
+    migrate_parser.add_argument("--source", default="data/usage_history", help="CSV履歴のディレクトリ")
+    migrate_parser.add_argument("--remove", action="store_true", help="取り込んだCSVファイルを削除")
+    
+    # processes コマンド
+    processes_parser = subparsers.add_parser("processes", help="上位プロセスの履歴を表示")
+    processes_parser.add_argument("--metric", choices=["cpu", "mem"], default="cpu", help="対象のメトリクス")
+    processes_parser.add_argument("--days", type=int, default=7, help="対象の日数")
+    processes_parser.add_argument("--name", help="推移を表示するプロセス名")
+    processes_parser.add_argument("--limit", type=int, default=5, help="ランキングの表示件数")
+    
+    # export コマンド
+    export_parser = subparsers.add_parser("export", help="履歴・集計・通知履歴をCSV / JSON Linesで書き出す")
+    export_parser.add_argument("dataset", nargs="?", choices=["samples", "rollups", "notifications"], default="samples", help="書き出すデータ")
+    export_parser.add_argument("--format", choices=["csv", "jsonl"], default="csv", help="出力形式")
+    export_parser.add_argument("--output", "-o", help="出力先ファイル（省略時は標準出力）")
+    export_parser.add_argument("--since", help="期間の開始（例: 2025-11-20, 2025-11-20T09:00）")
+    export_parser.add_argument("--until", help="期間の終了（日付のみの場合はその日の終わりまで）")
+    export_parser.add_argument("--metric", action="append", help="出力するメトリクス（複数指定可）")
+    export_parser.add_argument("--tier", choices=["1h", "1d"], default="1h", help="集計段（rollups のみ）")
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -93,8 +119,12 @@ def main():
         from komon.commands.initial import run_initial_setup
         run_initial_setup(config_dir)
     elif args.command == "status":
-        from komon.commands.status import run_status
-        run_status(config_dir)
+        if args.timings:
+            from komon.commands.status import run_timings
+            run_timings()
+        else:
+            from komon.commands.status import run_status
+            run_status(config_dir)
     elif args.command == "advise":
         from komon.commands.advise import run_advise
         
@@ -122,6 +152,27 @@ def main():
     elif args.command == "guide":
         from komon.commands.guide import run_guide
         run_guide(config_dir)
+    elif args.command == "daemon":
+        from komon.commands.daemon import run_daemon
+        run_daemon(config_dir)
+    elif args.command == "migrate-history":
+        from komon.commands.migrate_history import run_migrate_history
+        run_migrate_history(args.source, remove=args.remove, config_dir=config_dir)
+    elif args.command == "processes":
+        from komon.commands.processes import run_processes
+        run_processes(args.metric, days=args.days, name=args.name, limit=args.limit, config_dir=config_dir)
+    elif args.command == "export":
+        from komon.commands.export import run_export
+        run_export(
+            args.dataset,
+            fmt=args.format,
+            output=args.output,
+            since=args.since,
+            until=args.until,
+            metrics=args.metric,
+            tier=args.tier,
+            config_dir=config_dir
+        )
 
 
 def print_usage():
@@ -132,8 +183,13 @@ Komon - 軽量アドバイザー型SOAR風監視ツール
 使用方法:
   komon initial       初期設定を実行
   komon status        現在のステータスを表示
+  komon status --timings  Komon自身の処理時間を表示
   komon advise        対話型アドバイザーを実行
   komon guide         ガイドメニューを表示
+  komon daemon        常駐モードで監視を定期実行
+  komon migrate-history  旧形式のCSV履歴を時系列ストアに取り込む
+  komon processes     上位プロセスの履歴を表示
+  komon export        履歴・集計・通知履歴をCSV / JSON Linesで書き出す
   komon --version     バージョン情報を表示
 
 詳細は docs/README.md を参照してください。
@@ -14,16 +14,18 @@ import time
 import logging
 from pathlib import Path
 
-import yaml
 import psutil
 from komon.analyzer import analyze_usage, load_thresholds
-from komon.monitor import collect_detailed_resource_usage
+from komon.monitor import collect_detailed_resource_usage, get_collector_backend, ProcessSnapshot
 from komon.log_trends import analyze_log_trend, detect_repeated_spikes
 from komon.notification_history import load_notification_history, format_notification
 from komon.duplicate_detector import detect_duplicate_processes
 from komon.long_running_detector import detect_long_running_processes
 from komon.os_detection import get_os_detector
 from komon.net import check_ping, check_http, NetworkStateManager
+from komon.timeseries import get_timeseries_store
+from komon.timings import span, timed_run
+from komon.commands.config import load_config
 
 logger = logging.getLogger(__name__)
 
@@ -363,7 +365,7 @@ def advise_process_breakdown(usage: dict):
             print(f"- {proc['name']}: {proc['mem']} MB")
 
 
-def advise_process_details(thresholds: dict, config: dict = None):
+def advise_process_details(thresholds: dict, config: dict = None, snapshot: ProcessSnapshot = None):
     """
     高負荷プロセスの詳細情報を表示します。
     
@@ -382,7 +384,10 @@ def advise_process_details(thresholds: dict, config: dict = None):
             from komon.contextual_advisor import get_contextual_advice
             
             # CPU使用率でコンテキストアドバイスを取得
-            result = get_contextual_advice("cpu", config, contextual_config.get("advice_level", "normal"))
+            result = get_contextual_advice(
+                "cpu", config, contextual_config.get("advice_level", "normal"),
+                snapshot=snapshot
+            )
             
             if result["top_processes"]:
                 print(result["formatted_message"])
@@ -423,7 +428,7 @@ def advise_process_details(thresholds: dict, config: dict = None):
         print("→ 現在、高負荷なプロセスは検出されていません。")
 
 
-def advise_duplicate_processes(config):
+def advise_duplicate_processes(config, snapshot: ProcessSnapshot = None):
     """
     多重実行プロセスの警告を表示します。
     """
@@ -438,7 +443,7 @@ def advise_duplicate_processes(config):
         return
     
     try:
-        duplicates = detect_duplicate_processes(threshold=threshold)
+        duplicates = detect_duplicate_processes(threshold=threshold, snapshot=snapshot)
         
         if not duplicates:
             print("→ 多重実行プロセスは検出されませんでした。")
@@ -470,7 +475,7 @@ def advise_duplicate_processes(config):
         print(f"⚠️ 多重実行プロセスの検出に失敗しました: {e}")
 
 
-def advise_long_running_processes(config):
+def advise_long_running_processes(config, snapshot: ProcessSnapshot = None):
     """
     長時間実行プロセスの警告を表示します。
     """
@@ -489,7 +494,8 @@ def advise_long_running_processes(config):
     try:
         long_running = detect_long_running_processes(
             threshold_seconds=threshold_seconds,
-            target_extensions=target_extensions
+            target_extensions=target_extensions,
+            snapshot=snapshot
         )
         
         if not long_running:
@@ -547,27 +553,41 @@ def advise_disk_prediction():
             load_disk_history,
             calculate_daily_average,
             predict_disk_trend,
+            predict_from_state,
+            predict_mounts,
             detect_rapid_change,
+            format_mount_forecasts,
             format_prediction_message
         )
         
-        # データ読み込み
-        history = load_disk_history(days=7)
-        if len(history) < 2:
-            print("→ データが不足しています。7日分のデータが必要です。")
-            return
-        
-        # 日次平均を計算
-        daily_data = calculate_daily_average(history)
-        
-        # 予測計算
-        prediction = predict_disk_trend(daily_data)
-        rapid_change = detect_rapid_change(daily_data)
+        # 追記時に更新している回帰の十分統計量があれば、履歴を読まずに予測
+        result = predict_from_state(days=7)
+        if result is not None:
+            prediction, rapid_change = result
+        else:
+            # データ読み込み
+            history = load_disk_history(days=7)
+            if len(history) < 2:
+                print("→ データが不足しています。7日分のデータが必要です。")
+                return
+            
+            # 日次平均を計算
+            daily_data = calculate_daily_average(history)
+            
+            # 予測計算
+            prediction = predict_disk_trend(daily_data)
+            rapid_change = detect_rapid_change(daily_data)
         
         # メッセージ生成と表示
         message = format_prediction_message(prediction, rapid_change)
         print(message)
         
+        # マウントごとの予測（すべてのマウントをまとめて計算）
+        mounts = predict_mounts()
+        if mounts:
+            print("\n🗂 マウントごとの予測")
+            print(format_mount_forecasts(mounts))
+        
     except Exception as e:
         print(f"⚠️ 予測計算中にエラーが発生しました: {e}")
 
@@ -666,32 +686,7 @@ def advise_notification_history(limit: int = None):
         print(f"⚠️ 通知履歴の読み込みに失敗: {e}")
 
 
-def load_config(config_dir: Path):
-    """設定ファイルを読み込む"""
-    config_file = config_dir / "settings.yml"
-    
-    try:
-        with open(config_file, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f)
-    except FileNotFoundError:
-        print("❌ settings.yml が見つかりません")
-        print("")
-        print("初回セットアップを実行してください：")
-        print("  komon initial")
-        print("")
-        print("または、サンプルファイルをコピー：")
-        print("  cp config/settings.yml.sample settings.yml")
-        raise SystemExit(1)
-    except yaml.YAMLError as e:
-        print(f"❌ settings.yml の形式が不正です: {e}")
-        print("")
-        print("config/settings.yml.sampleを参考に修正してください")
-        raise SystemExit(1)
-    except Exception as e:
-        print(f"❌ 予期しないエラー: {e}")
-        raise SystemExit(1)
-
-
+@timed_run("advise")
 def run_advise(config_dir: Path, history_limit: int = None, verbose: bool = False, section: str = None, net_mode: str = None):
     """
     アドバイス機能のメイン実行関数
@@ -708,12 +703,17 @@ def run_advise(config_dir: Path, history_limit: int = None, verbose: bool = Fals
     # 設定ファイルを読み込み
     config = load_config(config_dir)
 
-    usage = collect_detailed_resource_usage()
+    # プロセステーブルは1回だけ走査し、各セクションで共有する
+    backend = get_collector_backend(config)
+    get_timeseries_store(config)
+    snapshot = ProcessSnapshot.take(backend)
+    group_by = (config.get("output") or {}).get("process_group_by", "name")
+    usage = collect_detailed_resource_usage(snapshot=snapshot, backend=backend, group_by=group_by)
     thresholds = load_thresholds(config)
     alerts = analyze_usage(usage, thresholds)
     
     # 設定ファイルからデフォルト値を取得
-    output_config = config.get("output", {})
+    output_config = config.get("output") or {}
     if history_limit is None:
         history_limit = output_config.get("history_limit", 5)
     
@@ -745,17 +745,18 @@ def run_advise(config_dir: Path, history_limit: int = None, verbose: bool = Fals
             advise_disk_prediction()
             return
         elif section == "process":
-            advise_duplicate_processes(config)
-            advise_long_running_processes(config)
+            advise_duplicate_processes(config, snapshot)
+            advise_long_running_processes(config, snapshot)
             if verbose:
                 advise_process_breakdown(usage)
-            advise_process_details(thresholds, config)
+            advise_process_details(thresholds, config, snapshot)
             return
         elif section == "history":
             advise_notification_history(limit=history_limit)
             return
         elif section == "network":
-            advise_network_check(config)
+            with span("network_check"):
+                advise_network_check(config)
             return
         else:
             print(f"❌ 不明なセクション: {section}")
@@ -795,11 +796,11 @@ def run_advise(config_dir: Path, history_limit: int = None, verbose: bool = Fals
         advise_disk_prediction()
     
     # 6. プロセス関連
-    advise_duplicate_processes(config)
-    advise_long_running_processes(config)
+    advise_duplicate_processes(config, snapshot)
+    advise_long_running_processes(config, snapshot)
     if verbose:
         advise_process_breakdown(usage)
-        advise_process_details(thresholds, config)
+        advise_process_details(thresholds, config, snapshot)
     
     # 7. ネットワークチェック（net_modeに応じて）
     if net_mode:
@@ -824,7 +825,8 @@ def run_advise(config_dir: Path, history_limit: int = None, verbose: bool = Fals
         # 一時的な設定で実行
         temp_config = config.copy()
         temp_config["network_check"] = network_config
-        advise_network_check(temp_config)
+        with span("network_check"):
+            advise_network_check(temp_config)
     
     # 8. 通知履歴を表示
     advise_notification_history(limit=history_limit)
@@ -0,0 +1,47 @@
+"""
+Settings loader for commands
+
+各コマンドで共通の settings.yml の読み込み処理を提供します。
+"""
+
+from pathlib import Path
+from typing import Optional
+
+import yaml
+
+
+def load_config(config_dir: Path):
+    """設定ファイルを読み込む"""
+    config_file = config_dir / "settings.yml"
+
+    try:
+        with open(config_file, "r", encoding="utf-8") as f:
+            return yaml.safe_load(f)
+    except FileNotFoundError:
+        print("❌ settings.yml が見つかりません")
+        print("")
+        print("初回セットアップを実行してください：")
+        print("  komon initial")
+        print("")
+        print("または、サンプルファイルをコピー：")
+        print("  cp config/settings.yml.sample settings.yml")
+        raise SystemExit(1)
+    except yaml.YAMLError as e:
+        print(f"❌ settings.yml の形式が不正です: {e}")
+        print("")
+        print("config/settings.yml.sampleを参考に修正してください")
+        raise SystemExit(1)
+    except Exception as e:
+        print(f"❌ 予期しないエラー: {e}")
+        raise SystemExit(1)
+
+
+def load_optional_config(config_dir: Optional[Path]) -> Optional[dict]:
+    """settings.yml を読み込む（ない・読めない場合は None で既定の設定を使う）"""
+    if config_dir is None:
+        return None
+    try:
+        with open(config_dir / "settings.yml", "r", encoding="utf-8") as f:
+            return yaml.safe_load(f) or None
+    except (OSError, yaml.YAMLError):
+        return None
@@ -0,0 +1,212 @@
+"""
+Daemon command implementation
+
+常駐モード（komon daemon）の実装を提供します。
+
+cronで個別に起動していた scripts/main.py・main_log_monitor.py・main_log_trend.py の
+処理を1つのプロセスで定期実行します。設定・通知頻度制御の履歴・ログ読み取り位置・
+HTTPセッションをメモリに保持するため、実行ごとの起動コストがかかりません。
+"""
+
+import logging
+import os
+import signal
+from pathlib import Path
+
+import requests
+
+from komon.analyzer import analyze_usage_with_levels
+from komon.cgroup_monitor import CgroupCollector, CGROUP_ROOT
+from komon.commands.config import load_config
+from komon.history import rotate_history, save_current_usage
+from komon.jobs import check_log_trends, check_logs, handle_alerts
+from komon.log_watcher import LogWatcher
+from komon.monitor import collect_detailed_resource_usage, get_collector_backend
+from komon.notification import NotificationThrottle
+from komon.scheduler import Scheduler
+from komon.settings_validator import validate_threshold_config, ValidationError
+from komon.timeseries import get_timeseries_store
+from komon.timings import span, timed_run
+from komon.webhook_notifier import set_http_session
+
+logger = logging.getLogger(__name__)
+
+# ジョブごとのデフォルト実行間隔（秒）。従来のcron設定例と同じ間隔
+DEFAULT_INTERVALS = {
+    "resource": 300,
+    "log_monitor": 300,
+    "log_trend": 86400,
+}
+
+
+def get_job_intervals(config: dict) -> dict:
+    """
+    settings.yml の daemon セクションから各ジョブの実行間隔を取得
+
+    Args:
+        config: 設定辞書
+
+    Returns:
+        dict: {ジョブ名: 実行間隔（秒）}、0以下のジョブは無効
+    """
+    daemon_config = config.get("daemon", {}) or {}
+    intervals = {}
+    for job, default in DEFAULT_INTERVALS.items():
+        value = daemon_config.get(f"{job}_interval", default)
+        try:
+            intervals[job] = float(value)
+        except (TypeError, ValueError):
+            logger.warning("Invalid daemon.%s_interval: %s, using %s", job, value, default)
+            intervals[job] = float(default)
+    return intervals
+
+
+class KomonDaemon:
+    """常駐モードで監視ジョブを実行するクラス"""
+
+    def __init__(self, config_dir: Path, config: dict):
+        """
+        Args:
+            config_dir: 設定ディレクトリのパス
+            config: 設定辞書
+        """
+        self.config_dir = config_dir
+        self.scheduler = Scheduler()
+        self.http_session = requests.Session()
+        self.log_watcher = LogWatcher()
+        self._reload_requested = False
+        self.apply_config(config)
+
+    def apply_config(self, config: dict):
+        """設定を反映します（起動時とSIGHUP受信時）"""
+        self.thresholds = validate_threshold_config(config)
+        self.config = config
+        self.backend = get_collector_backend(config)
+        get_timeseries_store(config)
+        self.throttle = NotificationThrottle(config.get("throttle", {}), cache_history=True)
+
+        cgroup_config = config.get("cgroup_monitor", {}) or {}
+        self.cgroup_collector = None
+        if cgroup_config.get("enabled", False):
+            self.cgroup_collector = CgroupCollector(
+                root=cgroup_config.get("root", CGROUP_ROOT),
+                include=cgroup_config.get("include"),
+            )
+
+    def reload_config(self):
+        """
+        設定ファイルを再読み込みし、新しい間隔でジョブを登録し直します。
+        失敗した場合は現在の設定を維持します。
+        """
+        try:
+            self.apply_config(load_config(self.config_dir))
+        except (SystemExit, ValidationError) as e:
+            print(f"⚠️ 設定の再読み込みに失敗したため、現在の設定で継続します: {e}")
+            return
+        self.build_scheduler()
+        print("🔄 設定を再読み込みしました")
+
+    def request_reload(self):
+        """
+        設定の再読み込みを予約します（SIGHUPのシグナルハンドラ）。
+
+        ハンドラではフラグを立ててスケジューラーを起こすだけにし、
+        実際の再読み込みはジョブの実行の合間に reload_if_requested() で行います。
+        """
+        self._reload_requested = True
+        self.scheduler.wake()
+
+    def reload_if_requested(self):
+        """再読み込みが予約されていれば実行します（ジョブの実行の合間に呼ばれる）"""
+        if not self._reload_requested:
+            return
+        self._reload_requested = False
+        self.reload_config()
+
+    def build_scheduler(self) -> Scheduler:
+        """
+        設定された間隔で各ジョブを登録します。
+
+        登録済みのジョブは新しい間隔で登録し直し、次回実行予定時刻は
+        これまでの予定と新しい間隔での予定の早い方を引き継ぎます。
+        """
+        jobs = {
+            "resource": self.run_resource_check,
+            "log_monitor": self.run_log_monitor,
+            "log_trend": self.run_log_trend,
+        }
+        for name, interval in get_job_intervals(self.config).items():
+            previous = self.scheduler.remove_job(name)
+            if interval <= 0:
+                print(f"ℹ️ {name} ジョブは無効です")
+                continue
+            # ジョブごとの所要時間を "<ジョブ名>.total" として記録する
+            job = self.scheduler.add_job(
+                name, interval, timed_run(name)(jobs[name]), run_immediately=previous is None
+            )
+            if previous is not None:
+                job.next_run = min(job.next_run, previous.next_run)
+        return self.scheduler
+
+    def run(self):
+        """シグナルで停止されるまでジョブを実行し続けます。"""
+        self.build_scheduler()
+        set_http_session(self.http_session)
+
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.scheduler.stop())
+        signal.signal(signal.SIGINT, lambda signum, frame: self.scheduler.stop())
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, lambda signum, frame: self.request_reload())
+
+        try:
+            self.scheduler.run_forever(between_ticks=self.reload_if_requested)
+        finally:
+            set_http_session(None)
+            self.http_session.close()
+            print("👋 Komon デーモンを停止しました")
+
+    def run_resource_check(self):
+        """リソース監視ジョブ（scripts/main.py 相当）"""
+        group_by = (self.config.get("output") or {}).get("process_group_by", "name")
+        usage = collect_detailed_resource_usage(backend=self.backend, group_by=group_by)
+        if self.cgroup_collector is not None:
+            usage["cgroups"] = self.cgroup_collector.collect()
+        alerts, levels = analyze_usage_with_levels(usage, self.thresholds)
+
+        with span("history_write"):
+            rotate_history()
+            save_current_usage(usage)
+
+        if alerts:
+            handle_alerts(alerts, levels, self.config, usage, throttle=self.throttle)
+
+    def run_log_monitor(self):
+        """ログ急増監視ジョブ（scripts/main_log_monitor.py 相当）"""
+        check_logs(self.config, self.log_watcher)
+
+    def run_log_trend(self):
+        """ログ傾向分析ジョブ（scripts/main_log_trend.py 相当）"""
+        check_log_trends(self.config)
+
+
+def run_daemon(config_dir: Path):
+    """
+    常駐モードのメイン実行関数
+
+    Args:
+        config_dir: 設定ディレクトリのパス
+    """
+    config = load_config(config_dir)
+
+    # data/ 配下の状態ファイルは設定ディレクトリ基準で扱う
+    os.chdir(config_dir)
+
+    try:
+        daemon = KomonDaemon(config_dir, config)
+    except ValidationError as e:
+        print(f"❌ 設定エラー: {e}")
+        raise SystemExit(1)
+
+    intervals = ", ".join(f"{name}={int(sec)}s" for name, sec in get_job_intervals(config).items())
+    print(f"🛡️ Komon デーモンを開始しました（{intervals}）")
+    daemon.run()
@@ -0,0 +1,93 @@
+"""
+Export command implementation
+
+使用履歴のサンプル・集計段・通知履歴を CSV / JSON Lines で
+標準出力またはファイルに書き出すコマンドを提供します。
+"""
+
+import sys
+from datetime import datetime, time
+from pathlib import Path
+from typing import List, Optional
+
+from komon.commands.config import load_optional_config
+from komon.export import (
+    NOTIFICATION_FIELDS,
+    iter_notifications,
+    iter_rollups,
+    iter_samples,
+    rollup_fields,
+    sample_fields,
+    write_rows,
+)
+from komon.timeseries import get_timeseries_store
+
+
+def parse_time(value: Optional[str], default: datetime, end: bool = False) -> datetime:
+    """
+    --since / --until の値を日時に変換します。
+
+    日付のみ（YYYY-MM-DD）の場合、end が True ならその日の終わり、それ以外はその日の始まりとします。
+    タイムゾーン付き（+09:00 や Z）の場合は、履歴と比較できるようローカル時刻に変換します。
+
+    Raises:
+        ValueError: 日時として解釈できない場合
+    """
+    if not value:
+        return default
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    if end and len(value) == 10:
+        return datetime.combine(parsed.date(), time.max)
+    return parsed
+
+
+def run_export(
+    dataset: str = "samples",
+    fmt: str = "csv",
+    output: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    metrics: Optional[List[str]] = None,
+    tier: str = "1h",
+    config_dir: Optional[Path] = None
+):
+    """
+    エクスポートのメイン実行関数
+
+    Args:
+        dataset: "samples" / "rollups" / "notifications"
+        fmt: "csv" または "jsonl"
+        output: 出力先ファイル（Noneまたは "-" の場合は標準出力）
+        since: 期間の開始（ISO形式、Noneの場合は最初から）
+        until: 期間の終了（ISO形式、Noneの場合は現在まで）
+        metrics: 出力するメトリクス（通知は metric_type で絞り込み）
+        tier: 集計段（rollups のみ）
+        config_dir: 設定ディレクトリのパス（history.storage_engine の取得用）
+    """
+    try:
+        start = parse_time(since, datetime.fromtimestamp(0))
+        end = parse_time(until, datetime.now(), end=True)
+        if dataset == "notifications":
+            fields = NOTIFICATION_FIELDS
+            rows = iter_notifications(start, end, metrics)
+        else:
+            store = get_timeseries_store(load_optional_config(config_dir))
+            if dataset == "rollups":
+                fields = rollup_fields(metrics)
+                rows = iter_rollups(tier, start, end, metrics, store=store)
+            else:
+                fields = sample_fields(metrics)
+                rows = iter_samples(start, end, metrics, store=store)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        raise SystemExit(1)
+
+    if output is None or output == "-":
+        write_rows(rows, fields, sys.stdout, fmt)
+        return
+
+    with open(output, "w", encoding="utf-8", newline="") as f:
+        count = write_rows(rows, fields, f, fmt)
+    print(f"✅ {count}件を書き出しました: {output}")
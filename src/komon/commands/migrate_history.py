@@ -0,0 +1,41 @@
+"""
+Migrate-history command implementation
+
+旧形式のCSV履歴（data/usage_history/usage_*.csv）を
+時系列ストア（data/metrics）に取り込むコマンドを提供します。
+"""
+
+import os
+from pathlib import Path
+from typing import Optional
+
+from komon.commands.config import load_optional_config
+from komon.history import LEGACY_HISTORY_DIR, migrate_csv_history
+from komon.timeseries import get_timeseries_store
+
+
+def run_migrate_history(source: str = LEGACY_HISTORY_DIR, remove: bool = False, config_dir: Optional[Path] = None):
+    """
+    CSV履歴の移行のメイン実行関数
+    
+    Args:
+        source: CSV履歴のディレクトリ
+        remove: 取り込みに成功したCSVを削除するか
+        config_dir: 設定ディレクトリのパス（history.storage_engine の取得用）
+    """
+    if not os.path.isdir(source):
+        print(f"ℹ️ CSV履歴が見つかりません: {source}")
+        return
+    
+    store = get_timeseries_store(load_optional_config(config_dir))
+    print(f"📦 CSV履歴を取り込みます: {source} → {store.root}")
+    
+    result = migrate_csv_history(source, store=store, remove=remove)
+    
+    print(f"✅ {result['imported']}件のサンプルを取り込みました（{result['days']}日分）")
+    if result['skipped']:
+        print(f"⚠️ 読み込めなかったファイル: {result['skipped']}件")
+    if remove:
+        print("🗑️ 取り込んだCSVファイルを削除しました")
+    else:
+        print("ℹ️ CSVファイルは残しています（削除する場合は --remove を指定）")
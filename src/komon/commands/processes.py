@@ -0,0 +1,74 @@
+"""
+Processes command implementation
+
+上位プロセスの履歴（期間内に上位に入った回数が多いプロセス・プロセスごとの推移）を
+表示するコマンドを提供します。
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from komon.commands.config import load_optional_config
+from komon.timeseries import get_timeseries_store
+
+METRIC_LABELS = {"cpu": "CPU", "mem": "メモリ"}
+
+
+def format_value(metric: str, value: float) -> str:
+    """CPUは使用率、メモリは使用量（MB / GB）として整形"""
+    if metric == "cpu":
+        return f"{value:.1f}%"
+    if value >= 1024:
+        return f"{value / 1024:.1f} GB"
+    return f"{value:.1f}MB"
+
+
+def run_processes(
+    metric: str = "cpu",
+    days: int = 7,
+    name: Optional[str] = None,
+    limit: int = 5,
+    config_dir: Optional[Path] = None
+):
+    """
+    上位プロセスの履歴表示のメイン実行関数
+
+    Args:
+        metric: "cpu" または "mem"
+        days: 対象の日数
+        name: 推移を表示するプロセス名（Noneの場合は上位に入った回数のランキング）
+        limit: ランキングの表示件数
+        config_dir: 設定ディレクトリのパス（history.storage_engine の取得用）
+    """
+    store = get_timeseries_store(load_optional_config(config_dir))
+    end = datetime.now()
+    start = end - timedelta(days=days)
+    label = METRIC_LABELS[metric]
+
+    if name is None:
+        ranking = store.top_processes(metric, start, end, limit=limit)
+        print(f"📊 過去{days}日間に{label}上位に入った回数が多いプロセス")
+        if not ranking:
+            print("ℹ️ 上位プロセスの履歴がありません")
+            return
+        for rank, entry in enumerate(ranking, start=1):
+            print(
+                f"  {rank}. {entry['name']}: {entry['samples']}回"
+                f"（平均 {format_value(metric, entry['avg'])} / 最大 {format_value(metric, entry['peak'])}）"
+            )
+        return
+
+    tier = "1h" if days <= 1 else "1d"
+    trend = store.process_trend(name, metric, start, end, tier=tier)
+    print(f"📈 {name} の{label}の推移（過去{days}日間）")
+    if not trend:
+        print(f"ℹ️ {name} が上位に入った履歴がありません")
+        return
+    time_format = "%m/%d %H:00" if tier == "1h" else "%Y-%m-%d"
+    for bucket in trend:
+        print(
+            f"  {datetime.fromtimestamp(bucket['start']).strftime(time_format)}"
+            f"  平均 {format_value(metric, bucket['avg'])} / 最大 {format_value(metric, bucket['peak'])}"
+            f"（{bucket['samples']}回）"
+        )
@@ -4,36 +4,12 @@ Status command implementation
 システムステータス表示コマンドの実装を提供します。
 """
 
-import yaml
 from pathlib import Path
-from komon.monitor import collect_resource_usage
+from komon.monitor import collect_resource_usage, get_collector_backend
+from komon.disk_monitor import collect_disk_usage
 from komon.analyzer import load_thresholds
-
-
-def load_config(config_dir: Path):
-    """設定ファイルを読み込む"""
-    config_file = config_dir / "settings.yml"
-    
-    try:
-        with open(config_file, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f)
-    except FileNotFoundError:
-        print("❌ settings.yml が見つかりません")
-        print("")
-        print("初回セットアップを実行してください：")
-        print("  komon initial")
-        print("")
-        print("または、サンプルファイルをコピー：")
-        print("  cp config/settings.yml.sample settings.yml")
-        raise SystemExit(1)
-    except yaml.YAMLError as e:
-        print(f"❌ settings.yml の形式が不正です: {e}")
-        print("")
-        print("config/settings.yml.sampleを参考に修正してください")
-        raise SystemExit(1)
-    except Exception as e:
-        print(f"❌ 予期しないエラー: {e}")
-        raise SystemExit(1)
+from komon.commands.config import load_config
+from komon.timings import summarize_timings, TIMING_RETENTION_DAYS
 
 
 def run_status(config_dir: Path):
@@ -46,7 +22,7 @@ def run_status(config_dir: Path):
     print("📊 Komon ステータス")
 
     config = load_config(config_dir)
-    usage = collect_resource_usage()
+    usage = collect_resource_usage(get_collector_backend(config))
     thresholds = load_thresholds(config)
 
     print("\n【リソース使用率】")
@@ -55,6 +31,13 @@ def run_status(config_dir: Path):
         th = thresholds.get(key)
         print(f" - {key.upper()}: {val:.1f}%（閾値: {th}％）")
 
+    disks = collect_disk_usage()
+    if disks:
+        print("\n【マウント別ディスク使用率】")
+        for disk in disks:
+            print(f" - {disk['mountpoint']}: {disk['percent']:.1f}%"
+                  f"（inode: {disk['inodes_percent']:.1f}%、{disk['fstype']}）")
+
     print("\n【通知設定】")
     notifications = config.get("notifications", {})
     slack = notifications.get("slack", {}).get("enabled", False)
@@ -67,4 +50,31 @@ def run_status(config_dir: Path):
     if not logs:
         print(" - 監視対象なし")
     for log, enabled in logs.items():
-        print(f" - {log}: {'✅ 有効' if enabled else '❌ 無効'}")
\ No newline at end of file
+        print(f" - {log}: {'✅ 有効' if enabled else '❌ 無効'}")
+
+
+def run_timings():
+    """
+    Komon 自身の処理時間（ステージ別の p50/p95/最大値）を表示
+    
+    data/state/timings.json に記録された直近の実行分を集計します。
+    """
+    print(f"⏱️ Komon 処理時間（直近{TIMING_RETENTION_DAYS}日）")
+    
+    summary = summarize_timings()
+    if not summary:
+        print("\n計測データがありません（komon advise や scripts/main.py の実行後に記録されます）")
+        return
+    
+    print("\n【ステージ別処理時間】")
+    for name in sorted(summary):
+        stats = summary[name]
+        print(f" - {name}: p50 {_format_ms(stats['p50'])} / p95 {_format_ms(stats['p95'])}"
+              f" / 最大 {_format_ms(stats['max'])}（{stats['count']}回）")
+
+
+def _format_ms(value: float) -> str:
+    """ミリ秒を表示用に整形（1秒以上は秒単位）"""
+    if value >= 1000:
+        return f"{value / 1000:.2f}s"
+    return f"{value:.1f}ms"
@@ -5,8 +5,9 @@
 """
 
 import logging
-import psutil
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Optional
+
+from .monitor import ProcessSnapshot
 
 logger = logging.getLogger(__name__)
 
@@ -43,7 +44,8 @@ DEFAULT_PATTERNS = {
 def get_contextual_advice(
     metric_type: str,
     config: Dict[str, Any],
-    advice_level: str = "normal"
+    advice_level: str = "normal",
+    snapshot: Optional[ProcessSnapshot] = None
 ) -> Dict[str, Any]:
     """
     コンテキストに応じた具体的アドバイスを生成
@@ -52,6 +54,7 @@ def get_contextual_advice(
         metric_type: メトリクスタイプ（"cpu" または "memory"）
         config: 設定ファイルの内容
         advice_level: 詳細度（"minimal", "normal", "detailed"）
+        snapshot: 共有するプロセススナップショット（Noneの場合は新規に取得）
     
     Returns:
         {
@@ -71,7 +74,7 @@ def get_contextual_advice(
     patterns = contextual_config.get("patterns", DEFAULT_PATTERNS)
     
     # 上位プロセスを取得
-    processes = _get_top_processes(metric_type, top_count)
+    processes = _get_top_processes(metric_type, top_count, snapshot)
     
     # 各プロセスにパターンマッチングを適用
     for process in processes:
@@ -92,13 +95,18 @@ def get_contextual_advice(
     }
 
 
-def _get_top_processes(metric_type: str, count: int = 3) -> List[Dict[str, Any]]:
+def _get_top_processes(
+    metric_type: str,
+    count: int = 3,
+    snapshot: Optional[ProcessSnapshot] = None
+) -> List[Dict[str, Any]]:
     """
     上位プロセスを取得
     
     Args:
         metric_type: "cpu" または "memory"
         count: 取得件数
+        snapshot: 共有するプロセススナップショット（Noneの場合は新規に取得）
     
     Returns:
         プロセス情報のリスト
@@ -106,73 +114,36 @@ def _get_top_processes(metric_type: str, count: int = 3) -> List[Dict[str, Any]]
     processes = []
     
     try:
-        # 第1段階: 全プロセスの情報を高速に取得（interval=0）
-        for proc in psutil.process_iter(['name', 'pid', 'memory_percent', 'cmdline']):
-            try:
-                info = proc.info
-                
-                # CPU使用率は一旦0で取得（高速化のため）
-                memory_percent = info.get('memory_percent', 0.0)
-                
-                # コマンドラインを文字列に変換
-                cmdline = info.get('cmdline', [])
-                cmdline_str = ' '.join(cmdline) if cmdline else ''
-                
-                processes.append({
-                    "name": info.get('name', 'unknown'),
-                    "pid": info.get('pid', 0),
-                    "proc": proc,  # 後で再測定するために保持
-                    "cpu_percent": 0.0,  # 後で更新
-                    "memory_percent": memory_percent,
-                    "cmdline": cmdline_str
-                })
-                
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                logger.debug("Skipping process during initial scan")
-                continue
-            except Exception as e:
-                logger.warning("Failed to get process info: %s", e)
-                continue
+        # 第1段階: スナップショットから全プロセスの情報を取得
+        if snapshot is None:
+            snapshot = ProcessSnapshot.take()
+        
+        for info in snapshot:
+            # コマンドラインを文字列に変換
+            cmdline = info.get('cmdline', [])
+            cmdline_str = ' '.join(cmdline) if cmdline else ''
+            
+            processes.append({
+                "name": info.get('name') or 'unknown',
+                "pid": info.get('pid') or 0,
+                "cpu_percent": info.get('cpu_percent', 0.0),
+                "memory_percent": info.get('memory_percent', 0.0),
+                "cmdline": cmdline_str
+            })
     
     except Exception as e:
         logger.error("Failed to iterate processes: %s", e)
         return []
     
-    # 第2段階: メトリクスタイプに応じて処理
+    # 第2段階: メトリクスタイプに応じてソート
+    # CPU使用率はスナップショットがキャッシュとの差分で算出済みのため、再測定は不要
     if metric_type == "cpu":
-        # CPU使用率の場合、上位候補を多めに取得してから再測定
-        # メモリ使用率でソートして上位20件を取得（CPU使用率が高いプロセスはメモリも使う傾向）
-        processes.sort(key=lambda p: p["memory_percent"], reverse=True)
-        top_candidates = processes[:min(20, len(processes))]
-        
-        # 上位候補のCPU使用率を測定
-        for p in top_candidates:
-            try:
-                p["cpu_percent"] = p["proc"].cpu_percent(interval=0.1)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                p["cpu_percent"] = 0.0
-            except Exception as e:
-                logger.warning("Failed to get CPU percent for process %s: %s", p.get("pid"), e)
-                p["cpu_percent"] = 0.0
-            # procオブジェクトは不要なので削除
-            if "proc" in p:
-                del p["proc"]
-        
-        # CPU使用率で再ソート
-        top_candidates.sort(key=lambda p: p["cpu_percent"], reverse=True)
-        return top_candidates[:count]
+        processes.sort(key=lambda p: p["cpu_percent"], reverse=True)
+        return processes[:count]
     
     else:  # memory
-        # メモリ使用率の場合、既にソート済み
         processes.sort(key=lambda p: p["memory_percent"], reverse=True)
-        top_processes = processes[:count]
-        
-        # procオブジェクトを削除
-        for p in top_processes:
-            if "proc" in p:
-                del p["proc"]
-        
-        return top_processes
+        return processes[:count]
 
 
 def _match_pattern(process_name: str, patterns: Dict[str, Any]) -> Tuple[str, str]:
@@ -0,0 +1,335 @@
+"""
+ディスク監視モジュール
+
+実ファイルシステムのマウントごとにディスク使用率とinode使用率を収集します。
+
+/proc/self/mountinfo の解析結果はファイルが変化するまで保持し、
+同じデバイスのバインドマウントは1つにまとめるため、
+マウント数が多いホストでも statvfs はデバイスごとに1回で済みます。
+
+マウントごとの使用率は日ごとの件数・合計として data/state/mount_usage.json に保存し、
+マウントごとの増加傾向の予測（disk_predictor.predict_mounts）に使います。
+"""
+
+import logging
+import os
+import select
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from komon import storage
+
+logger = logging.getLogger(__name__)
+
+MOUNTINFO_PATH = "/proc/self/mountinfo"
+FILESYSTEMS_PATH = "/proc/filesystems"
+MOUNT_HISTORY_FILE = "data/state/mount_usage.json"
+MOUNT_HISTORY_DAYS = 90  # マウントごとの日次の合計を保持する日数
+
+# /proc/filesystems で nodev 扱いだが実データを持つファイルシステム
+REAL_NODEV_FS_TYPES = {"zfs"}
+
+# /proc/filesystems が読めない場合に除外する疑似ファイルシステム
+DEFAULT_PSEUDO_FS_TYPES = {
+    "proc", "sysfs", "devtmpfs", "devpts", "tmpfs", "cgroup", "cgroup2",
+    "overlay", "squashfs", "securityfs", "debugfs", "tracefs", "pstore",
+    "bpf", "mqueue", "hugetlbfs", "autofs", "fusectl", "configfs",
+    "binfmt_misc", "ramfs", "nsfs", "rpc_pipefs", "selinuxfs",
+}
+
+
+def _unescape(value: str) -> str:
+    """mountinfo のオクタルエスケープ（\\040 など）を戻す"""
+    if "\\" not in value:
+        return value
+    result = []
+    i = 0
+    while i < len(value):
+        if value[i] == "\\" and value[i + 1:i + 4].isdigit():
+            result.append(chr(int(value[i + 1:i + 4], 8)))
+            i += 4
+        else:
+            result.append(value[i])
+            i += 1
+    return "".join(result)
+
+
+def parse_mountinfo(text: str) -> List[Dict[str, str]]:
+    """
+    /proc/self/mountinfo の内容を解析します。
+
+    Args:
+        text: mountinfo の内容
+
+    Returns:
+        list: {'device_id', 'root', 'mountpoint', 'fstype', 'source'} のリスト
+    """
+    mounts = []
+    for line in text.splitlines():
+        fields = line.split()
+        try:
+            # オプションフィールドは可変長のため、区切りの "-" を基準にする
+            separator = fields.index("-", 6)
+            mounts.append({
+                'device_id': fields[2],
+                'root': _unescape(fields[3]),
+                'mountpoint': _unescape(fields[4]),
+                'fstype': fields[separator + 1],
+                'source': _unescape(fields[separator + 2]),
+            })
+        except (ValueError, IndexError):
+            continue
+    return mounts
+
+
+def _load_pseudo_fs_types(path: str = FILESYSTEMS_PATH) -> set:
+    """/proc/filesystems から nodev（疑似）ファイルシステムの種類を取得"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            pseudo = {
+                line.split()[1] for line in f
+                if line.startswith("nodev") and len(line.split()) > 1
+            }
+        # overlay や squashfs のレイヤーは実ディスクの使用率と重複するため除外
+        return (pseudo | {"squashfs"}) - REAL_NODEV_FS_TYPES
+    except (OSError, IndexError):
+        return set(DEFAULT_PSEUDO_FS_TYPES)
+
+
+class MountTable:
+    """
+    解析済みのマウントテーブルを保持するクラス
+
+    mountinfo はマウント・アンマウント時にのみ poll() で POLLPRI を通知するため、
+    変化がない間は再読み込み・再解析を行いません。
+    """
+
+    def __init__(self, path: str = MOUNTINFO_PATH, filesystems_path: str = FILESYSTEMS_PATH):
+        """
+        Args:
+            path: mountinfo のパス（テスト用）
+            filesystems_path: /proc/filesystems のパス（テスト用）
+        """
+        self.path = path
+        self.pseudo_fs_types = _load_pseudo_fs_types(filesystems_path)
+        self._file = None
+        self._poller = None
+        self._signature = None
+        self._mounts: Optional[List[Dict[str, str]]] = None
+        self.reload_count = 0
+
+    def _stat_signature(self):
+        """通常ファイル向けの変更検知用シグネチャ（/proc では常に同じ値）"""
+        st = os.fstat(self._file.fileno())
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _has_changed(self) -> bool:
+        """前回の読み込み以降に mountinfo が変化したかを判定"""
+        if self._file is None:
+            return True
+        if self._poller is not None:
+            for _, event in self._poller.poll(0):
+                if event & (select.POLLPRI | select.POLLERR):
+                    return True
+        return self._stat_signature() != self._signature
+
+    def _reload(self):
+        """mountinfo を読み込み直して解析する"""
+        if self._file is None:
+            self._file = open(self.path, "r", encoding="utf-8", errors="replace")
+            if hasattr(select, "poll"):
+                self._poller = select.poll()
+                self._poller.register(self._file.fileno(), select.POLLPRI | select.POLLERR)
+        self._file.seek(0)
+        text = self._file.read()
+        # 読み込み後に poll() のイベントを消費しておく
+        if self._poller is not None:
+            self._poller.poll(0)
+        self._signature = self._stat_signature()
+        self._mounts = parse_mountinfo(text)
+        self.reload_count += 1
+
+    def mounts(self) -> List[Dict[str, str]]:
+        """全マウントを返す（変化がなければキャッシュを返す）"""
+        if self._mounts is None or self._has_changed():
+            self._reload()
+        return self._mounts
+
+    def real_mounts(self) -> List[Dict[str, str]]:
+        """
+        実ファイルシステムのマウントを返す
+
+        疑似ファイルシステムを除外し、同じデバイス（major:minor）の
+        バインドマウントは最も短いマウントポイントの1つにまとめます。
+
+        Returns:
+            list: マウント情報のリスト
+        """
+        by_device = {}
+        for mount in self.mounts():
+            if mount['fstype'] in self.pseudo_fs_types:
+                continue
+            current = by_device.get(mount['device_id'])
+            if current is None or len(mount['mountpoint']) < len(current['mountpoint']):
+                by_device[mount['device_id']] = mount
+        return sorted(by_device.values(), key=lambda m: m['mountpoint'])
+
+    def close(self):
+        """保持しているファイルを閉じる"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._poller = None
+
+
+# グローバルインスタンス（シングルトン）
+_mount_table: Optional[MountTable] = None
+
+
+def get_mount_table() -> MountTable:
+    """マウントテーブルのグローバルインスタンスを取得"""
+    global _mount_table
+    if _mount_table is None:
+        _mount_table = MountTable()
+    return _mount_table
+
+
+def _statvfs_usage(mountpoint: str) -> Optional[Dict[str, Any]]:
+    """statvfs 1回でディスク・inode使用率を計算する（psutil.disk_usage と同じ計算式）"""
+    try:
+        st = os.statvfs(mountpoint)
+    except OSError as e:
+        logger.debug("statvfs failed for %s: %s", mountpoint, e)
+        return None
+
+    total = st.f_blocks * st.f_frsize
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    available = st.f_bavail * st.f_frsize
+    percent = round(used / (used + available) * 100, 1) if used + available else 0.0
+
+    inodes_used = st.f_files - st.f_ffree
+    inodes_percent = round(inodes_used / st.f_files * 100, 1) if st.f_files else 0.0
+
+    return {
+        'total': total,
+        'used': used,
+        'free': available,
+        'percent': percent,
+        'inodes_total': st.f_files,
+        'inodes_used': inodes_used,
+        'inodes_percent': inodes_percent,
+    }
+
+
+def collect_disk_usage(mount_table: Optional[MountTable] = None) -> List[Dict[str, Any]]:
+    """
+    実ファイルシステムのマウントごとのディスク・inode使用率を収集します。
+
+    Args:
+        mount_table: マウントテーブル（Noneの場合はグローバルインスタンス）
+
+    Returns:
+        list: マウントごとの使用率
+            [{'mountpoint', 'device', 'fstype', 'total', 'used', 'free',
+              'percent', 'inodes_total', 'inodes_used', 'inodes_percent'}, ...]
+    """
+    if mount_table is None:
+        mount_table = get_mount_table()
+
+    try:
+        mounts = mount_table.real_mounts()
+    except OSError as e:
+        logger.warning("Failed to read mount table: %s", e)
+        return []
+
+    results = []
+    for mount in mounts:
+        usage = _statvfs_usage(mount['mountpoint'])
+        if usage is None or usage['total'] == 0:
+            continue
+        results.append({
+            'mountpoint': mount['mountpoint'],
+            'device': mount['source'],
+            'fstype': mount['fstype'],
+            **usage,
+        })
+    return results
+
+
+def _load_mount_history(state_file: str) -> Dict[str, Dict[str, List[float]]]:
+    """マウントごとの日次の合計を読み込む（ない・壊れている場合は空）"""
+    try:
+        history = storage.read_json(state_file)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning("Failed to load mount usage history: %s", e)
+        return {}
+    return history if isinstance(history, dict) else {}
+
+
+def record_mount_usage(
+    disks: List[Dict[str, Any]],
+    timestamp: Optional[float] = None,
+    state_file: Optional[str] = None
+) -> None:
+    """
+    マウントごとのディスク使用率を日ごとの件数・合計に加えて保存します。
+
+    保存形式は {マウントポイント: {日付: [件数, 合計]}} で、
+    MOUNT_HISTORY_DAYS 日より前の日とアンマウントされたままのマウントは削除します。
+
+    Args:
+        disks: collect_disk_usage() の結果
+        timestamp: 使用率の時刻（UNIX時間、Noneの場合は現在時刻）
+        state_file: 保存先（Noneの場合は MOUNT_HISTORY_FILE）
+    """
+    state_file = state_file or MOUNT_HISTORY_FILE
+    day = (datetime.fromtimestamp(timestamp) if timestamp is not None else datetime.now()).date()
+    oldest = (day - timedelta(days=MOUNT_HISTORY_DAYS - 1)).isoformat()
+
+    history = _load_mount_history(state_file)
+    for disk in disks:
+        total = history.setdefault(disk['mountpoint'], {}).setdefault(day.isoformat(), [0, 0.0])
+        total[0] += 1
+        total[1] += disk['percent']
+    for mountpoint, days in list(history.items()):
+        days = {key: total for key, total in days.items() if key >= oldest}
+        if days:
+            history[mountpoint] = days
+        else:
+            del history[mountpoint]
+
+    try:
+        storage.write_json(state_file, history, separators=(",", ":"))
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning("Failed to save mount usage history: %s", e)
+
+
+def load_mount_daily_averages(
+    days: int = 30,
+    today: Optional[date] = None,
+    state_file: Optional[str] = None
+) -> Dict[str, List[Tuple[date, float]]]:
+    """
+    マウントごとのディスク使用率の日次平均を返します。
+
+    Args:
+        days: 読み込む日数（today を含む）
+        today: 基準日（テスト用）
+        state_file: 保存先（Noneの場合は MOUNT_HISTORY_FILE）
+
+    Returns:
+        dict: {マウントポイント: [(日付, 平均使用率), ...]}（日付順）
+    """
+    oldest = ((today or date.today()) - timedelta(days=days - 1)).isoformat()
+    results = {}
+    for mountpoint, totals in _load_mount_history(state_file or MOUNT_HISTORY_FILE).items():
+        daily = [
+            (date.fromisoformat(key), total / count)
+            for key, (count, total) in sorted(totals.items())
+            if key >= oldest and count
+        ]
+        if daily:
+            results[mountpoint] = daily
+    return results
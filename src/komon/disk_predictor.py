@@ -3,21 +3,32 @@
 
 過去のディスク使用率データから線形回帰により将来の使用量を予測し、
 ディスク容量が90%に到達する予測日を算出します。
+当てはめは forecast モジュールで行い、外れ値に強い方法（theil_sen など）も選べます。
+predict_from_state() は時系列ストアが追記のたびに更新している回帰の十分統計量から、
+履歴を読み込まずに同じ形式の予測を返します。1週間分の1時間ごとの集計段があれば、
+日次・週次の周期を除いた Holt–Winters 法の予測（seasonal モジュール）を優先します。
 また、前日比で10%以上の急激な増加を検出し、早期警告を発します。
+predict_mounts() はマウントごとの日次平均から、すべてのマウントの閾値への到達日を
+forecast_batch() でまとめて予測します。
 """
 
-import os
-import csv
 from datetime import datetime, date, timedelta
-from pathlib import Path
 from typing import Optional
 
+from komon.disk_monitor import load_mount_daily_averages
+from komon.forecast import fit_line, fit_sums, forecast_batch
+from komon.seasonal import predict_seasonal
+from komon.timeseries import get_timeseries_store
+from komon.timeseries_array import NUMPY_AVAILABLE, daily_means
+
 
 # 定数定義
-HISTORY_DIR = "data/usage_history"
 RAPID_CHANGE_THRESHOLD = 10.0  # 急激な変化の閾値（%）
 TARGET_USAGE = 90.0  # 予測対象のディスク使用率（%）
 SAFE_PREDICTION_DAYS = 36500  # 100年（当面は安全とみなす日数）
+VECTORIZE_MIN_SAMPLES = 1000  # この件数以上はNumPyで日次平均を計算（NumPyがある場合）
+MOUNT_FORECAST_DAYS = 30  # マウントごとの予測に使う日数
+MOUNT_FORECAST_METHOD = "theil_sen"  # マウントごとの予測の当てはめ方法（一時的な削除の影響を受けにくい）
 
 
 
@@ -32,53 +43,35 @@ def load_disk_history(days: int = 7) -> list[tuple[datetime, float]]:
         list[tuple[datetime, float]]: [(日時, ディスク使用率), ...]
         
     エラーハンドリング:
-        - ディレクトリが存在しない場合: 空リストを返す
-        - ファイルが読めない場合: そのファイルをスキップ
-        - 数値変換エラー: そのレコードをスキップ
+        - 履歴が存在しない場合: 空リストを返す
+        - 読めないパーティションはスキップ（時系列ストア側で処理）
     """
-    if not os.path.exists(HISTORY_DIR):
-        return []
-    
-    # 対象期間の計算
     end_date = datetime.now()
     start_date = end_date - timedelta(days=days)
     
-    # 履歴ファイルの取得
-    history_files = sorted(
-        Path(HISTORY_DIR).glob("usage_*.csv"),
-        key=lambda p: p.stat().st_mtime
-    )
+    return [
+        (datetime.fromtimestamp(sample.timestamp), sample.disk)
+        for sample in get_timeseries_store().query(start_date, end_date)
+    ]
+
+
+def load_daily_disk_average(days: int = 7) -> list[tuple[date, float]]:
+    """
+    過去N日分のディスク使用率の日次平均を読み込みます。
     
-    # データの収集
-    data = []
+    load_disk_history() + calculate_daily_average() と同じ結果を、
+    サンプルを読み込まずに時系列ストア側の集計で返します。
     
-    for file_path in history_files:
-        try:
-            # ファイル名から日時を取得（usage_20251122_093000.csv）
-            filename = file_path.stem
-            date_str = filename.replace('usage_', '')
-            file_datetime = datetime.strptime(date_str, '%Y%m%d_%H%M%S')
-            
-            # 期間内のファイルのみ処理
-            if start_date <= file_datetime <= end_date:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        try:
-                            disk_usage = float(row.get('disk', 0))
-                            data.append((file_datetime, disk_usage))
-                            break  # 最初の行のみ
-                        except (ValueError, KeyError):
-                            # 数値変換エラーはスキップ
-                            continue
-        except (ValueError, Exception):
-            # ファイル読み込みエラーはスキップ
-            continue
-    
-    # 日時でソート
-    data.sort(key=lambda x: x[0])
-    
-    return data
+    Args:
+        days: 読み込む日数（デフォルト: 7）
+        
+    Returns:
+        list[tuple[date, float]]: [(日付, 平均使用率), ...]
+    """
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+    
+    return get_timeseries_store().daily_average("disk", start_date, end_date)
 
 
 
@@ -95,6 +88,10 @@ def calculate_daily_average(data: list[tuple[datetime, float]]) -> list[tuple[da
     if not data:
         return []
     
+    # 長期間のデータはNumPyのベクトル演算で集計
+    if NUMPY_AVAILABLE and len(data) >= VECTORIZE_MIN_SAMPLES:
+        return daily_means([dt.timestamp() for dt, _ in data], [usage for _, usage in data])
+    
     # 日付でグループ化
     daily_data = {}
     for dt, usage in data:
@@ -116,12 +113,13 @@ def calculate_daily_average(data: list[tuple[datetime, float]]) -> list[tuple[da
 
 
 
-def predict_disk_trend(daily_data: list[tuple[date, float]]) -> dict:
+def predict_disk_trend(daily_data: list[tuple[date, float]], method: str = "ols") -> dict:
     """
     線形回帰により将来のディスク使用量を予測します。
     
     Args:
         daily_data: [(日付, 平均使用率), ...]
+        method: 当てはめの方法（"ols" / "weighted" / "theil_sen"、forecast.FORECAST_METHODS）
         
     Returns:
         dict: {
@@ -134,7 +132,7 @@ def predict_disk_trend(daily_data: list[tuple[date, float]]) -> dict:
         }
         
     Raises:
-        ValueError: データ件数が2件未満の場合
+        ValueError: データ件数が2件未満、または不明な予測方法の場合
     """
     if len(daily_data) < 2:
         raise ValueError("予測には最低2件のデータが必要です")
@@ -144,30 +142,15 @@ def predict_disk_trend(daily_data: list[tuple[date, float]]) -> dict:
     x_values = [(d - base_date).days for d, _ in daily_data]
     y_values = [usage for _, usage in daily_data]
     
-    n = len(x_values)
-    
-    # 最小二乗法で傾きと切片を計算
-    # slope = (n * Σxy - Σx * Σy) / (n * Σx² - (Σx)²)
-    # intercept = (Σy - slope * Σx) / n
-    
-    sum_x = sum(x_values)
-    sum_y = sum(y_values)
-    sum_xy = sum(x * y for x, y in zip(x_values, y_values))
-    sum_x_squared = sum(x * x for x in x_values)
-    
-    denominator = n * sum_x_squared - sum_x * sum_x
-    
-    if denominator == 0:
-        # 全てのx値が同じ（1日分のデータ）
-        slope = 0.0
-        intercept = sum_y / n
-    else:
-        slope = (n * sum_xy - sum_x * sum_y) / denominator
-        intercept = (sum_y - slope * sum_x) / n
+    # 傾きと切片を計算（全てのx値が同じ場合は傾き0）
+    slope, intercept = fit_line(x_values, y_values, method)
     
     # 現在の使用率（最新日のデータ）
-    current_usage = y_values[-1]
-    
+    return _build_prediction(slope, intercept, y_values[-1], daily_data[-1][0])
+
+
+def _build_prediction(slope: float, intercept: float, current_usage: float, latest_date: date) -> dict:
+    """傾きと現在の使用率からトレンドと90%到達予測日を求める（predict_disk_trend の戻り値の形式）"""
     # トレンド判定
     if slope > 0.01:
         trend = 'increasing'
@@ -193,7 +176,6 @@ def predict_disk_trend(daily_data: list[tuple[date, float]]) -> dict:
             else:
                 days_to_90 = int(days_to_90_float)
                 # 予測日を計算
-                latest_date = daily_data[-1][0]
                 pred_date = latest_date + timedelta(days=days_to_90)
                 prediction_date = pred_date.strftime('%Y-%m-%d')
         except (OverflowError, ValueError):
@@ -212,6 +194,39 @@ def predict_disk_trend(daily_data: list[tuple[date, float]]) -> dict:
 
 
 
+def predict_from_state(days: int = 7, store=None) -> Optional[tuple[dict, dict]]:
+    """
+    回帰の十分統計量から、履歴を読み込まずに予測します。
+    
+    時系列ストアが追記のたびに指数減衰させながら更新している十分統計量
+    （直近1週間程度を重視）で傾きを求め、保持している直近2日分の日次平均で
+    現在の使用率と前日比を求めます。
+    周期を考慮した予測の状態（1週間分以上）があれば、その予測（'model': "seasonal"）を返します。
+    
+    Args:
+        days: 前日のデータがこの日数より古い場合は予測しない（load_disk_history と同じ期間）
+        store: 時系列ストア（Noneの場合はグローバルインスタンス）
+    
+    Returns:
+        tuple: (predict_disk_trend と同じ形式の予測, detect_rapid_change と同じ形式の結果)
+            2日分のデータがない場合は None（'intercept' は最新のサンプル時点の当てはめ値）
+    """
+    store = store or get_timeseries_store()
+    state = store.trend("disk")
+    if state is None or len(state.get("daily", [])) < 2:
+        return None
+    daily_data = [(date.fromisoformat(day), total / count) for day, count, total in state["daily"]]
+    if daily_data[-2][0] < (datetime.now() - timedelta(days=days)).date():
+        return None
+    
+    prediction = predict_seasonal("disk", TARGET_USAGE, store=store)
+    if prediction is None:
+        slope, intercept = fit_sums(state)
+        prediction = _build_prediction(slope, intercept, daily_data[-1][1], daily_data[-1][0])
+    return prediction, detect_rapid_change(daily_data)
+
+
+
 def detect_rapid_change(daily_data: list[tuple[date, float]]) -> dict:
     """
     前日比で急激な変化を検出します。
@@ -320,4 +335,51 @@ def format_prediction_message(prediction: dict, rapid_change: dict) -> str:
             messages.append("")
             messages.append("当面は問題ありません。")
     
+    # 周期を考慮した予測の場合は、到達日が周期的なピークの到達日であることを補足
+    if prediction.get('model') == 'seasonal':
+        messages.append("")
+        messages.append(
+            f"📅 日次・週次の周期（変動幅 {prediction['seasonal_amplitude']:.1f}%）を除いた傾向で予測しています。"
+            f"ピーク時の使用率: {prediction['peak_usage']:.1f}%"
+        )
+    
     return "\n".join(messages)
+
+
+def predict_mounts(days: int = MOUNT_FORECAST_DAYS, method: str = MOUNT_FORECAST_METHOD) -> dict:
+    """
+    マウントごとのディスク使用率の日次平均から、すべてのマウントをまとめて予測します。
+    
+    Args:
+        days: 予測に使う日数
+        method: 当てはめの方法（forecast.FORECAST_METHODS）
+        
+    Returns:
+        dict: {マウントポイント: forecast_batch() の結果}（2日分以上のデータがあるマウントのみ）
+    """
+    return forecast_batch(load_mount_daily_averages(days), method=method)
+
+
+def format_mount_forecasts(forecasts: dict) -> str:
+    """
+    マウントごとの予測を1マウント1行のメッセージに変換します。
+    
+    Args:
+        forecasts: predict_mounts() の結果
+        
+    Returns:
+        str: フォーマットされたメッセージ（予測がない場合は空文字列）
+    """
+    lines = []
+    for mountpoint, forecast in sorted(forecasts.items()):
+        crossings = []
+        for crossing in forecast['thresholds']:
+            if crossing['days'] == 0:
+                crossings.append(f"{crossing['threshold']:.0f}% 到達済み")
+            elif crossing['days'] is not None:
+                crossings.append(f"{crossing['threshold']:.0f}% まであと{crossing['days']}日（{crossing['date']}）")
+        summary = "、".join(crossings) if crossings else "当面は問題ありません"
+        lines.append(
+            f"- {mountpoint}: {forecast['current_usage']:.1f}%（{forecast['slope']:+.2f}%/日） {summary}"
+        )
+    return "\n".join(lines)
@@ -7,20 +7,26 @@ cronなどによる同一スクリプトの多重起動を検出し、
 
 import logging
 from typing import List, Dict, Any, Optional
-import psutil
+
+from .monitor import ProcessSnapshot
+from .process_index import SCRIPT_EXTENSIONS, extract_script_name
 
 logger = logging.getLogger(__name__)
 
 # 対象とするスクリプト拡張子
-TARGET_EXTENSIONS = ('.py', '.sh', '.rb', '.pl')
+TARGET_EXTENSIONS = SCRIPT_EXTENSIONS
 
 
-def detect_duplicate_processes(threshold: int = 3) -> List[Dict[str, Any]]:
+def detect_duplicate_processes(
+    threshold: int = 3,
+    snapshot: Optional[ProcessSnapshot] = None
+) -> List[Dict[str, Any]]:
     """
     多重実行プロセスを検出
     
     Args:
         threshold: 警告閾値（この数以上で警告）
+        snapshot: 共有するプロセススナップショット（Noneの場合は新規に取得）
     
     Returns:
         多重実行プロセスのリスト
@@ -45,22 +51,25 @@ def detect_duplicate_processes(threshold: int = 3) -> List[Dict[str, Any]]:
     script_processes: Dict[str, List[int]] = {}
     
     try:
-        for proc in psutil.process_iter(['pid', 'cmdline']):
+        if snapshot is None:
+            snapshot = ProcessSnapshot.take()
+        
+        for proc in snapshot:
             try:
-                cmdline = proc.info['cmdline']
+                cmdline = proc['cmdline']
                 if not cmdline:
                     continue
                 
-                # スクリプト名を抽出
-                script_name = _extract_script_name(cmdline)
+                # スクリプト名を抽出（プロセスインデックスの解析結果があれば再利用）
+                if 'script' in proc:
+                    script_name = proc['script']
+                else:
+                    script_name = _extract_script_name(cmdline)
                 if script_name:
                     if script_name not in script_processes:
                         script_processes[script_name] = []
-                    script_processes[script_name].append(proc.info['pid'])
+                    script_processes[script_name].append(proc['pid'])
             
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                # プロセスが終了した、またはアクセス拒否された場合はスキップ
-                continue
             except Exception as e:
                 logger.debug("Error processing process: %s", e)
                 continue
@@ -110,20 +119,4 @@ def _extract_script_name(cmdline: List[str]) -> Optional[str]:
         ['/bin/bash', '/path/to/script.sh'] → 'script.sh'
         ['python', '-m', 'module'] → None（モジュール実行は対象外）
     """
-    if not cmdline or len(cmdline) == 0:
-        return None
-    
-    # モジュール実行（python -m module）は対象外
-    if '-m' in cmdline:
-        return None
-    
-    # コマンドライン引数を走査
-    for arg in cmdline:
-        # 対象拡張子を持つファイルを探す
-        for ext in TARGET_EXTENSIONS:
-            if arg.endswith(ext):
-                # ファイル名のみを抽出（パスを除去）
-                import os
-                return os.path.basename(arg)
-    
-    return None
+    return extract_script_name(cmdline, TARGET_EXTENSIONS)
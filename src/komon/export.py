@@ -0,0 +1,156 @@
+"""
+エクスポートモジュール
+
+使用履歴のサンプル・集計段（ロールアップ）・通知履歴を
+CSV または JSON Lines として書き出します。
+
+各データはジェネレーターで1行ずつ読み出して書き出すため、
+期間の長さによらずメモリ使用量は一定です
+（サンプルは時系列ストアのパーティション1日分ずつ読み込みます）。
+"""
+
+import csv
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO
+
+from komon.notification_history import DEFAULT_QUEUE_FILE, load_notification_history
+from komon.timeseries import METRICS, ROLLUP_STATS, TimeSeriesStore, get_timeseries_store
+
+EXPORT_FORMATS = ("csv", "jsonl")
+EXPORT_DATASETS = ("samples", "rollups", "notifications")
+
+NOTIFICATION_FIELDS = ["timestamp", "metric_type", "metric_value", "message"]
+
+
+def _metrics(metrics: Optional[Sequence[str]]) -> List[str]:
+    """指定されたメトリクス（未指定の場合はすべて）を保存順に返す"""
+    if not metrics:
+        return list(METRICS)
+    unknown = set(metrics) - set(METRICS)
+    if unknown:
+        raise ValueError(f"不明なメトリクス: {', '.join(sorted(unknown))}")
+    return [m for m in METRICS if m in metrics]
+
+
+def sample_fields(metrics: Optional[Sequence[str]] = None) -> List[str]:
+    """サンプルの列名"""
+    return ["timestamp"] + _metrics(metrics)
+
+
+def rollup_fields(metrics: Optional[Sequence[str]] = None) -> List[str]:
+    """集計段の列名"""
+    return ["start", "count"] + [f"{m}_{stat}" for m in _metrics(metrics) for stat in ROLLUP_STATS]
+
+
+def iter_samples(
+    start: datetime,
+    end: datetime,
+    metrics: Optional[Sequence[str]] = None,
+    store: Optional[TimeSeriesStore] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    期間内のサンプルを時刻順に1件ずつ返します。
+
+    Args:
+        start: 期間の開始（この時刻を含む）
+        end: 期間の終了（この時刻を含む）
+        metrics: 出力するメトリクス（Noneの場合はすべて）
+        store: 時系列ストア（Noneの場合はグローバルインスタンス）
+
+    Yields:
+        dict: {'timestamp': ISO形式の時刻, 'cpu': ..., ...}
+    """
+    columns = _metrics(metrics)
+    store = store or get_timeseries_store()
+    for sample in store.query(start, end):
+        row = {'timestamp': datetime.fromtimestamp(sample.timestamp).isoformat()}
+        row.update((m, getattr(sample, m)) for m in columns)
+        yield row
+
+
+def iter_rollups(
+    tier: str,
+    start: datetime,
+    end: datetime,
+    metrics: Optional[Sequence[str]] = None,
+    store: Optional[TimeSeriesStore] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    集計段の区間を時刻順に1件ずつ返します。
+
+    Args:
+        tier: 集計段（"1h" / "1d"）
+        start: 期間の開始（区間の開始時刻がこの時刻以降）
+        end: 期間の終了（区間の開始時刻がこの時刻以前）
+        metrics: 出力するメトリクス（Noneの場合はすべて）
+        store: 時系列ストア（Noneの場合はグローバルインスタンス）
+
+    Yields:
+        dict: {'start': ISO形式の時刻, 'count': ..., 'cpu_min': ..., ...}
+    """
+    columns = rollup_fields(metrics)[2:]
+    store = store or get_timeseries_store()
+    for rollup in store.rollups(tier, start, end):
+        row = {'start': datetime.fromtimestamp(rollup.start).isoformat(), 'count': rollup.count}
+        row.update((column, getattr(rollup, column)) for column in columns)
+        yield row
+
+
+def iter_notifications(
+    start: datetime,
+    end: datetime,
+    metrics: Optional[Sequence[str]] = None,
+    queue_file: str = DEFAULT_QUEUE_FILE
+) -> Iterator[Dict[str, Any]]:
+    """
+    期間内の通知履歴を古い順に1件ずつ返します。
+
+    Args:
+        start: 期間の開始
+        end: 期間の終了
+        metrics: 出力する通知の種類（metric_type、Noneの場合はすべて）
+        queue_file: 通知履歴のファイル
+
+    Yields:
+        dict: 通知（timestamp, metric_type, metric_value, message）
+    """
+    for notification in reversed(load_notification_history(queue_file)):
+        try:
+            when = datetime.fromisoformat(notification["timestamp"])
+        except (TypeError, ValueError):
+            continue
+        if not start <= when <= end:
+            continue
+        if metrics and notification["metric_type"] not in metrics:
+            continue
+        yield {field: notification[field] for field in NOTIFICATION_FIELDS}
+
+
+def write_rows(rows: Iterable[Dict[str, Any]], fields: List[str], out: TextIO, fmt: str = "csv") -> int:
+    """
+    行を1件ずつ CSV（ヘッダー付き）または JSON Lines で書き出します。
+
+    Args:
+        rows: 出力する行（ジェネレーター可）
+        fields: 列名（CSV のヘッダーと列の順序）
+        out: 出力先
+        fmt: "csv" または "jsonl"
+
+    Returns:
+        int: 書き出した行数
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"不明な形式: {fmt}")
+    count = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=fields, extrasaction="ignore", lineterminator="\n")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in rows:
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+    return count
@@ -0,0 +1,390 @@
+"""
+使用率の予測モジュール
+
+日次の使用率（ディスクなど）に直線を当てはめ、複数の期間先の予測値と信頼区間、
+複数の閾値（80/90/95%）への到達日をまとめて求めます。
+
+当てはめの方法:
+    ols: 最小二乗法
+    weighted: 新しい日ほど重みを大きくした最小二乗法（半減期 RECENCY_HALF_LIFE_DAYS 日）
+    theil_sen: 2点間の傾きの中央値（一時的なファイル削除などの外れ値の影響を受けにくい）
+
+forecast_batch() は複数の系列（マウントごとなど）を日付をそろえた行列にして、
+NumPy がある場合はすべての系列をベクトル演算で一度に当てはめます。
+NumPy がない場合は系列ごとに Python で計算します（結果は同じ）。
+
+update_sums() / fit_sums() は、サンプルが届くたびに回帰の十分統計量
+（重みの合計 n, Σx, Σy, Σxy, Σx²）を指数的に減衰させながら O(1) で更新し、
+履歴を読み直さずに傾きを求めます（時系列ストアが追記時に更新）。
+"""
+
+import math
+import statistics
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy はオプション
+    np = None
+
+NUMPY_AVAILABLE = np is not None
+
+FORECAST_METHODS = ("ols", "weighted", "theil_sen")
+DEFAULT_HORIZONS = (7, 30, 90)  # 予測する期間（日）
+DEFAULT_THRESHOLDS = (80.0, 90.0, 95.0)  # 到達日を求める使用率（%）
+DEFAULT_CONFIDENCE = 0.95  # 予測区間の信頼水準
+RECENCY_HALF_LIFE_DAYS = 7.0  # weighted の重みが半分になる日数
+MIN_SLOPE = 0.001  # これ以下の傾き（%/日）は到達しないとみなす
+SAFE_PREDICTION_DAYS = 36500  # これより先の到達は「当面は安全」とみなす
+MAD_SCALE = 1.4826  # 中央絶対偏差を標準偏差に換算する係数
+THEIL_SEN_CHUNK_PAIRS = 4_000_000  # Theil–Sen で一度に計算する傾きの数（メモリ使用量の上限）
+TREND_HALF_LIFE_DAYS = 3.0  # 十分統計量の重みが半分になる日数（直近1週間程度を重視）
+SUM_KEYS = ("n", "sx", "sy", "sxy", "sxx")
+
+
+def _check_method(method: str) -> None:
+    if method not in FORECAST_METHODS:
+        raise ValueError(f"不明な予測方法: {method}")
+
+
+def _weights(x: Sequence[float], method: str, half_life: float) -> List[float]:
+    if method != "weighted":
+        return [1.0] * len(x)
+    last = max(x)
+    return [0.5 ** ((last - xi) / half_life) for xi in x]
+
+
+def fit_line(
+    x: Sequence[float],
+    y: Sequence[float],
+    method: str = "ols",
+    half_life: float = RECENCY_HALF_LIFE_DAYS
+) -> Tuple[float, float]:
+    """
+    1つの系列に直線を当てはめ、(傾き, 切片) を返します（Python で計算）。
+
+    x がすべて同じ場合は傾き 0、切片は y の平均（theil_sen は中央値）です。
+
+    Raises:
+        ValueError: データ件数が2件未満、または不明な予測方法の場合
+    """
+    return _fit_python(x, y, method, half_life)[:2]
+
+
+def _fit_python(x, y, method: str, half_life: float) -> Tuple[float, float, float, float, float, float]:
+    """(傾き, 切片, 残差の標準偏差, 実効件数, x の重み付き平均, x の重み付き偏差平方和) を返す"""
+    _check_method(method)
+    n = len(x)
+    if n < 2:
+        raise ValueError("予測には最低2件のデータが必要です")
+
+    if method == "theil_sen":
+        slopes = [
+            (y[j] - y[i]) / (x[j] - x[i])
+            for i in range(n) for j in range(i + 1, n) if x[j] != x[i]
+        ]
+        slope = statistics.median(slopes) if slopes else 0.0
+        intercept = statistics.median(yi - slope * xi for xi, yi in zip(x, y))
+        residuals = [yi - intercept - slope * xi for xi, yi in zip(x, y)]
+        scale = MAD_SCALE * statistics.median(abs(r) for r in residuals)
+        mean_x = sum(x) / n
+        sxx = sum((xi - mean_x) ** 2 for xi in x)
+        return slope, intercept, scale, float(n), mean_x, sxx
+
+    w = _weights(x, method, half_life)
+    sum_w = sum(w)
+    sum_x = sum(wi * xi for wi, xi in zip(w, x))
+    sum_y = sum(wi * yi for wi, yi in zip(w, y))
+    sum_xy = sum(wi * xi * yi for wi, xi, yi in zip(w, x, y))
+    sum_x_squared = sum(wi * xi * xi for wi, xi in zip(w, x))
+
+    # slope = (n * Σxy - Σx * Σy) / (n * Σx² - (Σx)²)（weighted は各項に重みを掛ける）
+    denominator = sum_w * sum_x_squared - sum_x * sum_x
+    if denominator == 0:
+        slope = 0.0
+        intercept = sum_y / sum_w
+    else:
+        slope = (sum_w * sum_xy - sum_x * sum_y) / denominator
+        intercept = (sum_y - slope * sum_x) / sum_w
+
+    n_eff = sum_w * sum_w / sum(wi * wi for wi in w)
+    mean_x = sum_x / sum_w
+    sxx = sum(wi * (xi - mean_x) ** 2 for wi, xi in zip(w, x)) * n_eff / sum_w
+    residual = sum(wi * (yi - intercept - slope * xi) ** 2 for wi, xi, yi in zip(w, x, y)) / sum_w
+    scale = math.sqrt(residual * n_eff / max(n_eff - 2, 1.0))
+    return slope, intercept, scale, n_eff, mean_x, sxx
+
+
+def _fit_numpy(x, values, method: str, half_life: float):
+    """
+    行列（系列 × 日、ない日は NaN）のすべての系列を一度に当てはめ、
+    _fit_python と同じ6つの値をそれぞれ系列数の長さの配列で返す
+    """
+    mask = ~np.isnan(values)
+    filled = np.where(mask, values, 0.0)
+    n = mask.sum(axis=1).astype(float)
+
+    if method == "theil_sen":
+        i, j = np.triu_indices(len(x), 1)
+        dx = x[j] - x[i]
+        slope = np.empty(len(values))
+        step = max(1, THEIL_SEN_CHUNK_PAIRS // max(len(i), 1))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for lo in range(0, len(values), step):
+                pairs = (values[lo:lo + step, j] - values[lo:lo + step, i]) / dx
+                slope[lo:lo + step] = _nanmedian(pairs)
+        slope = np.where(np.isnan(slope), 0.0, slope)
+        intercept = _nanmedian(values - slope[:, None] * x)
+        residuals = values - intercept[:, None] - slope[:, None] * x
+        scale = MAD_SCALE * _nanmedian(np.abs(residuals))
+        mean_x = (mask * x).sum(axis=1) / n
+        sxx = (mask * (x - mean_x[:, None]) ** 2).sum(axis=1)
+        return slope, intercept, scale, n, mean_x, sxx
+
+    if method == "weighted":
+        last = np.where(mask, x, -np.inf).max(axis=1)
+        w = mask * 0.5 ** ((last[:, None] - x) / half_life)
+    else:
+        w = mask.astype(float)
+    sum_w = w.sum(axis=1)
+    mean_x = (w * x).sum(axis=1) / sum_w
+    mean_y = (w * filled).sum(axis=1) / sum_w
+    dx = x - mean_x[:, None]
+    sxx_w = (w * dx * dx).sum(axis=1)
+    sxy_w = (w * dx * (filled - mean_y[:, None])).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = np.where(sxx_w > 0, sxy_w / sxx_w, 0.0)
+    intercept = mean_y - slope * mean_x
+
+    n_eff = sum_w * sum_w / (w * w).sum(axis=1)
+    sxx = sxx_w * n_eff / sum_w
+    residuals = filled - intercept[:, None] - slope[:, None] * x
+    residual = (w * residuals * residuals).sum(axis=1) / sum_w
+    scale = np.sqrt(residual * n_eff / np.maximum(n_eff - 2, 1.0))
+    return slope, intercept, scale, n_eff, mean_x, sxx
+
+
+def _nanmedian(a):
+    """行ごとの NaN を除いた中央値（すべて NaN の行は NaN、警告は出さない）"""
+    valid = ~np.isnan(a)
+    result = np.full(len(a), np.nan)
+    rows = valid.any(axis=1)
+    if rows.any():
+        # NaN を +inf にして並べ替え、有効な値の中央の2つを平均する
+        ordered = np.sort(np.where(valid[rows], a[rows], np.inf), axis=1)
+        count = valid[rows].sum(axis=1)
+        low = ordered[np.arange(len(ordered)), (count - 1) // 2]
+        high = ordered[np.arange(len(ordered)), count // 2]
+        result[rows] = (low + high) / 2
+    return result
+
+
+def _z_score(confidence: float) -> float:
+    return statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def _days_to(threshold: float, current: float, slope: float) -> Optional[float]:
+    """閾値までの日数（到達済みは 0、到達しない・当面安全な場合は None）"""
+    if current >= threshold:
+        return 0.0
+    if slope <= MIN_SLOPE:
+        return None
+    days = (threshold - current) / slope
+    if days != days or days > SAFE_PREDICTION_DAYS:
+        return None
+    return days
+
+
+def _result(
+    method: str,
+    fit: Tuple[float, float, float, float, float, float],
+    base: date,
+    last_x: float,
+    current: float,
+    samples: int,
+    horizons: Sequence[int],
+    thresholds: Sequence[float],
+    z: float
+) -> dict:
+    slope, intercept, scale, n_eff, mean_x, sxx = (float(v) for v in fit)
+    last_date = base + timedelta(days=int(last_x))
+
+    forecasts = []
+    for horizon in horizons:
+        x0 = last_x + horizon
+        value = intercept + slope * x0
+        leverage = (x0 - mean_x) ** 2 / sxx if sxx > 0 else 0.0
+        margin = z * scale * math.sqrt(1 + 1 / n_eff + leverage)
+        forecasts.append({
+            'days': horizon,
+            'date': (last_date + timedelta(days=horizon)).strftime('%Y-%m-%d'),
+            'value': value,
+            'lower': value - margin,
+            'upper': value + margin,
+        })
+
+    crossings = []
+    for threshold in thresholds:
+        days = _days_to(threshold, current, slope)
+        crossings.append({
+            'threshold': threshold,
+            'days': None if days is None else int(days),
+            'date': None if days is None else (last_date + timedelta(days=int(days))).strftime('%Y-%m-%d'),
+        })
+
+    return {
+        'method': method,
+        'slope': slope,
+        'intercept': intercept,
+        'current_usage': current,
+        'last_date': last_date,
+        'samples': samples,
+        'forecasts': forecasts,
+        'thresholds': crossings,
+    }
+
+
+def forecast_batch(
+    series: Dict[str, Sequence[Tuple[date, float]]],
+    method: str = "theil_sen",
+    horizons: Sequence[int] = DEFAULT_HORIZONS,
+    thresholds: Sequence[float] = DEFAULT_THRESHOLDS,
+    confidence: float = DEFAULT_CONFIDENCE,
+    half_life: float = RECENCY_HALF_LIFE_DAYS,
+    vectorize: Optional[bool] = None
+) -> Dict[str, dict]:
+    """
+    複数の系列（マウントポイントごとの日次使用率など）をまとめて予測します。
+
+    Args:
+        series: {名前: [(日付, 使用率), ...]}（日付順でなくてもよい）
+        method: "ols" / "weighted" / "theil_sen"
+        horizons: 予測する期間（最新日から何日先か）
+        thresholds: 到達日を求める使用率
+        confidence: 予測区間の信頼水準（正規分布で近似）
+        half_life: weighted の重みが半分になる日数
+        vectorize: NumPy で一度に計算するか（None の場合は NumPy があれば使う）
+
+    Returns:
+        dict: {名前: {
+            'method', 'slope'（%/日）, 'intercept', 'current_usage'（最新日の値）,
+            'last_date', 'samples',
+            'forecasts': [{'days', 'date', 'value', 'lower', 'upper'}, ...],
+            'thresholds': [{'threshold', 'days', 'date'}, ...]
+                （到達済みは days=0、到達しない・当面安全な場合は None）
+        }}
+        データが2日分未満の系列は含まれません。
+
+    Raises:
+        ValueError: 不明な予測方法の場合
+    """
+    _check_method(method)
+    series = {name: sorted(points) for name, points in series.items() if len({d for d, _ in points}) >= 2}
+    if not series:
+        return {}
+    if vectorize is None:
+        vectorize = NUMPY_AVAILABLE
+
+    base = min(points[0][0] for points in series.values())
+    z = _z_score(confidence)
+    results = {}
+
+    if not vectorize:
+        for name, points in series.items():
+            x = [float((d - base).days) for d, _ in points]
+            y = [value for _, value in points]
+            fit = _fit_python(x, y, method, half_life)
+            results[name] = _result(method, fit, base, x[-1], y[-1], len(points), horizons, thresholds, z)
+        return results
+
+    names = list(series)
+    days = sorted({d for points in series.values() for d, _ in points})
+    column = {d: i for i, d in enumerate(days)}
+    x = np.array([(d - base).days for d in days], dtype=float)
+    values = np.full((len(names), len(days)), np.nan)
+    for row, name in enumerate(names):
+        for d, value in series[name]:
+            values[row, column[d]] = value
+
+    fits = _fit_numpy(x, values, method, half_life)
+    for row, name in enumerate(names):
+        points = series[name]
+        fit = tuple(f[row] for f in fits)
+        last_x = float((points[-1][0] - base).days)
+        results[name] = _result(method, fit, base, last_x, points[-1][1], len(points), horizons, thresholds, z)
+    return results
+
+
+def update_sums(
+    sums: Optional[Dict[str, float]],
+    timestamp: float,
+    value: float,
+    half_life: float = TREND_HALF_LIFE_DAYS
+) -> Dict[str, float]:
+    """
+    回帰の十分統計量にサンプルを1件加えます（O(1)）。
+
+    x は最新のサンプルからの日数（最新が0、過去は負）です。新しいサンプルが届いたら
+    原点をその時刻に移し、それまでの重みを経過日数に応じて減衰させます。
+    最新より古いサンプル（時刻の巻き戻し）は、その古さに応じた重みで加えます。
+
+    Args:
+        sums: {'t': 原点の時刻, 'n', 'sx', 'sy', 'sxy', 'sxx'}（Noneの場合は新規作成）
+        timestamp: サンプルの時刻（UNIX時間）
+        value: サンプルの値
+        half_life: 重みが半分になる日数
+
+    Returns:
+        dict: 更新した十分統計量（sums をその場で更新したもの）
+    """
+    if sums is None:
+        sums = {'t': timestamp, **{key: 0.0 for key in SUM_KEYS}}
+    x = (timestamp - sums['t']) / 86400
+    weight = 1.0
+    if x > 0:
+        decay = 0.5 ** (x / half_life)
+        n, sx, sy, sxy, sxx = (sums[key] for key in SUM_KEYS)
+        sums.update(
+            t=timestamp,
+            n=decay * n,
+            sx=decay * (sx - x * n),
+            sy=decay * sy,
+            sxy=decay * (sxy - x * sy),
+            sxx=decay * (sxx - 2 * x * sx + x * x * n),
+        )
+        x = 0.0
+    else:
+        weight = 0.5 ** (-x / half_life)
+    sums['n'] += weight
+    sums['sx'] += weight * x
+    sums['sy'] += weight * value
+    sums['sxy'] += weight * x * value
+    sums['sxx'] += weight * x * x
+    return sums
+
+
+def fit_sums(sums: Dict[str, float]) -> Tuple[float, float]:
+    """
+    十分統計量から (傾き（1日あたり）, 最新のサンプルの時刻での当てはめ値) を求めます。
+
+    サンプルの時刻がすべて同じ場合は傾き0、値は重み付き平均です。
+
+    Raises:
+        ValueError: サンプルがない場合
+    """
+    n, sx, sy, sxy, sxx = (sums[key] for key in SUM_KEYS)
+    if n <= 0:
+        raise ValueError("予測には最低2件のデータが必要です")
+    denominator = n * sxx - sx * sx
+    if denominator <= 1e-12 * n * n:
+        return 0.0, sy / n
+    slope = (n * sxy - sx * sy) / denominator
+    return slope, (sy - slope * sx) / n
+
+
+def forecast_series(daily_data: Sequence[Tuple[date, float]], method: str = "theil_sen", **kwargs) -> Optional[dict]:
+    """
+    1つの系列を予測します（forecast_batch と同じ結果、データ不足の場合は None）。
+    """
+    return forecast_batch({"": daily_data}, method=method, **kwargs).get("")
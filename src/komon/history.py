@@ -2,114 +2,164 @@
 履歴管理モジュール
 
 リソース使用履歴の保存とローテーション機能を提供します。
+履歴は時系列ストア（komon.timeseries）に保存し、
+旧形式のCSV履歴を取り込む移行処理も提供します。
 """
 
-import os
 import csv
-import json
+import logging
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
+from .disk_monitor import record_mount_usage
+from .seasonal import update_seasonal_states
+from .timeseries import METRICS, Sample, TimeSeriesStore, get_timeseries_store
 
-HISTORY_DIR = "data/usage_history"
-MAX_HISTORY_FILES = 95
+logger = logging.getLogger(__name__)
+
+# 旧形式（1サンプル1ファイルのCSV）の履歴ディレクトリ
+LEGACY_HISTORY_DIR = "data/usage_history"
+
+# 生のサンプルを保持する日数
+HISTORY_RETENTION_DAYS = 14
+
+# 集計段（1時間・1日ごとの min / max / avg / p95）を保持する日数
+ROLLUP_RETENTION_DAYS = {
+    "1h": 90,
+    "1d": 730,
+}
+
+# 1時間ごと・プロセス名ごとの上位プロセスの集計を保持する日数
+PROCESS_TALLY_RETENTION_DAYS = 90
+
+# 日ごとの分位点スケッチ（週次・月次の p50 / p95 / p99 用）を保持する日数
+SKETCH_RETENTION_DAYS = 90
 
 
 def rotate_history():
     """
-    履歴ファイルをローテーションします。
-    最大95世代まで保持し、古いファイルは自動削除されます。
+    終わった時間帯・日を集計段にまとめて周期を考慮した予測の状態を更新してから、
+    保持期間を過ぎた生のサンプル・集計段・分位点スケッチを削除し、
+    残った終わった日の履歴を圧縮します。
     """
-    os.makedirs(HISTORY_DIR, exist_ok=True)
-    
-    # 既存ファイルの取得
-    history_files = sorted(
-        Path(HISTORY_DIR).glob("usage_*.csv"),
-        key=lambda p: p.stat().st_mtime
-    )
-    
-    # 古いファイルを削除
-    if len(history_files) >= MAX_HISTORY_FILES:
-        for old_file in history_files[:len(history_files) - MAX_HISTORY_FILES + 1]:
-            try:
-                old_file.unlink()
-                print(f"🗑️ 古い履歴ファイルを削除: {old_file.name}")
-            except Exception as e:
-                print(f"⚠️ ファイル削除エラー: {e}")
+    store = get_timeseries_store()
+    store.rollup()
+    update_seasonal_states(store)
+    for day in store.prune(HISTORY_RETENTION_DAYS):
+        print(f"🗑️ 古い履歴を削除: {day.isoformat()}")
+    store.compact()
+    store.prune_rollups(ROLLUP_RETENTION_DAYS)
+    store.prune_process_tallies(PROCESS_TALLY_RETENTION_DAYS)
+    store.prune_sketches(SKETCH_RETENTION_DAYS)
 
 
 def save_current_usage(usage: dict):
     """
-    現在のリソース使用状況を履歴ファイルに保存します。
+    現在のリソース使用状況を時系列ストアに追記します。
+    
+    マウントごとの使用率（disks）があれば、マウントごとの日次の合計にも加えます。
     
     Args:
-        usage: リソース使用率データ
+        usage: リソース使用率データ（cpu, mem, disk を保存）
     """
-    os.makedirs(HISTORY_DIR, exist_ok=True)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{HISTORY_DIR}/usage_{timestamp}.csv"
-    
     try:
-        with open(filename, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["timestamp", "cpu", "mem", "disk"])
-            writer.writerow([
-                datetime.now().isoformat(),
-                usage.get("cpu", 0),
-                usage.get("mem", 0),
-                usage.get("disk", 0)
-            ])
-            
-            # プロセス情報も追記
-            if "cpu_by_process" in usage:
-                writer.writerow([])
-                writer.writerow(["CPU上位プロセス"])
-                writer.writerow(["name", "cpu_percent"])
-                for proc in usage["cpu_by_process"]:
-                    writer.writerow([proc["name"], proc["cpu"]])
-            
-            if "mem_by_process" in usage:
-                writer.writerow([])
-                writer.writerow(["メモリ上位プロセス"])
-                writer.writerow(["name", "mem_mb"])
-                for proc in usage["mem_by_process"]:
-                    writer.writerow([proc["name"], proc["mem"]])
-        
-        print(f"📝 使用履歴を保存: {filename}")
-        
+        path = get_timeseries_store().append(usage)
+        print(f"📝 使用履歴を保存: {path}")
     except Exception as e:
         print(f"❌ 履歴保存エラー: {e}")
+    if usage.get('disks'):
+        record_mount_usage(usage['disks'])
 
 
 def get_history(limit: int = 10) -> list:
     """
-    過去の使用履歴を取得します。
+    過去の使用履歴を新しい順に取得します。
     
     Args:
         limit: 取得する履歴の件数
         
     Returns:
-        list: 履歴データのリスト
+        list: [{'timestamp': ISO形式の日時, 'cpu', 'mem', 'disk'}, ...]
+    """
+    return [
+        {
+            'timestamp': datetime.fromtimestamp(sample.timestamp).isoformat(),
+            **{metric: round(getattr(sample, metric), 1) for metric in METRICS}
+        }
+        for sample in get_timeseries_store().latest(limit)
+    ]
+
+
+def _read_legacy_csv(file_path: Path) -> Optional[Sample]:
+    """旧形式のCSV（usage_YYYYMMDD_HHMMSS.csv）から1サンプルを読み込む"""
+    with open(file_path, "r", encoding="utf-8") as f:
+        row = next(csv.DictReader(f), None)
+    if row is None:
+        return None
+    
+    try:
+        timestamp = datetime.fromisoformat(row["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        # timestamp列が読めない場合はファイル名の日時を使う
+        stamp = file_path.stem.replace("usage_", "")
+        timestamp = datetime.strptime(stamp, "%Y%m%d_%H%M%S").timestamp()
+    return Sample(timestamp, *(float(row.get(metric) or 0) for metric in METRICS))
+
+
+def migrate_csv_history(
+    csv_dir: str = LEGACY_HISTORY_DIR,
+    store: Optional[TimeSeriesStore] = None,
+    remove: bool = False
+) -> dict:
     """
-    if not os.path.exists(HISTORY_DIR):
-        return []
+    旧形式のCSV履歴を時系列ストアに取り込みます。
+    
+    日ごとに既存のサンプルとまとめて書き直すため、同じCSVを
+    何度取り込んでもサンプルは重複しません。
     
-    history_files = sorted(
-        Path(HISTORY_DIR).glob("usage_*.csv"),
-        key=lambda p: p.stat().st_mtime,
-        reverse=True
-    )[:limit]
+    Args:
+        csv_dir: CSV履歴のディレクトリ
+        store: 取り込み先（Noneの場合はグローバルインスタンス）
+        remove: 取り込みに成功したCSVを削除するか
+    
+    Returns:
+        dict: {'imported': 取り込んだ件数, 'skipped': 読めなかったファイル数, 'days': 対象日数}
+    """
+    if store is None:
+        store = get_timeseries_store()
     
-    history_data = []
-    for file_path in history_files:
+    by_day = {}
+    imported_files = []
+    skipped = 0
+    for file_path in sorted(Path(csv_dir).glob("usage_*.csv")):
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    history_data.append(row)
-                    break  # 最初の行のみ
-        except Exception:
-            pass
+            sample = _read_legacy_csv(file_path)
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to read %s: %s", file_path, e)
+            sample = None
+        if sample is None:
+            skipped += 1
+            continue
+        day = datetime.fromtimestamp(sample.timestamp).date()
+        by_day.setdefault(day, {})[sample.timestamp] = sample
+        imported_files.append(file_path)
+    
+    for day, samples in by_day.items():
+        # 既存のサンプルと同じ時刻のものは上書き（重複させない）
+        merged = {s.timestamp: s for s in store.read_partition(day)}
+        merged.update(samples)
+        store.write_partition(day, list(merged.values()))
+    
+    if remove:
+        for file_path in imported_files:
+            try:
+                file_path.unlink()
+            except OSError as e:
+                logger.warning("Failed to remove %s: %s", file_path, e)
     
-    return history_data
+    return {
+        'imported': sum(len(samples) for samples in by_day.values()),
+        'skipped': skipped,
+        'days': len(by_day),
+    }
@@ -0,0 +1,259 @@
+"""
+監視ジョブモジュール
+
+リソース警戒の通知、ログ急増の監視、ログ傾向分析の処理を提供します。
+cronで起動する scripts/main.py・main_log_monitor.py・main_log_trend.py と
+常駐モード（komon daemon）の両方から呼び出します。
+"""
+
+import logging
+from typing import List, Optional
+
+from .analyzer import metric_label
+from .log_analyzer import check_log_anomaly
+from .log_tail_extractor import extract_log_tail
+from .log_trends import analyze_log_trend
+from .log_watcher import LogWatcher
+from .monitor import format_process_entry
+from .notification import NotificationThrottle, send_notification_with_fallback
+from .timings import span
+
+logger = logging.getLogger(__name__)
+
+
+def handle_alerts(
+    alerts: list,
+    levels: dict,
+    config: dict,
+    usage: dict,
+    throttle: Optional[NotificationThrottle] = None
+):
+    """
+    警戒情報が存在する場合にSlackやメールで通知を送信する。
+    Args:
+        alerts (list): 警戒メッセージのリスト
+        levels (dict): 閾値レベル情報 {"cpu": ("warning", 75.0), ...}
+        config (dict): 設定ファイルの内容
+        usage (dict): リソース使用率データ
+        throttle (NotificationThrottle): 通知頻度制御（Noneの場合は設定から作成、常駐モードでは使い回す）
+    """
+    print("⚠️ 警戒情報:")
+    for alert in alerts:
+        print(f"- {alert}")
+
+    # 通知頻度制御の初期化
+    if throttle is None:
+        throttle = NotificationThrottle(config.get("throttle", {}))
+
+    # 各メトリクスについて通知判定
+    for metric_type, (threshold_level, current_value) in levels.items():
+        # 通知すべきかを判定
+        should_send, reason = throttle.should_send_notification(
+            metric_type, threshold_level, current_value
+        )
+
+        if not should_send:
+            print(f"ℹ️ {metric_type}の通知を抑制しました（理由: {reason}）")
+            continue
+
+        # メッセージを作成
+        metric_alert = next((a for a in alerts if is_metric_alert(a, metric_type)), None)
+        if not metric_alert:
+            continue
+
+        message = f"⚠️ Komon 警戒情報:\n{metric_alert}"
+
+        # プロセス情報を追加
+        process_info = get_process_info_for_metric(metric_type, usage)
+        if process_info:
+            message += f"\n\n📊 上位プロセス:\n{process_info}"
+
+        # エスカレーションメッセージを追加
+        if reason == "escalation":
+            duration = throttle.get_duration_message(metric_type)
+            if duration:
+                message += f"\n\n⏰ {duration}経過しましたが、まだ高い状態が続いています"
+
+        # メタデータを作成
+        metadata = {
+            "metric_type": metric_type,
+            "metric_value": current_value
+        }
+
+        # 通知送信（統一Webhook方式 + フォールバック）
+        sent = send_notification_with_fallback(
+            message=message,
+            settings=config,
+            metadata=metadata,
+            title="Komon 警戒情報",
+            level="warning" if threshold_level == "warning" else "error"
+        )
+
+        # 送信成功時に履歴を記録
+        if sent:
+            throttle.record_notification(metric_type, threshold_level, current_value)
+            print(f"✅ {metric_type}の通知を送信しました（理由: {reason}）")
+
+
+def is_metric_alert(alert: str, metric_type: str) -> bool:
+    """
+    アラートメッセージが特定のメトリクスに関するものかを判定する
+
+    Args:
+        alert: アラートメッセージ
+        metric_type: メトリクスタイプ（cpu, memory, disk, cgroup:<名前>:<cpu|memory>）
+
+    Returns:
+        bool: 該当する場合True
+    """
+    return metric_label(metric_type) in alert
+
+
+def get_process_info_for_metric(metric_type: str, usage: dict) -> str:
+    """
+    指定されたメトリクスに対応するプロセス情報を取得する
+
+    Args:
+        metric_type: メトリクスタイプ（cpu, memory, disk）
+        usage: リソース使用率データ（プロセス情報を含む）
+
+    Returns:
+        str: フォーマットされたプロセス情報（上位3プロセス）
+    """
+    key = {"cpu": "cpu_by_process", "memory": "mem_by_process"}.get(metric_type)
+    # ディスクの場合はプロセス情報は表示しない（ディスク使用量はプロセス単位で取得困難）
+    if key is None:
+        return ""
+    return "\n".join(
+        f"{i}. {format_process_entry(proc, metric_type)}"
+        for i, proc in enumerate(usage.get(key, [])[:3], 1)
+    )
+
+
+def check_logs(config: dict, watcher: Optional[LogWatcher] = None) -> List[str]:
+    """
+    ログの増加行数を監視し、急増していれば末尾の抜粋を添えて通知する。
+
+    Args:
+        config: 設定ファイルの内容
+        watcher: ログ読み取り位置を保持する LogWatcher（Noneの場合は新規作成、常駐モードでは使い回す）
+
+    Returns:
+        list: 警戒メッセージのリスト
+    """
+    # ログ監視と差分行数取得
+    watcher = watcher or LogWatcher()
+    with span("log_watch"):
+        diff_results = watcher.watch_logs()  # {'/var/log/messages': 50, ...}
+
+    # ログ末尾抜粋の設定を取得
+    log_analysis_cfg = config.get("log_analysis", {})
+    tail_lines = log_analysis_cfg.get("tail_lines", 10)
+    max_line_length = log_analysis_cfg.get("max_line_length", 500)
+
+    alerts = []
+    alert_details = []  # (alert, log_path, tail_lines)のタプルリスト
+
+    for path, line_count in diff_results.items():
+        alert = check_log_anomaly(path, line_count, config)
+        if alert:
+            print(f"⚠️ {alert}")
+            alerts.append(alert)
+
+            # ログ末尾を抽出（設定で有効な場合）
+            tail_content = []
+            if tail_lines > 0:
+                try:
+                    tail_content = extract_log_tail(path, tail_lines, max_line_length)
+                except Exception as e:
+                    print(f"⚠️ ログ末尾の抽出に失敗: {e}")
+                    # エラーでも通知は継続
+
+            alert_details.append((alert, path, tail_content))
+
+    # 警戒がある場合は通知
+    if alerts:
+        # メッセージを作成
+        message_parts = ["⚠️ Komon ログ警戒情報:"]
+
+        for alert, log_path, tail_content in alert_details:
+            message_parts.append(f"\n- {alert}")
+
+            # 末尾抜粋を追加
+            if tail_content:
+                message_parts.append(f"\n📄 ログファイル: {log_path}")
+                message_parts.append(f"📋 末尾 {len(tail_content)} 行:")
+                message_parts.append("```")
+                message_parts.extend(tail_content)
+                message_parts.append("```")
+
+        # ログ監視のメタデータ
+        total_lines = sum(diff_results.values())
+        metadata = {
+            "metric_type": "log",
+            "metric_value": float(total_lines)
+        }
+
+        # 統一Webhook通知（新形式 + フォールバック）
+        send_notification_with_fallback(
+            message="\n".join(message_parts),
+            settings=config,
+            metadata=metadata,
+            title="Komon ログ異常検知",
+            level="warning"
+        )
+
+    else:
+        print("✅ ログに異常はありません。")
+
+    return alerts
+
+
+def check_log_trends(config: dict) -> List[str]:
+    """
+    監視対象ログの傾向を分析し、急増の可能性があれば通知する。
+
+    Args:
+        config: 設定ファイルの内容
+
+    Returns:
+        list: 急増の可能性があるログの分析結果のリスト
+    """
+    # 監視対象ログを取得
+    monitor_targets = config.get("log_monitor_targets", {}) or {}
+    log_ids = [path.strip("/").replace("/", "_") if path != "systemd journal" else "systemd_journal"
+               for path, enabled in monitor_targets.items() if enabled]
+
+    if not log_ids:
+        print("⚠️ 有効なログ監視対象が設定されていません。")
+        return []
+
+    # 閾値取得（なければデフォルト）
+    threshold = config.get("log_trend_threshold", 30)
+
+    # ログ傾向分析の実行
+    print("🔍 ログ傾向分析を開始します")
+    alerts = []
+    for log_id in log_ids:
+        result = analyze_log_trend(log_id, threshold_percent=threshold)
+        print(result)
+        if "急増の可能性" in result:
+            alerts.append(result)
+
+    # 通知が必要な場合のみ送信
+    if alerts:
+        message = "⚠️ Komon ログ傾向警戒情報:\n" + "\n".join(alerts)
+
+        # 統一Webhook通知（新形式 + フォールバック）
+        send_notification_with_fallback(
+            message=message,
+            settings=config,
+            metadata=None,
+            title="Komon ログ傾向警戒情報",
+            level="warning"
+        )
+
+    else:
+        print("✅ 異常な傾向は検出されませんでした。")
+
+    return alerts
@@ -17,6 +17,8 @@ class LogWatcher:
     
     def __init__(self, state_dir: str = STATE_DIR):
         self.state_dir = state_dir
+        # 読み取り位置のメモリキャッシュ（常駐モードで毎回の読み込みを省く）
+        self._positions = {}
         os.makedirs(state_dir, exist_ok=True)
     
     def _get_state_file(self, log_path: str) -> str:
@@ -26,6 +28,9 @@ class LogWatcher:
     
     def _load_last_position(self, log_path: str) -> int:
         """前回の読み取り位置を取得"""
+        if log_path in self._positions:
+            return self._positions[log_path]
+        
         state_file = self._get_state_file(log_path)
         if os.path.exists(state_file):
             try:
@@ -37,6 +42,7 @@ class LogWatcher:
     
     def _save_position(self, log_path: str, position: int):
         """現在の読み取り位置を保存"""
+        self._positions[log_path] = position
         state_file = self._get_state_file(log_path)
         try:
             with open(state_file, "wb") as f:
@@ -8,17 +8,20 @@
 import logging
 import time
 from typing import List, Dict, Any, Optional
-import psutil
+
+from .monitor import ProcessSnapshot
+from .process_index import SCRIPT_EXTENSIONS, extract_script_name
 
 logger = logging.getLogger(__name__)
 
 # 対象とするスクリプト拡張子
-TARGET_EXTENSIONS = ('.py', '.sh', '.rb', '.pl')
+TARGET_EXTENSIONS = SCRIPT_EXTENSIONS
 
 
 def detect_long_running_processes(
     threshold_seconds: int = 3600,
-    target_extensions: Optional[List[str]] = None
+    target_extensions: Optional[List[str]] = None,
+    snapshot: Optional[ProcessSnapshot] = None
 ) -> List[Dict[str, Any]]:
     """
     長時間実行プロセスを検出
@@ -26,6 +29,7 @@ def detect_long_running_processes(
     Args:
         threshold_seconds: 閾値（秒）。この時間以上実行されているプロセスを検出
         target_extensions: 対象拡張子のリスト。Noneの場合はデフォルト値を使用
+        snapshot: 共有するプロセススナップショット（Noneの場合は新規に取得）
     
     Returns:
         長時間実行プロセスのリスト
@@ -50,6 +54,7 @@ def detect_long_running_processes(
     # 対象拡張子の設定
     if target_extensions is None:
         target_extensions = list(TARGET_EXTENSIONS)
+    use_indexed = tuple(target_extensions) == SCRIPT_EXTENSIONS
     
     # 現在時刻を取得
     current_time = time.time()
@@ -58,33 +63,36 @@ def detect_long_running_processes(
     long_running = []
     
     try:
-        for proc in psutil.process_iter(['pid', 'cmdline', 'create_time']):
+        if snapshot is None:
+            snapshot = ProcessSnapshot.take()
+        
+        for proc in snapshot:
             try:
-                cmdline = proc.info['cmdline']
+                cmdline = proc['cmdline']
                 if not cmdline:
                     continue
                 
-                # スクリプト名を抽出
-                script_name = _extract_script_name(cmdline, target_extensions)
+                # スクリプト名を抽出（既定の拡張子ならプロセスインデックスの解析結果を再利用）
+                if use_indexed and 'script' in proc:
+                    script_name = proc['script']
+                else:
+                    script_name = _extract_script_name(cmdline, target_extensions)
                 if not script_name:
                     continue
                 
                 # 実行時間を計算
-                create_time = proc.info['create_time']
+                create_time = proc['create_time']
                 runtime_seconds = int(current_time - create_time)
                 
                 # 閾値以上なら結果に追加
                 if runtime_seconds >= threshold_seconds:
                     long_running.append({
                         'script': script_name,
-                        'pid': proc.info['pid'],
+                        'pid': proc['pid'],
                         'runtime_seconds': runtime_seconds,
                         'runtime_formatted': _format_duration(runtime_seconds)
                     })
             
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                # プロセスが終了した、またはアクセス拒否された場合はスキップ
-                continue
             except Exception as e:
                 logger.debug("Error processing process: %s", e)
                 continue
@@ -128,23 +136,7 @@ def _extract_script_name(
         ['/bin/bash', '/path/to/script.sh'] → 'script.sh'
         ['python', '-m', 'module'] → None（モジュール実行は対象外）
     """
-    if not cmdline or len(cmdline) == 0:
-        return None
-    
-    # モジュール実行（python -m module）は対象外
-    if '-m' in cmdline:
-        return None
-    
-    # コマンドライン引数を走査
-    for arg in cmdline:
-        # 対象拡張子を持つファイルを探す
-        for ext in target_extensions:
-            if arg.endswith(ext):
-                # ファイル名のみを抽出（パスを除去）
-                import os
-                return os.path.basename(arg)
-    
-    return None
+    return extract_script_name(cmdline, target_extensions)
 
 
 def _format_duration(seconds: int) -> str:
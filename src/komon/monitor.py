@@ -5,18 +5,622 @@ CPU、メモリ、ディスク使用率の収集と、
 プロセス別の詳細情報取得を行います。
 """
 
+import heapq
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
 import psutil
 
+from .disk_monitor import collect_disk_usage
+from . import storage
+from .process_index import ProcessIndex, get_process_index
+from .timings import span
+
+logger = logging.getLogger(__name__)
+
+# システムCPU時間カウンタの保存先（前回実行との差分計算用）
+CPU_STATE_FILE = "data/state/cpu_times.json"
+CPU_SAMPLE_MAX_AGE = 3600  # これより古い前回サンプルは使わない（秒）
+CPU_SAMPLE_MIN_INTERVAL = 0.1  # 差分計算に必要な最小間隔（秒）
+CPU_FALLBACK_INTERVAL = 0.1  # 前回サンプルがない場合の測定時間（秒）
+
+# プロセス別CPU時間キャッシュの保存先（{pid: [create_time, cpu秒]}）
+PROC_CPU_STATE_FILE = "data/state/proc_cpu_times.json"
+
+# スナップショットで1回だけ取得するプロセス属性
+SNAPSHOT_ATTRS = [
+    'pid', 'ppid', 'uids', 'name', 'cmdline', 'create_time',
+    'cpu_times', 'memory_info'
+]
+
+# 上位プロセスのグループ化方法（settings.yml の output.process_group_by）
+PROCESS_GROUP_BY = ("name", "user", "parent", "cgroup", "none")
+DEFAULT_PROCESS_GROUP_BY = "name"
+
+# ストリーミング集計で保持するグループ数の上限
+TOPK_CAPACITY = 256
+
+# 収集バックエンド（settings.yml の system.collector_backend で選択）
+DEFAULT_BACKEND = "psutil"
+PROC_ROOT = "/proc"
+
+# /proc/stat の cpu 行のフィールド名（psutil.cpu_times() と同じ並び）
+PROC_STAT_CPU_FIELDS = (
+    'user', 'nice', 'system', 'idle', 'iowait',
+    'irq', 'softirq', 'steal', 'guest', 'guest_nice'
+)
+
+# プロセス別CPU時間（psutilのpcputimesと同じく user/system 属性を持つ）
+ProcCpuTimes = namedtuple('ProcCpuTimes', ['user', 'system'])
+
+# インデックス済みプロセスの cmdline を返す関数（pid, create_time, name）
+KnownCmdline = Callable[[Optional[int], Optional[float], Optional[str]], Optional[List[str]]]
 
-def collect_resource_usage() -> dict:
+
+class CollectorBackend(ABC):
+    """
+    リソース収集バックエンドの基底クラス
+    
+    システムCPU時間、メモリ、プロセステーブルの取得方法を抽象化します。
+    """
+    
+    name = ""
+    
+    @abstractmethod
+    def cpu_times(self) -> Dict[str, float]:
+        """システム全体のCPU時間カウンタ（秒）を返す"""
+        pass
+    
+    @abstractmethod
+    def cpu_percent(self, interval: float) -> float:
+        """interval秒間のシステムCPU使用率（%）を実測する"""
+        pass
+    
+    @abstractmethod
+    def virtual_memory(self) -> Dict[str, float]:
+        """メモリ情報 {'total': バイト, 'percent': 使用率} を返す"""
+        pass
+    
+    @abstractmethod
+    def iter_processes(self, known: Optional[KnownCmdline] = None) -> Iterator[Dict[str, Any]]:
+        """
+        プロセス情報を1件ずつ返す
+        
+        Args:
+            known: インデックス済みプロセスの cmdline を返す関数
+                (pid, create_time, name) -> list または None。
+                指定した場合、返された cmdline を使い読み込みを省略する
+        
+        Yields:
+            dict: pid, ppid, uid, name, cmdline, create_time, cpu_times, rss
+        """
+        pass
+
+
+class PsutilBackend(CollectorBackend):
+    """psutilを使った収集バックエンド（全OS対応）"""
+    
+    name = "psutil"
+    
+    def cpu_times(self) -> Dict[str, float]:
+        return psutil.cpu_times()._asdict()
+    
+    def cpu_percent(self, interval: float) -> float:
+        return psutil.cpu_percent(interval=interval)
+    
+    def virtual_memory(self) -> Dict[str, float]:
+        vm = psutil.virtual_memory()
+        return {'total': vm.total, 'percent': vm.percent}
+    
+    def iter_processes(self, known: Optional[KnownCmdline] = None) -> Iterator[Dict[str, Any]]:
+        # インデックスがある場合、cmdline は未知のプロセスだけ個別に読む
+        attrs = SNAPSHOT_ATTRS if known is None else [a for a in SNAPSHOT_ATTRS if a != 'cmdline']
+        for proc in psutil.process_iter(attrs):
+            try:
+                info = proc.info
+                memory_info = _info_value(info, 'memory_info')
+                uids = _info_value(info, 'uids')
+                pid = _info_value(info, 'pid')
+                name = _info_value(info, 'name')
+                create_time = _info_value(info, 'create_time')
+                if 'cmdline' in info:
+                    cmdline = info['cmdline']
+                else:
+                    cmdline = known(pid, create_time, name)
+                    if cmdline is None:
+                        cmdline = _psutil_cmdline(proc)
+                yield {
+                    'pid': pid,
+                    'ppid': _info_value(info, 'ppid'),
+                    'uid': uids.real if uids is not None else None,
+                    'name': name,
+                    'cmdline': cmdline or [],
+                    'create_time': create_time,
+                    'cpu_times': _info_value(info, 'cpu_times'),
+                    'rss': memory_info.rss if memory_info is not None else 0,
+                }
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+
+
+class ProcfsBackend(CollectorBackend):
+    """
+    Linuxの /proc を直接読む収集バックエンド
+    
+    /proc/stat、/proc/meminfo と各PIDの stat / cmdline を os.scandir と
+    使い回しのバッファで読み込み、psutil.Process オブジェクトの生成を省きます。
+    常駐メモリ量は statm と同じ値が stat の rss フィールドにあるため、
+    PIDごとに開くファイルは stat と cmdline の2つだけです。
+    """
+    
+    name = "procfs"
+    
+    def __init__(self, proc_root: str = PROC_ROOT):
+        """
+        Args:
+            proc_root: procfsのマウント位置（テスト・ベンチマーク用）
+        """
+        self.proc_root = proc_root
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        self._boot_time: Optional[float] = None
+        self._buffer = bytearray(4096)
+    
+    def _read(self, path: str) -> bytes:
+        """ファイルを使い回しのバッファに読み込む（収まらない場合は全体を読む）"""
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            size = os.readv(fd, [self._buffer])
+            if size < len(self._buffer):
+                return bytes(self._buffer[:size])
+            chunks = [bytes(self._buffer)]
+            while True:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            return b"".join(chunks)
+        finally:
+            os.close(fd)
+    
+    def _read_proc_stat(self) -> Dict[str, Any]:
+        """/proc/stat から cpu 行と btime を読み込む"""
+        result = {}
+        for line in self._read(f"{self.proc_root}/stat").splitlines():
+            if line.startswith(b"cpu "):
+                values = [int(v) / self.clock_ticks for v in line.split()[1:]]
+                result['cpu'] = dict(zip(PROC_STAT_CPU_FIELDS, values))
+            elif line.startswith(b"btime "):
+                result['btime'] = float(line.split()[1])
+        return result
+    
+    @property
+    def boot_time(self) -> float:
+        if self._boot_time is None:
+            self._boot_time = self._read_proc_stat().get('btime', 0.0)
+        return self._boot_time
+    
+    def cpu_times(self) -> Dict[str, float]:
+        return self._read_proc_stat()['cpu']
+    
+    def cpu_percent(self, interval: float) -> float:
+        before = self.cpu_times()
+        time.sleep(interval)
+        busy = _busy_percent(before, self.cpu_times())
+        return busy if busy is not None else 0.0
+    
+    def virtual_memory(self) -> Dict[str, float]:
+        meminfo = {}
+        for line in self._read(f"{self.proc_root}/meminfo").splitlines():
+            key, _, value = line.partition(b":")
+            if key in (b"MemTotal", b"MemAvailable"):
+                meminfo[key] = int(value.split()[0]) * 1024
+        total = meminfo.get(b"MemTotal", 0)
+        available = meminfo.get(b"MemAvailable", 0)
+        percent = round((total - available) / total * 100, 1) if total else 0.0
+        return {'total': total, 'percent': percent}
+    
+    def iter_processes(self, known: Optional[KnownCmdline] = None) -> Iterator[Dict[str, Any]]:
+        boot_time = self.boot_time
+        with os.scandir(self.proc_root) as entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                try:
+                    yield self._read_process(int(entry.name), boot_time, known)
+                except (FileNotFoundError, ProcessLookupError, PermissionError, ValueError, IndexError):
+                    # 走査中に終了したプロセスや読めないプロセスはスキップ
+                    continue
+    
+    def _read_process(self, pid: int, boot_time: float, known: Optional[KnownCmdline] = None) -> Dict[str, Any]:
+        """1プロセス分の stat / cmdline を読み込む（インデックス済みなら cmdline は読まない）"""
+        base = f"{self.proc_root}/{pid}"
+        stat = self._read(f"{base}/stat")
+        
+        # comm は括弧や空白を含み得るため、最後の ')' で区切る
+        comm_end = stat.rfind(b")")
+        name = stat[stat.find(b"(") + 1:comm_end].decode("utf-8", "replace")
+        fields = stat[comm_end + 2:].split()
+        ppid = int(fields[1])
+        utime = int(fields[11]) / self.clock_ticks
+        stime = int(fields[12]) / self.clock_ticks
+        create_time = boot_time + int(fields[19]) / self.clock_ticks
+        rss = int(fields[21]) * self.page_size
+        
+        cmdline = known(pid, create_time, name) if known is not None else None
+        if cmdline is None:
+            raw_cmdline = self._read(f"{base}/cmdline")
+            cmdline = [
+                arg.decode("utf-8", "replace")
+                for arg in raw_cmdline.rstrip(b"\0").split(b"\0")
+            ] if raw_cmdline else []
+        
+        # comm は15文字で切り詰められるため、psutilと同様に cmdline から補う
+        if len(name) >= 15 and cmdline:
+            exe_name = os.path.basename(cmdline[0])
+            if exe_name.startswith(name):
+                name = exe_name
+        
+        return {
+            'pid': pid,
+            'ppid': ppid,
+            'uid': os.stat(base).st_uid,
+            'name': name,
+            'cmdline': cmdline,
+            'create_time': create_time,
+            'cpu_times': ProcCpuTimes(utime, stime),
+            'rss': rss,
+        }
+
+
+_BACKENDS = {
+    "psutil": PsutilBackend,
+    "procfs": ProcfsBackend,
+}
+
+# グローバルインスタンス（シングルトン）
+_backend_instance: Optional[CollectorBackend] = None
+
+
+def get_collector_backend(config: Optional[Dict[str, Any]] = None) -> CollectorBackend:
+    """
+    収集バックエンドのグローバルインスタンスを取得
+    
+    settings.yml の system.collector_backend（psutil / procfs）で選択します。
+    procfs が使えない環境では psutil にフォールバックします。
+    
+    Args:
+        config: 設定辞書（Noneの場合は現在のインスタンスを返す）
+    
+    Returns:
+        CollectorBackend: 収集バックエンド
+    """
+    global _backend_instance
+    
+    if config is None:
+        if _backend_instance is None:
+            _backend_instance = PsutilBackend()
+        return _backend_instance
+    
+    name = config.get("system", {}).get("collector_backend", DEFAULT_BACKEND)
+    if name not in _BACKENDS:
+        logger.warning("Unknown collector_backend: %s, using %s", name, DEFAULT_BACKEND)
+        name = DEFAULT_BACKEND
+    if name == "procfs" and not os.path.exists(f"{PROC_ROOT}/stat"):
+        logger.warning("procfs is not available, using psutil backend")
+        name = "psutil"
+    
+    if _backend_instance is None or _backend_instance.name != name:
+        _backend_instance = _BACKENDS[name]()
+    return _backend_instance
+
+
+class ProcessSnapshot:
+    """
+    プロセステーブルのスナップショット
+    
+    psutil.process_iter() を1回だけ走査し、各モジュールが必要とする
+    属性（pid, name, cmdline, create_time, cpu_times, memory_info）を
+    まとめて保持します。1回の実行の中で監視・検出の各モジュールが
+    同じスナップショットを参照することで、/proc の再走査を避けます。
+    
+    プロセス別CPU使用率は、前回実行時に保存したCPU時間との差分から
+    算出するため、測定のための待ち時間は発生しません。
+    """
+    
+    def __init__(
+        self,
+        processes: List[Dict[str, Any]],
+        total_memory: int = 0,
+        taken_at: Optional[float] = None
+    ):
+        """
+        Args:
+            processes: プロセス情報の辞書のリスト
+            total_memory: 物理メモリの総量（バイト）
+            taken_at: 取得時刻（UNIX時間）
+        """
+        self.processes = processes
+        self.total_memory = total_memory
+        self.taken_at = taken_at if taken_at is not None else time.time()
+    
+    @classmethod
+    def take(
+        cls,
+        backend: Optional[CollectorBackend] = None,
+        index: Optional[ProcessIndex] = None
+    ) -> "ProcessSnapshot":
+        """
+        現在のプロセステーブルを1回の走査で取得します。
+        
+        前回までに見たプロセス（pid, create_time が同じもの）は
+        プロセスインデックスの cmdline と解析結果（script, kind）を使い、
+        新しく起動したプロセスだけ cmdline を読み込みます。
+        
+        Args:
+            backend: 収集バックエンド（Noneの場合は設定済みのものを使用）
+            index: プロセスインデックス（Noneの場合はグローバルインスタンス）
+        
+        Returns:
+            ProcessSnapshot: 取得したスナップショット
+        """
+        if backend is None:
+            backend = get_collector_backend()
+        if index is None:
+            index = get_process_index()
+        
+        try:
+            total_memory = backend.virtual_memory()['total']
+        except Exception:
+            total_memory = 0
+        
+        with span("process_scan"):
+            processes = []
+            for entry in backend.iter_processes(known=index.lookup):
+                rss = entry['rss']
+                entry['memory_percent'] = (rss / total_memory * 100) if total_memory else 0.0
+                entry['cpu_percent'] = 0.0
+                processes.append(index.observe(entry))
+            
+            snapshot = cls(processes, total_memory)
+            snapshot._apply_cpu_cache(PROC_CPU_STATE_FILE)
+            index.retain(processes)
+            index.save()
+        return snapshot
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.processes)
+    
+    def __len__(self) -> int:
+        return len(self.processes)
+    
+    def top(self, key: str, count: int) -> List[Dict[str, Any]]:
+        """
+        指定キーの降順で上位のプロセスを返します。
+        
+        Args:
+            key: ソートに使うキー（'cpu_percent', 'rss', 'memory_percent' など）
+            count: 取得件数
+        
+        Returns:
+            list: プロセス情報のリスト
+        """
+        return heapq.nlargest(
+            count,
+            self.processes,
+            key=lambda p: p.get(key) or 0
+        )
+    
+    def _apply_cpu_cache(self, state_file: str) -> None:
+        """
+        前回のCPU時間キャッシュとの差分でプロセス別CPU使用率を設定し、
+        キャッシュを今回の値で置き換えます（消えたPIDは削除されます）。
+        
+        (pid, create_time) が一致するエントリのみ差分に使い、PIDが再利用された
+        プロセスやキャッシュにないプロセス、キャッシュが近すぎる・古すぎる
+        （CPU_SAMPLE_MIN_INTERVAL〜CPU_SAMPLE_MAX_AGE の範囲外）場合は起動からの平均使用率とします。
+        
+        Args:
+            state_file: キャッシュファイルのパス
+        """
+        previous = _load_proc_cpu_cache(state_file)
+        prev_time = previous.get("timestamp", 0.0)
+        prev_procs = previous.get("procs", {})
+        elapsed = self.taken_at - prev_time
+        usable = CPU_SAMPLE_MIN_INTERVAL <= elapsed <= CPU_SAMPLE_MAX_AGE
+        
+        cache = {}
+        for entry in self.processes:
+            cpu_times = entry['cpu_times']
+            create_time = entry['create_time']
+            if cpu_times is None or create_time is None or entry['pid'] is None:
+                continue
+            
+            cpu_seconds = cpu_times.user + cpu_times.system
+            key = str(entry['pid'])
+            cached = prev_procs.get(key)
+            
+            if cached and cached[0] == create_time and usable:
+                percent = (cpu_seconds - cached[1]) / elapsed * 100
+            else:
+                lifetime = self.taken_at - create_time
+                percent = cpu_seconds / lifetime * 100 if lifetime > 0 else 0.0
+            
+            entry['cpu_percent'] = round(max(0.0, percent), 1)
+            cache[key] = [create_time, round(cpu_seconds, 2)]
+        
+        _save_proc_cpu_cache(state_file, {"timestamp": self.taken_at, "procs": cache})
+
+
+def _load_proc_cpu_cache(state_file: str) -> dict:
+    """プロセス別CPU時間キャッシュを読み込む"""
+    try:
+        cache = json.loads(storage.read_text(state_file))
+        return cache if isinstance(cache, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning("Failed to load process CPU cache: %s", e)
+        return {}
+
+
+def _save_proc_cpu_cache(state_file: str, cache: dict) -> None:
+    """プロセス別CPU時間キャッシュを保存する"""
+    try:
+        storage.write_text(state_file, json.dumps(cache, separators=(",", ":")))
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning("Failed to save process CPU cache: %s", e)
+
+
+def _info_value(info, key: str):
+    """proc.info から値を取得する（キーがない場合はNone）"""
+    try:
+        return info[key]
+    except KeyError:
+        return None
+
+
+def _psutil_cmdline(proc) -> List[str]:
+    """psutil.Process の cmdline を読む（権限がない場合は空リスト）"""
+    try:
+        return proc.cmdline()
+    except psutil.AccessDenied:
+        return []
+
+
+def sample_cpu_percent(backend: Optional[CollectorBackend] = None) -> float:
+    """
+    システム全体のCPU使用率を、前回実行時のカウンタとの差分で算出します。
+    
+    /proc/stat 由来のCPU時間カウンタを状態ファイルに保存しておき、
+    次回実行時はその差分から使用率を計算するため、待ち時間なしで返ります。
+    前回サンプルがない・古すぎる・再起動でカウンタが戻った場合のみ、
+    短い測定時間（CPU_FALLBACK_INTERVAL）で実測します。
+    
+    Args:
+        backend: 収集バックエンド（Noneの場合は設定済みのものを使用）
+    
+    Returns:
+        float: CPU使用率（%）
+    """
+    if backend is None:
+        backend = get_collector_backend()
+    
+    now = time.time()
+    current = backend.cpu_times()
+    
+    cpu = None
+    previous = _load_cpu_sample(CPU_STATE_FILE)
+    if previous is not None:
+        cpu = _cpu_percent_between(previous, current, now)
+    
+    if cpu is None:
+        # 使える前回サンプルがない場合は短時間だけ実測する
+        cpu = backend.cpu_percent(CPU_FALLBACK_INTERVAL)
+        now = time.time()
+        current = backend.cpu_times()
+    
+    _save_cpu_sample(CPU_STATE_FILE, now, current)
+    return cpu
+
+
+def _cpu_percent_between(previous: dict, current: dict, now: float) -> Optional[float]:
+    """
+    前回サンプルと今回のCPU時間カウンタからCPU使用率を計算します。
+    
+    Args:
+        previous: 前回サンプル {"timestamp": float, "times": {...}}
+        current: 今回のCPU時間カウンタ
+        now: 今回の取得時刻（UNIX時間）
+    
+    Returns:
+        float: CPU使用率（%）、計算できない場合は None
+    """
+    try:
+        elapsed = now - float(previous["timestamp"])
+        prev_times = previous["times"]
+    except (KeyError, TypeError, ValueError):
+        return None
+    
+    if not (CPU_SAMPLE_MIN_INTERVAL <= elapsed <= CPU_SAMPLE_MAX_AGE):
+        return None
+    return _busy_percent(prev_times, current)
+
+
+def _busy_percent(before: dict, after: dict) -> Optional[float]:
+    """
+    2つのCPU時間カウンタの差分からCPU使用率を計算します。
+    
+    Args:
+        before: 前のCPU時間カウンタ
+        after: 後のCPU時間カウンタ
+    
+    Returns:
+        float: CPU使用率（%）、計算できない場合は None
+    """
+    try:
+        if set(before) != set(after):
+            return None
+        deltas = {key: after[key] - before[key] for key in after}
+    except (KeyError, TypeError, ValueError):
+        return None
+    
+    # 再起動などでカウンタが戻った場合は使えない
+    if any(delta < 0 for delta in deltas.values()):
+        return None
+    
+    # guest/guest_nice は user/nice に含まれるため二重計上しない（psutilと同じ扱い）
+    total = sum(deltas.values()) - deltas.get("guest", 0) - deltas.get("guest_nice", 0)
+    idle = deltas.get("idle", 0) + deltas.get("iowait", 0)
+    if total <= 0:
+        return None
+    
+    busy = max(0.0, min(100.0, (total - idle) / total * 100))
+    return round(busy, 1)
+
+
+def _load_cpu_sample(state_file: str) -> Optional[dict]:
+    """前回のCPU時間カウンタを読み込む"""
+    try:
+        sample = json.loads(storage.read_text(state_file))
+        return sample if isinstance(sample, dict) else None
+    except FileNotFoundError:
+        return None
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning("Failed to load CPU sample: %s", e)
+        return None
+
+
+def _save_cpu_sample(state_file: str, timestamp: float, times: dict) -> None:
+    """今回のCPU時間カウンタを保存する"""
+    try:
+        storage.write_text(state_file, json.dumps({"timestamp": timestamp, "times": times}))
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning("Failed to save CPU sample: %s", e)
+
+
+def collect_resource_usage(backend: Optional[CollectorBackend] = None) -> dict:
     """
     基本的なリソース使用率を収集します。
     
+    Args:
+        backend: 収集バックエンド（Noneの場合は設定済みのものを使用）
+    
     Returns:
         dict: cpu, mem, disk の使用率（%）
     """
-    cpu = psutil.cpu_percent(interval=1)
-    mem = psutil.virtual_memory().percent
+    if backend is None:
+        backend = get_collector_backend()
+    
+    with span("cpu_sample"):
+        cpu = sample_cpu_percent(backend)
+    mem = backend.virtual_memory()['percent']
     disk = psutil.disk_usage('/').percent
     
     return {
@@ -26,42 +630,249 @@ def collect_resource_usage() -> dict:
     }
 
 
-def collect_detailed_resource_usage() -> dict:
+class TopKAggregator:
+    """
+    プロセスを1件ずつ受け取り、上位K件を求めるストリーミング集計器
+    
+    - グループ化あり: グループごとに値を合計し、保持するグループ数は
+      capacity までに制限する（超えた場合は最小のグループを置き換える
+      Space-Saving 方式。置き換えたグループの値を引き継ぐため過小評価しない）
+    - グループ化なし: 要素数 k の最小ヒープで上位K件だけを保持する
+    
+    どちらもプロセス数に関係なくメモリ使用量は一定です。
+    """
+    
+    def __init__(self, k: int = 5, grouped: bool = True, capacity: int = TOPK_CAPACITY):
+        """
+        Args:
+            k: 取得件数
+            grouped: グループごとに合計するか
+            capacity: 保持するグループ数の上限（k 以上）
+        """
+        self.k = k
+        self.grouped = grouped
+        self.capacity = max(capacity, k)
+        self._groups: Dict[Any, List[Any]] = {}  # key -> [value, count, label]
+        self._heap: List[tuple] = []
+        self._seq = 0
+    
+    def add(self, key: Any, label: str, value: float) -> None:
+        """
+        値を1件追加します。
+        
+        Args:
+            key: グループのキー（グループ化なしの場合は無視）
+            label: 表示名
+            value: 集計する値
+        """
+        value = value or 0
+        if not self.grouped:
+            # 同じ値のときにラベルを比較しないよう、追加順を挟む
+            item = (value, self._seq, label)
+            self._seq += 1
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, item)
+            elif value > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+            return
+        
+        entry = self._groups.get(key)
+        if entry is not None:
+            entry[0] += value
+            entry[1] += 1
+            return
+        
+        base = 0
+        if len(self._groups) >= self.capacity:
+            min_key = min(self._groups, key=lambda k: self._groups[k][0])
+            base = self._groups.pop(min_key)[0]
+        self._groups[key] = [base + value, 1, label]
+    
+    def top(self) -> List[Dict[str, Any]]:
+        """
+        上位K件を返します。
+        
+        Returns:
+            list: [{'name', 'value', 'count'}, ...]（値の降順）
+        """
+        if not self.grouped:
+            return [
+                {'name': label, 'value': value, 'count': 1}
+                for value, _, label in sorted(self._heap, reverse=True)
+            ]
+        return [
+            {'name': label, 'value': value, 'count': count}
+            for value, count, label in heapq.nlargest(
+                self.k, self._groups.values(), key=lambda e: e[0]
+            )
+        ]
+
+
+@lru_cache(maxsize=256)
+def _user_name(uid: Optional[int]) -> str:
+    """UIDをユーザー名に変換する（解決できない場合はUIDの文字列）"""
+    if uid is None:
+        return "unknown"
+    try:
+        import pwd
+        return pwd.getpwuid(uid).pw_name
+    except (ImportError, KeyError):
+        return str(uid)
+
+
+def _read_cgroup_path(pid: Optional[int], proc_root: str = PROC_ROOT) -> Optional[str]:
+    """/proc/<pid>/cgroup からプロセスの所属cgroupのパスを取得"""
+    try:
+        with open(os.path.join(proc_root, str(pid), "cgroup"), "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    # cgroup v2 の行（"0::/system.slice/nginx.service"）を優先する
+    for line in lines:
+        if line.startswith("0::"):
+            return line[3:]
+    return lines[-1].split(":", 2)[-1] if lines else None
+
+
+def _parent_group_resolver(processes: List[Dict[str, Any]]):
+    """
+    親プロセスツリー単位のグループ解決関数を作成する
+    
+    PID 1（init）の直下にある祖先プロセスをグループとするため、
+    php-fpm や chrome のワーカーは親プロセスと同じグループになります。
+    """
+    parents = {p.get('pid'): (p.get('ppid'), p.get('name')) for p in processes}
+    resolved: Dict[Any, Any] = {}
+    
+    def resolve(proc: Dict[str, Any]):
+        pid = proc.get('pid')
+        chain = []
+        current = pid
+        while current in parents and current not in resolved and len(chain) < 64:
+            chain.append(current)
+            ppid = parents[current][0]
+            if ppid in (None, 0, 1) or ppid not in parents:
+                resolved[current] = (current, parents[current][1])
+                break
+            current = ppid
+        root = resolved.get(current, (pid, proc.get('name')))
+        for visited in chain:
+            resolved[visited] = root
+        return root
+    
+    return resolve
+
+
+def _group_resolver(group_by: str, processes: List[Dict[str, Any]]):
+    """group_by に応じて、プロセスから (グループキー, 表示名) を返す関数を作成する"""
+    if group_by == "user":
+        return lambda p: (p.get('uid'), _user_name(p.get('uid')))
+    if group_by == "parent":
+        return _parent_group_resolver(processes)
+    if group_by == "cgroup":
+        def resolve_cgroup(p):
+            path = _read_cgroup_path(p.get('pid'))
+            if path is None:
+                return p.get('name'), p.get('name')
+            return path, os.path.basename(path.rstrip("/")) or "/"
+        return resolve_cgroup
+    return lambda p: (p.get('name'), p.get('name'))
+
+
+def aggregate_top_processes(
+    processes: List[Dict[str, Any]],
+    key: str,
+    count: int = 5,
+    group_by: str = DEFAULT_PROCESS_GROUP_BY,
+    capacity: int = TOPK_CAPACITY
+) -> List[Dict[str, Any]]:
+    """
+    プロセスをグループごとに合計し、上位のグループを返します。
+    
+    Args:
+        processes: プロセス情報の辞書のリスト（ProcessSnapshot も可）
+        key: 集計する値のキー（'cpu_percent', 'rss' など）
+        count: 取得件数
+        group_by: グループ化方法（name, user, parent, cgroup, none）
+        capacity: 保持するグループ数の上限
+    
+    Returns:
+        list: [{'name', 'value', 'count'}, ...]（値の降順）
+    """
+    if group_by not in PROCESS_GROUP_BY:
+        logger.warning("Unknown process_group_by: %s, using %s", group_by, DEFAULT_PROCESS_GROUP_BY)
+        group_by = DEFAULT_PROCESS_GROUP_BY
+    
+    aggregator = TopKAggregator(count, grouped=group_by != "none", capacity=capacity)
+    resolve = _group_resolver(group_by, list(processes) if group_by == "parent" else [])
+    for proc in processes:
+        group_key, label = resolve(proc)
+        aggregator.add(group_key, label, proc.get(key))
+    return aggregator.top()
+
+
+def format_process_entry(proc: Dict[str, Any], metric_type: str) -> str:
+    """
+    上位プロセスの1件を通知用に整形します。
+    
+    例: "php-fpm (48 workers): 2.1 GB", "python: 25.5%"
+    
+    Args:
+        proc: cpu_by_process / mem_by_process の要素
+        metric_type: "cpu" または "memory"
+    
+    Returns:
+        str: 整形した文字列
+    """
+    label = proc['name']
+    if proc.get('count', 1) > 1:
+        label = f"{label} ({proc['count']} workers)"
+    if metric_type == "cpu":
+        return f"{label}: {proc['cpu']:.1f}%"
+    mem = proc['mem']
+    if mem >= 1024:
+        return f"{label}: {mem / 1024:.1f} GB"
+    return f"{label}: {mem:.1f}MB"
+
+
+def collect_detailed_resource_usage(
+    snapshot: Optional[ProcessSnapshot] = None,
+    backend: Optional[CollectorBackend] = None,
+    group_by: str = DEFAULT_PROCESS_GROUP_BY
+) -> dict:
     """
     プロセス別の詳細情報を含むリソース使用率を収集します。
     
+    上位プロセスは group_by に従ってまとめて集計します（既定は実行ファイル名）。
+    各要素の count はグループに含まれるプロセス数です。
+    
+    Args:
+        snapshot: 共有するプロセススナップショット（Noneの場合は新規に取得）
+        backend: 収集バックエンド（Noneの場合は設定済みのものを使用）
+        group_by: グループ化方法（name, user, parent, cgroup, none）
+    
     Returns:
-        dict: 基本使用率 + プロセス別CPU/メモリ情報
+        dict: 基本使用率 + プロセス別CPU/メモリ情報 + マウント別ディスク情報
     """
-    usage = collect_resource_usage()
+    usage = collect_resource_usage(backend)
     
-    # CPU使用率上位5プロセス
-    processes = []
-    for proc in psutil.process_iter(['pid', 'name', 'cpu_percent']):
-        try:
-            processes.append({
-                'name': proc.info['name'],
-                'cpu': proc.info['cpu_percent']
-            })
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            pass
-    
-    processes.sort(key=lambda x: x['cpu'], reverse=True)
-    usage['cpu_by_process'] = processes[:5]
-    
-    # メモリ使用量上位5プロセス
-    mem_processes = []
-    for proc in psutil.process_iter(['pid', 'name', 'memory_info']):
-        try:
-            mem_mb = proc.info['memory_info'].rss / (1024 * 1024)
-            mem_processes.append({
-                'name': proc.info['name'],
-                'mem': round(mem_mb, 1)
-            })
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            pass
-    
-    mem_processes.sort(key=lambda x: x['mem'], reverse=True)
-    usage['mem_by_process'] = mem_processes[:5]
+    if snapshot is None:
+        snapshot = ProcessSnapshot.take(backend)
+    
+    # CPU使用率上位5グループ
+    usage['cpu_by_process'] = [
+        {'name': g['name'], 'cpu': round(g['value'], 1), 'count': g['count']}
+        for g in aggregate_top_processes(snapshot, 'cpu_percent', 5, group_by)
+    ]
+    
+    # メモリ使用量上位5グループ
+    usage['mem_by_process'] = [
+        {'name': g['name'], 'mem': round(g['value'] / (1024 * 1024), 1), 'count': g['count']}
+        for g in aggregate_top_processes(snapshot, 'rss', 5, group_by)
+    ]
+    
+    # マウント別のディスク・inode使用率
+    with span("disk_usage"):
+        usage['disks'] = collect_disk_usage()
     
     return usage
@@ -4,11 +4,12 @@ Network check state manager.
 Manages network check state (NG only) with retention-based auto-cleanup.
 """
 
-import json
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from komon import storage
+
 logger = logging.getLogger(__name__)
 
 
@@ -45,17 +46,16 @@ class NetworkStateManager:
     def _load(self):
         """Load state from file."""
         try:
-            if not self.state_file.exists():
+            if not storage.exists(self.state_file):
                 logger.debug("State file not found, using empty state: %s", self.state_file)
                 return {}
             
-            with open(self.state_file, 'r', encoding='utf-8') as f:
-                state = json.load(f)
+            state = storage.read_json(self.state_file)
             
             logger.debug("Loaded state: %d entries", len(state))
             return state
             
-        except json.JSONDecodeError as e:
+        except ValueError as e:
             logger.warning("State file corrupted, using empty state: %s", e)
             return {}
             
@@ -66,11 +66,8 @@ class NetworkStateManager:
     def _save(self):
         """Save state to file."""
         try:
-            # Create parent directory if not exists
-            self.state_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(self.state_file, 'w', encoding='utf-8') as f:
-                json.dump(self.state, f, indent=2, ensure_ascii=False)
+            # Write to a temp file and rename it, so a crash never leaves it truncated
+            storage.write_json(self.state_file, self.state, indent=2, ensure_ascii=False)
             
             logger.debug("Saved state: %d entries", len(self.state))
             
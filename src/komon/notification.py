@@ -12,7 +12,9 @@ from email.mime.multipart import MIMEMultipart
 from typing import Dict, Any, Optional, List
 import logging
 
-import requests
+from . import storage
+from .timings import span
+from .webhook_notifier import http_post
 
 logger = logging.getLogger(__name__)
 
@@ -39,7 +41,7 @@ def send_slack_alert(message: str, webhook_url: str, metadata: dict = None) -> b
                 return False
         
         payload = {"text": message}
-        response = requests.post(webhook_url, json=payload, timeout=10)
+        response = http_post(webhook_url, json=payload, timeout=10)
         
         if response.status_code == 200:
             print("✅ Slack通知を送信しました")
@@ -88,7 +90,7 @@ def send_discord_alert(message: str, webhook_url: str, metadata: dict = None) ->
                 return False
         
         payload = {"content": message}
-        response = requests.post(webhook_url, json=payload, timeout=10)
+        response = http_post(webhook_url, json=payload, timeout=10)
         
         if response.status_code == 204:  # Discordは204を返す
             print("✅ Discord通知を送信しました")
@@ -137,7 +139,7 @@ def send_teams_alert(message: str, webhook_url: str, metadata: dict = None) -> b
                 return False
         
         payload = {"text": message}
-        response = requests.post(webhook_url, json=payload, timeout=10)
+        response = http_post(webhook_url, json=payload, timeout=10)
         
         if response.status_code == 200:
             print("✅ Teams通知を送信しました")
@@ -322,20 +324,21 @@ def send_notification_with_fallback(
     notifiers_config = settings.get("notifiers", {})
     webhooks_config = notifiers_config.get("webhooks", [])
     
-    if webhooks_config:
-        # 新形式（統一Webhook）を使用
-        logger.info("Using unified webhook notification system")
-        return send_unified_webhook_notification(
-            message=message,
-            webhooks_config=webhooks_config,
-            metadata=metadata,
-            title=title,
-            level=level
-        )
-    else:
-        # 旧形式（個別関数）を使用
-        logger.info("Using legacy notification system (fallback)")
-        return _send_legacy_notifications(message, settings, metadata)
+    with span("notification"):
+        if webhooks_config:
+            # 新形式（統一Webhook）を使用
+            logger.info("Using unified webhook notification system")
+            return send_unified_webhook_notification(
+                message=message,
+                webhooks_config=webhooks_config,
+                metadata=metadata,
+                title=title,
+                level=level
+            )
+        else:
+            # 旧形式（個別関数）を使用
+            logger.info("Using legacy notification system (fallback)")
+            return _send_legacy_notifications(message, settings, metadata)
 
 
 def _send_legacy_notifications(
@@ -387,7 +390,6 @@ def _send_legacy_notifications(
     return success_count > 0
 
 
-import json
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -406,13 +408,16 @@ class NotificationThrottle:
         'critical': 3
     }
     
-    def __init__(self, config: dict, history_file: Optional[Path] = None):
+    def __init__(self, config: dict, history_file: Optional[Path] = None, cache_history: bool = False):
         """
         Args:
             config: settings.ymlのthrottle設定
             history_file: 履歴ファイルのパス（テスト用）
+            cache_history: Trueの場合は履歴をメモリに保持し、毎回の読み込みを省く（常駐モード用）
         """
         self.enabled = config.get('enabled', True)
+        self.cache_history = cache_history
+        self._history_cache: Optional[Dict] = None
         self.interval_minutes = config.get('interval_minutes', 60)
         self.escalation_minutes = config.get('escalation_minutes', 180)
         
@@ -560,11 +565,16 @@ class NotificationThrottle:
     
     def _load_history(self) -> Dict:
         """履歴ファイルを読み込む"""
+        if self._history_cache is not None:
+            return dict(self._history_cache)
+        
         try:
-            if self.history_file.exists():
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except (json.JSONDecodeError, IOError, IsADirectoryError) as e:
+            if storage.exists(self.history_file):
+                history = storage.read_json(self.history_file)
+                if self.cache_history:
+                    self._history_cache = dict(history)
+                return history
+        except (ValueError, IOError, IsADirectoryError) as e:
             logger.warning(f"履歴ファイルの読み込みに失敗: {e}")
             # 破損している場合は削除して新規作成
             if self.history_file.exists():
@@ -581,9 +591,11 @@ class NotificationThrottle:
     
     def _save_history(self, history: Dict) -> None:
         """履歴ファイルに保存する"""
+        if self.cache_history:
+            self._history_cache = dict(history)
+        
         try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(history, f, ensure_ascii=False, indent=2)
+            storage.write_json(self.history_file, history, ensure_ascii=False, indent=2)
         except IOError as e:
             logger.error(f"履歴ファイルの保存に失敗: {e}")
     
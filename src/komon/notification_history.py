@@ -4,11 +4,11 @@
 Komonの通知をローカルファイルに保存し、後から確認できるようにします。
 """
 
-import json
-import os
 from datetime import datetime
 from typing import Optional
 
+from . import storage
+
 
 MAX_QUEUE_SIZE = 100
 DEFAULT_QUEUE_FILE = "data/notifications/queue.json"
@@ -43,13 +43,12 @@ def save_notification(
         
         # 既存の履歴を読み込む
         queue = []
-        if os.path.exists(queue_file):
+        if storage.exists(queue_file):
             try:
-                with open(queue_file, "r", encoding="utf-8") as f:
-                    queue = json.load(f)
-                    if not isinstance(queue, list):
-                        queue = []
-            except (json.JSONDecodeError, IOError):
+                queue = storage.read_json(queue_file)
+                if not isinstance(queue, list):
+                    queue = []
+            except (ValueError, IOError):
                 # 破損したファイルは無視して新規作成
                 queue = []
         
@@ -60,12 +59,8 @@ def save_notification(
         if len(queue) > MAX_QUEUE_SIZE:
             queue = queue[:MAX_QUEUE_SIZE]
         
-        # ディレクトリが存在しない場合は作成
-        os.makedirs(os.path.dirname(queue_file), exist_ok=True)
-        
-        # ファイルに保存
-        with open(queue_file, "w", encoding="utf-8") as f:
-            json.dump(queue, f, ensure_ascii=False, indent=2)
+        # ファイルに保存（一時ファイルに書いてから置き換える）
+        storage.write_json(queue_file, queue, ensure_ascii=False, indent=2)
         
         return True
         
@@ -89,11 +84,10 @@ def load_notification_history(
         list[dict]: 通知履歴のリスト（新しい順）
     """
     try:
-        if not os.path.exists(queue_file):
+        if not storage.exists(queue_file):
             return []
         
-        with open(queue_file, "r", encoding="utf-8") as f:
-            queue = json.load(f)
+        queue = storage.read_json(queue_file)
         
         if not isinstance(queue, list):
             return []
@@ -115,7 +109,7 @@ def load_notification_history(
         
         return valid_queue
         
-    except json.JSONDecodeError:
+    except ValueError:
         # JSONパースエラーは空リストを返す
         return []
     except Exception:
@@ -0,0 +1,197 @@
+"""
+プロセスインデックスモジュール
+
+(pid, create_time) をキーに、プロセスの cmdline とその解析結果
+（スクリプト名・種別）を実行をまたいで保持します。
+
+多くのプロセスは実行間で変化しないため、インデックスに載っている
+プロセスは cmdline の読み込みと解析を省略し、新しく起動した
+プロセスだけを読み込みます。exec で同じ PID・起動時刻のまま
+別のプログラムに切り替わった場合に備え、プロセス名が変わった
+エントリは読み直します。
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from komon import storage
+
+logger = logging.getLogger(__name__)
+
+PROCESS_INDEX_FILE = "data/state/process_index.json"
+
+# スクリプトとして扱う拡張子
+SCRIPT_EXTENSIONS = ('.py', '.sh', '.rb', '.pl')
+
+
+def extract_script_name(cmdline: List[str], extensions=SCRIPT_EXTENSIONS) -> Optional[str]:
+    """
+    コマンドラインからスクリプト名を抽出
+    
+    Args:
+        cmdline: コマンドライン引数
+        extensions: 対象とする拡張子
+    
+    Returns:
+        スクリプト名（拡張子付き）、または None
+    
+    Examples:
+        ['python', '/path/to/script.py', 'arg1'] → 'script.py'
+        ['/bin/bash', '/path/to/script.sh'] → 'script.sh'
+        ['python', '-m', 'module'] → None（モジュール実行は対象外）
+    """
+    if not cmdline:
+        return None
+    
+    # モジュール実行（python -m module）は対象外
+    if '-m' in cmdline:
+        return None
+    
+    for arg in cmdline:
+        for ext in extensions:
+            if arg.endswith(ext):
+                return os.path.basename(arg)
+    
+    return None
+
+
+def classify_cmdline(cmdline: List[str]) -> str:
+    """
+    コマンドラインからプロセスの種別を判定
+    
+    Returns:
+        str: "script"（スクリプト実行）、"module"（python -m）、
+             "kernel"（cmdlineなし）、"binary"（それ以外）
+    """
+    if not cmdline:
+        return "kernel"
+    if '-m' in cmdline:
+        return "module"
+    if extract_script_name(cmdline) is not None:
+        return "script"
+    return "binary"
+
+
+def process_key(pid: Optional[int], create_time: Optional[float]) -> Optional[str]:
+    """インデックスのキー（"pid:起動時刻"）を作成"""
+    if pid is None or create_time is None:
+        return None
+    return f"{pid}:{create_time:.2f}"
+
+
+class ProcessIndex:
+    """
+    (pid, create_time) をキーにしたプロセス情報のインデックス
+    
+    エントリは {'name', 'cmdline', 'script', 'kind'} で、
+    終了したプロセスのエントリは retain() で削除されます。
+    """
+    
+    def __init__(self, state_file: Optional[str] = None):
+        """
+        Args:
+            state_file: インデックスの保存先（Noneの場合は使用時点の PROCESS_INDEX_FILE）
+        """
+        self._state_file = state_file
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+        self.hits = 0
+        self.misses = 0
+    
+    @property
+    def state_file(self) -> str:
+        """インデックスの保存先"""
+        return self._state_file or PROCESS_INDEX_FILE
+    
+    def lookup(self, pid: Optional[int], create_time: Optional[float], name: Optional[str]) -> Optional[List[str]]:
+        """
+        インデックス済みプロセスの cmdline を返します。
+        
+        Args:
+            pid: プロセスID
+            create_time: 起動時刻（UNIX時間）
+            name: 現在のプロセス名（exec による切り替わりの検出用）
+        
+        Returns:
+            list: cmdline（インデックスにない・名前が変わった場合は None）
+        """
+        entry = self.entries.get(process_key(pid, create_time))
+        if entry is None:
+            return None
+        stored = entry.get('name') or ""
+        name = name or ""
+        # /proc の comm は15文字で切り詰められるため、前方一致も同じ名前とみなす
+        if stored != name and not (len(name) >= 15 and stored.startswith(name)):
+            return None
+        return entry['cmdline']
+    
+    def observe(self, proc: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        プロセスをインデックスに反映し、解析結果を proc に設定します。
+        
+        Args:
+            proc: スナップショットのプロセス情報（pid, name, cmdline, create_time）
+        
+        Returns:
+            dict: 解析結果を追加した proc（'script', 'kind'）
+        """
+        key = process_key(proc.get('pid'), proc.get('create_time'))
+        cmdline = proc.get('cmdline') or []
+        entry = self.entries.get(key) if key is not None else None
+        if entry is not None and entry['cmdline'] == cmdline:
+            self.hits += 1
+        else:
+            self.misses += 1
+            entry = {
+                'name': proc.get('name'),
+                'cmdline': cmdline,
+                'script': extract_script_name(cmdline),
+                'kind': classify_cmdline(cmdline),
+            }
+            if key is not None:
+                self.entries[key] = entry
+        
+        proc['script'] = entry['script']
+        proc['kind'] = entry['kind']
+        return proc
+    
+    def retain(self, processes: Iterable[Dict[str, Any]]) -> None:
+        """現在のプロセス一覧にないエントリ（終了したプロセス）を削除"""
+        alive = {process_key(p.get('pid'), p.get('create_time')) for p in processes}
+        self.entries = {key: entry for key, entry in self.entries.items() if key in alive}
+    
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """保存済みのインデックスを読み込む"""
+        try:
+            data = json.loads(storage.read_text(self.state_file))
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning("Failed to load process index: %s", e)
+            return {}
+    
+    def save(self) -> None:
+        """インデックスを保存する"""
+        try:
+            storage.write_text(self.state_file, json.dumps(self.entries, separators=(",", ":"), ensure_ascii=False))
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Failed to save process index: %s", e)
+
+
+# グローバルインスタンス（シングルトン）
+_process_index: Optional[ProcessIndex] = None
+
+
+def get_process_index() -> ProcessIndex:
+    """
+    プロセスインデックスのグローバルインスタンスを取得
+    
+    常駐モードではメモリ上のインデックスをそのまま使い続けるため、
+    状態ファイルの読み込みは初回のみです。
+    """
+    global _process_index
+    if _process_index is None:
+        _process_index = ProcessIndex()
+    return _process_index
@@ -43,6 +43,12 @@ def format_weekly_report(data: dict) -> str:
                 resource_data.get('change', 0)
             ))
     
+    # 使用率の分布（平均に埋もれる一時的な高負荷）
+    percentile_section = format_percentiles(data.get('percentiles') or {}, resource_names)
+    if percentile_section:
+        lines.append("")
+        lines.append(percentile_section)
+    
     # 警戒情報
     lines.append("")
     lines.append("【今週の警戒情報】")
@@ -71,6 +77,14 @@ def format_weekly_report(data: dict) -> str:
             lines.append("")
             lines.append(prediction_section)
     
+    # マウントごとの予測
+    mount_forecasts = data.get('mount_forecasts')
+    if mount_forecasts:
+        from komon.disk_predictor import format_mount_forecasts
+        lines.append("")
+        lines.append("【🗂 マウントごとの予測】")
+        lines.append(format_mount_forecasts(mount_forecasts))
+    
     # フッター
     lines.append("")
     lines.append("異常がなくても、定期的に確認しておくと安心ですね 👀")
@@ -98,6 +112,38 @@ def format_resource_status(resource: str, current: float, change: float) -> str:
     return f"{resource}: {current:.1f}% (先週比 {change_str})"
 
 
+def format_percentiles(percentiles: dict, resource_names: dict) -> str:
+    """
+    使用率の分布（p50 / p95 / p99）セクションをフォーマットします。
+    
+    Args:
+        percentiles: collect_weekly_data() の 'percentiles'（{'week': {...}, 'month': {...}}）
+        resource_names: リソースキーと表示名の対応
+        
+    Returns:
+        str: フォーマット済みセクション（今週のデータがない場合は空文字列）
+    """
+    week = percentiles.get('week') or {}
+    month = percentiles.get('month') or {}
+    if not week:
+        return ""
+    
+    lines = ["【使用率の分布（p50 / p95 / p99）】"]
+    for resource_key in ['cpu', 'mem', 'disk']:
+        if resource_key not in week:
+            continue
+        line = f"{resource_names.get(resource_key, resource_key.upper())}: 今週 {_format_quantiles(week[resource_key])}"
+        if resource_key in month:
+            line += f"（30日間 {_format_quantiles(month[resource_key])}）"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _format_quantiles(summary: dict) -> str:
+    """p50 / p95 / p99 を「38.1% / 81.4% / 93.0%」の形式にする"""
+    return " / ".join(f"{summary[key]:.1f}%" for key in ('p50', 'p95', 'p99'))
+
+
 def format_trend_indicator(trend: str) -> str:
     """
     トレンドを視覚的インジケーターに変換します。
@@ -0,0 +1,170 @@
+"""
+スケジューラーモジュール
+
+常駐モード（komon daemon）で各ジョブを一定間隔で実行します。
+ジョブは1本のスレッドで順番に実行するため同時に重なることはなく、
+実行が長引いて予定時刻を過ぎた回は溜め込まずにスキップします。
+設定の再読み込みなどジョブの登録し直しは、ジョブの実行の合間（between_ticks）に行います。
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """スケジューラーに登録されたジョブ"""
+
+    def __init__(self, name: str, interval: float, func: Callable[[], None], next_run: float):
+        """
+        Args:
+            name: ジョブ名
+            interval: 実行間隔（秒）
+            func: 実行する関数
+            next_run: 次回実行予定時刻（スケジューラーの時計基準）
+        """
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.next_run = next_run
+        self.running = False
+        self.run_count = 0
+        self.skipped_count = 0
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+
+class Scheduler:
+    """
+    単一スレッドの間隔実行スケジューラー
+
+    - 同じジョブが重なって実行されることはない
+    - 予定時刻を過ぎた回はまとめて実行せず、次の予定時刻まで読み飛ばす
+    - ジョブ内の例外はログに記録し、他のジョブの実行は継続する
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            clock: 現在時刻を返す関数（テスト用に差し替え可能）
+        """
+        self.clock = clock
+        self.jobs: Dict[str, Job] = {}
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    def add_job(
+        self,
+        name: str,
+        interval: float,
+        func: Callable[[], None],
+        run_immediately: bool = True
+    ) -> Job:
+        """
+        ジョブを登録します。
+
+        Args:
+            name: ジョブ名
+            interval: 実行間隔（秒、0より大きい値）
+            func: 実行する関数
+            run_immediately: Trueの場合は起動直後に1回目を実行
+
+        Returns:
+            Job: 登録したジョブ
+        """
+        if interval <= 0:
+            raise ValueError(f"interval must be positive: {name}={interval}")
+
+        now = self.clock()
+        job = Job(name, interval, func, now if run_immediately else now + interval)
+        self.jobs[name] = job
+        return job
+
+    def remove_job(self, name: str) -> Optional[Job]:
+        """
+        ジョブの登録を解除します。
+
+        Returns:
+            Job: 解除したジョブ（登録されていない場合は None）
+        """
+        return self.jobs.pop(name, None)
+
+    def run_pending(self) -> List[str]:
+        """
+        予定時刻を迎えたジョブを実行します。
+
+        Returns:
+            list: 実行したジョブ名のリスト
+        """
+        executed = []
+        for job in sorted(self.jobs.values(), key=lambda j: j.next_run):
+            if self._stop_event.is_set():
+                break
+            if job.running or self.clock() < job.next_run:
+                continue
+            self._run_job(job)
+            executed.append(job.name)
+        return executed
+
+    def _run_job(self, job: Job):
+        """ジョブを1回実行し、次回予定時刻を決める"""
+        job.running = True
+        started = self.clock()
+        try:
+            job.func()
+            job.last_error = None
+        except Exception as e:
+            job.last_error = str(e)
+            logger.exception("Job %s failed", job.name)
+        finally:
+            job.running = False
+            job.run_count += 1
+            finished = self.clock()
+            job.last_duration = finished - started
+
+        # 過ぎてしまった予定時刻は溜め込まずに読み飛ばす
+        next_run = job.next_run + job.interval
+        if next_run <= finished:
+            missed = int((finished - next_run) // job.interval) + 1
+            next_run += missed * job.interval
+            job.skipped_count += missed
+            logger.warning("Job %s overran its interval, skipped %d tick(s)", job.name, missed)
+        job.next_run = next_run
+
+    def seconds_until_next(self) -> Optional[float]:
+        """次のジョブ実行までの秒数（ジョブがない場合は None）"""
+        if not self.jobs:
+            return None
+        next_run = min(job.next_run for job in self.jobs.values())
+        return max(0.0, next_run - self.clock())
+
+    def run_forever(self, between_ticks: Optional[Callable[[], None]] = None):
+        """
+        stop() が呼ばれるまでジョブを実行し続けます。
+
+        Args:
+            between_ticks: ジョブを実行する前に毎回呼び出す関数（ジョブの登録し直しなどに使う）
+        """
+        self._stop_event.clear()
+        while not self._stop_event.is_set():
+            self._wake_event.clear()
+            if between_ticks is not None:
+                try:
+                    between_ticks()
+                except Exception:
+                    logger.exception("between_ticks callback failed")
+            self.run_pending()
+            wait = self.seconds_until_next()
+            self._wake_event.wait(wait if wait is not None else 1.0)
+
+    def wake(self):
+        """待機中の run_forever() を起こします（シグナルハンドラからも呼び出し可能）"""
+        self._wake_event.set()
+
+    def stop(self):
+        """run_forever() のループを停止します（シグナルハンドラからも呼び出し可能）"""
+        self._stop_event.set()
+        self._wake_event.set()
@@ -0,0 +1,223 @@
+"""
+周期を考慮した使用率の予測モジュール
+
+夜間のバックアップや週次のバッチのように、使用率が1日・1週間の周期で増減する場合、
+直線の当てはめでは増加した直後の値に引きずられて誤った到達予測を出します。
+このモジュールは1時間ごとの集計段（rollup-1h）の平均値に、日次（24時間）と
+週次（168時間）の2つの周期を持つ加法型の Holt–Winters 法（Taylor の二重周期モデル）を適用し、
+周期を除いた水準と傾きから予測します。
+
+状態（水準・傾き・日次24個・週次168個の周期成分）はメトリクスごとに
+時系列ストアのディレクトリの seasonal.json に保存し、新しい1時間の区間ごとに O(1) で更新します。
+history.rotate_history() で集計段を作成した直後に update_seasonal_states() で更新します。
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from komon import storage
+from komon.forecast import MIN_SLOPE, SAFE_PREDICTION_DAYS
+from komon.timeseries import METRICS, TimeSeriesStore, get_timeseries_store
+
+logger = logging.getLogger(__name__)
+
+SEASONAL_NAME = "seasonal.json"
+DAY_HOURS = 24
+WEEK_HOURS = 168
+
+# 平滑化係数（水準・傾き・日次の周期・週次の周期）
+SMOOTHING = {"level": 0.1, "trend": 0.01, "day": 0.2, "week": 0.1}
+MIN_HOURS = WEEK_HOURS  # 予測に使うまでに必要な1時間の区間の数（1週間分）
+MAX_GAP_HOURS = WEEK_HOURS  # これより長く区間が欠けた場合は水準と傾きを初期化
+
+
+def _hour_of_week(timestamp: float) -> int:
+    """ローカル時刻の週の中の時間（月曜0時が0）"""
+    when = datetime.fromtimestamp(timestamp)
+    return when.weekday() * DAY_HOURS + when.hour
+
+
+def new_state(timestamp: float, value: float) -> Dict[str, Any]:
+    """最初の1時間の区間から状態を作成する（周期成分は0）"""
+    return {
+        'last': timestamp,
+        'value': value,
+        'level': value,
+        'trend': 0.0,
+        'day': [0.0] * DAY_HOURS,
+        'week': [0.0] * WEEK_HOURS,
+        'hours': 1,
+    }
+
+
+def update_state(state: Optional[Dict[str, Any]], timestamp: float, value: float) -> Dict[str, Any]:
+    """
+    1時間の区間の平均値で状態を更新します。
+
+    区間が欠けている場合は、欠けた時間だけ水準を傾きに沿って進めてから更新します
+    （MAX_GAP_HOURS より長い場合は周期成分を残して水準と傾きを初期化）。
+    最後の区間以前の区間は無視します。
+
+    Args:
+        state: 状態（Noneの場合は新規作成）
+        timestamp: 区間の開始時刻（UNIX時間）
+        value: 区間の平均値
+
+    Returns:
+        dict: 更新した状態（state をその場で更新したもの）
+    """
+    if state is None:
+        return new_state(timestamp, value)
+    steps = round((timestamp - state['last']) / 3600)
+    if steps < 1:
+        return state
+
+    j = _hour_of_week(timestamp)
+    i = j % DAY_HOURS
+    day, week = state['day'], state['week']
+    if steps > MAX_GAP_HOURS:
+        state['level'] = value - day[i] - week[j]
+        state['trend'] = 0.0
+    else:
+        level = state['level'] + (steps - 1) * state['trend']
+        trend = state['trend']
+        new_level = SMOOTHING['level'] * (value - day[i] - week[j]) + (1 - SMOOTHING['level']) * (level + trend)
+        state['trend'] = SMOOTHING['trend'] * (new_level - level) + (1 - SMOOTHING['trend']) * trend
+        state['level'] = new_level
+        old_day = day[i]
+        day[i] = SMOOTHING['day'] * (value - new_level - week[j]) + (1 - SMOOTHING['day']) * old_day
+        week[j] = SMOOTHING['week'] * (value - new_level - old_day) + (1 - SMOOTHING['week']) * week[j]
+
+    state['last'] = timestamp
+    state['value'] = value
+    state['hours'] += 1
+    return state
+
+
+def forecast_hours(state: Dict[str, Any], hours: int) -> List[float]:
+    """1〜hours 時間先の各区間の予測値"""
+    j = _hour_of_week(state['last'])
+    return [
+        state['level'] + h * state['trend']
+        + state['day'][(j + h) % DAY_HOURS] + state['week'][(j + h) % WEEK_HOURS]
+        for h in range(1, hours + 1)
+    ]
+
+
+def seasonal_range(state: Dict[str, Any]) -> tuple:
+    """1週間の中での周期成分（日次 + 週次）の (最小値, 最大値)"""
+    offsets = [state['day'][k % DAY_HOURS] + state['week'][k] for k in range(WEEK_HOURS)]
+    return min(offsets), max(offsets)
+
+
+def _state_path(store: TimeSeriesStore) -> str:
+    return os.path.join(store.root, SEASONAL_NAME)
+
+
+def load_seasonal_states(store: Optional[TimeSeriesStore] = None) -> Dict[str, Dict[str, Any]]:
+    """保存済みのメトリクスごとの状態を読み込む（ない・壊れている場合は空の辞書）"""
+    path = _state_path(store or get_timeseries_store())
+    if not storage.exists(path):
+        return {}
+    try:
+        states = storage.read_json(path).get("metrics")
+    except (OSError, ValueError, AttributeError) as e:
+        logger.warning("Failed to load seasonal states: %s", e)
+        return {}
+    return states if isinstance(states, dict) else {}
+
+
+def update_seasonal_states(store: Optional[TimeSeriesStore] = None, now: Optional[datetime] = None) -> int:
+    """
+    前回の更新より後の1時間の集計段で、メトリクスごとの状態を更新します。
+
+    新しい区間だけを読み込むため、1回の更新のコストは新しい区間の数に比例します。
+
+    Args:
+        store: 時系列ストア（Noneの場合はグローバルインスタンス）
+        now: 基準時刻（テスト用）
+
+    Returns:
+        int: 反映した区間の数
+    """
+    store = store or get_timeseries_store()
+    states = load_seasonal_states(store)
+    last = min((states[m]['last'] for m in METRICS if m in states), default=None)
+    start = datetime.fromtimestamp(0) if last is None else datetime.fromtimestamp(last) + timedelta(hours=1)
+    rollups = store.rollups("1h", start, now or datetime.now())
+    if not rollups:
+        return 0
+
+    for rollup in rollups:
+        for metric in METRICS:
+            states[metric] = update_state(states.get(metric), rollup.start, getattr(rollup, f"{metric}_avg"))
+    try:
+        storage.write_json(_state_path(store), {"metrics": states}, separators=(",", ":"))
+    except OSError as e:
+        logger.warning("Failed to save seasonal states: %s", e)
+    return len(rollups)
+
+
+def predict_seasonal(
+    metric: str = "disk",
+    target: float = 90.0,
+    store: Optional[TimeSeriesStore] = None,
+    states: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Optional[dict]:
+    """
+    周期を除いた水準と傾きから、target に到達する日を予測します。
+
+    周期的なピーク（水準 + 周期成分の最大値）が target に届く日を到達日とするため、
+    夜間のバックアップなどの一時的な増加を傾きと取り違えません。
+
+    Args:
+        metric: メトリクス（"cpu" / "mem" / "disk"）
+        target: 到達日を求める使用率
+        store: 時系列ストア（states を指定しない場合に読み込む）
+        states: load_seasonal_states() の結果
+
+    Returns:
+        dict: predict_disk_trend と同じキー（'slope' は %/日、'intercept' は周期を除いた現在の水準）に加え、
+            'model': "seasonal", 'peak_usage': 周期的なピーク時の使用率, 'seasonal_amplitude': 周期による変動幅
+            1週間分の区間がない場合は None
+    """
+    if states is None:
+        states = load_seasonal_states(store)
+    state = states.get(metric)
+    if state is None or state['hours'] < MIN_HOURS:
+        return None
+
+    slope = state['trend'] * DAY_HOURS
+    low, high = seasonal_range(state)
+    peak = state['level'] + high
+    current = state['value']
+
+    if slope > 0.01:
+        trend = 'increasing'
+    elif slope < -0.01:
+        trend = 'decreasing'
+    else:
+        trend = 'stable'
+
+    days_to_target = None
+    prediction_date = None
+    if slope > MIN_SLOPE and current < target:
+        days = max(0.0, (target - peak) / slope)
+        if days <= SAFE_PREDICTION_DAYS:
+            days_to_target = int(days)
+            latest = datetime.fromtimestamp(state['last']).date()
+            prediction_date = (latest + timedelta(days=days_to_target)).strftime('%Y-%m-%d')
+
+    return {
+        'slope': slope,
+        'intercept': state['level'],
+        'current_usage': current,
+        'days_to_90': days_to_target,
+        'prediction_date': prediction_date,
+        'trend': trend,
+        'model': 'seasonal',
+        'peak_usage': peak,
+        'seasonal_amplitude': high - low,
+    }
@@ -57,9 +57,104 @@ def validate_threshold_config(config: dict) -> dict:
                 f"閾値 '{metric}' の形式が無効です。数値または辞書形式で指定してください。"
             )
     
+    # cgroup（サービス/コンテナ）ごとの閾値は指定された場合のみ
+    cgroup_thresholds = thresholds.get("cgroup")
+    if cgroup_thresholds is not None:
+        normalized["cgroup"] = _validate_cgroup_thresholds(cgroup_thresholds)
+    
+    # 統計的な異常検知は指定された場合のみ
+    anomaly_thresholds = thresholds.get("anomaly")
+    if anomaly_thresholds is not None:
+        normalized["anomaly"] = _validate_anomaly_thresholds(anomaly_thresholds)
+    
     return normalized
 
 
+def _validate_cgroup_thresholds(thresholds) -> dict:
+    """
+    cgroupごとの閾値（cpu / mem）を検証し、3段階形式に正規化する。
+    
+    Args:
+        thresholds: thresholds.cgroup の設定値
+        
+    Returns:
+        dict: {"cpu": 3段階閾値, "mem": 3段階閾値}（指定されたものだけ）
+        
+    Raises:
+        ValidationError: 設定が無効な場合
+    """
+    if not isinstance(thresholds, dict):
+        raise ValidationError("閾値 'cgroup' は辞書形式で指定してください。")
+    
+    normalized = {}
+    for metric in ["cpu", "mem"]:
+        value = thresholds.get(metric)
+        if value is None:
+            continue
+        if isinstance(value, dict):
+            normalized[metric] = _validate_three_tier(f"cgroup.{metric}", value)
+        elif isinstance(value, (int, float)):
+            normalized[metric] = _normalize_single_threshold(value)
+        else:
+            raise ValidationError(
+                f"閾値 'cgroup.{metric}' の形式が無効です。数値または辞書形式で指定してください。"
+            )
+    return normalized
+
+
+def _validate_anomaly_thresholds(thresholds) -> dict:
+    """
+    統計的な異常検知の設定（対象メトリクス・方法・外れ具合の3段階閾値）を検証し、正規化する。
+    
+    Args:
+        thresholds: thresholds.anomaly の設定値
+        
+    Returns:
+        dict: {"metrics": [...], "method": "ewma" | "mad", "min_value": 数値 | None,
+               "allow_downgrade": bool, "warning": ..., "alert": ..., "critical": ...}
+        
+    Raises:
+        ValidationError: 設定が無効な場合
+    """
+    if not isinstance(thresholds, dict):
+        raise ValidationError("閾値 'anomaly' は辞書形式で指定してください。")
+    
+    metrics = thresholds.get("metrics", ["cpu", "mem", "disk"])
+    if not isinstance(metrics, list) or not all(m in ("cpu", "mem", "disk") for m in metrics):
+        raise ValidationError(
+            "閾値 'anomaly.metrics' は cpu / mem / disk のリストで指定してください。"
+        )
+    
+    method = thresholds.get("method", "ewma")
+    if method not in ("ewma", "mad"):
+        raise ValidationError(
+            f"閾値 'anomaly.method' は ewma または mad で指定してください（現在: {method}）。"
+        )
+    
+    # 異常とみなす値の下限（None の場合は anomaly.DEFAULT_MIN_VALUE）
+    min_value = thresholds.get("min_value")
+    if min_value is not None and (not isinstance(min_value, (int, float)) or not (0 <= min_value <= 200)):
+        raise ValidationError(
+            f"閾値 'anomaly.min_value' は 0-200 の数値で指定してください（現在: {min_value}）。"
+        )
+    
+    # 外れ具合のレベルが固定閾値のレベルより低い場合にそちらを使うか（既定は高い方を使う）
+    allow_downgrade = thresholds.get("allow_downgrade", False)
+    if not isinstance(allow_downgrade, bool):
+        raise ValidationError(
+            f"閾値 'anomaly.allow_downgrade' は true または false で指定してください（現在: {allow_downgrade}）。"
+        )
+    
+    levels = {"warning": 3.0, "alert": 4.0, "critical": 5.0}
+    if any(key in thresholds for key in levels):
+        levels = _validate_three_tier("anomaly", thresholds)
+    
+    return {
+        "metrics": list(metrics), "method": method, "min_value": min_value,
+        "allow_downgrade": allow_downgrade, **levels
+    }
+
+
 def _get_default_thresholds(metric: str) -> dict:
     """
     デフォルトの3段階閾値を返す。
@@ -0,0 +1,82 @@
+"""
+分位点スケッチモジュール
+
+使用率の分布を、生のサンプルを保持せずに要約するためのスケッチを提供します。
+
+スケッチは使用率（0〜SKETCH_MAX %）を SKETCH_RESOLUTION ％ポイント幅の区間に分けた
+疎なヒストグラム（{区間の番号（文字列）: 件数}）です。
+区間ごとの件数を足し合わせるだけで統合できるため、日ごとのスケッチから
+週・月の p50 / p95 / p99 を誤差なく（区間の幅の範囲で）求められ、
+1日分の大きさはサンプル数によらず区間の数で頭打ちになります。
+"""
+
+import math
+from typing import Dict, Iterable, Optional
+
+SKETCH_RESOLUTION = 0.1  # 区間の幅（％ポイント、分位点の誤差の上限）
+SKETCH_MAX = 200.0  # 区間の上限（CPUバーストを考慮、これを超える値は上限の区間に入れる）
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+
+
+def bin_index(value: float) -> int:
+    """値が入る区間の番号"""
+    return int(min(max(value, 0.0), SKETCH_MAX) / SKETCH_RESOLUTION)
+
+
+def add_value(sketch: Dict[str, int], value: float) -> Dict[str, int]:
+    """値をスケッチに加え、更新したスケッチを返す（sketch をその場で更新）"""
+    key = str(bin_index(value))
+    sketch[key] = sketch.get(key, 0) + 1
+    return sketch
+
+
+def merge_sketches(sketches: Iterable[Dict[str, int]]) -> Dict[str, int]:
+    """複数のスケッチを統合した新しいスケッチを返す"""
+    merged: Dict[str, int] = {}
+    for sketch in sketches:
+        for key, count in sketch.items():
+            merged[key] = merged.get(key, 0) + count
+    return merged
+
+
+def quantile(sketch: Dict[str, int], q: float) -> Optional[float]:
+    """
+    最近傍順位法による分位点の近似値を返します。
+
+    順位が入る区間の中では値が均等に分布しているとみなして補間するため、
+    生のサンプルから求めた値との差は SKETCH_RESOLUTION 以下です。
+
+    Args:
+        sketch: スケッチ
+        q: 分位（0〜1）
+
+    Returns:
+        float: 分位点（空のスケッチの場合は None）
+    """
+    bins = sorted((int(key), count) for key, count in sketch.items())
+    total = sum(count for _, count in bins)
+    if not total:
+        return None
+    rank = max(math.ceil(q * total), 1)
+    seen = 0
+    for index, count in bins:
+        if seen + count >= rank:
+            return (index + (rank - seen - 0.5) / count) * SKETCH_RESOLUTION
+        seen += count
+    return (bins[-1][0] + 1) * SKETCH_RESOLUTION
+
+
+def summarize(sketch: Dict[str, int], quantiles: Iterable[float] = DEFAULT_QUANTILES) -> Optional[Dict[str, float]]:
+    """
+    スケッチの件数と分位点をまとめて返します。
+
+    Returns:
+        dict: {'count': 件数, 'p50': ..., 'p95': ..., 'p99': ...}（空のスケッチの場合は None）
+    """
+    total = sum(sketch.values())
+    if not total:
+        return None
+    summary: Dict[str, float] = {'count': total}
+    for q in quantiles:
+        summary[f"p{round(q * 100)}"] = quantile(sketch, q)
+    return summary
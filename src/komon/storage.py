@@ -0,0 +1,266 @@
+"""
+状態ファイルの保存モジュール
+
+履歴・通知の頻度制御（throttle.json）・通知キュー・ネットワーク状態などの
+状態ファイルを、書き込み途中のクラッシュやディスクフルで壊れないように保存します。
+
+- 書き込みは同じディレクトリの一時ファイルに行い、fsync してから rename で置き換えます。
+  途中で失敗しても元のファイルはそのまま残ります。
+- batch() の中の書き込みはメモリ上に溜め、ブロックを抜けるときに1回のコミットとして反映します
+  （一時ファイルをすべて書いて fsync → rename → ディレクトリの fsync）。
+  溜めている間の読み込み（read_json など）は溜めた内容を返します。
+- 追記したファイル（時系列のパーティションなど）の fsync も、batch() の中ではコミット時にまとめて行います。
+- batch() の中の削除（remove）もコミット時に、溜めた書き込みを反映した後で行います。
+  マニフェストなどの索引を先に更新してから元のファイルを消すため、途中で中断されても
+  索引が消えたファイルを指すことはありません。
+
+1回の実行（timed_run を付けた入口）は batch() で囲まれるため、
+実行ごとの fsync は変更したファイル数 + ディレクトリ数の1回ずつで済みます。
+"""
+
+import json
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict, List, Set
+
+logger = logging.getLogger(__name__)
+
+# batch() の中で溜めている書き込み（絶対パス → 内容）と、fsync が必要な追記済みファイル、削除するファイル
+_pending: Dict[str, bytes] = {}
+_dirty: Set[str] = set()
+_removed: Set[str] = set()
+_depth = 0
+
+
+def _key(path) -> str:
+    return os.path.abspath(os.fspath(path))
+
+
+def _fsync_path(path: str) -> None:
+    """ファイルまたはディレクトリを fsync する（対応していない環境では何もしない）"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_temp(path: str, data: bytes) -> str:
+    """同じディレクトリの一時ファイルに書き込んで fsync し、そのパスを返す"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return tmp_path
+
+
+def replace_file(path, data: bytes) -> None:
+    """
+    ファイルをすぐに置き換えます（batch() の中でも溜めずに書き込む）。
+
+    パーティションの書き直しなど、置き換えた直後に元のファイルを削除する処理で使います。
+
+    Raises:
+        OSError: 書き込みに失敗した場合（元のファイルは変更されない）
+    """
+    path = _key(path)
+    os.replace(_write_temp(path, data), path)
+    _fsync_path(os.path.dirname(path))
+    _removed.discard(path)
+
+
+def write_bytes(path, data: bytes) -> None:
+    """
+    ファイルを置き換えます（batch() の中ではコミット時に反映）。
+
+    Raises:
+        OSError: batch() の外で書き込みに失敗した場合（元のファイルは変更されない）
+    """
+    if _depth:
+        key = _key(path)
+        _pending[key] = data
+        _removed.discard(key)
+        return
+    replace_file(path, data)
+
+
+def write_text(path, text: str) -> None:
+    write_bytes(path, text.encode("utf-8"))
+
+
+def write_json(path, obj: Any, **kwargs) -> None:
+    """JSON として保存する（kwargs は json.dumps に渡す）"""
+    write_text(path, json.dumps(obj, **kwargs))
+
+
+def read_bytes(path) -> bytes:
+    """
+    ファイルを読み込みます（batch() の中で溜めている書き込みがあればその内容）。
+
+    Raises:
+        FileNotFoundError: ファイルがない場合
+    """
+    key = _key(path)
+    if key in _pending:
+        return _pending[key]
+    if key in _removed:
+        raise FileNotFoundError(f"No such file (pending removal): {key}")
+    with open(key, "rb") as f:
+        return f.read()
+
+
+def read_text(path) -> str:
+    return read_bytes(path).decode("utf-8")
+
+
+def read_json(path) -> Any:
+    """
+    JSON ファイルを読み込みます。
+
+    Raises:
+        FileNotFoundError: ファイルがない場合
+        ValueError: JSON として読めない場合
+    """
+    return json.loads(read_text(path))
+
+
+def exists(path) -> bool:
+    """ファイルがあるか（batch() の中で溜めている書き込み・削除を含む）"""
+    key = _key(path)
+    if key in _pending:
+        return True
+    return key not in _removed and os.path.exists(key)
+
+
+def listdir(directory) -> List[str]:
+    """
+    ディレクトリのファイル名の一覧（batch() の中で溜めている書き込み・削除を含む）
+
+    ディレクトリがない場合は、溜めている書き込みのファイル名だけを返します。
+    """
+    directory = _key(directory)
+    try:
+        names = set(os.listdir(directory))
+    except FileNotFoundError:
+        names = set()
+    for key in _pending:
+        if os.path.dirname(key) == directory:
+            names.add(os.path.basename(key))
+    for key in _removed:
+        if os.path.dirname(key) == directory:
+            names.discard(os.path.basename(key))
+    return sorted(names)
+
+
+def remove(path) -> None:
+    """
+    ファイルを削除します（batch() の中ではコミット時に、溜めた書き込みを反映した後で削除）。
+
+    同じファイルへの溜めている書き込みは取り消します。ファイルがない場合は何もしません。
+
+    Raises:
+        OSError: batch() の外で削除に失敗した場合
+    """
+    key = _key(path)
+    if _depth:
+        _pending.pop(key, None)
+        _dirty.discard(key)
+        _removed.add(key)
+        return
+    try:
+        os.remove(key)
+    except FileNotFoundError:
+        return
+    _fsync_path(os.path.dirname(key))
+
+
+def sync_file(path) -> None:
+    """追記などでその場で更新したファイルを fsync する（batch() の中ではコミット時にまとめて行う）"""
+    if _depth:
+        _dirty.add(_key(path))
+        return
+    _fsync_path(_key(path))
+
+
+def commit() -> None:
+    """
+    溜めている書き込みと fsync をまとめて反映します。
+
+    一時ファイルをすべて書いて fsync してから rename するため、
+    途中で失敗したファイルは元の内容のまま残ります（警告をログに出力）。
+    削除は書き込みをすべて反映した後で行い、書き込みに失敗した場合は
+    （更新できなかった索引が削除したファイルを指さないように）削除を見送ります。
+    """
+    pending = dict(_pending)
+    dirty = set(_dirty)
+    removed = set(_removed)
+    _pending.clear()
+    _dirty.clear()
+    _removed.clear()
+
+    written = []
+    failed = False
+    for path, data in pending.items():
+        try:
+            written.append((_write_temp(path, data), path))
+        except OSError as e:
+            failed = True
+            logger.warning("Failed to write %s: %s", path, e)
+    for path in dirty:
+        _fsync_path(path)
+
+    directories = set()
+    for tmp_path, path in written:
+        try:
+            os.replace(tmp_path, path)
+            directories.add(os.path.dirname(path))
+        except OSError as e:
+            failed = True
+            logger.warning("Failed to replace %s: %s", path, e)
+    if failed and removed:
+        logger.warning("Skipped removing %d file(s) because a write failed", len(removed))
+        removed = set()
+    for path in removed:
+        try:
+            os.remove(path)
+            directories.add(os.path.dirname(path))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Failed to remove %s: %s", path, e)
+    for directory in directories:
+        _fsync_path(directory)
+
+
+@contextmanager
+def batch():
+    """
+    ブロック内の書き込みを1回のコミットにまとめます（入れ子にした場合は一番外側で反映）。
+
+    例外で抜けた場合も、それまでの書き込みは反映します（各ファイルは置き換え単位で整合）。
+    """
+    global _depth
+    _depth += 1
+    try:
+        yield
+    finally:
+        _depth -= 1
+        if _depth == 0:
+            commit()
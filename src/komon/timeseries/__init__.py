@@ -0,0 +1,111 @@
+"""
+時系列ストアモジュール
+
+リソース使用率のサンプルを日ごとのパーティションに追記して保存し、
+期間指定で読み出すための API（TimeSeriesStore）を提供します。
+
+settings.yml の history.storage_engine に "sqlite" を指定すると、
+同じ API のまま data/metrics/metrics.db（SQLite、WALモード）に保存します。
+
+モジュール構成:
+    records: レコード形式・サンプル・集計段の区間と、保存方式で共通の集計処理
+    store: 日ごとのバイナリファイルに保存する TimeSeriesStore（binary）
+    segments: 終わった日のパーティションの圧縮セグメントへの置き換えと読み込み
+    processes: 上位プロセスの履歴とプロセスごとの集計
+    sqlite: SQLite に保存する SQLiteStore
+
+ファイル形式（binary）:
+    ヘッダー（16バイト）: マジック "KMTS"、バージョン、レコード長、メトリクス数
+    レコード（32バイト）: タイムスタンプ（UNIX時間）+ cpu, mem, disk（いずれも float64）
+    manifest.json: パーティションごとの件数・最初と最後の時刻・時刻順かどうか・メトリクスごとの合計、
+        追記中の日の分位点スケッチ（komon.sketch）と、メトリクスごとの回帰の十分統計量（指数減衰）
+    rollup-1h.bin / rollup-1d.bin: 1時間・1日ごとの件数と各メトリクスの min / max / avg / p95
+    YYYY-MM-DD.seg: 終わった日を圧縮したセグメント
+    processes/YYYY-MM-DD.jsonl: 上位プロセスのサンプル（1行に [時刻, 名前, プロセス数, CPU, メモリ]）
+    processes/tallies/YYYY-MM-DD.json: 1時間ごと・プロセス名ごとの上位に入った回数・合計・最大値（日ごとのファイル）
+    sketches/YYYY-MM-DD.json: 終わった日の分位点スケッチ（生のサンプルより長く保持）
+
+1件の追記で書き直すのは、パーティションへの追記のほかはマニフェストと追記中の日の上位プロセスの集計だけです。
+生のサンプルは数日分だけ保持し、長期の傾向は集計段（ロールアップ）から読みます。
+
+ファイルの書き直しとマニフェスト・集計の保存は storage モジュール経由で行い、
+追記したファイルの fsync は storage.batch() の中ではコミット時にまとめて行います。
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from .processes import PROCESS_LISTS, ProcessSample
+from .records import (
+    HEADER,
+    METRICS,
+    RECORD,
+    ROLLUP_STATS,
+    ROLLUP_TIERS,
+    TIMESERIES_DIR,
+    Rollup,
+    Sample,
+)
+from .sqlite import SQLiteStore
+from .store import TimeSeriesStore
+
+
+__all__ = [
+    'DEFAULT_STORAGE_ENGINE',
+    'HEADER',
+    'METRICS',
+    'PROCESS_LISTS',
+    'ProcessSample',
+    'RECORD',
+    'ROLLUP_STATS',
+    'ROLLUP_TIERS',
+    'Rollup',
+    'SQLiteStore',
+    'STORAGE_ENGINES',
+    'Sample',
+    'TIMESERIES_DIR',
+    'TimeSeriesStore',
+    'get_timeseries_store',
+]
+
+logger = logging.getLogger(__name__)
+
+# 保存方式（settings.yml の history.storage_engine で選択）
+DEFAULT_STORAGE_ENGINE = "binary"
+
+STORAGE_ENGINES = {
+    "binary": TimeSeriesStore,
+    "sqlite": SQLiteStore,
+}
+
+
+# グローバルインスタンス（シングルトン）
+_store: Optional[TimeSeriesStore] = None
+_engine = DEFAULT_STORAGE_ENGINE
+
+
+def get_timeseries_store(config: Optional[Dict[str, Any]] = None) -> TimeSeriesStore:
+    """
+    時系列ストアのグローバルインスタンスを取得
+    
+    settings.yml の history.storage_engine（binary / sqlite）で保存方式を選択します。
+    TIMESERIES_DIR が変わった場合は作り直します。
+    
+    Args:
+        config: 設定辞書（Noneの場合は前回選択した保存方式を使う）
+    
+    Returns:
+        TimeSeriesStore: 時系列ストア
+    """
+    global _store, _engine
+    
+    if config is not None:
+        engine = (config.get("history") or {}).get("storage_engine", DEFAULT_STORAGE_ENGINE)
+        if engine not in STORAGE_ENGINES:
+            logger.warning("Unknown storage_engine: %s, using %s", engine, DEFAULT_STORAGE_ENGINE)
+            engine = DEFAULT_STORAGE_ENGINE
+        _engine = engine
+    
+    if _store is None or _store.engine != _engine or _store.root != TIMESERIES_DIR:
+        _store = STORAGE_ENGINES[_engine](TIMESERIES_DIR)
+    return _store
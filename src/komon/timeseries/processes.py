@@ -0,0 +1,313 @@
+"""
+上位プロセスの履歴
+
+時系列ストアの追記と同時に、CPU・メモリの上位プロセスを日ごとのファイル
+（processes/YYYY-MM-DD.jsonl、1行に [時刻, 名前, プロセス数, CPU, メモリ]）に追記し、
+1時間ごと・プロセス名ごとの上位に入った回数・合計・最大値を日ごとの集計
+（processes/tallies/YYYY-MM-DD.json）に加算します。
+1件の追記で書き直す集計は追記中の日の分だけで、表示では期間にかかる日の分だけを読みます。
+"""
+
+import json
+import logging
+import os
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from komon import storage
+from .records import FILE_VERSION, _bucket_start, _mtime
+
+logger = logging.getLogger(__name__)
+
+# 上位プロセスの履歴（TIMESERIES_DIR 内のディレクトリに日ごとのファイルと、その下に日ごとの名前ごとの集計を作成）
+PROCESS_DIR_NAME = "processes"
+PROCESS_SUFFIX = ".jsonl"
+PROCESS_TALLY_DIR_NAME = "tallies"
+PROCESS_TALLY_SUFFIX = ".json"
+
+# 上位プロセスのリスト（usage のキー）と値のキー
+PROCESS_LISTS = {"cpu": ("cpu_by_process", "cpu"), "mem": ("mem_by_process", "mem")}
+
+# 上位プロセス1件分のデータ（cpu は使用率、mem はメモリ使用量 MB。上位に入っていない値は None）
+ProcessSample = namedtuple("ProcessSample", ("timestamp", "name", "count") + tuple(PROCESS_LISTS))
+
+
+def _process_samples(usage: Dict[str, Any], timestamp: float) -> List[ProcessSample]:
+    """usage の上位プロセス（CPU・メモリ）をプロセス名ごとに1件にまとめる"""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for metric, (list_key, value_key) in PROCESS_LISTS.items():
+        for proc in usage.get(list_key) or []:
+            row = merged.setdefault(str(proc.get("name")), dict.fromkeys(PROCESS_LISTS, None))
+            row["count"] = int(proc.get("count", 1))
+            row[metric] = float(proc.get(value_key) or 0)
+    return [
+        ProcessSample(timestamp, name, row.pop("count"), **row)
+        for name, row in merged.items()
+    ]
+
+
+def _tally_processes(tallies: Dict[str, Dict[str, Dict[str, list]]], samples: List[ProcessSample]) -> None:
+    """上位プロセスのサンプルを1時間ごと・名前ごとの集計（[回数, 合計, 最大値]）に加算する"""
+    for sample in samples:
+        hour = tallies.setdefault(str(int(_bucket_start("1h", sample.timestamp))), {})
+        for metric in PROCESS_LISTS:
+            value = getattr(sample, metric)
+            if value is None:
+                continue
+            tally = hour.setdefault(metric, {}).setdefault(sample.name, [0, 0.0, value])
+            tally[0] += 1
+            tally[1] += value
+            tally[2] = max(tally[2], value)
+
+
+class ProcessHistory:
+    """
+    上位プロセスの履歴とプロセスごとの集計（TimeSeriesStore が継承）
+
+    SQLiteStore はサンプル・集計の読み書き（process_samples, prune_process_tallies, _process_tallies）を
+    テーブルに置き換えます。
+    """
+    
+    def top_processes(self, metric: str, start: datetime, end: datetime, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        期間内に上位に入った回数が多いプロセスを返します。
+        
+        1時間ごと・プロセス名ごとの集計を書き込み時に加算しているため、
+        上位プロセスのサンプルを読み直さずに求まります。
+        
+        Args:
+            metric: "cpu" または "mem"
+            start: 期間の開始（この時刻を含む1時間の区間から集計）
+            end: 期間の終了
+            limit: 返す件数
+        
+        Returns:
+            list: [{'name', 'samples'（上位に入った回数）, 'avg', 'peak'}, ...]（回数の多い順）
+        """
+        tallies: Dict[str, list] = {}
+        for _, name, top, total, peak in self._process_tallies(metric, start.timestamp(), end.timestamp()):
+            tally = tallies.setdefault(name, [0, 0.0, peak])
+            tally[0] += top
+            tally[1] += total
+            tally[2] = max(tally[2], peak)
+        ranked = sorted(tallies.items(), key=lambda item: (-item[1][0], -item[1][1], item[0]))
+        return [
+            {'name': name, 'samples': top, 'avg': total / top, 'peak': peak}
+            for name, (top, total, peak) in ranked[:limit]
+            if top > 0
+        ]
+    
+    def process_trend(
+        self, name: str, metric: str, start: datetime, end: datetime, tier: str = "1h"
+    ) -> List[Dict[str, Any]]:
+        """
+        プロセスの値の推移を集計段の区間ごとに返します（上位に入っていた区間のみ）。
+        
+        Args:
+            name: プロセス名
+            metric: "cpu" または "mem"（mem はメモリ使用量 MB）
+            start: 期間の開始
+            end: 期間の終了
+            tier: 区間（"1h" / "1d"）
+        
+        Returns:
+            list: [{'start', 'samples', 'avg', 'peak'}, ...]（時刻順）
+        """
+        buckets: Dict[float, list] = {}
+        for hour, _, top, total, peak in self._process_tallies(metric, start.timestamp(), end.timestamp(), name):
+            bucket = buckets.setdefault(_bucket_start(tier, hour), [0, 0.0, peak])
+            bucket[0] += top
+            bucket[1] += total
+            bucket[2] = max(bucket[2], peak)
+        return [
+            {'start': bucket_start, 'samples': top, 'avg': total / top, 'peak': peak}
+            for bucket_start, (top, total, peak) in sorted(buckets.items())
+            if top > 0
+        ]
+    
+    def process_samples(self, start: datetime, end: datetime) -> List[ProcessSample]:
+        """期間内の上位プロセスのサンプルを時刻順に返す"""
+        start_ts, end_ts = start.timestamp(), end.timestamp()
+        samples = []
+        for day in self._process_days():
+            if start.date() <= day <= end.date():
+                samples.extend(s for s in self._read_processes(day) if start_ts <= s.timestamp <= end_ts)
+        samples.sort(key=lambda s: s.timestamp)
+        return samples
+    
+    def prune_process_tallies(self, retention_days: int, today: Optional[date] = None) -> int:
+        """
+        保持期間を過ぎたプロセスごとの集計を削除します。
+        
+        Args:
+            retention_days: 保持する日数（当日を含む）
+            today: 基準日（テスト用）
+        
+        Returns:
+            int: 削除した日数
+        """
+        oldest = (today or date.today()) - timedelta(days=retention_days - 1)
+        removed = 0
+        for day in self._process_tally_days():
+            if day >= oldest:
+                break
+            try:
+                storage.remove(self.process_tally_path(day))
+                removed += 1
+            except OSError as e:
+                logger.warning("Failed to remove process tallies %s: %s", day, e)
+        if self._tallies_cache is not None and self._tallies_cache[0] < oldest:
+            self._tallies_cache = None
+        return removed
+    
+    @property
+    def process_dir(self) -> str:
+        return os.path.join(self.root, PROCESS_DIR_NAME)
+    
+    def process_path(self, day: date) -> str:
+        """日付に対応する上位プロセスのファイルのパス"""
+        return os.path.join(self.process_dir, f"{day.isoformat()}{PROCESS_SUFFIX}")
+    
+    def _process_days(self) -> List[date]:
+        """上位プロセスのファイルがある日付（昇順）"""
+        days = []
+        for name in storage.listdir(self.process_dir):
+            if not name.endswith(PROCESS_SUFFIX):
+                continue
+            try:
+                days.append(date.fromisoformat(name[:-len(PROCESS_SUFFIX)]))
+            except ValueError:
+                continue
+        return sorted(days)
+    
+    def _read_processes(self, day: date) -> List[ProcessSample]:
+        """1日分の上位プロセスのサンプルを読み込む（壊れた行は読み飛ばす）"""
+        try:
+            with open(self.process_path(day), "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        samples = []
+        for line in lines:
+            try:
+                samples.append(ProcessSample._make(json.loads(line)))
+            except (ValueError, TypeError):
+                continue
+        return samples
+    
+    def _append_processes(self, day: date, samples: List[ProcessSample]) -> None:
+        """上位プロセスのサンプルを日ごとのファイルに追記し、その日のプロセスごとの集計に加算する"""
+        path = self.process_path(day)
+        lines = "".join(json.dumps(list(s), ensure_ascii=False, separators=(",", ":")) + "\n" for s in samples)
+        # 集計がない場合の再構築は追記前のファイルから行う（追記分を二重に数えない）
+        tallies = self._load_process_tallies(day)
+        os.makedirs(self.process_dir, exist_ok=True)
+        with open(path, "a+b") as f:
+            size = f.tell()
+            if size:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    # 前回の書き込みが中断された行と混ざらないように改行する
+                    lines = "\n" + lines
+            f.write(lines.encode("utf-8"))
+        storage.sync_file(path)
+        
+        _tally_processes(tallies, samples)
+        self._save_process_tallies(day, tallies)
+    
+    @property
+    def process_tally_dir(self) -> str:
+        return os.path.join(self.process_dir, PROCESS_TALLY_DIR_NAME)
+    
+    def process_tally_path(self, day: date) -> str:
+        """日付に対応するプロセスごとの集計のファイルのパス"""
+        return os.path.join(self.process_tally_dir, f"{day.isoformat()}{PROCESS_TALLY_SUFFIX}")
+    
+    def _process_tally_days(self) -> List[date]:
+        """プロセスごとの集計のファイルがある日付（昇順）"""
+        days = []
+        for name in storage.listdir(self.process_tally_dir):
+            if not name.endswith(PROCESS_TALLY_SUFFIX):
+                continue
+            try:
+                days.append(date.fromisoformat(name[:-len(PROCESS_TALLY_SUFFIX)]))
+            except ValueError:
+                continue
+        return sorted(days)
+    
+    def _load_process_tallies(self, day: date) -> Dict[str, Dict[str, Dict[str, list]]]:
+        """
+        日のプロセスごとの集計を返します（{1時間の区間の開始時刻: {メトリクス: {名前: [回数, 合計, 最大値]}}}）。
+        
+        分位点スケッチと同様に直近に読んだ1日分を保持し、更新時刻が変わっていれば読み直します。
+        ない・壊れている場合はその日の上位プロセスのファイルから再構築します。
+        """
+        path = self.process_tally_path(day)
+        mtime = _mtime(path)
+        if self._tallies_cache is not None and self._tallies_cache[0] == day and mtime == self._tallies_mtime:
+            return self._tallies_cache[1]
+        
+        hours = None
+        if mtime is not None or storage.exists(path):
+            try:
+                hours = storage.read_json(path).get("hours")
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, AttributeError) as e:
+                logger.warning("Failed to load process tallies %s: %s", day, e)
+        if isinstance(hours, dict):
+            self._tallies_cache = (day, hours)
+            self._tallies_mtime = mtime
+            return hours
+        
+        tallies: Dict[str, Dict[str, Dict[str, list]]] = {}
+        samples = self._read_processes(day)
+        if samples:
+            _tally_processes(tallies, samples)
+            self._save_process_tallies(day, tallies)
+        return tallies
+    
+    def _save_process_tallies(self, day: date, tallies: Dict[str, Dict[str, Dict[str, list]]]) -> None:
+        """日のプロセスごとの集計を保存する（一時ファイルに書いてから置き換える）"""
+        path = self.process_tally_path(day)
+        try:
+            storage.write_json(
+                path,
+                {"version": FILE_VERSION, "hours": tallies},
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+            self._tallies_cache = (day, tallies)
+            self._tallies_mtime = _mtime(path)
+        except OSError as e:
+            logger.warning("Failed to save process tallies %s: %s", day, e)
+    
+    def _process_tallies(
+        self, metric: str, start_ts: float, end_ts: float, name: Optional[str] = None
+    ) -> Iterator[Tuple[float, str, int, float, float]]:
+        """
+        期間にかかる1時間ごとの集計を (区間の開始時刻, 名前, 回数, 合計, 最大値) として返す
+        
+        期間にかかる日の集計のファイルだけを読みます（ない日は上位プロセスのファイルから再構築）。
+        """
+        first = _bucket_start("1h", start_ts)
+        first_day, last_day = date.fromtimestamp(first), date.fromtimestamp(end_ts)
+        days = set(self._process_tally_days()).union(self._process_days())
+        for day in sorted(d for d in days if first_day <= d <= last_day):
+            for hour, metrics in self._load_process_tallies(day).items():
+                hour = float(hour)
+                if hour < first or hour > end_ts:
+                    continue
+                for tally_name, (top, total, peak) in metrics.get(metric, {}).items():
+                    if name is None or tally_name == name:
+                        yield hour, tally_name, top, total, peak
+    
+    def _prune_processes(self, oldest: date) -> None:
+        """oldest より前の日の上位プロセスのファイルを削除する（集計は prune_process_tallies で別に削除）"""
+        for day in self._process_days():
+            if day < oldest:
+                try:
+                    storage.remove(self.process_path(day))
+                except OSError as e:
+                    logger.warning("Failed to remove process history %s: %s", day, e)
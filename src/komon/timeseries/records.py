@@ -0,0 +1,149 @@
+"""
+時系列ストアのレコード形式
+
+パーティションのファイル形式（ヘッダーと固定長のレコード）、1サンプル・集計段の1区間のデータと、
+保存方式によらず共通の集計処理（マニフェストのエントリ・集計区間・十分統計量・分位点スケッチ）を定義します。
+"""
+
+import math
+import os
+import struct
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from komon.forecast import SUM_KEYS, update_sums
+from komon.sketch import add_value
+
+TIMESERIES_DIR = "data/metrics"
+
+# レコードに保存するメトリクス（順序はファイル形式の一部）
+METRICS = ("cpu", "mem", "disk")
+
+FILE_MAGIC = b"KMTS"
+FILE_VERSION = 1
+HEADER = struct.Struct("<4sHHH6x")
+RECORD = struct.Struct("<d" + "d" * len(METRICS))
+PARTITION_SUFFIX = ".bin"
+TIMESTAMP = struct.Struct("<d")
+
+# パーティションごとの件数・時刻の範囲を記録するマニフェスト（TIMESERIES_DIR 内に作成）
+MANIFEST_NAME = "manifest.json"
+
+# 回帰の十分統計量（追記のたびに更新し、予測時に履歴を読まずに済ませる）
+TREND_DAILY_DAYS = 2  # trend() で返す日ごとの合計の日数（現在の値と前日比に使用）
+TREND_REBUILD_DAYS = 14  # 十分統計量がない場合に再構築に使うサンプルの日数
+LEGACY_TREND_NAME = "trend.json"  # 以前の版が十分統計量を保存していたファイル（再構築時に削除）
+TREND_COLUMNS = ("t",) + SUM_KEYS  # 十分統計量のキー（SQLite の trend_sums テーブルの列）
+
+# 終わった日の分位点スケッチ（TIMESERIES_DIR 内のディレクトリに日ごとのファイルを作成）
+SKETCH_DIR_NAME = "sketches"
+SKETCH_SUFFIX = ".json"
+
+# 集計段（ロールアップ）。粗い順に並べ、読み込み時は粗い段から使う
+ROLLUP_TIERS = ("1d", "1h")
+ROLLUP_STATS = ("min", "max", "avg", "p95")
+ROLLUP_RECORD = struct.Struct("<dI4x" + "d" * len(METRICS) * len(ROLLUP_STATS))
+
+# 1サンプル分のデータ（timestamp は UNIX時間）
+Sample = namedtuple("Sample", ("timestamp",) + METRICS)
+
+# 集計段の1区間分のデータ（start は区間の開始時刻、各メトリクスの min / max / avg / p95）
+Rollup = namedtuple(
+    "Rollup",
+    ("start", "count") + tuple(f"{metric}_{stat}" for metric in METRICS for stat in ROLLUP_STATS)
+)
+
+
+def _partition_name(day: date) -> str:
+    """日付に対応するパーティションのファイル名"""
+    return f"{day.isoformat()}{PARTITION_SUFFIX}"
+
+
+def _header_bytes() -> bytes:
+    return HEADER.pack(FILE_MAGIC, FILE_VERSION, RECORD.size, len(METRICS))
+
+
+def _mtime(path: str) -> Optional[int]:
+    """ファイルの更新時刻（ナノ秒、ない場合は None）"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _record_count(size: int) -> int:
+    """ファイルサイズから完全なレコードの件数を求める"""
+    return max(size - HEADER.size, 0) // RECORD.size
+
+
+def _entry_for(samples: List[Sample]) -> Optional[Dict[str, Any]]:
+    """サンプルからマニフェストのエントリ（件数・最初と最後の時刻・時刻順か・各メトリクスの合計）を作成"""
+    if not samples:
+        return None
+    timestamps = [s.timestamp for s in samples]
+    return {
+        "count": len(timestamps),
+        "first": min(timestamps),
+        "last": max(timestamps),
+        "sorted": all(a <= b for a, b in zip(timestamps, timestamps[1:])),
+        "sums": {metric: sum(getattr(s, metric) for s in samples) for metric in METRICS},
+    }
+
+
+def _read_records(f, lo: int, hi: int) -> List[Sample]:
+    """パーティションの lo 番目から hi 番目の手前までのレコードを読み込む"""
+    if hi <= lo:
+        return []
+    f.seek(HEADER.size + lo * RECORD.size)
+    data = f.read((hi - lo) * RECORD.size)
+    data = data[:len(data) - len(data) % RECORD.size]
+    return [Sample._make(values) for values in RECORD.iter_unpack(data)]
+
+
+def _bucket_start(tier: str, timestamp: float) -> float:
+    """時刻が属する集計区間の開始時刻（1h: 正時、1d: その日の0時）"""
+    dt = datetime.fromtimestamp(timestamp)
+    if tier == "1d":
+        return datetime.combine(dt.date(), time()).timestamp()
+    return dt.replace(minute=0, second=0, microsecond=0).timestamp()
+
+
+def _bucket_end(tier: str, start: float) -> float:
+    """集計区間の終了時刻（次の区間の開始時刻）"""
+    if tier == "1d":
+        return _day_range(datetime.fromtimestamp(start).date())[1]
+    return start + 3600
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """最近傍順位法によるパーセンタイル"""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+def _make_rollup(start: float, samples: List[Sample]) -> Rollup:
+    """1区間分のサンプルから集計値を作成"""
+    values = []
+    for metric in METRICS:
+        column = [getattr(s, metric) for s in samples]
+        values += [min(column), max(column), sum(column) / len(column), _percentile(column, 0.95)]
+    return Rollup(start, len(samples), *values)
+
+
+def _add_trend(trends: Dict[str, Dict[str, Any]], sample: Sample) -> None:
+    """サンプルをメトリクスごとの十分統計量に加える"""
+    for metric in METRICS:
+        trends[metric] = update_sums(trends.get(metric), sample.timestamp, getattr(sample, metric))
+
+
+def _add_sketch(sketches: Dict[str, Dict[str, int]], sample: Sample) -> None:
+    """サンプルをメトリクスごとの分位点スケッチに加える"""
+    for metric in METRICS:
+        add_value(sketches.setdefault(metric, {}), getattr(sample, metric))
+
+
+def _day_range(day: date) -> Tuple[float, float]:
+    """日付の範囲（開始時刻, 翌日の開始時刻）をUNIX時間で返す"""
+    start = datetime.combine(day, time())
+    return start.timestamp(), (start + timedelta(days=1)).timestamp()
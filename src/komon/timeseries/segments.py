@@ -0,0 +1,205 @@
+"""
+時系列ストアのセグメント圧縮
+
+終わった日のパーティションを compact() で圧縮したセグメント（YYYY-MM-DD.seg）に置き換えます。
+セグメントはレコードを最大 SEGMENT_BLOCK_RECORDS 件ずつのブロックに分け、
+ブロックごとに列単位で前の値との差分（float64 のビット列の差）を取ってから zlib で圧縮します。
+先頭のブロック索引（各ブロックの最初と最後の時刻・件数・位置）で読むブロックを絞り込み、
+展開したブロックは LRU キャッシュに保持します。
+"""
+
+import logging
+import os
+import struct
+import zlib
+from collections import OrderedDict
+from datetime import date
+from itertools import accumulate
+from typing import List, Optional, Tuple
+
+from komon import storage
+from .records import FILE_VERSION, HEADER, METRICS, RECORD, Sample, _entry_for
+
+logger = logging.getLogger(__name__)
+
+# 終わった日を圧縮したセグメント（ヘッダーの後にブロック数・ブロック索引・ブロックが続く）
+SEGMENT_MAGIC = b"KMTZ"
+SEGMENT_SUFFIX = ".seg"
+SEGMENT_BLOCK_RECORDS = 1024
+SEGMENT_COMPRESS_LEVEL = 9
+BLOCK_COUNT = struct.Struct("<I")
+BLOCK_INDEX = struct.Struct("<ddIII")  # 最初の時刻, 最後の時刻, 件数, 位置, 長さ
+BLOCK_CACHE_SIZE = 32  # 展開したブロックを保持する数
+
+# 1レコードのフィールド数と、float64 のビット列の差分計算用のマスク
+_FIELDS = 1 + len(METRICS)
+_U64_MASK = (1 << 64) - 1
+
+
+def _encode_block(samples: List[Sample]) -> bytes:
+    """
+    サンプルを列ごとの差分に変換して圧縮します。
+    
+    float64 のビット列を整数とみなして前の値との差を取るため、可逆です。
+    等間隔の時刻やゆっくり変化する値は差が小さく、同じバイト列が続いて圧縮が効きます。
+    """
+    n = len(samples)
+    bits = struct.unpack(f"<{n * _FIELDS}Q", b"".join(RECORD.pack(*s) for s in samples))
+    deltas = []
+    for column in range(_FIELDS):
+        previous = 0
+        for value in bits[column::_FIELDS]:
+            deltas.append((value - previous) & _U64_MASK)
+            previous = value
+    return zlib.compress(struct.pack(f"<{len(deltas)}Q", *deltas), SEGMENT_COMPRESS_LEVEL)
+
+
+def _decode_block(data: bytes, count: int) -> List[Sample]:
+    """_encode_block() で圧縮したブロックをサンプルのリストに戻す"""
+    deltas = struct.unpack(f"<{count * _FIELDS}Q", zlib.decompress(data))
+    columns = [
+        accumulate(deltas[column * count:(column + 1) * count], lambda a, b: (a + b) & _U64_MASK)
+        for column in range(_FIELDS)
+    ]
+    bits = struct.pack(f"<{count * _FIELDS}Q", *(value for row in zip(*columns) for value in row))
+    return [Sample._make(values) for values in RECORD.iter_unpack(bits)]
+
+
+class _BlockCache:
+    """展開したセグメントのブロックを保持する LRU キャッシュ"""
+    
+    def __init__(self, size: int = BLOCK_CACHE_SIZE):
+        self.size = size
+        self._blocks: "OrderedDict[tuple, List[Sample]]" = OrderedDict()
+    
+    def get(self, key: tuple) -> Optional[List[Sample]]:
+        samples = self._blocks.get(key)
+        if samples is not None:
+            self._blocks.move_to_end(key)
+        return samples
+    
+    def put(self, key: tuple, samples: List[Sample]) -> None:
+        self._blocks[key] = samples
+        self._blocks.move_to_end(key)
+        while len(self._blocks) > self.size:
+            self._blocks.popitem(last=False)
+
+
+class SegmentCompaction:
+    """
+    終わった日のパーティションを圧縮セグメントに置き換え、必要なブロックだけを読み込む機能
+
+    TimeSeriesStore が継承し、root・マニフェスト・パーティションの読み込みは TimeSeriesStore のものを使います。
+    展開したブロックは TimeSeriesStore が作成する _block_cache に保持します。
+    """
+    
+    def segment_path(self, day: date) -> str:
+        """日付に対応する圧縮セグメントのパス"""
+        return os.path.join(self.root, f"{day.isoformat()}{SEGMENT_SUFFIX}")
+    
+    def compact(self, today: Optional[date] = None) -> List[date]:
+        """
+        終わった日（today より前）のパーティションを圧縮セグメントに置き換えます。
+        
+        セグメントを一時ファイルに書いてから置き換え、元のパーティションの削除は
+        storage.remove() でマニフェストの反映後に行うため、途中で中断されてもデータは失われず、
+        マニフェストが削除済みのパーティションを指すこともありません。
+        
+        Args:
+            today: 基準日（テスト用）
+        
+        Returns:
+            list: 圧縮したパーティションの日付
+        """
+        today = today or date.today()
+        manifest = self._manifest()
+        compacted = []
+        for day in self.partitions():
+            if day >= today:
+                break
+            path = self.partition_path(day)
+            if not storage.exists(path):
+                continue
+            samples = sorted(self.read_partition(day), key=lambda s: s.timestamp)
+            if not samples:
+                continue
+            try:
+                size = self._write_segment(day, samples)
+                entry = _entry_for(samples)
+                entry.update(compressed=True, size=size)
+                if "sketch" in manifest.get(day.isoformat(), {}):
+                    entry["sketch"] = manifest[day.isoformat()]["sketch"]
+                manifest[day.isoformat()] = entry
+                self._save_manifest()
+                storage.remove(path)
+            except OSError as e:
+                logger.warning("Failed to compact partition %s: %s", day, e)
+                continue
+            compacted.append(day)
+        return compacted
+    
+    def _write_segment(self, day: date, samples: List[Sample]) -> int:
+        """時刻順のサンプルをセグメントに書き込み、ファイルサイズを返す"""
+        blocks = [samples[i:i + SEGMENT_BLOCK_RECORDS] for i in range(0, len(samples), SEGMENT_BLOCK_RECORDS)]
+        encoded = [_encode_block(block) for block in blocks]
+        offset = HEADER.size + BLOCK_COUNT.size + len(blocks) * BLOCK_INDEX.size
+        index = []
+        for block, data in zip(blocks, encoded):
+            index.append(BLOCK_INDEX.pack(block[0].timestamp, block[-1].timestamp, len(block), offset, len(data)))
+            offset += len(data)
+        
+        storage.replace_file(self.segment_path(day), b"".join([
+            HEADER.pack(SEGMENT_MAGIC, FILE_VERSION, RECORD.size, len(METRICS)),
+            BLOCK_COUNT.pack(len(blocks)),
+            *index,
+            *encoded,
+        ]))
+        return offset
+    
+    def _segment_index(self, f, day: date) -> List[Tuple[float, float, int, int, int]]:
+        """セグメントのブロック索引を読み込む"""
+        f.seek(0)
+        data = f.read(HEADER.size + BLOCK_COUNT.size)
+        if len(data) < HEADER.size + BLOCK_COUNT.size:
+            return []
+        magic, version, record_size, _ = HEADER.unpack_from(data)
+        if magic != SEGMENT_MAGIC or record_size != RECORD.size:
+            logger.warning("Unsupported time-series segment: %s (version %s)", day, version)
+            return []
+        (count,) = BLOCK_COUNT.unpack_from(data, HEADER.size)
+        data = f.read(count * BLOCK_INDEX.size)
+        return list(BLOCK_INDEX.iter_unpack(data[:len(data) - len(data) % BLOCK_INDEX.size]))
+    
+    def _segment_block(self, f, path: str, block: Tuple[float, float, int, int, int]) -> List[Sample]:
+        """セグメントのブロックを展開する（展開済みのブロックはキャッシュから返す）"""
+        _, _, count, offset, length = block
+        key = (path, os.fstat(f.fileno()).st_mtime_ns, offset)
+        samples = self._block_cache.get(key)
+        if samples is None:
+            f.seek(offset)
+            try:
+                samples = _decode_block(f.read(length), count)
+            except (zlib.error, struct.error) as e:
+                logger.warning("Failed to decode time-series segment block: %s (%s)", path, e)
+                return []
+            self._block_cache.put(key, samples)
+        return samples
+    
+    def _read_blocks(self, f, path: str, day: date, start_ts: float, end_ts: float) -> List[Sample]:
+        """セグメントから期間にかかるブロックだけを展開してサンプルを返す"""
+        samples = []
+        for block in self._segment_index(f, day):
+            if block[1] < start_ts or block[0] > end_ts:
+                continue
+            samples.extend(s for s in self._segment_block(f, path, block) if start_ts <= s.timestamp <= end_ts)
+        return samples
+    
+    def _read_segment(self, day: date, start_ts: float, end_ts: float) -> List[Sample]:
+        """セグメントから期間内のサンプルを読み込む"""
+        path = self.segment_path(day)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return []
+        with f:
+            return self._read_blocks(f, path, day, start_ts, end_ts)
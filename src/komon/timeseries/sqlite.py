@@ -0,0 +1,413 @@
+"""
+時系列ストア（SQLite）
+
+settings.yml の history.storage_engine に "sqlite" を指定した場合に、
+TimeSeriesStore と同じ API のまま data/metrics/metrics.db（SQLite、WALモード）に保存します。
+"""
+
+import os
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from komon.sketch import SKETCH_MAX, SKETCH_RESOLUTION, bin_index
+from .processes import PROCESS_LISTS, ProcessSample
+from .records import (
+    METRICS,
+    TIMESERIES_DIR,
+    TREND_COLUMNS,
+    Rollup,
+    Sample,
+    _add_sketch,
+    _add_trend,
+    _bucket_start,
+    _day_range,
+)
+from .store import TimeSeriesStore
+
+# SQLite エンジンのデータベースファイル名（TIMESERIES_DIR 内に作成）
+SQLITE_DB_NAME = "metrics.db"
+
+# SQL でメトリクスを絞り込む条件
+_METRIC_FILTER = "metric IN (" + ", ".join(f"'{m}'" for m in METRICS) + ")"
+
+
+class SQLiteStore(TimeSeriesStore):
+    """
+    SQLite（WALモード）に保存する時系列ストア
+    
+    メトリクスは縦持ちの samples テーブル（主キー: metric, timestamp）に、
+    上位プロセスは正規化した process_samples テーブルに、集計段は rollups テーブルに
+    保存します。期間指定の読み込みや、平均・日次平均のうち生のサンプルを使う部分は
+    SQL で集計するため、全サンプルを Python に読み込む必要はありません。
+    日ごとのサンプル数と合計は daily_totals テーブルに、1時間ごと・プロセス名ごとの
+    上位に入った回数・合計・最大値は process_tallies テーブルに、
+    日ごとの分位点スケッチの区間ごとの件数は daily_sketches テーブルに書き込み時に加算します。
+    """
+    
+    engine = "sqlite"
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS samples (
+            metric TEXT NOT NULL,
+            timestamp REAL NOT NULL,
+            value REAL NOT NULL,
+            PRIMARY KEY (metric, timestamp)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS process_samples (
+            timestamp REAL NOT NULL,
+            metric TEXT NOT NULL,
+            rank INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            value REAL NOT NULL,
+            count INTEGER NOT NULL DEFAULT 1,
+            PRIMARY KEY (timestamp, metric, rank)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS rollups (
+            tier TEXT NOT NULL,
+            start REAL NOT NULL,
+            count INTEGER NOT NULL,
+            {rollup_columns},
+            PRIMARY KEY (tier, start)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS daily_totals (
+            day TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            total REAL NOT NULL,
+            PRIMARY KEY (day, metric)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS process_tallies (
+            metric TEXT NOT NULL,
+            hour REAL NOT NULL,
+            name TEXT NOT NULL,
+            top INTEGER NOT NULL,
+            total REAL NOT NULL,
+            peak REAL NOT NULL,
+            PRIMARY KEY (metric, hour, name)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS daily_sketches (
+            day TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            bin INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, metric, bin)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS trend_sums (
+            metric TEXT PRIMARY KEY,
+            {trend_columns}
+        ) WITHOUT ROWID;
+    """.format(
+        rollup_columns=", ".join(f"{column} REAL NOT NULL" for column in Rollup._fields[2:]),
+        trend_columns=", ".join(f"{column} REAL NOT NULL" for column in TREND_COLUMNS),
+    )
+    
+    # メトリクスを1行（timestamp, cpu, mem, disk）にまとめる SELECT 句
+    PIVOT = "SELECT timestamp, " + ", ".join(
+        f"MAX(CASE WHEN metric = '{m}' THEN value END)" for m in METRICS
+    ) + f" FROM samples WHERE {_METRIC_FILTER}"
+    
+    def __init__(self, root: str = TIMESERIES_DIR):
+        super().__init__(root)
+        self.path = os.path.join(root, SQLITE_DB_NAME)
+        self._initialized = False
+    
+    def _connect(self) -> sqlite3.Connection:
+        """接続を開く（初回はスキーマ作成とWALモードの設定を行う）"""
+        os.makedirs(self.root, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+            with conn:
+                # daily_totals がない古いデータベースは既存のサンプルから作成
+                if conn.execute("SELECT 1 FROM daily_totals LIMIT 1").fetchone() is None:
+                    conn.execute(
+                        "INSERT INTO daily_totals SELECT date(timestamp, 'unixepoch', 'localtime') AS day,"
+                        " metric, COUNT(*), SUM(value) FROM samples GROUP BY day, metric"
+                    )
+                # process_tallies がない古いデータベースは既存の上位プロセスから作成
+                if conn.execute("SELECT 1 FROM process_tallies LIMIT 1").fetchone() is None:
+                    tallies: Dict[Tuple[str, float, str], list] = {}
+                    for timestamp, metric, name, value in conn.execute(
+                        "SELECT timestamp, metric, name, value FROM process_samples"
+                    ):
+                        tally = tallies.setdefault((metric, _bucket_start("1h", timestamp), name), [0, 0.0, value])
+                        tally[0] += 1
+                        tally[1] += value
+                        tally[2] = max(tally[2], value)
+                    conn.executemany(
+                        "INSERT INTO process_tallies VALUES (?, ?, ?, ?, ?, ?)",
+                        [(*key, *tally) for key, tally in tallies.items()]
+                    )
+                # daily_sketches がない古いデータベースは既存のサンプルから作成（区間は sketch.bin_index と同じ）
+                if conn.execute("SELECT 1 FROM daily_sketches LIMIT 1").fetchone() is None:
+                    conn.execute(
+                        "INSERT INTO daily_sketches SELECT date(timestamp, 'unixepoch', 'localtime') AS day, metric,"
+                        " CAST(MIN(MAX(value, 0.0), ?) / ? AS INTEGER) AS bin, COUNT(*)"
+                        " FROM samples GROUP BY day, metric, bin",
+                        (SKETCH_MAX, SKETCH_RESOLUTION)
+                    )
+            self._initialized = True
+        return conn
+    
+    def _select(self, sql: str, params: tuple = ()) -> List[Any]:
+        """SELECT を実行して全行を返す（データベースがない場合は空リスト）"""
+        if not os.path.exists(self.path):
+            return []
+        with closing(self._connect()) as conn:
+            return conn.execute(sql, params).fetchall()
+    
+    def _samples(self, sql: str, params: tuple = ()) -> List[Sample]:
+        """SELECT（PIVOT）の結果をサンプルのリストに変換"""
+        return [Sample(row[0], *(value or 0.0 for value in row[1:])) for row in self._select(sql, params)]
+    
+    def partitions(self) -> List[date]:
+        """サンプルが存在する日付（昇順）"""
+        rows = self._select("SELECT DISTINCT day FROM daily_totals ORDER BY day")
+        return [date.fromisoformat(row[0]) for row in rows]
+    
+    def append(self, usage: Dict[str, Any], timestamp: Optional[float] = None) -> str:
+        """
+        サンプルを1件保存します。
+        
+        usage に cpu_by_process / mem_by_process があれば、
+        上位プロセスも process_samples テーブルに保存し、process_tallies に加算します。
+        """
+        if timestamp is None:
+            timestamp = datetime.now().timestamp()
+        metric_rows = [(m, timestamp, float(usage.get(m) or 0)) for m in METRICS]
+        trends = self._load_trends()
+        process_rows = []
+        for metric, (list_key, value_key) in PROCESS_LISTS.items():
+            for rank, proc in enumerate(usage.get(list_key) or [], start=1):
+                process_rows.append((
+                    timestamp, metric, rank, str(proc.get("name")),
+                    float(proc.get(value_key) or 0), int(proc.get("count", 1)),
+                ))
+        
+        day = datetime.fromtimestamp(timestamp).date().isoformat()
+        with closing(self._connect()) as conn, conn:
+            for metric, _, value in metric_rows:
+                # 同じ時刻のサンプルを置き換える場合は、日ごとの合計から古い値を差し引く
+                old = conn.execute(
+                    "SELECT value FROM samples WHERE metric = ? AND timestamp = ?", (metric, timestamp)
+                ).fetchone()
+                conn.execute(
+                    "INSERT INTO daily_totals VALUES (?, ?, ?, ?) ON CONFLICT (day, metric)"
+                    " DO UPDATE SET count = count + excluded.count, total = total + excluded.total",
+                    (day, metric, 0 if old else 1, value - (old[0] if old else 0))
+                )
+                changes = [(day, metric, bin_index(value), 1)]
+                if old:
+                    changes.append((day, metric, bin_index(old[0]), -1))
+                conn.executemany(
+                    "INSERT INTO daily_sketches VALUES (?, ?, ?, ?) ON CONFLICT (day, metric, bin)"
+                    " DO UPDATE SET count = count + excluded.count",
+                    changes
+                )
+            conn.execute("DELETE FROM daily_sketches WHERE day = ? AND count <= 0", (day,))
+            conn.executemany("INSERT OR REPLACE INTO samples VALUES (?, ?, ?)", metric_rows)
+            
+            # 同じ時刻の上位プロセスを置き換える場合は、集計から古い値を差し引く
+            hour = _bucket_start("1h", timestamp)
+            for metric, name, value in conn.execute(
+                "SELECT metric, name, value FROM process_samples WHERE timestamp = ?", (timestamp,)
+            ).fetchall():
+                conn.execute(
+                    "UPDATE process_tallies SET top = top - 1, total = total - ?"
+                    " WHERE metric = ? AND hour = ? AND name = ?",
+                    (value, metric, hour, name)
+                )
+            conn.execute("DELETE FROM process_samples WHERE timestamp = ?", (timestamp,))
+            conn.executemany("INSERT INTO process_samples VALUES (?, ?, ?, ?, ?, ?)", process_rows)
+            conn.executemany(
+                "INSERT INTO process_tallies VALUES (?, ?, ?, 1, ?, ?) ON CONFLICT (metric, hour, name)"
+                " DO UPDATE SET top = top + 1, total = total + excluded.total, peak = MAX(peak, excluded.peak)",
+                [(metric, hour, name, value, value) for _, metric, _, name, value, _ in process_rows]
+            )
+            _add_trend(trends, Sample(timestamp, *(value for _, _, value in metric_rows)))
+            self._write_trends(conn, trends)
+        return self.path
+    
+    def write_partition(self, day: date, samples: List[Sample]) -> str:
+        """1日分のサンプルを置き換えます（移行処理用、1トランザクション）"""
+        start_ts, end_ts = _day_range(day)
+        rows = [(m, s.timestamp, getattr(s, m)) for s in samples for m in METRICS]
+        totals = [
+            (day.isoformat(), m, len(samples), sum(getattr(s, m) for s in samples)) for m in METRICS
+        ] if samples else []
+        sketches: Dict[str, Dict[str, int]] = {}
+        for sample in samples:
+            _add_sketch(sketches, sample)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM samples WHERE timestamp >= ? AND timestamp < ?", (start_ts, end_ts))
+            conn.executemany("INSERT OR REPLACE INTO samples VALUES (?, ?, ?)", rows)
+            conn.execute("DELETE FROM daily_totals WHERE day = ?", (day.isoformat(),))
+            conn.executemany("INSERT INTO daily_totals VALUES (?, ?, ?, ?)", totals)
+            conn.execute("DELETE FROM daily_sketches WHERE day = ?", (day.isoformat(),))
+            conn.executemany(
+                "INSERT INTO daily_sketches VALUES (?, ?, ?, ?)",
+                [(day.isoformat(), m, int(key), count) for m, sketch in sketches.items() for key, count in sketch.items()]
+            )
+            # 十分統計量は次回の読み込み時に再構築する
+            conn.execute("DELETE FROM trend_sums")
+        return self.path
+    
+    def read_partition(self, day: date) -> List[Sample]:
+        start_ts, end_ts = _day_range(day)
+        return self._samples(
+            f"{self.PIVOT} AND timestamp >= ? AND timestamp < ? GROUP BY timestamp ORDER BY timestamp",
+            (start_ts, end_ts)
+        )
+    
+    def query(self, start: datetime, end: datetime) -> Iterator[Sample]:
+        if not os.path.exists(self.path):
+            return
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                f"{self.PIVOT} AND timestamp BETWEEN ? AND ? GROUP BY timestamp ORDER BY timestamp",
+                (start.timestamp(), end.timestamp())
+            )
+            for row in cursor:
+                yield Sample(row[0], *(value or 0.0 for value in row[1:]))
+    
+    def _raw_chunks(self, start_ts: float, end_ts: float, closed: bool) -> Iterator[Tuple[float, int, Dict[str, float]]]:
+        """生のサンプルを SQL で1時間ごとに集計して返す"""
+        rows = self._select(
+            "SELECT strftime('%Y-%m-%d %H', timestamp, 'unixepoch', 'localtime') AS hour, metric,"
+            " MIN(timestamp), COUNT(*), AVG(value) FROM samples"
+            f" WHERE {_METRIC_FILTER} AND timestamp >= ? AND timestamp {'<=' if closed else '<'} ?"
+            " GROUP BY hour, metric",
+            (start_ts, end_ts)
+        )
+        chunks: Dict[str, List[Any]] = {}
+        for hour, metric, first, count, value in rows:
+            chunk = chunks.setdefault(hour, [first, count, {}])
+            chunk[0] = min(chunk[0], first)
+            chunk[2][metric] = value
+        for first, count, averages in chunks.values():
+            yield first, count, {m: averages.get(m, 0.0) for m in METRICS}
+    
+    def latest(self, limit: int) -> List[Sample]:
+        return self._samples(f"{self.PIVOT} GROUP BY timestamp ORDER BY timestamp DESC LIMIT ?", (limit,))
+    
+    def prune(self, retention_days: int, today: Optional[date] = None) -> List[date]:
+        oldest = (today or date.today()) - timedelta(days=retention_days - 1)
+        removed = [day for day in self.partitions() if day < oldest]
+        if removed:
+            cutoff = _day_range(oldest)[0]
+            with closing(self._connect()) as conn, conn:
+                conn.execute("DELETE FROM samples WHERE timestamp < ?", (cutoff,))
+                conn.execute("DELETE FROM process_samples WHERE timestamp < ?", (cutoff,))
+                conn.execute("DELETE FROM daily_totals WHERE day < ?", (oldest.isoformat(),))
+        return removed
+    
+    def compact(self, today: Optional[date] = None) -> List[date]:
+        # SQLite はページ単位で管理するため、日ごとのセグメントには圧縮しない
+        return []
+    
+    def process_samples(self, start: datetime, end: datetime) -> List[ProcessSample]:
+        rows = self._select(
+            "SELECT timestamp, metric, name, value, count FROM process_samples"
+            " WHERE timestamp BETWEEN ? AND ? ORDER BY timestamp, metric, rank",
+            (start.timestamp(), end.timestamp())
+        )
+        merged: Dict[Tuple[float, str], Dict[str, Any]] = {}
+        for timestamp, metric, name, value, count in rows:
+            row = merged.setdefault((timestamp, name), dict.fromkeys(PROCESS_LISTS, None))
+            row["count"] = count
+            row[metric] = value
+        return [ProcessSample(timestamp, name, row.pop("count"), **row) for (timestamp, name), row in merged.items()]
+    
+    def prune_process_tallies(self, retention_days: int, today: Optional[date] = None) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        cutoff = _day_range((today or date.today()) - timedelta(days=retention_days - 1))[0]
+        with closing(self._connect()) as conn, conn:
+            hours = conn.execute("SELECT DISTINCT hour FROM process_tallies WHERE hour < ?", (cutoff,)).fetchall()
+            conn.execute("DELETE FROM process_tallies WHERE hour < ?", (cutoff,))
+        return len({date.fromtimestamp(hour) for hour, in hours})
+    
+    def _process_tallies(
+        self, metric: str, start_ts: float, end_ts: float, name: Optional[str] = None
+    ) -> Iterator[Tuple[float, str, int, float, float]]:
+        sql = "SELECT hour, name, top, total, peak FROM process_tallies WHERE metric = ? AND hour BETWEEN ? AND ?"
+        params: tuple = (metric, _bucket_start("1h", start_ts), end_ts)
+        if name is not None:
+            sql += " AND name = ?"
+            params += (name,)
+        yield from self._select(sql, params)
+    
+    def daily_totals(self, first_day: date, last_day: date) -> Dict[date, Tuple[int, Dict[str, float]]]:
+        rows = self._select(
+            "SELECT day, metric, count, total FROM daily_totals WHERE day BETWEEN ? AND ?",
+            (first_day.isoformat(), last_day.isoformat())
+        )
+        totals: Dict[date, Tuple[int, Dict[str, float]]] = {}
+        for day, metric, count, total in rows:
+            totals.setdefault(date.fromisoformat(day), (count, dict.fromkeys(METRICS, 0.0)))[1][metric] = total
+        return totals
+    
+    def _load_trends(self) -> Dict[str, Dict[str, Any]]:
+        rows = self._select(f"SELECT metric, {', '.join(TREND_COLUMNS)} FROM trend_sums")
+        if rows:
+            return {row[0]: dict(zip(TREND_COLUMNS, row[1:])) for row in rows}
+        trends = self._rebuild_trends()
+        if trends:
+            with closing(self._connect()) as conn, conn:
+                self._write_trends(conn, trends)
+        return trends
+    
+    def _write_trends(self, conn: sqlite3.Connection, trends: Dict[str, Dict[str, Any]]) -> None:
+        """十分統計量を trend_sums テーブルに書き込む（呼び出し元のトランザクション内）"""
+        conn.executemany(
+            f"INSERT OR REPLACE INTO trend_sums VALUES (?, {', '.join('?' * len(TREND_COLUMNS))})",
+            [(metric, *(sums[column] for column in TREND_COLUMNS)) for metric, sums in trends.items()]
+        )
+    
+    def daily_sketches(self, first_day: date, last_day: date) -> Dict[date, Dict[str, Dict[str, int]]]:
+        rows = self._select(
+            "SELECT day, metric, bin, count FROM daily_sketches WHERE day BETWEEN ? AND ?",
+            (first_day.isoformat(), last_day.isoformat())
+        )
+        sketches: Dict[date, Dict[str, Dict[str, int]]] = {}
+        for day, metric, index, count in rows:
+            sketches.setdefault(date.fromisoformat(day), {}).setdefault(metric, {})[str(index)] = count
+        return sketches
+    
+    def prune_sketches(self, retention_days: int, today: Optional[date] = None) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        oldest = ((today or date.today()) - timedelta(days=retention_days - 1)).isoformat()
+        with closing(self._connect()) as conn, conn:
+            days = conn.execute("SELECT COUNT(DISTINCT day) FROM daily_sketches WHERE day < ?", (oldest,)).fetchone()[0]
+            conn.execute("DELETE FROM daily_sketches WHERE day < ?", (oldest,))
+        return days
+    
+    def _read_rollups(self, tier: str, start_ts: float, end_ts: float) -> List[Rollup]:
+        rows = self._select(
+            "SELECT * FROM rollups WHERE tier = ? AND start BETWEEN ? AND ? ORDER BY start",
+            (tier, start_ts, end_ts)
+        )
+        return [Rollup._make(row[1:]) for row in rows]
+    
+    def _last_rollup(self, tier: str) -> Optional[Rollup]:
+        rows = self._select("SELECT * FROM rollups WHERE tier = ? ORDER BY start DESC LIMIT 1", (tier,))
+        return Rollup._make(rows[0][1:]) if rows else None
+    
+    def _append_rollups(self, tier: str, rollups: List[Rollup]) -> None:
+        placeholders = ", ".join("?" * (len(Rollup._fields) + 1))
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO rollups VALUES ({placeholders})",
+                [(tier, *rollup) for rollup in rollups]
+            )
+    
+    def _prune_rollups(self, tier: str, cutoff: float) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("DELETE FROM rollups WHERE tier = ? AND start < ?", (tier, cutoff)).rowcount
@@ -0,0 +1,870 @@
+"""
+時系列ストア（binary）
+
+リソース使用率のサンプルを日ごとのバイナリファイル（パーティション）に追記して保存し、
+期間指定で読み出すための API を提供します。
+
+1サンプルは固定長のレコード（タイムスタンプ + 各メトリクスの値）で、
+1日分は data/metrics/YYYY-MM-DD.bin の1ファイルにまとまります。
+サンプルごとにファイルを作らないため、inode の消費や open() の回数は
+日数分だけで済み、読み込みも struct.iter_unpack で一括して行います。
+
+終わった日のセグメントへの圧縮は segments、上位プロセスの履歴は processes の
+SegmentCompaction・ProcessHistory から継承します。
+"""
+
+import logging
+import math
+import os
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from komon import storage
+from komon.sketch import DEFAULT_QUANTILES, merge_sketches, summarize
+from .processes import ProcessHistory, _process_samples
+from .records import (
+    FILE_MAGIC,
+    FILE_VERSION,
+    HEADER,
+    LEGACY_TREND_NAME,
+    MANIFEST_NAME,
+    METRICS,
+    PARTITION_SUFFIX,
+    RECORD,
+    ROLLUP_RECORD,
+    ROLLUP_TIERS,
+    SKETCH_DIR_NAME,
+    SKETCH_SUFFIX,
+    TIMESERIES_DIR,
+    TIMESTAMP,
+    TREND_DAILY_DAYS,
+    TREND_REBUILD_DAYS,
+    Rollup,
+    Sample,
+    _add_sketch,
+    _add_trend,
+    _bucket_end,
+    _bucket_start,
+    _day_range,
+    _entry_for,
+    _header_bytes,
+    _make_rollup,
+    _mtime,
+    _partition_name,
+    _read_records,
+    _record_count,
+)
+from .segments import SEGMENT_SUFFIX, SegmentCompaction, _BlockCache
+
+logger = logging.getLogger(__name__)
+
+
+class _RecordTimestamps:
+    """
+    パーティション内の各レコードのタイムスタンプを参照するシーケンス
+    
+    ファイル全体を読み込まず、bisect が参照した位置だけを seek して読みます。
+    """
+    
+    def __init__(self, f, count: int):
+        self.f = f
+        self.count = count
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def __getitem__(self, index: int) -> float:
+        self.f.seek(HEADER.size + index * RECORD.size)
+        return TIMESTAMP.unpack(self.f.read(TIMESTAMP.size))[0]
+
+
+class TimeSeriesStore(SegmentCompaction, ProcessHistory):
+    """
+    日ごとにパーティション分割された追記専用の時系列ストア
+    
+    書き込みは当日のパーティションへの追記のみで、既存レコードは書き換えません。
+    書き込み途中で中断された末尾の不完全なレコードは、読み込み時に無視し、
+    次回の追記前に切り詰めます。
+    
+    パーティションごとのレコード数・最初と最後の時刻・時刻順かどうかを
+    マニフェスト（manifest.json）に記録し、書き込みのたびに更新します。
+    読み込み時はマニフェストで対象のパーティションを絞り込み、
+    時刻順のパーティションは二分探索で必要な範囲のレコードだけを読みます。
+    
+    終わった日のパーティションは compact() で圧縮したセグメントに置き換えます。
+    セグメントは読み込み時に必要なブロックだけを展開します。
+    """
+    
+    engine = "binary"
+    
+    def __init__(self, root: str = TIMESERIES_DIR):
+        """
+        Args:
+            root: パーティションを保存するディレクトリ
+        """
+        self.root = root
+        self._manifest_cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._manifest_mtime: Optional[int] = None
+        self._block_cache = _BlockCache()
+        self._tallies_cache: Optional[Tuple[date, Dict[str, Dict[str, Dict[str, list]]]]] = None
+        self._tallies_mtime: Optional[int] = None
+        self._trends_cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._sketch_cache: Optional[Tuple[date, Dict[str, Dict[str, int]]]] = None
+        self._sketch_mtime: Optional[int] = None
+    
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root, MANIFEST_NAME)
+    
+    def partition_path(self, day: date) -> str:
+        """日付に対応するパーティションのパス"""
+        return os.path.join(self.root, _partition_name(day))
+    
+    def _partition_file(self, day: date) -> Tuple[str, bool]:
+        """
+        日付のデータを読むファイルのパスと、圧縮セグメントかどうかを返します。
+        
+        圧縮途中で中断されて両方ある場合は、圧縮前のパーティションを優先します。
+        """
+        path = self.partition_path(day)
+        if not storage.exists(path) and storage.exists(self.segment_path(day)):
+            return self.segment_path(day), True
+        return path, False
+    
+    def partitions(self) -> List[date]:
+        """存在するパーティションの日付（昇順）"""
+        return sorted(date.fromisoformat(key) for key in self._manifest())
+    
+    def _list_partitions(self) -> List[date]:
+        """ディレクトリを走査してパーティションの日付を取得（マニフェストの再構築用）"""
+        days = []
+        for name in storage.listdir(self.root):
+            stem, suffix = os.path.splitext(name)
+            if suffix not in (PARTITION_SUFFIX, SEGMENT_SUFFIX):
+                continue
+            try:
+                days.append(date.fromisoformat(stem))
+            except ValueError:
+                continue
+        return sorted(set(days))
+    
+    def _manifest(self) -> Dict[str, Dict[str, Any]]:
+        """
+        マニフェストを返します。
+        
+        他のプロセス（cron と常駐モードなど）が更新した場合に備え、
+        ファイルの更新時刻が変わっていれば読み直します。
+        マニフェストがない・壊れている場合はパーティションから再構築します。
+        回帰の十分統計量（"trends"）も同じファイルから読み込みます。
+        """
+        mtime = _mtime(self.manifest_path)
+        if self._manifest_cache is not None and mtime == self._manifest_mtime:
+            return self._manifest_cache
+        
+        entries = trends = None
+        if mtime is not None or storage.exists(self.manifest_path):
+            try:
+                data = storage.read_json(self.manifest_path)
+                entries, trends = data.get("partitions"), data.get("trends")
+            except (OSError, ValueError, AttributeError) as e:
+                logger.warning("Failed to load time-series manifest: %s", e)
+        self._manifest_cache = entries if isinstance(entries, dict) else {}
+        self._trends_cache = trends if isinstance(trends, dict) else None
+        self._manifest_mtime = mtime
+        
+        if not isinstance(entries, dict):
+            for day in self._list_partitions():
+                entry = self._scan_entry(day)
+                if entry is not None:
+                    self._manifest_cache[day.isoformat()] = entry
+            if self._manifest_cache:
+                self._save_manifest()
+        return self._manifest_cache
+    
+    def _save_manifest(self) -> None:
+        """マニフェストを保存する（一時ファイルに書いてから置き換える）"""
+        data = {"version": FILE_VERSION, "partitions": self._manifest_cache}
+        if self._trends_cache is not None:
+            data["trends"] = self._trends_cache
+        try:
+            storage.write_json(self.manifest_path, data, separators=(",", ":"))
+            self._manifest_mtime = _mtime(self.manifest_path)
+        except OSError as e:
+            logger.warning("Failed to save time-series manifest: %s", e)
+    
+    def _scan_entry(self, day: date) -> Optional[Dict[str, Any]]:
+        """パーティションを読み込んでマニフェストのエントリを作成"""
+        path, compressed = self._partition_file(day)
+        entry = _entry_for(self.read_partition(day))
+        if entry is not None and compressed:
+            entry.update(compressed=True, size=os.path.getsize(path))
+        return entry
+    
+    def _entry(self, day: date, size: int, compressed: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        パーティションのマニフェストエントリを返します。
+        
+        ファイルサイズから求めたレコード数（セグメントはファイルサイズ）とエントリが
+        食い違う場合（マニフェスト更新前に中断された場合など）や、
+        合計値を持たない古い形式のエントリは作り直します。
+        """
+        manifest = self._manifest()
+        key = day.isoformat()
+        entry = manifest.get(key)
+        if compressed:
+            stale = entry is None or not entry.get("compressed") or entry.get("size") != size
+        else:
+            stale = entry is None or entry.get("compressed") or entry.get("count") != _record_count(size)
+        if stale or "sums" not in entry:
+            entry = self._scan_entry(day)
+            if entry is None:
+                manifest.pop(key, None)
+            else:
+                manifest[key] = entry
+            self._save_manifest()
+        return entry
+    
+    def append(self, usage: Dict[str, float], timestamp: Optional[float] = None) -> str:
+        """
+        サンプルを1件追記します。
+        
+        Args:
+            usage: メトリクスの値（cpu, mem, disk）。ない値は 0 として保存
+            timestamp: サンプルの時刻（UNIX時間、Noneの場合は現在時刻）
+        
+        Returns:
+            str: 追記したパーティションのパス
+        """
+        if timestamp is None:
+            timestamp = datetime.now().timestamp()
+        day = datetime.fromtimestamp(timestamp).date()
+        path = self.partition_path(day)
+        record = RECORD.pack(timestamp, *(float(usage.get(m) or 0) for m in METRICS))
+        
+        if self._partition_file(day)[1]:
+            # 圧縮済みの日への追記（時刻の巻き戻しなど）は、展開して通常のパーティションに戻す
+            self.write_partition(day, self.read_partition(day))
+        # 十分統計量・スケッチがない場合の再構築は追記前のサンプルから行う（追記分を二重に数えない）
+        trends = self._load_trends()
+        sketches = self._load_sketches(day)
+        
+        os.makedirs(self.root, exist_ok=True)
+        with open(path, "ab") as f:
+            size = f.tell()
+            if size < HEADER.size:
+                # 新規（またはヘッダー書き込み中に中断された）パーティション
+                f.truncate(0)
+                f.write(_header_bytes())
+            elif (size - HEADER.size) % RECORD.size:
+                # 前回の書き込みが中断された不完全なレコードを切り詰める
+                f.truncate(size - (size - HEADER.size) % RECORD.size)
+            f.write(record)
+            count = _record_count(f.tell())
+        storage.sync_file(path)
+        
+        manifest = self._manifest()
+        key = day.isoformat()
+        entry = manifest.get(key)
+        if entry is not None and entry.get("count") == count - 1 and "sums" in entry:
+            entry.update(
+                count=count,
+                first=min(entry["first"], timestamp),
+                last=max(entry["last"], timestamp),
+                sorted=entry["sorted"] and timestamp >= entry["last"],
+            )
+            for metric, value in zip(METRICS, RECORD.unpack(record)[1:]):
+                entry["sums"][metric] += value
+        else:
+            entry = self._scan_entry(day)
+        manifest[key] = entry
+        sample = Sample._make(RECORD.unpack(record))
+        _add_trend(trends, sample)
+        _add_sketch(sketches, sample)
+        if "sketch" not in entry:
+            # 日ごとのファイル（以前の版や再構築したもの）から読んだスケッチはマニフェストに移す
+            storage.remove(self.sketch_path(day))
+        entry["sketch"] = sketches
+        self._archive_sketches(key)
+        # 十分統計量と追記中の日のスケッチはマニフェストに含めて、1回の書き込みで保存する
+        self._save_manifest()
+        
+        processes = _process_samples(usage, timestamp)
+        if processes:
+            self._append_processes(day, processes)
+        return path
+    
+    def write_partition(self, day: date, samples: List[Sample]) -> str:
+        """
+        パーティション全体を書き直します（移行処理用）。
+        
+        一時ファイルに書き込んでから置き換えるため、途中で中断されても
+        既存のパーティションは壊れません。
+        
+        Args:
+            day: パーティションの日付
+            samples: 保存するサンプル（時刻順に並べ替えて保存）
+        
+        Returns:
+            str: パーティションのパス
+        """
+        path = self.partition_path(day)
+        samples = sorted(samples, key=lambda s: s.timestamp)
+        # 続けて追記できるように batch() の中でもすぐに書き込み、セグメントはマニフェストの反映後に削除する
+        storage.replace_file(path, _header_bytes() + b"".join(RECORD.pack(*sample) for sample in samples))
+        storage.remove(self.segment_path(day))
+        
+        self._reset_trends()
+        self._reset_sketches(day)
+        manifest = self._manifest()
+        entry = _entry_for(samples)
+        if entry is None:
+            manifest.pop(day.isoformat(), None)
+        else:
+            manifest[day.isoformat()] = entry
+        self._save_manifest()
+        return path
+    
+    def read_partition(self, day: date) -> List[Sample]:
+        """1日分のサンプルを読み込む（パーティションがない場合は空リスト）"""
+        path, compressed = self._partition_file(day)
+        if compressed:
+            return self._read_segment(day, -math.inf, math.inf)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        return self._decode(data, day)
+    
+    def _decode(self, data: bytes, day: date) -> List[Sample]:
+        """パーティションの内容をサンプルのリストに変換"""
+        if len(data) < HEADER.size:
+            return []
+        magic, version, record_size, _ = HEADER.unpack_from(data)
+        if magic != FILE_MAGIC or record_size != RECORD.size:
+            logger.warning("Unsupported time-series partition: %s (version %s)", day, version)
+            return []
+        end = len(data) - (len(data) - HEADER.size) % RECORD.size
+        return [Sample._make(values) for values in RECORD.iter_unpack(data[HEADER.size:end])]
+    
+    def _read_range(self, day: date, start_ts: float, end_ts: float) -> List[Sample]:
+        """
+        パーティションから期間内のサンプルだけを読み込みます。
+        
+        時刻順のパーティションはタイムスタンプを二分探索して
+        該当するレコードの範囲だけを読み、それ以外は全体を読んで絞り込みます。
+        圧縮セグメントは期間にかかるブロックだけを展開します。
+        """
+        path, compressed = self._partition_file(day)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return []
+        with f:
+            entry = self._entry(day, os.fstat(f.fileno()).st_size, compressed)
+            if entry is None or entry["last"] < start_ts or entry["first"] > end_ts:
+                return []
+            if compressed:
+                return self._read_blocks(f, path, day, start_ts, end_ts)
+            if not entry["sorted"]:
+                samples = self._decode(f.read(), day)
+                return [s for s in samples if start_ts <= s.timestamp <= end_ts]
+            
+            timestamps = _RecordTimestamps(f, entry["count"])
+            lo = bisect_left(timestamps, start_ts)
+            hi = bisect_right(timestamps, end_ts)
+            return _read_records(f, lo, hi)
+    
+    def query(self, start: datetime, end: datetime) -> Iterator[Sample]:
+        """
+        期間内のサンプルを時刻順に返します。
+        
+        Args:
+            start: 期間の開始（この時刻を含む）
+            end: 期間の終了（この時刻を含む）
+        
+        Yields:
+            Sample: サンプル
+        """
+        start_ts = start.timestamp()
+        end_ts = end.timestamp()
+        for day in self.partitions():
+            if day < start.date() or day > end.date():
+                continue
+            yield from self._read_range(day, start_ts, end_ts)
+    
+    def _chunks(self, start: datetime, end: datetime) -> Iterator[Tuple[float, int, Dict[str, float]]]:
+        """
+        期間を集計段の粗い順に埋め、(時刻, 件数, {メトリクス: 平均}) を返します。
+        
+        1d の区間で覆える部分は1日分を1件として、残りを 1h の区間で、
+        それでも残った端の部分だけを生のサンプルで返します。
+        生のサンプルが保持期間を過ぎて削除された期間も、集計段が残っていれば返せます。
+        """
+        # 未処理の期間: (開始, 終了, 終了時刻を含むか)
+        gaps = [(start.timestamp(), end.timestamp(), True)]
+        for tier in ROLLUP_TIERS:
+            remaining = []
+            for gap_start, gap_end, closed in gaps:
+                cursor = gap_start
+                for rollup in self._read_rollups(tier, gap_start, gap_end):
+                    rollup_end = _bucket_end(tier, rollup.start)
+                    if rollup.start < cursor or rollup_end > gap_end:
+                        continue
+                    if rollup.start > cursor:
+                        remaining.append((cursor, rollup.start, False))
+                    yield rollup.start, rollup.count, {m: getattr(rollup, f"{m}_avg") for m in METRICS}
+                    cursor = rollup_end
+                remaining.append((cursor, gap_end, closed))
+            gaps = remaining
+        
+        for gap_start, gap_end, closed in gaps:
+            if gap_start < gap_end or (closed and gap_start == gap_end):
+                yield from self._raw_chunks(gap_start, gap_end, closed)
+    
+    def _raw_chunks(self, start_ts: float, end_ts: float, closed: bool) -> Iterator[Tuple[float, int, Dict[str, float]]]:
+        """生のサンプルを1件ずつ (時刻, 1, 値) として返す"""
+        for sample in self.query(datetime.fromtimestamp(start_ts), datetime.fromtimestamp(end_ts)):
+            if sample.timestamp < end_ts or (closed and sample.timestamp == end_ts):
+                yield sample.timestamp, 1, {m: getattr(sample, m) for m in METRICS}
+    
+    def average(self, start: datetime, end: datetime) -> Dict[str, float]:
+        """
+        期間内の各メトリクスの平均値を返します（サンプルがない場合は 0）。
+        
+        集計段を使える部分は集計値から求め、件数と合計だけを保持して集計します。
+        """
+        count = 0
+        totals = dict.fromkeys(METRICS, 0.0)
+        for _, n, averages in self._chunks(start, end):
+            count += n
+            for metric in METRICS:
+                totals[metric] += averages[metric] * n
+        return {metric: totals[metric] / count if count else 0 for metric in METRICS}
+    
+    def daily_average(self, metric: str, start: datetime, end: datetime) -> List[Tuple[date, float]]:
+        """
+        期間内の1つのメトリクスの日次平均を日付順に返します。
+        
+        Returns:
+            list: [(日付, 平均値), ...]
+        """
+        sums: Dict[date, List[float]] = {}
+        for timestamp, n, averages in self._chunks(start, end):
+            bucket = sums.setdefault(datetime.fromtimestamp(timestamp).date(), [0.0, 0])
+            bucket[0] += averages[metric] * n
+            bucket[1] += n
+        return [(day, total / count) for day, (total, count) in sorted(sums.items())]
+    
+    def daily_totals(self, first_day: date, last_day: date) -> Dict[date, Tuple[int, Dict[str, float]]]:
+        """
+        日ごとのサンプル数と各メトリクスの合計を返します。
+        
+        合計は書き込みのたびにマニフェストで更新しているため、
+        サンプル数によらず日数分のエントリを参照するだけで求まります。
+        
+        Args:
+            first_day: 最初の日（この日を含む）
+            last_day: 最後の日（この日を含む）
+        
+        Returns:
+            dict: {日付: (サンプル数, {メトリクス: 合計})}
+        """
+        totals = {}
+        for day in self.partitions():
+            if day < first_day or day > last_day:
+                continue
+            path, compressed = self._partition_file(day)
+            try:
+                size = os.stat(path).st_size
+            except FileNotFoundError:
+                continue
+            entry = self._entry(day, size, compressed)
+            if entry is not None:
+                totals[day] = (entry["count"], dict(entry["sums"]))
+        return totals
+    
+    def latest(self, limit: int) -> List[Sample]:
+        """
+        新しい順に最大 limit 件のサンプルを返します。
+        
+        新しいパーティションから順に、必要な件数分のレコードだけを末尾から読みます。
+        """
+        results: List[Sample] = []
+        for day in reversed(self.partitions()):
+            if len(results) >= limit:
+                break
+            needed = limit - len(results)
+            path, compressed = self._partition_file(day)
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                continue
+            with f:
+                entry = self._entry(day, os.fstat(f.fileno()).st_size, compressed)
+                if entry is None:
+                    continue
+                if compressed:
+                    samples = []
+                    for block in reversed(self._segment_index(f, day)):
+                        samples[:0] = self._segment_block(f, path, block)
+                        if len(samples) >= needed:
+                            break
+                    samples = samples[-needed:]
+                elif entry["sorted"]:
+                    samples = _read_records(f, max(entry["count"] - needed, 0), entry["count"])
+                else:
+                    samples = sorted(self._decode(f.read(), day), key=lambda s: s.timestamp)[-needed:]
+            results.extend(reversed(samples))
+        return results
+    
+    def prune(self, retention_days: int, today: Optional[date] = None) -> List[date]:
+        """
+        保持期間を過ぎたパーティションを削除します。
+        
+        Args:
+            retention_days: 保持する日数（当日を含む）
+            today: 基準日（テスト用）
+        
+        Returns:
+            list: 削除したパーティションの日付
+        """
+        oldest = (today or date.today()) - timedelta(days=retention_days - 1)
+        manifest = self._manifest()
+        removed = []
+        for day in self.partitions():
+            if day >= oldest:
+                break
+            try:
+                # batch() の中ではマニフェストの反映後に削除される
+                for path in (self.partition_path(day), self.segment_path(day)):
+                    storage.remove(path)
+            except OSError as e:
+                logger.warning("Failed to remove partition %s: %s", day, e)
+                continue
+            entry = manifest.pop(day.isoformat(), None)
+            if entry is not None and "sketch" in entry:
+                # スケッチは生のサンプルより長く保持する
+                self._save_sketches(day, entry["sketch"])
+            removed.append(day)
+        if removed:
+            self._save_manifest()
+        
+        self._prune_processes(oldest)
+        return removed
+    
+    def rollups(self, tier: str, start: datetime, end: datetime) -> List[Rollup]:
+        """
+        集計段の区間を時刻順に返します。
+        
+        Args:
+            tier: 集計段（"1h" / "1d"）
+            start: 期間の開始（区間の開始時刻がこの時刻以降）
+            end: 期間の終了（区間の開始時刻がこの時刻以前）
+        
+        Returns:
+            list: Rollup のリスト
+        """
+        return self._read_rollups(tier, start.timestamp(), end.timestamp())
+    
+    def rollup(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        終わった区間の生のサンプルを集計段に書き込みます。
+        
+        各段の最後の区間より後で、now の時点で終わっている区間だけを集計します。
+        
+        Args:
+            now: 基準時刻（テスト用）
+        
+        Returns:
+            dict: {集計段: 追加した区間数}
+        """
+        now = now or datetime.now()
+        added = {}
+        for tier in ROLLUP_TIERS:
+            limit = _bucket_start(tier, now.timestamp())
+            last = self._last_rollup(tier)
+            if last is not None:
+                begin = _bucket_end(tier, last.start)
+            else:
+                samples = self.query(datetime.fromtimestamp(0), now)
+                first = next(samples, None)
+                samples.close()
+                begin = _bucket_start(tier, first.timestamp) if first is not None else limit
+            
+            buckets: Dict[float, List[Sample]] = {}
+            if begin < limit:
+                for sample in self.query(datetime.fromtimestamp(begin), datetime.fromtimestamp(limit)):
+                    if sample.timestamp < limit:
+                        buckets.setdefault(_bucket_start(tier, sample.timestamp), []).append(sample)
+            rollups = [_make_rollup(start, samples) for start, samples in sorted(buckets.items())]
+            if rollups:
+                self._append_rollups(tier, rollups)
+            added[tier] = len(rollups)
+        return added
+    
+    def prune_rollups(self, retention_days: Dict[str, int], today: Optional[date] = None) -> Dict[str, int]:
+        """
+        集計段ごとの保持期間を過ぎた区間を削除します。
+        
+        Args:
+            retention_days: {集計段: 保持する日数（当日を含む）}
+            today: 基準日（テスト用）
+        
+        Returns:
+            dict: {集計段: 削除した区間数}
+        """
+        today = today or date.today()
+        return {
+            tier: self._prune_rollups(tier, _day_range(today - timedelta(days=days - 1))[0])
+            for tier, days in retention_days.items()
+        }
+    
+    def rollup_path(self, tier: str) -> str:
+        """集計段のファイルのパス"""
+        return os.path.join(self.root, f"rollup-{tier}{PARTITION_SUFFIX}")
+    
+    def _read_rollups(self, tier: str, start_ts: float, end_ts: float) -> List[Rollup]:
+        """集計段のファイルから開始時刻が期間内の区間を読み込む"""
+        try:
+            with open(self.rollup_path(tier), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        if len(data) < HEADER.size:
+            return []
+        magic, version, record_size, _ = HEADER.unpack_from(data)
+        if magic != FILE_MAGIC or record_size != ROLLUP_RECORD.size:
+            logger.warning("Unsupported rollup file: %s (version %s)", tier, version)
+            return []
+        end = len(data) - (len(data) - HEADER.size) % ROLLUP_RECORD.size
+        rollups = map(Rollup._make, ROLLUP_RECORD.iter_unpack(data[HEADER.size:end]))
+        return [r for r in rollups if start_ts <= r.start <= end_ts]
+    
+    def _last_rollup(self, tier: str) -> Optional[Rollup]:
+        rollups = self._read_rollups(tier, -math.inf, math.inf)
+        return rollups[-1] if rollups else None
+    
+    def _append_rollups(self, tier: str, rollups: List[Rollup]) -> None:
+        """集計段のファイルに区間を追記する"""
+        header = HEADER.pack(FILE_MAGIC, FILE_VERSION, ROLLUP_RECORD.size, len(METRICS))
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.rollup_path(tier), "ab") as f:
+            size = f.tell()
+            if size < HEADER.size:
+                f.truncate(0)
+                f.write(header)
+            elif (size - HEADER.size) % ROLLUP_RECORD.size:
+                f.truncate(size - (size - HEADER.size) % ROLLUP_RECORD.size)
+            f.write(b"".join(ROLLUP_RECORD.pack(*r) for r in rollups))
+        storage.sync_file(self.rollup_path(tier))
+    
+    def _prune_rollups(self, tier: str, cutoff: float) -> int:
+        """開始時刻が cutoff より前の区間を削除する（ファイルを書き直す）"""
+        rollups = self._read_rollups(tier, -math.inf, math.inf)
+        kept = [r for r in rollups if r.start >= cutoff]
+        if len(kept) == len(rollups):
+            return 0
+        storage.replace_file(
+            self.rollup_path(tier),
+            HEADER.pack(FILE_MAGIC, FILE_VERSION, ROLLUP_RECORD.size, len(METRICS))
+            + b"".join(ROLLUP_RECORD.pack(*r) for r in kept),
+        )
+        return len(rollups) - len(kept)
+    
+    def trend(self, metric: str) -> Optional[Dict[str, Any]]:
+        """
+        メトリクスの回帰の十分統計量と直近の日ごとの合計を返します。
+        
+        十分統計量は追記のたびに O(1) で更新し、日ごとの合計はマニフェスト（daily_totals）から
+        求めるため、サンプルは読み込みません（forecast.fit_sums で傾きを求められます）。
+        
+        Returns:
+            dict: {'t', 'n', 'sx', 'sy', 'sxy', 'sxx', 'daily': [[日付, 件数, 合計], ...]}
+                （サンプルがない場合は None）
+        """
+        sums = self._load_trends().get(metric)
+        if sums is None:
+            return None
+        days = self.partitions()[-TREND_DAILY_DAYS:]
+        totals = self.daily_totals(days[0], days[-1]) if days else {}
+        daily = [[day.isoformat(), count, sums_by_metric[metric]] for day, (count, sums_by_metric) in sorted(totals.items())]
+        return dict(sums, daily=daily)
+    
+    def _load_trends(self) -> Dict[str, Dict[str, Any]]:
+        """
+        メトリクスごとの十分統計量を返します。
+        
+        マニフェストの "trends" に保存しており、ない場合（以前の版のデータや
+        サンプルを書き直した後）は直近 TREND_REBUILD_DAYS 日分のサンプルから再構築します。
+        """
+        self._manifest()
+        if self._trends_cache is None:
+            self._trends_cache = self._rebuild_trends()
+            self._save_manifest()
+        return self._trends_cache
+    
+    def _rebuild_trends(self) -> Dict[str, Dict[str, Any]]:
+        """直近 TREND_REBUILD_DAYS 日分のサンプルから十分統計量を作成する（以前の版の trend.json は削除）"""
+        trends: Dict[str, Dict[str, Any]] = {}
+        end = datetime.now()
+        for sample in self.query(end - timedelta(days=TREND_REBUILD_DAYS), end):
+            _add_trend(trends, sample)
+        storage.remove(os.path.join(self.root, LEGACY_TREND_NAME))
+        return trends
+    
+    def _reset_trends(self) -> None:
+        """過去のサンプルを書き直した場合に十分統計量を破棄する（次回の読み込み時に再構築）"""
+        self._manifest()
+        self._trends_cache = None
+    
+    def quantiles(
+        self, first_day: date, last_day: date, quantiles: Tuple[float, ...] = DEFAULT_QUANTILES
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        期間内の日ごとの分位点スケッチを統合して、メトリクスごとの分位点を返します。
+        
+        スケッチは追記のたびに更新しているため、生のサンプルを保持していない日も含めて
+        日数分のスケッチを読むだけで求まります。
+        
+        Args:
+            first_day: 最初の日（この日を含む）
+            last_day: 最後の日（この日を含む）
+            quantiles: 求める分位（0〜1）
+        
+        Returns:
+            dict: {メトリクス: {'count': 件数, 'p50': ..., 'p95': ..., 'p99': ...}}（サンプルがないメトリクスは含めない）
+        """
+        days = list(self.daily_sketches(first_day, last_day).values())
+        results = {}
+        for metric in METRICS:
+            summary = summarize(merge_sketches(sketches.get(metric, {}) for sketches in days), quantiles)
+            if summary is not None:
+                results[metric] = summary
+        return results
+    
+    def daily_sketches(self, first_day: date, last_day: date) -> Dict[date, Dict[str, Dict[str, int]]]:
+        """
+        日ごとのメトリクスごとの分位点スケッチを返します。
+        
+        Args:
+            first_day: 最初の日（この日を含む）
+            last_day: 最後の日（この日を含む）
+        
+        Returns:
+            dict: {日付: {メトリクス: スケッチ}}
+        """
+        days = sorted(set(self._sketch_days()) | set(self.partitions()))
+        results = {}
+        for day in days:
+            if first_day <= day <= last_day:
+                sketches = self._load_sketches(day)
+                if sketches:
+                    results[day] = sketches
+        return results
+    
+    def prune_sketches(self, retention_days: int, today: Optional[date] = None) -> int:
+        """
+        保持期間を過ぎた分位点スケッチを削除します。
+        
+        Args:
+            retention_days: 保持する日数（当日を含む）
+            today: 基準日（テスト用）
+        
+        Returns:
+            int: 削除した日数
+        """
+        oldest = (today or date.today()) - timedelta(days=retention_days - 1)
+        removed = 0
+        for day in self._sketch_days():
+            if day >= oldest:
+                break
+            try:
+                storage.remove(self.sketch_path(day))
+                removed += 1
+            except OSError as e:
+                logger.warning("Failed to remove sketch %s: %s", day, e)
+        return removed
+    
+    @property
+    def sketch_dir(self) -> str:
+        return os.path.join(self.root, SKETCH_DIR_NAME)
+    
+    def sketch_path(self, day: date) -> str:
+        """日付に対応する分位点スケッチのパス"""
+        return os.path.join(self.sketch_dir, f"{day.isoformat()}{SKETCH_SUFFIX}")
+    
+    def _sketch_days(self) -> List[date]:
+        """分位点スケッチのファイルがある日付（昇順）"""
+        days = []
+        for name in storage.listdir(self.sketch_dir):
+            if not name.endswith(SKETCH_SUFFIX):
+                continue
+            try:
+                days.append(date.fromisoformat(name[:-len(SKETCH_SUFFIX)]))
+            except ValueError:
+                continue
+        return sorted(days)
+    
+    def _load_sketches(self, day: date) -> Dict[str, Dict[str, int]]:
+        """
+        日のメトリクスごとの分位点スケッチを返します。
+        
+        追記中の日はマニフェストのエントリ（"sketch"）から、終わった日は日ごとのファイルから読みます。
+        ファイルは直近に読んだ1日分を保持し、更新時刻が変わっていれば読み直します。
+        ない・壊れている場合はその日のサンプルから再構築します。
+        """
+        entry = self._manifest().get(day.isoformat())
+        if entry is not None and isinstance(entry.get("sketch"), dict):
+            return entry["sketch"]
+        
+        path = self.sketch_path(day)
+        mtime = _mtime(path)
+        if self._sketch_cache is not None and self._sketch_cache[0] == day and mtime == self._sketch_mtime:
+            return self._sketch_cache[1]
+        
+        metrics = None
+        if mtime is not None or storage.exists(path):
+            try:
+                metrics = storage.read_json(path).get("metrics")
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, AttributeError) as e:
+                logger.warning("Failed to load quantile sketch %s: %s", day, e)
+        if isinstance(metrics, dict):
+            self._sketch_cache = (day, metrics)
+            self._sketch_mtime = mtime
+            return metrics
+        
+        sketches: Dict[str, Dict[str, int]] = {}
+        for sample in self.read_partition(day):
+            _add_sketch(sketches, sample)
+        if sketches:
+            self._save_sketches(day, sketches)
+        return sketches
+    
+    def _save_sketches(self, day: date, sketches: Dict[str, Dict[str, int]]) -> None:
+        """終わった日の分位点スケッチを日ごとのファイルに保存する（一時ファイルに書いてから置き換える）"""
+        path = self.sketch_path(day)
+        try:
+            storage.write_json(path, {"version": FILE_VERSION, "metrics": sketches}, separators=(",", ":"))
+            self._sketch_cache = (day, sketches)
+            self._sketch_mtime = _mtime(path)
+        except OSError as e:
+            logger.warning("Failed to save quantile sketch %s: %s", day, e)
+    
+    def _archive_sketches(self, current: str) -> None:
+        """追記中の日（current）以外のエントリのスケッチを日ごとのファイルに移す（日が変わった最初の追記で行う）"""
+        for key, entry in self._manifest().items():
+            if key != current and "sketch" in entry:
+                self._save_sketches(date.fromisoformat(key), entry.pop("sketch"))
+    
+    def _reset_sketches(self, day: date) -> None:
+        """日のサンプルを書き直した場合にスケッチを破棄する（次回の読み込み時に再構築）"""
+        entry = self._manifest().get(day.isoformat())
+        if entry is not None:
+            entry.pop("sketch", None)
+        if self._sketch_cache is not None and self._sketch_cache[0] == day:
+            self._sketch_cache = None
+        storage.remove(self.sketch_path(day))
@@ -0,0 +1,58 @@
+"""
+時系列の NumPy 集計モジュール
+
+長い期間のサンプルの日ごとの平均を、タプルのリストに対する Python のループではなく
+ベクトル演算で求めます（disk_predictor.calculate_daily_average が件数の多い場合に使用）。
+
+時系列ストアの平均・日次平均は書き込み時に更新している日ごとの合計から、
+分位点は日ごとのスケッチから求めるため、このモジュールは生のサンプルを集計する場合だけに使います。
+
+NumPy はオプションの依存パッケージです（pip install komon[numpy]）。
+インストールされていない場合、このモジュールの関数は ImportError を送出します。
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy はオプション
+    np = None
+
+NUMPY_AVAILABLE = np is not None
+
+
+def _require_numpy():
+    if not NUMPY_AVAILABLE:
+        raise ImportError("この機能には NumPy が必要です（pip install numpy）")
+
+
+def daily_means(timestamps, values) -> List[Tuple[date, float]]:
+    """
+    日ごとの平均値を求めます（日付はローカル時刻）。
+    
+    各日の0時の時刻を境界とし、searchsorted で日に割り当ててから
+    bincount で日ごとの合計と件数を求めます。
+    
+    Args:
+        timestamps: UNIX時間の配列
+        values: 値の配列
+    
+    Returns:
+        list: [(日付, 平均値), ...]（日付順、サンプルのない日は含まない）
+    """
+    _require_numpy()
+    timestamps = np.asarray(timestamps, dtype=float)
+    values = np.asarray(values, dtype=float)
+    if len(timestamps) == 0:
+        return []
+    
+    first_day = datetime.fromtimestamp(timestamps.min()).date()
+    last_day = datetime.fromtimestamp(timestamps.max()).date()
+    days = [first_day + timedelta(days=n) for n in range((last_day - first_day).days + 1)]
+    edges = np.array([datetime.combine(day, time()).timestamp() for day in days])
+    
+    index = np.searchsorted(edges, timestamps, side="right") - 1
+    counts = np.bincount(index, minlength=len(days))
+    sums = np.bincount(index, weights=values, minlength=len(days))
+    return [(day, float(sums[i] / counts[i])) for i, day in enumerate(days) if counts[i]]
@@ -0,0 +1,217 @@
+"""
+処理時間計測モジュール
+
+Komon 自身の各処理（プロセス走査・CPUサンプリング・履歴保存・通知送信・
+ネットワークチェックなど）の所要時間を計測し、ステージごとの
+ヒストグラムとして data ディレクトリに保存します。
+
+ヒストグラムは日ごとに分けて保持し、古い日の分は自動的に削除するため、
+ファイルサイズは実行回数に関係なくほぼ一定です。
+`komon status --timings` で p50/p95/最大値を確認できます。
+"""
+
+import functools
+import logging
+import math
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from . import storage
+
+logger = logging.getLogger(__name__)
+
+TIMINGS_FILE = "data/state/timings.json"
+
+# ヒストグラムを保持する日数
+TIMING_RETENTION_DAYS = 7
+
+# バケット境界（ミリ秒）: 0.1ms から 1.25 倍ずつ広がる対数バケット
+# パーセンタイルはバケット上限で返すため、誤差は最大 25% です
+BUCKET_BASE_MS = 0.1
+BUCKET_GROWTH = 1.25
+
+
+def bucket_index(duration_ms: float) -> int:
+    """所要時間（ミリ秒）からバケット番号を求める"""
+    if duration_ms <= BUCKET_BASE_MS:
+        return 0
+    return math.ceil(math.log(duration_ms / BUCKET_BASE_MS) / math.log(BUCKET_GROWTH))
+
+
+def bucket_upper_ms(index: int) -> float:
+    """バケット番号の上限値（ミリ秒）"""
+    return BUCKET_BASE_MS * BUCKET_GROWTH ** index
+
+
+class TimingRecorder:
+    """
+    ステージごとの所要時間を記録するクラス
+    
+    計測値はメモリ上に溜めておき、flush() でまとめてファイルに反映します。
+    """
+    
+    def __init__(self, state_file: Optional[str] = None, clock: Callable[[], float] = time.perf_counter):
+        """
+        Args:
+            state_file: ヒストグラムの保存先（Noneの場合は使用時点の TIMINGS_FILE）
+            clock: 計測に使う時計（テスト用に差し替え可能）
+        """
+        self._state_file = state_file
+        self.clock = clock
+        self._pending: Dict[str, List[float]] = {}
+    
+    @property
+    def state_file(self) -> str:
+        """ヒストグラムの保存先"""
+        return self._state_file or TIMINGS_FILE
+    
+    @contextmanager
+    def span(self, name: str):
+        """
+        with ブロックの所要時間をステージ name として記録します。
+        
+        例外が発生した場合も計測値は記録します。
+        """
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self.record(name, (self.clock() - started) * 1000)
+    
+    def record(self, name: str, duration_ms: float) -> None:
+        """計測値（ミリ秒）を1件記録"""
+        self._pending.setdefault(name, []).append(duration_ms)
+    
+    def flush(self, today: Optional[date] = None) -> None:
+        """
+        溜まった計測値をヒストグラムファイルに反映します。
+        
+        Args:
+            today: 集計日（テスト用）
+        """
+        if not self._pending:
+            return
+        
+        today = today or date.today()
+        day_key = today.isoformat()
+        oldest = (today - timedelta(days=TIMING_RETENTION_DAYS - 1)).isoformat()
+        
+        data = _load_timings(self.state_file)
+        stages = data.setdefault("stages", {})
+        for name, durations in self._pending.items():
+            days = stages.setdefault(name, {})
+            hist = days.setdefault(day_key, {"count": 0, "max": 0.0, "buckets": {}})
+            for duration in durations:
+                index = str(bucket_index(duration))
+                hist["buckets"][index] = hist["buckets"].get(index, 0) + 1
+                hist["count"] += 1
+                hist["max"] = max(hist["max"], round(duration, 3))
+        
+        # 保持期間を過ぎた日のヒストグラムを削除
+        for name in list(stages):
+            for day in [d for d in stages[name] if d < oldest]:
+                del stages[name][day]
+            if not stages[name]:
+                del stages[name]
+        
+        self._pending.clear()
+        _save_timings(self.state_file, data)
+
+
+def _load_timings(state_file: str) -> dict:
+    """ヒストグラムファイルを読み込む"""
+    try:
+        data = storage.read_json(state_file)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_timings(state_file: str, data: dict) -> None:
+    """ヒストグラムファイルを保存する"""
+    try:
+        storage.write_json(state_file, data, separators=(",", ":"))
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning("Failed to save timings: %s", e)
+
+
+def _percentile_ms(buckets: Dict[int, int], count: int, max_ms: float, ratio: float) -> float:
+    """バケットのヒストグラムからパーセンタイル値（ミリ秒）を求める"""
+    target = max(1, math.ceil(count * ratio))
+    seen = 0
+    for index in sorted(buckets):
+        seen += buckets[index]
+        if seen >= target:
+            return min(bucket_upper_ms(index), max_ms)
+    return max_ms
+
+
+def summarize_timings(state_file: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    保持期間内のヒストグラムを合算し、ステージごとの統計を返します。
+    
+    Args:
+        state_file: ヒストグラムの保存先（Noneの場合は TIMINGS_FILE）
+    
+    Returns:
+        dict: {ステージ名: {'count', 'p50', 'p95', 'max'}}（時間はミリ秒）
+    """
+    summary = {}
+    for name, days in _load_timings(state_file or TIMINGS_FILE).get("stages", {}).items():
+        merged: Dict[int, int] = {}
+        count = 0
+        max_ms = 0.0
+        for hist in days.values():
+            for index, n in hist.get("buckets", {}).items():
+                merged[int(index)] = merged.get(int(index), 0) + n
+            count += hist.get("count", 0)
+            max_ms = max(max_ms, hist.get("max", 0.0))
+        if count == 0:
+            continue
+        summary[name] = {
+            'count': count,
+            'p50': _percentile_ms(merged, count, max_ms, 0.50),
+            'p95': _percentile_ms(merged, count, max_ms, 0.95),
+            'max': max_ms,
+        }
+    return summary
+
+
+# グローバルインスタンス（シングルトン）
+_recorder: Optional[TimingRecorder] = None
+
+
+def get_timing_recorder() -> TimingRecorder:
+    """計測のグローバルインスタンスを取得"""
+    global _recorder
+    if _recorder is None:
+        _recorder = TimingRecorder()
+    return _recorder
+
+
+def span(name: str):
+    """グローバルインスタンスでステージ name の所要時間を計測する（with 文で使用）"""
+    return get_timing_recorder().span(name)
+
+
+def timed_run(name: str):
+    """
+    1回の実行全体を "<name>.total" として計測し、終了時にファイルへ反映するデコレーター
+    
+    scripts/main.py の main() や run_advise() など、実行の入口に付けます。
+    実行中の状態ファイルの書き込みは storage.batch() で1回のコミットにまとめます。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = get_timing_recorder()
+            with storage.batch():
+                try:
+                    with recorder.span(f"{name}.total"):
+                        return func(*args, **kwargs)
+                finally:
+                    recorder.flush()
+        return wrapper
+    return decorator
@@ -15,6 +15,37 @@ from .formatters import FormatterFactory
 
 logger = logging.getLogger(__name__)
 
+# 常駐モード（komon daemon）で使い回すHTTPセッション
+_http_session: Optional[requests.Session] = None
+
+
+def set_http_session(session: Optional[requests.Session]) -> None:
+    """通知送信に使うHTTPセッションを設定
+    
+    設定したセッションは接続を保持するため、常駐モードでは
+    通知ごとのTCP/TLSハンドシェイクを省けます。Noneで解除します。
+    
+    Args:
+        session: requests.Session（Noneの場合は毎回 requests.post を使用）
+    """
+    global _http_session
+    _http_session = session
+
+
+def http_post(url: str, **kwargs) -> requests.Response:
+    """HTTP POSTを送信（セッションが設定されていれば再利用）
+    
+    Args:
+        url: 送信先URL
+        **kwargs: requests.post に渡す引数
+    
+    Returns:
+        requests.Response: レスポンス
+    """
+    if _http_session is not None:
+        return _http_session.post(url, **kwargs)
+    return requests.post(url, **kwargs)
+
 
 class WebhookNotifier:
     """統一Webhook通知クラス
@@ -137,7 +168,7 @@ class WebhookNotifier:
             payload = formatter.format(notification)
             
             # HTTP送信
-            response = requests.post(
+            response = http_post(
                 webhook_url,
                 json=payload,
                 timeout=10,
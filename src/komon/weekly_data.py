@@ -4,16 +4,11 @@
 週次健全性レポートのためのデータ収集と分析機能を提供します。
 """
 
-import os
-import csv
-from datetime import datetime, timedelta
-from pathlib import Path
+from datetime import date, datetime, timedelta
 from typing import Optional
 
 from komon.notification_history import load_notification_history
-
-
-HISTORY_DIR = "data/usage_history"
+from komon.timeseries import get_timeseries_store
 
 
 def collect_weekly_data() -> dict:
@@ -28,7 +23,13 @@ def collect_weekly_data() -> dict:
                 'mem': {'current': 62.8, 'previous': 64.3, 'change': -1.5, 'trend': 'stable'},
                 'disk': {'current': 68.5, 'previous': 65.3, 'change': +3.2, 'trend': 'increasing'}
             },
-            'alerts': [...]
+            'percentiles': {
+                'week': {'cpu': {'count': 2016, 'p50': 38.1, 'p95': 81.4, 'p99': 93.0}, ...},
+                'month': {...}
+            },
+            'alerts': [...],
+            'disk_prediction': {'prediction': {...}, 'rapid_change': {...}},
+            'mount_forecasts': {'/var': {...}, ...}
         }
     """
     # 期間の計算
@@ -41,6 +42,12 @@ def collect_weekly_data() -> dict:
     # 先週のデータ（8-14日前）
     previous_data = calculate_average_usage(days=7, offset_days=7)
     
+    # 分布（日ごとの分位点スケッチを統合した p50 / p95 / p99、平均に埋もれる一時的な高負荷の確認用）
+    percentiles = {
+        'week': calculate_percentiles(days=7),
+        'month': calculate_percentiles(days=30)
+    }
+    
     # 警戒履歴の取得
     alerts = get_alert_history(days=7)
     
@@ -70,34 +77,51 @@ def collect_weekly_data() -> dict:
     disk_prediction = None
     try:
         from komon.disk_predictor import (
-            load_disk_history,
-            calculate_daily_average,
+            load_daily_disk_average,
             predict_disk_trend,
+            predict_from_state,
             detect_rapid_change
         )
         
-        history = load_disk_history(days=7)
-        if len(history) >= 2:
-            daily_data = calculate_daily_average(history)
-            prediction = predict_disk_trend(daily_data)
-            rapid_change = detect_rapid_change(daily_data)
-            
+        # 追記時に更新している回帰の十分統計量があれば、履歴を読まずに予測
+        result = predict_from_state(days=7)
+        if result is not None:
+            prediction, rapid_change = result
             disk_prediction = {
                 'prediction': prediction,
                 'rapid_change': rapid_change
             }
+        else:
+            daily_data = load_daily_disk_average(days=7)
+            if len(daily_data) >= 2:
+                prediction = predict_disk_trend(daily_data)
+                rapid_change = detect_rapid_change(daily_data)
+                
+                disk_prediction = {
+                    'prediction': prediction,
+                    'rapid_change': rapid_change
+                }
     except Exception:
         # エラーが発生しても週次レポート全体は継続
         disk_prediction = None
     
+    # マウントごとの予測を追加
+    try:
+        from komon.disk_predictor import predict_mounts
+        mount_forecasts = predict_mounts()
+    except Exception:
+        mount_forecasts = {}
+    
     return {
         'period': {
             'start': start_date.strftime('%Y-%m-%d'),
             'end': end_date.strftime('%Y-%m-%d')
         },
         'resources': resources,
+        'percentiles': percentiles,
         'alerts': alerts,
-        'disk_prediction': disk_prediction
+        'disk_prediction': disk_prediction,
+        'mount_forecasts': mount_forecasts
     }
 
 
@@ -105,6 +129,9 @@ def calculate_average_usage(days: int = 7, offset_days: int = 0) -> dict:
     """
     指定期間のリソース使用率の平均値を計算します。
     
+    書き込み時に更新している日ごとのサンプル数と合計から求めるため、
+    サンプリング間隔によらず日数分の集計値を参照するだけで済みます。
+    
     Args:
         days: 計算する日数
         offset_days: 何日前から計算するか（0=今日から、7=7日前から）
@@ -112,55 +139,38 @@ def calculate_average_usage(days: int = 7, offset_days: int = 0) -> dict:
     Returns:
         dict: {'cpu': 45.2, 'mem': 62.8, 'disk': 68.5}
     """
-    if not os.path.exists(HISTORY_DIR):
-        return {'cpu': 0, 'mem': 0, 'disk': 0}
+    # 対象期間の計算（offset_days 日前までの days 日分、当日を含む）
+    last_day = date.today() - timedelta(days=offset_days)
+    first_day = last_day - timedelta(days=days - 1)
     
-    # 対象期間の計算
-    end_date = datetime.now() - timedelta(days=offset_days)
-    start_date = end_date - timedelta(days=days)
-    
-    # 履歴ファイルの取得
-    history_files = sorted(
-        Path(HISTORY_DIR).glob("usage_*.csv"),
-        key=lambda p: p.stat().st_mtime,
-        reverse=True
-    )
-    
-    # データの収集
-    cpu_values = []
-    mem_values = []
-    disk_values = []
-    
-    for file_path in history_files:
-        try:
-            # ファイル名から日時を取得（usage_20251122_093000.csv）
-            filename = file_path.stem
-            date_str = filename.replace('usage_', '')
-            file_date = datetime.strptime(date_str, '%Y%m%d_%H%M%S')
-            
-            # 期間内のファイルのみ処理
-            if start_date <= file_date <= end_date:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        try:
-                            cpu_values.append(float(row.get('cpu', 0)))
-                            mem_values.append(float(row.get('mem', 0)))
-                            disk_values.append(float(row.get('disk', 0)))
-                            break  # 最初の行のみ
-                        except (ValueError, KeyError):
-                            continue
-        except (ValueError, Exception):
-            continue
+    totals = get_timeseries_store().daily_totals(first_day, last_day).values()
+    count = sum(n for n, _ in totals)
     
     # 平均値の計算
-    result = {
-        'cpu': sum(cpu_values) / len(cpu_values) if cpu_values else 0,
-        'mem': sum(mem_values) / len(mem_values) if mem_values else 0,
-        'disk': sum(disk_values) / len(disk_values) if disk_values else 0
+    return {
+        resource: sum(sums[resource] for _, sums in totals) / count if count else 0
+        for resource in ['cpu', 'mem', 'disk']
     }
+
+
+def calculate_percentiles(days: int = 7, offset_days: int = 0) -> dict:
+    """
+    指定期間のリソース使用率の p50 / p95 / p99 を計算します。
+    
+    書き込み時に更新している日ごとの分位点スケッチを統合して求めるため、
+    生のサンプルを保持していない日も含めて日数分のスケッチを参照するだけで済みます。
     
-    return result
+    Args:
+        days: 計算する日数
+        offset_days: 何日前から計算するか（0=今日から、7=7日前から）
+        
+    Returns:
+        dict: {'cpu': {'count': 2016, 'p50': 38.1, 'p95': 81.4, 'p99': 93.0}, ...}
+        （サンプルがないリソースは含めない）
+    """
+    last_day = date.today() - timedelta(days=offset_days)
+    first_day = last_day - timedelta(days=days - 1)
+    return get_timeseries_store().quantiles(first_day, last_day)
 
 
 def get_alert_history(days: int = 7) -> list:
@@ -4,11 +4,43 @@ pytestの共通設定とフィクスチャ
 テスト全体で使用する共通の設定やヘルパー関数を定義します。
 """
 
+import importlib
 import pytest
 import tempfile
 import os
+import sys
 from pathlib import Path
 
+# 実行のたびに更新される状態ファイル: {モジュール名: (定数名, ファイル名)}
+# 時系列ストアのディレクトリには seasonal.json なども作られるため、ディレクトリごと向け先を変えます。
+STATE_FILES = {
+    "monitor": ("PROC_CPU_STATE_FILE", "proc_cpu_times.json"),
+    "process_index": ("PROCESS_INDEX_FILE", "process_index.json"),
+    "timings": ("TIMINGS_FILE", "timings.json"),
+    "disk_monitor": ("MOUNT_HISTORY_FILE", "mount_usage.json"),
+    "timeseries": ("TIMESERIES_DIR", "metrics"),
+    "anomaly": ("ANOMALY_STATE_FILE", "anomaly.json"),
+}
+
+
+@pytest.fixture(autouse=True)
+def isolated_state_files(tmp_path, monkeypatch):
+    """
+    実行のたびに更新される状態ファイルを一時ディレクトリに向ける（作業ディレクトリを汚さないため）
+
+    テストによっては src.komon としても読み込まれるため、両方のモジュールを書き換えます。
+    komon のモジュールはテストの途中で初めて読み込まれても漏れないよう、先に読み込みます。
+    """
+    state_dir = tmp_path / "state"
+    for package in ("komon", "src.komon"):
+        for name, (attr, filename) in STATE_FILES.items():
+            if package == "komon":
+                importlib.import_module(f"{package}.{name}")
+            module = sys.modules.get(f"{package}.{name}")
+            if module is not None:
+                monkeypatch.setattr(module, attr, str(state_dir / filename))
+    return state_dir
+
 
 @pytest.fixture
 def temp_dir():
@@ -135,3 +135,46 @@ class TestAnalyzeUsageWithLevels:
         assert "cpu" in levels
         assert "memory" not in levels
         assert "disk" not in levels
+    
+    def test_cgroup_levels(self):
+        """cgroupごとの閾値を超えた場合、cgroup単位のレベル情報を返す"""
+        usage = {
+            "cpu": 10.0, "mem": 10.0, "disk": 10.0,
+            "cgroups": [
+                {"name": "nginx.service", "cpu": 90.0, "mem": 20.0},
+                {"name": "mysql.service", "cpu": None, "mem": 95.0},
+            ]
+        }
+        thresholds = {
+            "cpu": {"warning": 70, "alert": 85, "critical": 95},
+            "mem": {"warning": 70, "alert": 80, "critical": 90},
+            "disk": {"warning": 70, "alert": 80, "critical": 90},
+            "cgroup": {
+                "cpu": {"warning": 70, "alert": 80, "critical": 90},
+                "mem": {"warning": 70, "alert": 80, "critical": 90},
+            }
+        }
+        
+        alerts, levels = analyze_usage_with_levels(usage, thresholds)
+        
+        assert levels == {
+            "cgroup:nginx.service:cpu": ("critical", 90.0),
+            "cgroup:mysql.service:memory": ("critical", 95.0),
+        }
+        assert "nginx.service のCPU使用率: 90.0%" in alerts[0]
+        assert "mysql.service のメモリ使用率: 95.0%" in alerts[1]
+    
+    def test_cgroups_ignored_without_thresholds(self):
+        """cgroupの閾値が未設定の場合は判定しない"""
+        usage = {"cpu": 10.0, "mem": 10.0, "disk": 10.0,
+                 "cgroups": [{"name": "nginx.service", "cpu": 99.0, "mem": 99.0}]}
+        thresholds = {
+            "cpu": {"warning": 70, "alert": 85, "critical": 95},
+            "mem": {"warning": 70, "alert": 80, "critical": 90},
+            "disk": {"warning": 70, "alert": 80, "critical": 90}
+        }
+        
+        alerts, levels = analyze_usage_with_levels(usage, thresholds)
+        
+        assert alerts == []
+        assert levels == {}
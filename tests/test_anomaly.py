@@ -0,0 +1,217 @@
+"""
+anomaly.py のテスト
+
+曜日・時間帯ごとのベースラインによる統計的な異常検知と、
+analyze_usage_with_levels での閾値レベルの判定をテストします。
+"""
+
+import json
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from komon import anomaly
+from komon.analyzer import analyze_usage_with_levels
+from komon.anomaly import (
+    DEFAULT_MIN_VALUE,
+    MIN_SAMPLES,
+    MIN_WEEKS,
+    MIN_SPREAD,
+    RELATIVE_SPREAD,
+    WEEK_HOURS,
+    AnomalyDetector,
+    anomaly_score,
+    update_bucket,
+)
+from komon.settings_validator import ThresholdLevel
+
+MONDAY = datetime(2025, 11, 3)
+
+THRESHOLDS = {
+    "cpu": {"warning": 70, "alert": 85, "critical": 95},
+    "mem": {"warning": 70, "alert": 80, "critical": 90},
+    "disk": {"warning": 70, "alert": 80, "critical": 90},
+}
+
+
+@pytest.fixture
+def state_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "anomaly.json")
+    monkeypatch.setattr(anomaly, "ANOMALY_STATE_FILE", path)
+    return path
+
+
+def _train(detector, weeks=3, seed=0):
+    """毎日2時だけ CPU が80%前後（夜間のバッチ）、それ以外は20%前後の値で学習する"""
+    rng = random.Random(seed)
+    for h in range(WEEK_HOURS * weeks):
+        when = MONDAY + timedelta(hours=h)
+        for minute in (0, 20, 40):
+            base = 80.0 if when.hour == 2 else 20.0
+            detector.observe("cpu", base + rng.gauss(0, 2), (when + timedelta(minutes=minute)).timestamp())
+
+
+class TestBucket:
+    """update_bucket / anomaly_score のテスト"""
+    
+    @pytest.mark.parametrize("method", ["ewma", "mad"])
+    def test_converges_to_baseline(self, method):
+        """安定した値では中心が値に近づき、外れた値ほど外れ具合が大きい"""
+        rng = random.Random(1)
+        bucket = [0.0, 0.0, 0]
+        for _ in range(300):
+            update_bucket(bucket, 40.0 + rng.gauss(0, 3), method)
+        
+        assert bucket[0] == pytest.approx(40.0, abs=1.5)
+        assert bucket[2] == 300
+        assert anomaly_score(bucket, 40.0, method) == pytest.approx(0.0, abs=1.0)
+        assert anomaly_score(bucket, 70.0, method) > 5.0
+    
+    def test_spike_is_clipped(self):
+        """1回のスパイクでばらつきが大きく広がらない"""
+        bucket = [20.0, 4.0, 50]
+        update_bucket(bucket, 100.0)
+        assert bucket[1] < 4.0 + 0.05 * (5 * MIN_SPREAD) ** 2
+    
+    def test_min_spread(self):
+        """ほぼ一定の区間でもばらつきの下限（％ポイントと中心に対する割合の大きい方）で割る"""
+        assert anomaly_score([10.0, 0.0, 10], 16.0) == pytest.approx(6.0 / MIN_SPREAD)
+        assert anomaly_score([60.0, 0.0, 10], 72.0) == pytest.approx(12.0 / (RELATIVE_SPREAD * 60.0))
+
+
+class TestAnomalyDetector:
+    """AnomalyDetectorクラスのテスト"""
+    
+    def test_warm_up(self, state_file):
+        """区間のサンプルか、サンプルのある週が足りない間は判定しない"""
+        detector = AnomalyDetector()
+        for minute in range(MIN_SAMPLES * 2):
+            assert detector.observe("cpu", 50.0, (MONDAY + timedelta(minutes=minute)).timestamp()) == (None, {})
+        
+        for week in range(1, MIN_WEEKS):
+            assert detector.observe("cpu", 50.0, (MONDAY + timedelta(weeks=week)).timestamp()) == (None, {})
+        assert detector.metrics["cpu"][0][3] == MIN_WEEKS
+        
+        level, _ = detector.observe("cpu", 50.0, (MONDAY + timedelta(weeks=MIN_WEEKS)).timestamp())
+        assert level == ThresholdLevel.NORMAL
+    
+    @pytest.mark.parametrize("method", ["ewma", "mad"])
+    def test_hour_of_week_baseline(self, state_file, method):
+        """夜間のバッチの時間帯の高い値は正常、昼間の同じ値は異常"""
+        detector = AnomalyDetector({"method": method})
+        _train(detector)
+        
+        night = (MONDAY + timedelta(weeks=3, hours=2, minutes=10)).timestamp()
+        noon = (MONDAY + timedelta(weeks=3, hours=12, minutes=10)).timestamp()
+        
+        assert detector.observe("cpu", 82.0, night)[0] == ThresholdLevel.NORMAL
+        level, info = detector.observe("cpu", 82.0, noon)
+        assert level == ThresholdLevel.CRITICAL
+        assert info["baseline"] == pytest.approx(20.0, abs=2.0)
+    
+    def test_save_and_load(self, state_file):
+        """状態を保存して読み込み、方法が変わった場合は学習し直す"""
+        detector = AnomalyDetector()
+        _train(detector, weeks=1)
+        detector.save()
+        
+        with open(state_file) as f:
+            saved = json.load(f)
+        assert saved["method"] == "ewma"
+        assert len(saved["metrics"]["cpu"]) == WEEK_HOURS
+        
+        assert AnomalyDetector().metrics == detector.metrics
+        assert AnomalyDetector({"method": "mad"}).metrics == {}
+    
+    def test_broken_state(self, state_file):
+        """壊れた状態ファイルは空の状態、形式の違うメトリクスは学習し直す"""
+        with open(state_file, "w") as f:
+            f.write("{broken")
+        assert AnomalyDetector().metrics == {}
+        
+        with open(state_file, "w") as f:
+            json.dump({"method": "ewma", "metrics": {"cpu": [[20.0, 4.0, 50]] * WEEK_HOURS}}, f)
+        assert AnomalyDetector().metrics == {}
+
+
+class TestAnalyzeUsageWithAnomaly:
+    """analyze_usage_with_levels の異常検知モードのテスト"""
+    
+    def _thresholds(self, **anomaly_config):
+        config = {
+            "metrics": ["cpu"], "method": "ewma", "min_value": None, "allow_downgrade": False,
+            "warning": 3.0, "alert": 4.0, "critical": 5.0
+        }
+        config.update(anomaly_config)
+        return dict(THRESHOLDS, anomaly=config)
+    
+    def test_static_thresholds_during_warm_up(self, state_file):
+        """学習中は固定閾値で判定する"""
+        usage = {"cpu": 75.0, "mem": 10.0, "disk": 10.0}
+        alerts, levels = analyze_usage_with_levels(usage, self._thresholds())
+        
+        assert levels == {"cpu": ("warning", 75.0)}
+        assert "📈" not in alerts[0]
+    
+    def test_anomaly_levels(self, state_file, monkeypatch):
+        """学習後はいつもの水準からの外れ具合で判定し（固定閾値の警告未満でも）、状態を保存する"""
+        detector = AnomalyDetector(self._thresholds()["anomaly"])
+        _train(detector)
+        detector.save()
+        monkeypatch.setattr(anomaly.time, "time", lambda: (MONDAY + timedelta(weeks=3, hours=12)).timestamp())
+        
+        usage = {"cpu": 45.0, "mem": 10.0, "disk": 10.0}
+        assert DEFAULT_MIN_VALUE <= usage["cpu"] < THRESHOLDS["cpu"]["warning"]
+        alerts, levels = analyze_usage_with_levels(usage, self._thresholds())
+        
+        assert levels == {"cpu": ("critical", 45.0)}
+        assert "CPU使用率: 45.0%" in alerts[0]
+        assert "いつもの同じ曜日・時間帯" in alerts[0]
+        assert AnomalyDetector().metrics["cpu"][12][2] == detector.metrics["cpu"][12][2] + 1
+    
+    def test_low_usage_spike_stays_normal(self, state_file, monkeypatch):
+        """普段ほぼ使われていないホストのわずかな増加は、外れ具合が大きくても通知しない"""
+        rng = random.Random(3)
+        detector = AnomalyDetector()
+        for h in range(WEEK_HOURS * 3):
+            when = MONDAY + timedelta(hours=h)
+            for minute in (0, 20, 40):
+                detector.observe("cpu", rng.uniform(3.0, 7.0), (when + timedelta(minutes=minute)).timestamp())
+        detector.save()
+        monkeypatch.setattr(anomaly.time, "time", lambda: (MONDAY + timedelta(weeks=3, hours=12)).timestamp())
+        
+        alerts, levels = analyze_usage_with_levels({"cpu": 15.0, "mem": 10.0, "disk": 10.0}, self._thresholds())
+        assert (alerts, levels) == ([], {})
+        
+        # 下限を外しても、ばらつきの下限（3％ポイント）により緊急にはならない（判定前の状態に戻して確認）
+        detector.save()
+        _, levels = analyze_usage_with_levels({"cpu": 15.0, "mem": 10.0, "disk": 10.0}, self._thresholds(min_value=0))
+        assert levels == {"cpu": ("warning", 15.0)}
+    
+    def test_static_level_not_downgraded(self, state_file, monkeypatch):
+        """いつも高い時間帯でも固定閾値のレベルを使い、allow_downgrade の場合だけ緊急以外を下げる"""
+        detector = AnomalyDetector()
+        _train(detector)
+        detector.save()
+        monkeypatch.setattr(anomaly.time, "time", lambda: (MONDAY + timedelta(weeks=3, hours=2)).timestamp())
+        
+        alerts, levels = analyze_usage_with_levels({"cpu": 80.0, "mem": 10.0, "disk": 10.0}, self._thresholds())
+        assert levels == {"cpu": ("warning", 80.0)}
+        assert "📈" not in alerts[0]
+        
+        _, levels = analyze_usage_with_levels(
+            {"cpu": 80.0, "mem": 10.0, "disk": 10.0}, self._thresholds(allow_downgrade=True)
+        )
+        assert levels == {}
+        
+        _, levels = analyze_usage_with_levels(
+            {"cpu": 97.0, "mem": 10.0, "disk": 10.0}, self._thresholds(allow_downgrade=True)
+        )
+        assert levels == {"cpu": ("critical", 97.0)}
+    
+    def test_other_metrics_use_static_thresholds(self, state_file):
+        """対象外のメトリクスは固定閾値のまま"""
+        usage = {"cpu": 10.0, "mem": 85.0, "disk": 10.0}
+        _, levels = analyze_usage_with_levels(usage, self._thresholds())
+        assert levels == {"memory": ("alert", 85.0)}
@@ -0,0 +1,100 @@
+"""
+cgroup_monitor.py のテスト
+
+cgroup v2 によるサービス/コンテナ単位の収集をテストします。
+"""
+
+import pytest
+from komon.cgroup_monitor import CgroupCollector, collect_cgroup_usage
+
+
+def _write_cgroup(root, rel_path, usage_usec, memory_current="104857600",
+                  memory_max="max", io_stat="8:0 rbytes=1000 wbytes=2000 rios=1 wios=2"):
+    path = root / rel_path
+    path.mkdir(parents=True, exist_ok=True)
+    (path / "cpu.stat").write_text(f"usage_usec {usage_usec}\nuser_usec 0\nsystem_usec 0\n")
+    (path / "memory.current").write_text(f"{memory_current}\n")
+    (path / "memory.max").write_text(f"{memory_max}\n")
+    (path / "io.stat").write_text(f"{io_stat}\n")
+
+
+@pytest.fixture
+def cgroup_root(tmp_path):
+    """合成した cgroup v2 階層"""
+    root = tmp_path / "cgroup"
+    root.mkdir()
+    (root / "cgroup.controllers").write_text("cpu io memory\n")
+    _write_cgroup(root, "system.slice/nginx.service", 1_000_000, memory_max="209715200")
+    _write_cgroup(root, "system.slice/cron.service", 500_000)
+    _write_cgroup(root, "system.slice/session.slice", 0)
+    _write_cgroup(root, "user.slice/user-1000.slice", 0)
+    return root
+
+
+def _collector(cgroup_root, tmp_path):
+    collector = CgroupCollector(
+        root=str(cgroup_root),
+        include=["system.slice/*.service"],
+        state_file=str(tmp_path / "state" / "cgroup.json")
+    )
+    collector.cpu_count = 2
+    return collector
+
+
+class TestCgroupCollector:
+    """CgroupCollectorのテスト"""
+    
+    def test_discover_matches_patterns_only(self, cgroup_root, tmp_path):
+        """パターンに一致するcgroupだけを探す"""
+        collector = _collector(cgroup_root, tmp_path)
+        
+        assert collector.discover() == ["system.slice/cron.service", "system.slice/nginx.service"]
+    
+    def test_first_collect_has_no_cpu_delta(self, cgroup_root, tmp_path):
+        """初回はカウンタがないためCPUは None、メモリは即時に計算できる"""
+        collector = _collector(cgroup_root, tmp_path)
+        
+        result = {c['name']: c for c in collector.collect(now=1000.0)}
+        
+        nginx = result["nginx.service"]
+        assert nginx['cpu'] is None
+        assert nginx['mem_bytes'] == 104857600
+        # memory.max に対する割合
+        assert nginx['mem'] == 50.0
+    
+    def test_cpu_and_io_delta_from_persisted_counters(self, cgroup_root, tmp_path):
+        """保存したカウンタとの差分でCPU使用率とI/O速度を計算する"""
+        collector = _collector(cgroup_root, tmp_path)
+        collector.collect(now=1000.0)
+        
+        # 10秒間で 5秒分のCPU時間（2コア中 25%）、読み込み 10000バイト
+        _write_cgroup(cgroup_root, "system.slice/nginx.service", 6_000_000,
+                      io_stat="8:0 rbytes=11000 wbytes=2000")
+        result = {c['name']: c for c in _collector(cgroup_root, tmp_path).collect(now=1010.0)}
+        
+        assert result["nginx.service"]['cpu'] == 25.0
+        assert result["nginx.service"]['io_read_bps'] == 1000.0
+        assert result["nginx.service"]['io_write_bps'] == 0.0
+        assert result["cron.service"]['cpu'] == 0.0
+    
+    def test_restarted_cgroup_is_not_diffed(self, cgroup_root, tmp_path):
+        """カウンタが戻った（再作成された）cgroupは差分を使わない"""
+        collector = _collector(cgroup_root, tmp_path)
+        collector.collect(now=1000.0)
+        
+        _write_cgroup(cgroup_root, "system.slice/nginx.service", 100)
+        result = {c['name']: c for c in collector.collect(now=1010.0)}
+        
+        assert result["nginx.service"]['cpu'] is None
+    
+    def test_not_cgroup_v2(self, tmp_path):
+        """cgroup v2 でない場合は空リスト"""
+        collector = CgroupCollector(root=str(tmp_path), state_file=str(tmp_path / "s.json"))
+        
+        assert collector.collect() == []
+
+
+def test_collect_cgroup_usage_disabled():
+    """無効な場合は何も読まない"""
+    assert collect_cgroup_usage({}) == []
+    assert collect_cgroup_usage({"cgroup_monitor": {"enabled": False}}) == []
@@ -46,6 +46,18 @@ class TestMain:
         
         mock_run_status.assert_called_once_with(Path("/test/config"))
     
+    @patch('sys.argv', ['komon', 'status', '--timings'])
+    @patch('komon.commands.status.run_timings')
+    @patch('komon.cli.ensure_config_dir')
+    def test_main_status_timings_command(self, mock_ensure_config_dir, mock_run_timings):
+        """status --timings で処理時間を表示する"""
+        from pathlib import Path
+        mock_ensure_config_dir.return_value = Path("/test/config")
+        
+        main()
+        
+        mock_run_timings.assert_called_once_with()
+    
     @patch('sys.argv', ['komon', 'advise'])
     @patch('komon.commands.advise.run_advise')
     @patch('komon.cli.ensure_config_dir')
@@ -94,6 +106,57 @@ class TestMain:
         
         mock_run_guide.assert_called_once_with(Path("/test/config"))
     
+    @patch('sys.argv', ['komon', 'daemon'])
+    @patch('komon.commands.daemon.run_daemon')
+    @patch('komon.cli.ensure_config_dir')
+    def test_main_daemon_command(self, mock_ensure_config_dir, mock_run_daemon):
+        """daemonコマンドが正しく実行される"""
+        from pathlib import Path
+        mock_ensure_config_dir.return_value = Path("/test/config")
+        
+        main()
+        
+        mock_run_daemon.assert_called_once_with(Path("/test/config"))
+    
+    @patch('sys.argv', ['komon', 'migrate-history', '--remove'])
+    @patch('komon.commands.migrate_history.run_migrate_history')
+    @patch('komon.cli.ensure_config_dir')
+    def test_main_migrate_history_command(self, mock_ensure_config_dir, mock_run_migrate):
+        """migrate-historyコマンドが正しく実行される"""
+        from pathlib import Path
+        mock_ensure_config_dir.return_value = Path("/test/config")
+        
+        main()
+        
+        mock_run_migrate.assert_called_once_with("data/usage_history", remove=True, config_dir=Path("/test/config"))
+    
+    @patch('sys.argv', ['komon', 'processes', '--metric', 'mem', '--name', 'mysqld'])
+    @patch('komon.commands.processes.run_processes')
+    @patch('komon.cli.ensure_config_dir')
+    def test_main_processes_command(self, mock_ensure_config_dir, mock_run_processes):
+        """processesコマンドが正しく実行される"""
+        from pathlib import Path
+        mock_ensure_config_dir.return_value = Path("/test/config")
+        
+        main()
+        
+        mock_run_processes.assert_called_once_with("mem", days=7, name="mysqld", limit=5, config_dir=Path("/test/config"))
+    
+    @patch('sys.argv', ['komon', 'export', 'rollups', '--format', 'jsonl', '--metric', 'cpu', '--since', '2025-11-20'])
+    @patch('komon.commands.export.run_export')
+    @patch('komon.cli.ensure_config_dir')
+    def test_main_export_command(self, mock_ensure_config_dir, mock_run_export):
+        """exportコマンドが正しく実行される"""
+        from pathlib import Path
+        mock_ensure_config_dir.return_value = Path("/test/config")
+        
+        main()
+        
+        mock_run_export.assert_called_once_with(
+            "rollups", fmt="jsonl", output=None, since="2025-11-20", until=None,
+            metrics=["cpu"], tier="1h", config_dir=Path("/test/config")
+        )
+    
     @patch('sys.argv', ['komon', 'unknown'])
     def test_main_unknown_command(self, capsys):
         """不明なコマンドの場合、エラーメッセージが表示される"""
@@ -225,7 +225,7 @@ class TestAdviseAdditionalFunctions(unittest.TestCase):
         # コンテキストアドバイスが表示されることを確認
         self.assertIn("🧐 高負荷プロセスの詳細情報", output)
         self.assertIn("高負荷プロセス: python", output)
-        mock_get_contextual_advice.assert_called_once_with("cpu", config, "detailed")
+        mock_get_contextual_advice.assert_called_once_with("cpu", config, "detailed", snapshot=None)
     
     @patch('komon.contextual_advisor.get_contextual_advice')
     def test_advise_process_details_contextual_no_processes(self, mock_get_contextual_advice):
@@ -19,13 +19,15 @@ from src.komon.commands.advise import (
 class TestAdviseAdditionalFunctions(unittest.TestCase):
     """advise.pyの追加関数テスト"""
     
+    @patch('komon.disk_predictor.predict_from_state', return_value=None)
     @patch('komon.disk_predictor.load_disk_history')
     @patch('komon.disk_predictor.calculate_daily_average')
     @patch('komon.disk_predictor.predict_disk_trend')
     @patch('komon.disk_predictor.detect_rapid_change')
     @patch('komon.disk_predictor.format_prediction_message')
     def test_advise_disk_prediction_success(self, mock_format_message, mock_detect_rapid, 
-                                          mock_predict_trend, mock_calculate_daily, mock_load_history):
+                                          mock_predict_trend, mock_calculate_daily, mock_load_history,
+                                          mock_from_state):
         """ディスク予測成功のテスト"""
         # モックデータの設定
         mock_load_history.return_value = [
@@ -55,8 +57,24 @@ class TestAdviseAdditionalFunctions(unittest.TestCase):
         mock_detect_rapid.assert_called_once()
         mock_format_message.assert_called_once()
     
+    @patch('komon.disk_predictor.format_prediction_message', return_value="予測メッセージ")
     @patch('komon.disk_predictor.load_disk_history')
-    def test_advise_disk_prediction_insufficient_data(self, mock_load_history):
+    @patch('komon.disk_predictor.predict_from_state')
+    def test_advise_disk_prediction_from_state(self, mock_from_state, mock_load_history, mock_format_message):
+        """十分統計量から予測できる場合は履歴を読み込まない"""
+        mock_from_state.return_value = ({"days_to_90": 30, "trend": "increasing"}, {"is_rapid": False})
+        
+        captured_output = io.StringIO()
+        with patch('sys.stdout', captured_output):
+            advise_disk_prediction()
+        
+        self.assertIn("予測メッセージ", captured_output.getvalue())
+        mock_load_history.assert_not_called()
+        mock_format_message.assert_called_once_with(*mock_from_state.return_value)
+    
+    @patch('komon.disk_predictor.predict_from_state', return_value=None)
+    @patch('komon.disk_predictor.load_disk_history')
+    def test_advise_disk_prediction_insufficient_data(self, mock_load_history, mock_from_state):
         """データ不足時のテスト"""
         # データが不足している場合
         mock_load_history.return_value = [{"date": "2023-01-01", "usage": 70.0}]
@@ -71,8 +89,9 @@ class TestAdviseAdditionalFunctions(unittest.TestCase):
         self.assertIn("データが不足しています", output)
         self.assertIn("7日分のデータが必要", output)
     
+    @patch('komon.disk_predictor.predict_from_state', return_value=None)
     @patch('komon.disk_predictor.load_disk_history')
-    def test_advise_disk_prediction_exception(self, mock_load_history):
+    def test_advise_disk_prediction_exception(self, mock_load_history, mock_from_state):
         """例外発生時のテスト"""
         # 例外を発生させる
         mock_load_history.side_effect = Exception("File not found")
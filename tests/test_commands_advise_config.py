@@ -220,6 +220,25 @@ class TestAdviseConfigFunctions(unittest.TestCase):
             # デフォルト値5が使用されることを確認（内部的に）
             mock_load_config.assert_called_once()
     
+    @patch('src.komon.commands.advise.display_system_status')
+    @patch('src.komon.commands.advise.collect_detailed_resource_usage')
+    @patch('src.komon.commands.advise.load_thresholds')
+    @patch('src.komon.commands.advise.analyze_usage')
+    @patch('src.komon.commands.advise.load_config')
+    def test_run_advise_empty_output_section(self, mock_load_config, mock_analyze_usage,
+                                            mock_load_thresholds, mock_collect_usage, mock_display):
+        """output: が空（None）の場合も既定値で実行できるテスト"""
+        mock_load_config.return_value = yaml.safe_load("output:\nthresholds:\n  cpu: 80\n")
+        mock_collect_usage.return_value = {"cpu": 45.0, "mem": 55.0, "disk": 60.0}
+        mock_load_thresholds.return_value = {"cpu": 80, "mem": 85, "disk": 90}
+        mock_analyze_usage.return_value = []
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            run_advise(Path(temp_dir), section="status")
+        
+        self.assertEqual(mock_collect_usage.call_args.kwargs["group_by"], "name")
+        mock_display.assert_called_once()
+    
     @patch('src.komon.commands.advise.load_config')
     def test_run_advise_config_load_failure(self, mock_load_config):
         """設定読み込み失敗時のテスト"""
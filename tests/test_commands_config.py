@@ -0,0 +1,34 @@
+"""
+src/komon/commands/config.py のテスト
+
+コマンド共通の settings.yml の読み込みをテストします。
+"""
+
+import pytest
+
+from komon.commands.config import load_config, load_optional_config
+
+
+def test_load_config(tmp_path, capsys):
+    """設定を読み込み、ない場合は案内を表示して終了する"""
+    (tmp_path / "settings.yml").write_text("history:\n  storage_engine: sqlite\n", encoding="utf-8")
+    assert load_config(tmp_path) == {"history": {"storage_engine": "sqlite"}}
+
+    with pytest.raises(SystemExit):
+        load_config(tmp_path / "missing")
+    assert "komon initial" in capsys.readouterr().out
+
+
+def test_load_optional_config(tmp_path):
+    """ない・壊れている・空の場合は None（既定の設定）を返す"""
+    assert load_optional_config(None) is None
+    assert load_optional_config(tmp_path) is None
+
+    (tmp_path / "settings.yml").write_text("", encoding="utf-8")
+    assert load_optional_config(tmp_path) is None
+
+    (tmp_path / "settings.yml").write_text("invalid: yaml: [", encoding="utf-8")
+    assert load_optional_config(tmp_path) is None
+
+    (tmp_path / "settings.yml").write_text("history:\n  storage_engine: sqlite\n", encoding="utf-8")
+    assert load_optional_config(tmp_path) == {"history": {"storage_engine": "sqlite"}}
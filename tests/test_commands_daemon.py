@@ -0,0 +1,124 @@
+"""
+commands/daemon.py のテスト
+
+常駐モード（komon daemon）のテストを行います。
+"""
+
+import pytest
+from unittest.mock import patch, MagicMock
+from komon.commands.daemon import KomonDaemon, get_job_intervals, DEFAULT_INTERVALS
+
+
+CONFIG = {
+    "thresholds": {"cpu": 80, "mem": 80, "disk": 80},
+    "throttle": {"enabled": True, "interval_minutes": 60},
+}
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    """data/ を一時ディレクトリに向けたデーモン"""
+    monkeypatch.chdir(tmp_path)
+    return KomonDaemon(tmp_path, CONFIG)
+
+
+class TestGetJobIntervals:
+    """get_job_intervals()のテスト"""
+    
+    def test_defaults(self):
+        """daemonセクションがない場合はデフォルト間隔"""
+        assert get_job_intervals({}) == {k: float(v) for k, v in DEFAULT_INTERVALS.items()}
+    
+    def test_custom_and_invalid_values(self):
+        """設定値を使い、不正な値はデフォルトに戻す"""
+        intervals = get_job_intervals({"daemon": {"resource_interval": 60, "log_trend_interval": "abc"}})
+        
+        assert intervals["resource"] == 60.0
+        assert intervals["log_trend"] == float(DEFAULT_INTERVALS["log_trend"])
+    
+    def test_disabled_job_is_not_scheduled(self, daemon):
+        """0を指定したジョブは登録されない"""
+        daemon.config = dict(CONFIG, daemon={"log_trend_interval": 0})
+        
+        scheduler = daemon.build_scheduler()
+        
+        assert set(scheduler.jobs) == {"resource", "log_monitor"}
+
+
+class TestReload:
+    """SIGHUPによる設定の再読み込みのテスト"""
+    
+    def test_reload_runs_between_ticks_and_rebuilds_jobs(self, daemon, tmp_path):
+        """ハンドラはフラグを立てるだけで、ジョブの合間に再読み込みして間隔を反映する"""
+        daemon.build_scheduler()
+        resource_next_run = daemon.scheduler.jobs["resource"].next_run
+        (tmp_path / "settings.yml").write_text(
+            "thresholds: {cpu: 80, mem: 80, disk: 80}\n"
+            "daemon: {resource_interval: 60, log_trend_interval: 0}\n",
+            encoding="utf-8"
+        )
+        
+        daemon.request_reload()
+        assert daemon.config is CONFIG
+        
+        daemon.reload_if_requested()
+        
+        assert daemon.config["daemon"]["resource_interval"] == 60
+        assert set(daemon.scheduler.jobs) == {"resource", "log_monitor"}
+        assert daemon.scheduler.jobs["resource"].interval == 60.0
+        assert daemon.scheduler.jobs["resource"].next_run == resource_next_run
+    
+    def test_invalid_config_keeps_current(self, daemon, tmp_path):
+        """不正な設定の場合は現在の設定とジョブを維持する"""
+        daemon.build_scheduler()
+        (tmp_path / "settings.yml").write_text("thresholds: [broken\n", encoding="utf-8")
+        
+        daemon.request_reload()
+        daemon.reload_if_requested()
+        
+        assert daemon.config is CONFIG
+        assert set(daemon.scheduler.jobs) == {"resource", "log_monitor", "log_trend"}
+
+
+class TestResourceCheck:
+    """run_resource_check()のテスト"""
+    
+    @patch('komon.jobs.send_notification_with_fallback', return_value=True)
+    @patch('komon.commands.daemon.save_current_usage')
+    @patch('komon.commands.daemon.rotate_history')
+    @patch('komon.commands.daemon.collect_detailed_resource_usage')
+    def test_throttle_state_is_kept_between_runs(self, mock_collect, mock_rotate, mock_save,
+                                                 mock_send, daemon, capsys):
+        """2回目の実行では同じアラートが抑制され、cron用スクリプトと同じく送信・抑制を記録する"""
+        mock_collect.return_value = {
+            "cpu": 95.0, "mem": 10.0, "disk": 10.0,
+            "cpu_by_process": [{"name": "python", "cpu": 90.0}],
+            "mem_by_process": []
+        }
+        
+        daemon.run_resource_check()
+        daemon.run_resource_check()
+        
+        assert mock_send.call_count == 1
+        message = mock_send.call_args.kwargs["message"]
+        assert "CPU" in message
+        assert "1. python: 90.0%" in message
+        assert mock_save.call_count == 2
+        output = capsys.readouterr().out
+        assert "cpuの通知を送信しました" in output
+        assert "cpuの通知を抑制しました" in output
+
+
+class TestLogMonitor:
+    """run_log_monitor()のテスト"""
+    
+    @patch('komon.jobs.send_notification_with_fallback')
+    def test_log_anomaly_is_notified(self, mock_send, daemon):
+        """閾値を超えるログ増加があれば通知される"""
+        daemon.log_watcher.watch_logs = MagicMock(return_value={"/var/log/messages": 500})
+        daemon.config = dict(CONFIG, log_analysis={"line_threshold": 100, "tail_lines": 0})
+        
+        daemon.run_log_monitor()
+        
+        mock_send.assert_called_once()
+        assert "500 行の増加" in mock_send.call_args.kwargs["message"]
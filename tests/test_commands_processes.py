@@ -0,0 +1,58 @@
+"""
+commands/processes.py のテスト
+
+上位プロセスの履歴表示コマンドのテストを行います。
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from komon.commands.processes import format_value, run_processes
+from komon.timeseries import get_timeseries_store
+
+
+@pytest.fixture
+def temp_store(tmp_path, monkeypatch):
+    """テスト用の一時時系列ストア"""
+    monkeypatch.setattr('komon.timeseries.TIMESERIES_DIR', str(tmp_path / "metrics"))
+    store = get_timeseries_store()
+    now = datetime.now()
+    for i in range(3):
+        store.append({
+            'cpu': 50.0,
+            'cpu_by_process': [{'name': 'nginx', 'cpu': 20.0, 'count': 4}],
+            'mem_by_process': [{'name': 'mysqld', 'mem': 2048.0, 'count': 1}],
+        }, timestamp=(now - timedelta(hours=i)).timestamp())
+    return store
+
+
+def test_format_value():
+    """CPUは%、メモリはMB / GB で表示"""
+    assert format_value("cpu", 12.34) == "12.3%"
+    assert format_value("mem", 512.0) == "512.0MB"
+    assert format_value("mem", 2048.0) == "2.0 GB"
+
+
+def test_ranking(temp_store, capsys):
+    """上位に入った回数のランキングを表示"""
+    run_processes("cpu", days=7)
+    
+    output = capsys.readouterr().out
+    assert "1. nginx: 3回（平均 20.0% / 最大 20.0%）" in output
+
+
+def test_trend(temp_store, capsys):
+    """プロセスごとの推移を表示"""
+    run_processes("mem", days=7, name="mysqld")
+    
+    output = capsys.readouterr().out
+    assert "mysqld のメモリの推移" in output
+    assert "平均 2.0 GB / 最大 2.0 GB" in output
+
+
+def test_no_history(temp_store, capsys):
+    """履歴がないプロセスはその旨を表示"""
+    run_processes("cpu", days=7, name="unknown")
+    
+    assert "unknown が上位に入った履歴がありません" in capsys.readouterr().out
@@ -218,7 +218,7 @@ class TestErrorHandling:
         }
         mock_proc.cpu_percent.side_effect = psutil.AccessDenied(12345)
         
-        with patch('src.komon.contextual_advisor.psutil.process_iter', return_value=[mock_proc]):
+        with patch('psutil.process_iter', return_value=[mock_proc]):
             config = {"contextual_advice": {"top_processes_count": 3}}
             
             # エラーが発生してもクラッシュしない
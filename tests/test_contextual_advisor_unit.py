@@ -58,7 +58,7 @@ class TestGetTopProcesses:
         
         **検証要件: AC-001**
         """
-        with patch('src.komon.contextual_advisor.psutil.process_iter', return_value=[]):
+        with patch('psutil.process_iter', return_value=[]):
             processes = _get_top_processes("cpu", 3)
             assert processes == []
     
@@ -93,7 +93,7 @@ class TestGetTopProcesses:
         }
         mock_proc.cpu_percent.side_effect = psutil.NoSuchProcess(12345)
         
-        with patch('src.komon.contextual_advisor.psutil.process_iter', return_value=[mock_proc]):
+        with patch('psutil.process_iter', return_value=[mock_proc]):
             processes = _get_top_processes("cpu", 3)
             # エラーが発生してもクラッシュしない
             assert isinstance(processes, list)
@@ -453,7 +453,7 @@ class TestExceptionHandling:
         **検証要件: AC-001**
         """
         # psutil.process_iter()が例外を投げる場合
-        with patch('src.komon.contextual_advisor.psutil.process_iter', side_effect=Exception("Test error")):
+        with patch('psutil.process_iter', side_effect=Exception("Test error")):
             processes = _get_top_processes("cpu", 3)
             
             # 空リストが返される
@@ -478,7 +478,7 @@ class TestExceptionHandling:
         # 予期しない例外
         mock_proc.cpu_percent.side_effect = RuntimeError("Unexpected error")
         
-        with patch('src.komon.contextual_advisor.psutil.process_iter', return_value=[mock_proc]):
+        with patch('psutil.process_iter', return_value=[mock_proc]):
             # 例外が発生してもクラッシュしない
             processes = _get_top_processes("cpu", 3)
             assert isinstance(processes, list)
@@ -0,0 +1,146 @@
+"""
+disk_monitor.py のテスト
+
+マウント別ディスク使用率の収集をテストします。
+"""
+
+import os
+from datetime import date, datetime, timedelta
+from unittest.mock import patch, MagicMock
+from komon.disk_monitor import (
+    MOUNT_HISTORY_DAYS,
+    MountTable,
+    collect_disk_usage,
+    load_mount_daily_averages,
+    parse_mountinfo,
+    record_mount_usage,
+)
+
+
+MOUNTINFO = """\
+22 1 8:1 / / rw,relatime shared:1 - ext4 /dev/sda1 rw
+23 22 0:21 / /proc rw,nosuid - proc proc rw
+24 22 8:2 / /var rw,relatime shared:2 master:1 - xfs /dev/sda2 rw
+25 22 8:2 /lib/docker /var/lib/docker rw,relatime - xfs /dev/sda2 rw
+26 22 0:50 / /var/lib/docker/overlay2/abc/merged rw - overlay overlay rw
+27 22 8:3 / /mnt/my\\040disk rw - ext4 /dev/sda3 rw
+"""
+
+FILESYSTEMS = "nodev\tproc\nnodev\toverlay\n\text4\n\txfs\n"
+
+
+def _make_table(tmp_path, text=MOUNTINFO):
+    mountinfo = tmp_path / "mountinfo"
+    mountinfo.write_text(text)
+    filesystems = tmp_path / "filesystems"
+    filesystems.write_text(FILESYSTEMS)
+    return MountTable(path=str(mountinfo), filesystems_path=str(filesystems)), mountinfo
+
+
+class TestParseMountinfo:
+    """parse_mountinfo()のテスト"""
+    
+    def test_parse_fields(self):
+        """オプションフィールドの数に関係なく解析できる"""
+        mounts = parse_mountinfo(MOUNTINFO)
+        
+        assert len(mounts) == 6
+        assert mounts[2] == {
+            'device_id': '8:2', 'root': '/', 'mountpoint': '/var',
+            'fstype': 'xfs', 'source': '/dev/sda2'
+        }
+        # オクタルエスケープ（\040 = 空白）を戻す
+        assert mounts[5]['mountpoint'] == '/mnt/my disk'
+    
+    def test_broken_line_is_skipped(self):
+        """形式が不正な行はスキップ"""
+        assert parse_mountinfo("broken line\n") == []
+
+
+class TestMountTable:
+    """MountTableのテスト"""
+    
+    def test_real_mounts_filters_pseudo_and_bind_mounts(self, tmp_path):
+        """疑似FSとバインドマウントを除外する"""
+        table, _ = _make_table(tmp_path)
+        
+        mountpoints = [m['mountpoint'] for m in table.real_mounts()]
+        
+        assert mountpoints == ['/', '/mnt/my disk', '/var']
+    
+    def test_table_is_cached_until_file_changes(self, tmp_path):
+        """ファイルが変化するまで再解析しない"""
+        table, mountinfo = _make_table(tmp_path)
+        
+        table.mounts()
+        table.mounts()
+        assert table.reload_count == 1
+        
+        mountinfo.write_text(MOUNTINFO + "28 22 8:4 / /data rw - ext4 /dev/sdb1 rw\n")
+        os.utime(mountinfo, ns=(0, 1))
+        
+        assert len(table.mounts()) == 7
+        assert table.reload_count == 2
+
+
+class TestCollectDiskUsage:
+    """collect_disk_usage()のテスト"""
+    
+    def test_statvfs_once_per_mount(self, tmp_path):
+        """マウントごとに statvfs を1回だけ呼び、ディスク・inode使用率を計算する"""
+        table, _ = _make_table(tmp_path)
+        stat = MagicMock(
+            f_blocks=1000, f_bfree=400, f_bavail=350, f_frsize=4096,
+            f_files=100, f_ffree=75
+        )
+        
+        with patch('komon.disk_monitor.os.statvfs', return_value=stat) as mock_statvfs:
+            result = collect_disk_usage(table)
+        
+        assert mock_statvfs.call_count == 3
+        root = result[0]
+        assert root['mountpoint'] == '/'
+        assert root['device'] == '/dev/sda1'
+        assert root['total'] == 1000 * 4096
+        # psutil.disk_usage と同じ計算式: used / (used + avail)
+        assert root['percent'] == round(600 / 950 * 100, 1)
+        assert root['inodes_used'] == 25
+        assert root['inodes_percent'] == 25.0
+    
+    def test_statvfs_error_is_skipped(self, tmp_path):
+        """statvfs に失敗したマウントはスキップ"""
+        table, _ = _make_table(tmp_path)
+        
+        with patch('komon.disk_monitor.os.statvfs', side_effect=OSError("stale")):
+            assert collect_disk_usage(table) == []
+
+
+class TestMountHistory:
+    """record_mount_usage() / load_mount_daily_averages() のテスト"""
+    
+    def test_daily_averages(self, tmp_path):
+        """マウントごとに日次平均を返し、保持期間を過ぎた日とマウントは削除する"""
+        state_file = str(tmp_path / "mount_usage.json")
+        day = datetime(2025, 11, 20, 12, 0)
+        record_mount_usage([{'mountpoint': '/old', 'percent': 5.0}], timestamp=day.timestamp(), state_file=state_file)
+        later = day + timedelta(days=MOUNT_HISTORY_DAYS - 2)
+        for hour, (root, var) in enumerate([(40.0, 10.0), (50.0, 20.0)]):
+            disks = [{'mountpoint': '/', 'percent': root}, {'mountpoint': '/var', 'percent': var}]
+            record_mount_usage(disks, timestamp=(later + timedelta(hours=hour)).timestamp(), state_file=state_file)
+        
+        today = later.date()
+        assert load_mount_daily_averages(MOUNT_HISTORY_DAYS, today=today, state_file=state_file)["/old"] == [
+            (day.date(), 5.0)
+        ]
+        assert load_mount_daily_averages(7, today=today, state_file=state_file) == {
+            '/': [(today, 45.0)], '/var': [(today, 15.0)]
+        }
+        
+        record_mount_usage([], timestamp=(later + timedelta(days=2)).timestamp(), state_file=state_file)
+        assert '/old' not in load_mount_daily_averages(MOUNT_HISTORY_DAYS, today=today, state_file=state_file)
+    
+    def test_broken_state(self, tmp_path):
+        """壊れた状態ファイルは空として扱う"""
+        state_file = tmp_path / "mount_usage.json"
+        state_file.write_text("{broken")
+        assert load_mount_daily_averages(state_file=str(state_file)) == {}
@@ -7,7 +7,6 @@ advise.pyおよびweekly_report.pyとの統合をテストします。
 import pytest
 import os
 import tempfile
-import csv
 from datetime import datetime, date, timedelta
 from pathlib import Path
 from unittest.mock import patch, MagicMock
@@ -20,6 +19,7 @@ from komon.disk_predictor import (
     detect_rapid_change,
     format_prediction_message
 )
+from komon.timeseries import TimeSeriesStore
 
 
 # ========================================
@@ -33,26 +33,21 @@ def test_advise_disk_prediction_with_data(tmp_path, capsys):
     **検証要件: 5.1**
     """
     # テスト用の履歴データを作成
-    history_dir = tmp_path / "data" / "usage_history"
+    history_dir = tmp_path / "data" / "metrics"
     history_dir.mkdir(parents=True)
+    store = TimeSeriesStore(str(history_dir))
     
     # 7日分のデータを作成（増加傾向）
     base_date = datetime.now() - timedelta(days=7)
     for i in range(7):
         file_date = base_date + timedelta(days=i)
-        filename = f"usage_{file_date.strftime('%Y%m%d_%H%M%S')}.csv"
-        filepath = history_dir / filename
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(['timestamp', 'cpu', 'mem', 'disk'])
-            disk_usage = 70.0 + i * 2.0  # 70%から84%まで増加
-            writer.writerow([file_date.strftime('%Y-%m-%d %H:%M:%S'), 50.0, 60.0, disk_usage])
+        disk_usage = 70.0 + i * 2.0  # 70%から84%まで増加
+        store.append({'cpu': 50.0, 'mem': 60.0, 'disk': disk_usage}, timestamp=file_date.timestamp())
     
-    # disk_predictorのHISTORY_DIRを一時的に変更
-    import komon.disk_predictor as dp
-    original_dir = dp.HISTORY_DIR
-    dp.HISTORY_DIR = str(history_dir)
+    # 時系列ストアの保存先を一時的に変更
+    import komon.timeseries as ts
+    original_dir = ts.TIMESERIES_DIR
+    ts.TIMESERIES_DIR = str(history_dir)
     
     try:
         # advise_disk_prediction関数をインポートして実行
@@ -66,7 +61,7 @@ def test_advise_disk_prediction_with_data(tmp_path, capsys):
         assert "現在の使用率" in captured.out or "増加" in captured.out or "安定" in captured.out
         
     finally:
-        dp.HISTORY_DIR = original_dir
+        ts.TIMESERIES_DIR = original_dir
 
 
 def test_advise_disk_prediction_insufficient_data(tmp_path, capsys):
@@ -76,13 +71,14 @@ def test_advise_disk_prediction_insufficient_data(tmp_path, capsys):
     **検証要件: 5.2**
     """
     # 空のディレクトリを作成
-    history_dir = tmp_path / "data" / "usage_history"
+    history_dir = tmp_path / "data" / "metrics"
     history_dir.mkdir(parents=True)
+    store = TimeSeriesStore(str(history_dir))
     
-    # disk_predictorのHISTORY_DIRを一時的に変更
-    import komon.disk_predictor as dp
-    original_dir = dp.HISTORY_DIR
-    dp.HISTORY_DIR = str(history_dir)
+    # 時系列ストアの保存先を一時的に変更
+    import komon.timeseries as ts
+    original_dir = ts.TIMESERIES_DIR
+    ts.TIMESERIES_DIR = str(history_dir)
     
     try:
         from scripts.advise import advise_disk_prediction
@@ -94,7 +90,7 @@ def test_advise_disk_prediction_insufficient_data(tmp_path, capsys):
         assert "データが不足しています" in captured.out
         
     finally:
-        dp.HISTORY_DIR = original_dir
+        ts.TIMESERIES_DIR = original_dir
 
 
 def test_advise_disk_prediction_error_handling(capsys):
@@ -104,9 +100,9 @@ def test_advise_disk_prediction_error_handling(capsys):
     **検証要件: 5.3**
     """
     # 存在しないディレクトリを指定してエラーを発生させる
-    import komon.disk_predictor as dp
-    original_dir = dp.HISTORY_DIR
-    dp.HISTORY_DIR = "/nonexistent/directory"
+    import komon.timeseries as ts
+    original_dir = ts.TIMESERIES_DIR
+    ts.TIMESERIES_DIR = "/nonexistent/directory"
     
     try:
         from scripts.advise import advise_disk_prediction
@@ -119,7 +115,7 @@ def test_advise_disk_prediction_error_handling(capsys):
         assert "データが不足しています" in captured.out or "エラーが発生しました" in captured.out
         
     finally:
-        dp.HISTORY_DIR = original_dir
+        ts.TIMESERIES_DIR = original_dir
 
 
 
@@ -134,26 +130,21 @@ def test_weekly_report_includes_prediction(tmp_path):
     **検証要件: 6.1**
     """
     # テスト用の履歴データを作成
-    history_dir = tmp_path / "data" / "usage_history"
+    history_dir = tmp_path / "data" / "metrics"
     history_dir.mkdir(parents=True)
+    store = TimeSeriesStore(str(history_dir))
     
     # 7日分のデータを作成
     base_date = datetime.now() - timedelta(days=7)
     for i in range(7):
         file_date = base_date + timedelta(days=i)
-        filename = f"usage_{file_date.strftime('%Y%m%d_%H%M%S')}.csv"
-        filepath = history_dir / filename
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(['timestamp', 'cpu', 'mem', 'disk'])
-            disk_usage = 70.0 + i * 2.0
-            writer.writerow([file_date.strftime('%Y-%m-%d %H:%M:%S'), 50.0, 60.0, disk_usage])
+        disk_usage = 70.0 + i * 2.0
+        store.append({'cpu': 50.0, 'mem': 60.0, 'disk': disk_usage}, timestamp=file_date.timestamp())
     
-    # disk_predictorのHISTORY_DIRを一時的に変更
-    import komon.disk_predictor as dp
-    original_dir = dp.HISTORY_DIR
-    dp.HISTORY_DIR = str(history_dir)
+    # 時系列ストアの保存先を一時的に変更
+    import komon.timeseries as ts
+    original_dir = ts.TIMESERIES_DIR
+    ts.TIMESERIES_DIR = str(history_dir)
     
     try:
         from komon.weekly_data import collect_weekly_data
@@ -175,7 +166,7 @@ def test_weekly_report_includes_prediction(tmp_path):
         assert 'ディスク使用量の予測' in report
         
     finally:
-        dp.HISTORY_DIR = original_dir
+        ts.TIMESERIES_DIR = original_dir
 
 
 def test_weekly_report_insufficient_data(tmp_path):
@@ -185,13 +176,14 @@ def test_weekly_report_insufficient_data(tmp_path):
     **検証要件: 6.5**
     """
     # 空のディレクトリを作成
-    history_dir = tmp_path / "data" / "usage_history"
+    history_dir = tmp_path / "data" / "metrics"
     history_dir.mkdir(parents=True)
+    store = TimeSeriesStore(str(history_dir))
     
-    # disk_predictorのHISTORY_DIRを一時的に変更
-    import komon.disk_predictor as dp
-    original_dir = dp.HISTORY_DIR
-    dp.HISTORY_DIR = str(history_dir)
+    # 時系列ストアの保存先を一時的に変更
+    import komon.timeseries as ts
+    original_dir = ts.TIMESERIES_DIR
+    ts.TIMESERIES_DIR = str(history_dir)
     
     try:
         from komon.weekly_data import collect_weekly_data
@@ -210,4 +202,4 @@ def test_weekly_report_insufficient_data(tmp_path):
         assert '週次健全性レポート' in report
         
     finally:
-        dp.HISTORY_DIR = original_dir
+        ts.TIMESERIES_DIR = original_dir
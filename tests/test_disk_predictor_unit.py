@@ -7,18 +7,21 @@
 import pytest
 import os
 import tempfile
-import csv
 from datetime import datetime, date, timedelta
 from pathlib import Path
 
 from komon.disk_predictor import (
     load_disk_history,
+    load_daily_disk_average,
     calculate_daily_average,
     predict_disk_trend,
+    predict_from_state,
     detect_rapid_change,
+    format_mount_forecasts,
     format_prediction_message,
-    HISTORY_DIR
+    predict_mounts
 )
+from komon.disk_monitor import record_mount_usage
 
 
 # ========================================
@@ -32,15 +35,70 @@ def test_load_disk_history_no_directory():
     **検証要件: 1.2**
     """
     # 存在しないディレクトリを指定
-    import komon.disk_predictor as dp
-    original_dir = dp.HISTORY_DIR
-    dp.HISTORY_DIR = "/nonexistent/directory"
+    import komon.timeseries as ts
+    original_dir = ts.TIMESERIES_DIR
+    ts.TIMESERIES_DIR = "/nonexistent/directory"
     
     try:
         result = load_disk_history()
         assert result == [], "存在しないディレクトリの場合、空リストを返すべき"
     finally:
-        dp.HISTORY_DIR = original_dir
+        ts.TIMESERIES_DIR = original_dir
+
+
+def test_load_daily_disk_average_matches_daily_average(tmp_path, monkeypatch):
+    """
+    時系列ストアで集計した日次平均が calculate_daily_average と一致する
+    """
+    import komon.timeseries as ts
+    monkeypatch.setattr(ts, 'TIMESERIES_DIR', str(tmp_path / "metrics"))
+    store = ts.get_timeseries_store()
+    now = datetime.now()
+    for i in range(12):
+        store.append({'disk': 50.0 + i}, timestamp=(now - timedelta(hours=10 * i)).timestamp())
+    
+    expected = calculate_daily_average(load_disk_history(days=7))
+    result = load_daily_disk_average(days=7)
+    
+    assert [day for day, _ in result] == [day for day, _ in expected]
+    assert [usage for _, usage in result] == pytest.approx([usage for _, usage in expected])
+
+
+def test_predict_from_state(tmp_path, monkeypatch):
+    """
+    追記時に更新した十分統計量から、履歴を読まずに同じ形式の予測を返す
+    """
+    import komon.timeseries as ts
+    monkeypatch.setattr(ts, 'TIMESERIES_DIR', str(tmp_path / "metrics"))
+    store = ts.get_timeseries_store()
+    start = datetime.combine(date.today() - timedelta(days=3), datetime.min.time())
+    for i in range(72):
+        store.append({'disk': 60.0 + 2.0 * i / 24}, timestamp=(start + timedelta(hours=i)).timestamp())
+    
+    monkeypatch.setattr(ts.TimeSeriesStore, 'query', lambda *args: pytest.fail("履歴を読み込んだ"))
+    prediction, rapid_change = predict_from_state(days=7)
+    
+    daily_data = [(start.date() + timedelta(days=1), 63.0 - 1 / 24), (start.date() + timedelta(days=2), 65.0 - 1 / 24)]
+    assert prediction['slope'] == pytest.approx(2.0)
+    assert prediction['current_usage'] == pytest.approx(daily_data[-1][1])
+    assert prediction['trend'] == 'increasing'
+    assert prediction['days_to_90'] == predict_disk_trend(daily_data)['days_to_90']
+    assert rapid_change == pytest.approx(detect_rapid_change(daily_data))
+
+
+def test_predict_from_state_insufficient(tmp_path, monkeypatch):
+    """
+    2日分のデータがない・前日のデータが古い場合は None
+    """
+    import komon.timeseries as ts
+    monkeypatch.setattr(ts, 'TIMESERIES_DIR', str(tmp_path / "metrics"))
+    store = ts.get_timeseries_store()
+    assert predict_from_state() is None
+    
+    old = datetime.now() - timedelta(days=30)
+    store.append({'disk': 50.0}, timestamp=old.timestamp())
+    store.append({'disk': 51.0}, timestamp=datetime.now().timestamp())
+    assert predict_from_state(days=7) is None
 
 
 def test_calculate_daily_average_empty_data():
@@ -369,3 +427,23 @@ def test_format_prediction_message_normal_increase_with_prediction():
     assert '90%に到達' in message
     assert '6日' in message
     assert '推奨アクション' in message or 'journalctl' in message
+
+
+def test_predict_mounts():
+    """
+    マウントごとの日次平均から、すべてのマウントの閾値への到達日をまとめて予測する
+    """
+    start = datetime.combine(date.today() - timedelta(days=4), datetime.min.time()) + timedelta(hours=12)
+    for i in range(5):
+        disks = [{'mountpoint': '/', 'percent': 40.0}, {'mountpoint': '/var', 'percent': 70.0 + 2.0 * i}]
+        record_mount_usage(disks, timestamp=(start + timedelta(days=i)).timestamp())
+    
+    forecasts = predict_mounts()
+    
+    assert forecasts['/var']['slope'] == pytest.approx(2.0)
+    assert [t['days'] for t in forecasts['/var']['thresholds']] == [1, 6, 8]
+    assert forecasts['/']['slope'] == pytest.approx(0.0)
+    
+    message = format_mount_forecasts(forecasts)
+    assert message.splitlines()[0] == "- /: 40.0%（+0.00%/日） 当面は問題ありません"
+    assert "- /var: 78.0%（+2.00%/日） 80% まであと1日" in message
@@ -5,6 +5,7 @@
 import pytest
 from unittest.mock import MagicMock, patch
 from komon.duplicate_detector import detect_duplicate_processes, _extract_script_name
+from komon.monitor import ProcessSnapshot
 
 
 class TestDetectDuplicateProcesses:
@@ -133,6 +134,22 @@ class TestDetectDuplicateProcesses:
         
         # 検証: エラー時は空リストを返す
         assert result == []
+    
+    def test_detect_duplicate_processes_with_snapshot(self):
+        """
+        正常系: 共有スナップショットを渡した場合は再走査しない
+        """
+        snapshot = ProcessSnapshot([
+            {'pid': 1001, 'cmdline': ['python', '/path/to/backup.py']},
+            {'pid': 1002, 'cmdline': ['python', '/path/to/backup.py']},
+            {'pid': 1003, 'cmdline': ['python', '/path/to/backup.py']},
+        ])
+        
+        with patch('psutil.process_iter') as mock_iter:
+            result = detect_duplicate_processes(threshold=3, snapshot=snapshot)
+        
+        mock_iter.assert_not_called()
+        assert result == [{'script': 'backup.py', 'count': 3, 'pids': [1001, 1002, 1003]}]
 
 
 class TestExtractScriptName:
@@ -0,0 +1,165 @@
+"""
+export.py / commands/export.py のテスト
+
+履歴・集計段・通知履歴のエクスポートのテストを行います。
+"""
+
+import csv
+import io
+import json
+import types
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from komon.commands.export import parse_time, run_export
+from komon.export import (
+    iter_notifications,
+    iter_rollups,
+    iter_samples,
+    rollup_fields,
+    sample_fields,
+    write_rows,
+)
+from komon.timeseries import get_timeseries_store
+
+
+BASE = datetime(2025, 11, 20, 10, 0, 0)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """サンプルと集計段を書き込んだ一時時系列ストア"""
+    monkeypatch.setattr('komon.timeseries.TIMESERIES_DIR', str(tmp_path / "metrics"))
+    store = get_timeseries_store()
+    for i in range(6):
+        store.append({'cpu': 10.0 * i, 'mem': 50.0, 'disk': 70.0}, timestamp=(BASE + timedelta(minutes=30 * i)).timestamp())
+    store.rollup(now=BASE + timedelta(days=1))
+    return store
+
+
+@pytest.fixture
+def queue_file(tmp_path):
+    """通知履歴（新しい順）"""
+    path = tmp_path / "queue.json"
+    path.write_text(json.dumps([
+        {"timestamp": "2025-11-21T09:00:00", "metric_type": "disk", "metric_value": 91.0, "message": "ディスク"},
+        {"timestamp": "2025-11-20T09:00:00", "metric_type": "cpu", "metric_value": 95.0, "message": "CPU"},
+        {"timestamp": "2025-11-19T09:00:00", "metric_type": "cpu", "metric_value": 90.0, "message": "古いCPU"},
+    ], ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+class TestIterators:
+    """ジェネレーターのテスト"""
+    
+    def test_samples_with_metric_filter(self, store):
+        """期間とメトリクスで絞り込んだサンプルを1件ずつ返す"""
+        rows = iter_samples(BASE + timedelta(minutes=30), BASE + timedelta(minutes=90), ['cpu'], store=store)
+        
+        assert isinstance(rows, types.GeneratorType)
+        assert list(rows) == [
+            {'timestamp': '2025-11-20T10:30:00', 'cpu': 10.0},
+            {'timestamp': '2025-11-20T11:00:00', 'cpu': 20.0},
+            {'timestamp': '2025-11-20T11:30:00', 'cpu': 30.0},
+        ]
+    
+    def test_unknown_metric(self, store):
+        """不明なメトリクスは ValueError"""
+        with pytest.raises(ValueError):
+            sample_fields(['gpu'])
+    
+    def test_rollups(self, store):
+        """集計段の区間を返す"""
+        rows = list(iter_rollups("1h", BASE, BASE + timedelta(hours=3), ['disk'], store=store))
+        
+        assert rollup_fields(['disk']) == ['start', 'count', 'disk_min', 'disk_max', 'disk_avg', 'disk_p95']
+        assert [(r['start'], r['count'], r['disk_avg']) for r in rows] == [
+            ('2025-11-20T10:00:00', 2, 70.0), ('2025-11-20T11:00:00', 2, 70.0), ('2025-11-20T12:00:00', 2, 70.0),
+        ]
+    
+    def test_notifications_oldest_first(self, queue_file):
+        """通知履歴を期間・種類で絞り込み、古い順に返す"""
+        rows = list(iter_notifications(datetime(2025, 11, 20), datetime(2025, 11, 22), ['cpu'], queue_file=queue_file))
+        
+        assert [r['message'] for r in rows] == ['CPU']
+        assert [r['message'] for r in iter_notifications(datetime(2025, 11, 1), datetime(2025, 11, 30), queue_file=queue_file)] == [
+            '古いCPU', 'CPU', 'ディスク'
+        ]
+
+
+class TestWriteRows:
+    """write_rows関数のテスト"""
+    
+    def test_csv(self):
+        """ヘッダー付きのCSVを書き出す"""
+        out = io.StringIO()
+        
+        count = write_rows(iter([{'timestamp': 't1', 'cpu': 1.5}]), ['timestamp', 'cpu'], out, "csv")
+        
+        assert count == 1
+        assert list(csv.reader(io.StringIO(out.getvalue()))) == [['timestamp', 'cpu'], ['t1', '1.5']]
+    
+    def test_jsonl(self):
+        """1行1件の JSON を書き出す"""
+        out = io.StringIO()
+        
+        write_rows(iter([{'message': 'ディスク'}, {'message': 'CPU'}]), ['message'], out, "jsonl")
+        
+        assert [json.loads(line) for line in out.getvalue().splitlines()] == [{'message': 'ディスク'}, {'message': 'CPU'}]
+
+
+class TestRunExport:
+    """run_export関数のテスト"""
+    
+    def test_parse_time(self):
+        """日付のみの終了はその日の終わり"""
+        assert parse_time("2025-11-20", BASE) == datetime(2025, 11, 20)
+        assert parse_time("2025-11-20", BASE, end=True) == datetime(2025, 11, 20, 23, 59, 59, 999999)
+        assert parse_time(None, BASE) == BASE
+    
+    def test_parse_time_with_offset(self):
+        """タイムゾーン付きの日時はローカル時刻に変換する"""
+        expected = datetime(2025, 11, 20, 12, 0, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+        
+        assert parse_time("2025-11-20T12:00:00+00:00", BASE) == expected
+        assert parse_time("2025-11-20T12:00:00Z", BASE) == expected
+    
+    def test_export_with_offset(self, store, capsys):
+        """タイムゾーン付きの --since / --until でも比較できる"""
+        since = datetime(2025, 11, 20, 12, 0).astimezone().isoformat()
+        
+        run_export("samples", since=since, until="2025-11-20", metrics=["cpu"])
+        
+        assert capsys.readouterr().out.splitlines() == [
+            "timestamp,cpu",
+            "2025-11-20T12:00:00,40.0",
+            "2025-11-20T12:30:00,50.0",
+        ]
+    
+    def test_export_to_stdout(self, store, capsys):
+        """標準出力にCSVを書き出す"""
+        run_export("samples", since="2025-11-20T12:00", until="2025-11-20", metrics=["cpu", "disk"])
+        
+        assert capsys.readouterr().out.splitlines() == [
+            "timestamp,cpu,disk",
+            "2025-11-20T12:00:00,40.0,70.0",
+            "2025-11-20T12:30:00,50.0,70.0",
+        ]
+    
+    def test_export_to_file(self, store, tmp_path, capsys):
+        """ファイルに JSON Lines を書き出す"""
+        output = tmp_path / "rollups.jsonl"
+        
+        run_export("rollups", fmt="jsonl", output=str(output), tier="1d")
+        
+        rows = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+        assert [(r['start'], r['count'], r['cpu_max']) for r in rows] == [('2025-11-20T00:00:00', 6, 50.0)]
+        assert "1件を書き出しました" in capsys.readouterr().out
+    
+    def test_invalid_time(self, store, capsys):
+        """解釈できない日時はエラー終了"""
+        with pytest.raises(SystemExit):
+            run_export("samples", since="yesterday")
+        
+        assert "❌" in capsys.readouterr().err
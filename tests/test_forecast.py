@@ -0,0 +1,209 @@
+"""
+forecast.py のテスト
+
+使用率の予測（当てはめの方法・予測区間・閾値への到達日・まとめての予測）をテストします。
+NumPy による計算との一致は NumPy がインストールされている場合のみテストします。
+"""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from komon.disk_predictor import predict_disk_trend
+from komon.forecast import (
+    NUMPY_AVAILABLE,
+    TREND_HALF_LIFE_DAYS,
+    fit_line,
+    fit_sums,
+    forecast_batch,
+    forecast_series,
+    update_sums,
+)
+
+START = date(2025, 11, 1)
+
+
+def _daily(values, start=START):
+    return [(start + timedelta(days=i), v) for i, v in enumerate(values)]
+
+
+class TestFitLine:
+    """fit_line関数のテスト"""
+    
+    @pytest.mark.parametrize("method", ["ols", "weighted", "theil_sen"])
+    def test_exact_line(self, method):
+        """直線上のデータはどの方法でも同じ傾きと切片"""
+        slope, intercept = fit_line([0, 1, 2, 3], [10.0, 12.0, 14.0, 16.0], method)
+        assert slope == pytest.approx(2.0)
+        assert intercept == pytest.approx(10.0)
+    
+    def test_theil_sen_ignores_cleanup(self):
+        """一時的な削除（1日だけの急減）の影響を受けにくい"""
+        values = [50.0 + i for i in range(10)]
+        values[7] -= 30.0
+        
+        ols, _ = fit_line(range(10), values, "ols")
+        robust, _ = fit_line(range(10), values, "theil_sen")
+        
+        assert robust == pytest.approx(1.0)
+        assert ols < 0.8
+    
+    def test_weighted_follows_recent_growth(self):
+        """weighted は最近の増加を重視する"""
+        values = [50.0] * 10 + [50.0 + 2 * i for i in range(1, 6)]
+        ols, _ = fit_line(range(15), values, "ols")
+        weighted, _ = fit_line(range(15), values, "weighted")
+        assert weighted > ols
+    
+    def test_same_x(self):
+        """x がすべて同じ場合は傾き0"""
+        assert fit_line([3, 3], [10.0, 20.0]) == (0.0, 15.0)
+    
+    def test_errors(self):
+        """データ不足・不明な方法はValueError"""
+        with pytest.raises(ValueError):
+            fit_line([0], [1.0])
+        with pytest.raises(ValueError):
+            fit_line([0, 1], [1.0, 2.0], "cubic")
+
+
+class TestForecastSeries:
+    """forecast_series関数のテスト"""
+    
+    def test_thresholds_and_horizons(self):
+        """複数の閾値への到達日と複数の期間先の予測値を返す"""
+        result = forecast_series(_daily([70.0, 71.0, 72.0, 73.0, 74.0]), method="ols", vectorize=False)
+        
+        assert result['slope'] == pytest.approx(1.0)
+        assert result['current_usage'] == 74.0
+        assert [t['threshold'] for t in result['thresholds']] == [80.0, 90.0, 95.0]
+        assert [t['days'] for t in result['thresholds']] == [6, 16, 21]
+        assert result['thresholds'][0]['date'] == '2025-11-11'
+        week = result['forecasts'][0]
+        assert week['days'] == 7
+        assert week['value'] == pytest.approx(81.0)
+        assert week['lower'] == pytest.approx(81.0)
+        assert week['upper'] == pytest.approx(81.0)
+    
+    def test_interval_widens_with_horizon(self):
+        """ばらつきがある場合、予測区間は先ほど広い"""
+        rng = random.Random(0)
+        data = _daily([40.0 + 0.5 * i + rng.gauss(0, 1) for i in range(30)])
+        result = forecast_series(data, method="ols", vectorize=False)
+        
+        widths = [f['upper'] - f['lower'] for f in result['forecasts']]
+        assert all(f['lower'] < f['value'] < f['upper'] for f in result['forecasts'])
+        assert widths == sorted(widths)
+    
+    def test_reached_and_decreasing(self):
+        """到達済みの閾値は0日、減少傾向では到達しない"""
+        result = forecast_series(_daily([92.0, 91.0, 90.5]), vectorize=False)
+        assert [t['days'] for t in result['thresholds']] == [0, 0, None]
+    
+    def test_not_enough_data(self):
+        """データが2日分未満の場合はNone"""
+        assert forecast_series(_daily([50.0])) is None
+    
+    def test_matches_predict_disk_trend(self):
+        """ols の結果は predict_disk_trend と同じ"""
+        data = _daily([60.0, 61.5, 61.0, 63.0, 64.5, 64.0, 66.0])
+        prediction = predict_disk_trend(data)
+        result = forecast_series(data, method="ols", vectorize=False)
+        
+        assert result['slope'] == pytest.approx(prediction['slope'])
+        assert result['thresholds'][1]['days'] == prediction['days_to_90']
+        assert result['thresholds'][1]['date'] == prediction['prediction_date']
+
+
+class TestForecastBatch:
+    """forecast_batch関数のテスト"""
+    
+    def test_each_series(self):
+        """系列ごとの結果を返し、データ不足の系列は含めない"""
+        results = forecast_batch({
+            "/": _daily([50.0, 51.0, 52.0]),
+            "/var": _daily([20.0, 20.0], start=START + timedelta(days=1)),
+            "/tmp": _daily([10.0]),
+        }, vectorize=False)
+        
+        assert set(results) == {"/", "/var"}
+        assert results["/"]['slope'] == pytest.approx(1.0)
+        assert results["/var"]['last_date'] == START + timedelta(days=2)
+    
+    def test_unknown_method(self):
+        with pytest.raises(ValueError):
+            forecast_batch({"/": _daily([1.0, 2.0])}, method="cubic")
+    
+    @pytest.mark.skipif(not NUMPY_AVAILABLE, reason="NumPy がインストールされていません")
+    @pytest.mark.parametrize("method", ["ols", "weighted", "theil_sen"])
+    def test_vectorized_matches_python(self, method):
+        """NumPy でまとめて計算した結果は系列ごとの Python の計算と一致する（欠けた日を含む）"""
+        rng = random.Random(1)
+        series = {}
+        for m in range(5):
+            points = [
+                (START + timedelta(days=m + i), 30.0 + 0.2 * i + rng.gauss(0, 1))
+                for i in range(60) if rng.random() > 0.1
+            ]
+            series[f"/m{m}"] = points
+        
+        python = forecast_batch(series, method, vectorize=False)
+        vectorized = forecast_batch(series, method, vectorize=True)
+        
+        for name in series:
+            assert vectorized[name]['slope'] == pytest.approx(python[name]['slope'])
+            assert vectorized[name]['thresholds'] == python[name]['thresholds']
+            for a, b in zip(vectorized[name]['forecasts'], python[name]['forecasts']):
+                assert a['lower'] == pytest.approx(b['lower'])
+                assert a['upper'] == pytest.approx(b['upper'])
+
+
+class TestIncrementalSums:
+    """update_sums / fit_sums のテスト"""
+    
+    def test_matches_weighted_regression(self):
+        """1件ずつ更新した結果は、経過日数で減衰させた重み付き最小二乗法と一致する（時刻の巻き戻しを含む）"""
+        rng = random.Random(2)
+        points = []
+        t = 0.0
+        for _ in range(100):
+            t += rng.uniform(600, 7200)
+            points.append((t, 50.0 + 0.3 * t / 86400 + rng.gauss(0, 0.5)))
+        points[40], points[41] = points[41], points[40]
+        
+        sums = None
+        for timestamp, value in points:
+            sums = update_sums(sums, timestamp, value)
+        
+        x = [(timestamp - t) / 86400 for timestamp, _ in points]
+        w = [0.5 ** (-xi / TREND_HALF_LIFE_DAYS) for xi in x]
+        y = [value for _, value in points]
+        sw = sum(w)
+        sx = sum(wi * xi for wi, xi in zip(w, x))
+        sy = sum(wi * yi for wi, yi in zip(w, y))
+        sxy = sum(wi * xi * yi for wi, xi, yi in zip(w, x, y))
+        sxx = sum(wi * xi * xi for wi, xi in zip(w, x))
+        slope = (sw * sxy - sx * sy) / (sw * sxx - sx * sx)
+        
+        assert sums['n'] == pytest.approx(sw)
+        assert fit_sums(sums) == pytest.approx((slope, (sy - slope * sx) / sw))
+    
+    def test_single_timestamp(self):
+        """時刻がすべて同じ場合は傾き0・平均値"""
+        sums = update_sums(update_sums(None, 1000.0, 10.0), 1000.0, 20.0)
+        assert fit_sums(sums) == (0.0, 15.0)
+    
+    def test_empty(self):
+        with pytest.raises(ValueError):
+            fit_sums({'t': 0.0, 'n': 0.0, 'sx': 0.0, 'sy': 0.0, 'sxy': 0.0, 'sxx': 0.0})
+
+
+class TestPredictDiskTrendMethod:
+    """predict_disk_trend の method 引数のテスト"""
+    
+    def test_theil_sen(self):
+        """theil_sen を指定すると一時的な削除の後も増加傾向を保つ"""
+        data = _daily([60.0, 61.0, 62.0, 63.0, 40.0, 65.0, 66.0])
+        assert predict_disk_trend(data, method="theil_sen")['slope'] == pytest.approx(1.0)
+        assert predict_disk_trend(data)['slope'] < 1.0
@@ -5,71 +5,76 @@ history.py のテスト
 """
 
 import pytest
-import os
 import csv
-from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from komon.history import (
     rotate_history,
     save_current_usage,
     get_history,
-    HISTORY_DIR,
-    MAX_HISTORY_FILES
+    migrate_csv_history,
+    HISTORY_RETENTION_DAYS
 )
+from komon.timeseries import TimeSeriesStore, get_timeseries_store
 
 
 @pytest.fixture
-def temp_history_dir(tmp_path, monkeypatch):
-    """テスト用の一時履歴ディレクトリ"""
-    test_dir = tmp_path / "test_history"
-    monkeypatch.setattr('komon.history.HISTORY_DIR', str(test_dir))
-    return test_dir
+def temp_store(tmp_path, monkeypatch):
+    """テスト用の一時時系列ストア"""
+    test_dir = tmp_path / "metrics"
+    monkeypatch.setattr('komon.timeseries.TIMESERIES_DIR', str(test_dir))
+    return get_timeseries_store()
+
+
+def _write_legacy_csv(directory, when, cpu, mem, disk):
+    """旧形式のCSV履歴ファイルを作成"""
+    directory.mkdir(parents=True, exist_ok=True)
+    file_path = directory / f"usage_{when.strftime('%Y%m%d_%H%M%S')}.csv"
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp", "cpu", "mem", "disk"])
+        writer.writerow([when.isoformat(), cpu, mem, disk])
+        writer.writerow([])
+        writer.writerow(["CPU上位プロセス"])
+    return file_path
 
 
 class TestRotateHistory:
     """rotate_history関数のテスト"""
     
-    def test_create_history_dir_if_not_exists(self, temp_history_dir):
-        """履歴ディレクトリが存在しない場合に作成される"""
-        assert not temp_history_dir.exists()
+    def test_no_history(self, temp_store):
+        """履歴がなくてもエラーにならない"""
         rotate_history()
-        assert temp_history_dir.exists()
+        assert temp_store.partitions() == []
     
-    def test_no_deletion_when_under_limit(self, temp_history_dir):
-        """ファイル数が上限未満の場合は削除されない"""
-        temp_history_dir.mkdir(parents=True)
-        
-        # 10個のファイルを作成
-        for i in range(10):
-            (temp_history_dir / f"usage_{i:03d}.csv").touch()
+    def test_delete_partitions_past_retention(self, temp_store):
+        """保持期間を過ぎた日の履歴が削除される"""
+        now = datetime.now()
+        for days_ago in (0, HISTORY_RETENTION_DAYS - 1, HISTORY_RETENTION_DAYS, HISTORY_RETENTION_DAYS + 5):
+            temp_store.append({"cpu": 1.0}, timestamp=(now - timedelta(days=days_ago)).timestamp())
         
         rotate_history()
         
-        files = list(temp_history_dir.glob("usage_*.csv"))
-        assert len(files) == 10
+        assert temp_store.partitions() == [
+            (now - timedelta(days=HISTORY_RETENTION_DAYS - 1)).date(),
+            now.date(),
+        ]
     
-    def test_delete_old_files_when_over_limit(self, temp_history_dir, monkeypatch):
-        """ファイル数が上限を超える場合に古いファイルが削除される"""
-        temp_history_dir.mkdir(parents=True)
-        monkeypatch.setattr('komon.history.MAX_HISTORY_FILES', 5)
-        
-        # 10個のファイルを作成（古い順）
-        import time
-        for i in range(10):
-            file_path = temp_history_dir / f"usage_{i:03d}.csv"
-            file_path.touch()
-            time.sleep(0.01)  # ファイル作成時刻を確実に異ならせる
+    def test_rollups_outlive_raw_samples(self, temp_store):
+        """削除する前に日ごとの集計段にまとめ、生のサンプル削除後も残る"""
+        old = datetime.now() - timedelta(days=HISTORY_RETENTION_DAYS + 5)
+        temp_store.append({"cpu": 42.0}, timestamp=old.timestamp())
         
         rotate_history()
         
-        files = list(temp_history_dir.glob("usage_*.csv"))
-        assert len(files) <= 5
+        assert temp_store.partitions() == []
+        daily = temp_store.rollups("1d", old - timedelta(days=1), datetime.now())
+        assert [(r.count, r.cpu_avg) for r in daily] == [(1, 42.0)]
 
 
 class TestSaveCurrentUsage:
     """save_current_usage関数のテスト"""
     
-    def test_save_basic_usage(self, temp_history_dir):
+    def test_save_basic_usage(self, temp_store):
         """基本的な使用率データの保存"""
         usage = {
             "cpu": 45.5,
@@ -79,105 +84,96 @@ class TestSaveCurrentUsage:
         
         save_current_usage(usage)
         
-        # ファイルが作成されたことを確認
-        files = list(temp_history_dir.glob("usage_*.csv"))
-        assert len(files) == 1
-        
-        # ファイル内容を確認
-        with open(files[0], 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            rows = list(reader)
-            assert rows[0] == ["timestamp", "cpu", "mem", "disk"]
-            assert float(rows[1][1]) == 45.5
-            assert float(rows[1][2]) == 60.2
-            assert float(rows[1][3]) == 75.8
+        samples = temp_store.read_partition(date.today())
+        assert len(samples) == 1
+        assert samples[0].cpu == 45.5
+        assert samples[0].mem == 60.2
+        assert samples[0].disk == 75.8
+    
+    def test_samples_share_one_partition_per_day(self, temp_store):
+        """同じ日のサンプルは1つのファイルに追記される"""
+        for i in range(5):
+            save_current_usage({"cpu": 10.0 + i, "mem": 20.0, "disk": 30.0})
+        
+        assert temp_store.partitions() == [date.today()]
+        assert [s.cpu for s in temp_store.read_partition(date.today())] == [10.0, 11.0, 12.0, 13.0, 14.0]
     
-    def test_save_with_process_info(self, temp_history_dir):
-        """プロセス情報を含むデータの保存"""
+    def test_save_with_process_info(self, temp_store):
+        """プロセス情報を含むデータでも基本メトリクスを保存できる"""
         usage = {
             "cpu": 50.0,
             "mem": 60.0,
             "disk": 70.0,
-            "cpu_by_process": [
-                {"name": "python", "cpu": 25.5},
-                {"name": "chrome", "cpu": 15.2}
-            ],
-            "mem_by_process": [
-                {"name": "python", "mem": 100.5},
-                {"name": "chrome", "mem": 200.3}
-            ]
+            "cpu_by_process": [{"name": "python", "cpu": 25.5}],
+            "mem_by_process": [{"name": "python", "mem": 100.5}]
         }
         
         save_current_usage(usage)
         
-        files = list(temp_history_dir.glob("usage_*.csv"))
-        assert len(files) == 1
-        
-        # プロセス情報が保存されていることを確認
-        with open(files[0], 'r', encoding='utf-8') as f:
-            content = f.read()
-            assert "CPU上位プロセス" in content
-            assert "メモリ上位プロセス" in content
-            assert "python" in content
-            assert "chrome" in content
-    
-    def test_filename_format(self, temp_history_dir):
-        """ファイル名が正しい形式で生成される"""
-        usage = {"cpu": 10.0, "mem": 20.0, "disk": 30.0}
-        
-        save_current_usage(usage)
-        
-        files = list(temp_history_dir.glob("usage_*.csv"))
-        assert len(files) == 1
-        
-        # ファイル名が usage_YYYYMMDD_HHMMSS.csv の形式か確認
-        filename = files[0].name
-        assert filename.startswith("usage_")
-        assert filename.endswith(".csv")
-        assert len(filename) == len("usage_20231201_123456.csv")
+        assert temp_store.read_partition(date.today())[0].cpu == 50.0
 
 
 class TestGetHistory:
     """get_history関数のテスト"""
     
-    def test_empty_history(self, temp_history_dir):
+    def test_empty_history(self, temp_store):
         """履歴が存在しない場合は空リストを返す"""
         result = get_history()
         assert result == []
     
-    def test_get_recent_history(self, temp_history_dir):
-        """最近の履歴を取得できる"""
-        temp_history_dir.mkdir(parents=True)
-        
-        # 3つの履歴ファイルを作成
-        import time
+    def test_get_recent_history(self, temp_store):
+        """最近の履歴を新しい順に取得できる"""
+        now = datetime.now().timestamp()
         for i in range(3):
-            file_path = temp_history_dir / f"usage_{i:03d}.csv"
-            with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(["timestamp", "cpu", "mem", "disk"])
-                writer.writerow([datetime.now().isoformat(), 10+i, 20+i, 30+i])
-            time.sleep(0.01)
+            temp_store.append({"cpu": 10 + i, "mem": 20 + i, "disk": 30 + i}, timestamp=now - 300 * (2 - i))
         
         result = get_history(limit=10)
         
         assert len(result) == 3
-        assert "cpu" in result[0]
+        assert result[0]["cpu"] == 12
+        assert "timestamp" in result[0]
     
-    def test_limit_history_count(self, temp_history_dir):
-        """limit パラメータで取得件数を制限できる"""
-        temp_history_dir.mkdir(parents=True)
-        
-        # 10個の履歴ファイルを作成
-        import time
+    def test_limit_history_count(self, temp_store):
+        """limit パラメータで取得件数を制限できる（日をまたいでも取得）"""
+        now = datetime.now()
         for i in range(10):
-            file_path = temp_history_dir / f"usage_{i:03d}.csv"
-            with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(["timestamp", "cpu", "mem", "disk"])
-                writer.writerow([datetime.now().isoformat(), 10, 20, 30])
-            time.sleep(0.01)
+            temp_store.append({"cpu": 10, "mem": 20, "disk": 30}, timestamp=(now - timedelta(hours=6 * i)).timestamp())
         
         result = get_history(limit=5)
         
         assert len(result) == 5
+
+
+class TestMigrateCsvHistory:
+    """migrate_csv_history関数のテスト"""
+    
+    def test_import_legacy_csv(self, tmp_path):
+        """CSV履歴を日ごとのパーティションに取り込む"""
+        csv_dir = tmp_path / "usage_history"
+        store = TimeSeriesStore(str(tmp_path / "metrics"))
+        base = datetime(2025, 11, 20, 23, 55, 0)
+        _write_legacy_csv(csv_dir, base, 10.0, 20.0, 30.0)
+        _write_legacy_csv(csv_dir, base + timedelta(minutes=10), 11.0, 21.0, 31.0)
+        (csv_dir / "usage_broken.csv").write_text("", encoding="utf-8")
+        
+        result = migrate_csv_history(str(csv_dir), store=store)
+        
+        assert result == {'imported': 2, 'skipped': 1, 'days': 2}
+        assert store.partitions() == [date(2025, 11, 20), date(2025, 11, 21)]
+        assert store.read_partition(date(2025, 11, 21))[0].disk == 31.0
+        assert len(list(csv_dir.glob("usage_*.csv"))) == 3
+    
+    def test_migration_is_idempotent(self, tmp_path):
+        """同じCSVを再度取り込んでも重複しない"""
+        csv_dir = tmp_path / "usage_history"
+        store = TimeSeriesStore(str(tmp_path / "metrics"))
+        when = datetime(2025, 11, 20, 9, 30, 0)
+        _write_legacy_csv(csv_dir, when, 10.0, 20.0, 30.0)
+        store.append({"cpu": 50.0}, timestamp=when.timestamp() + 60)
+        
+        migrate_csv_history(str(csv_dir), store=store)
+        migrate_csv_history(str(csv_dir), store=store, remove=True)
+        
+        samples = store.read_partition(when.date())
+        assert [s.cpu for s in samples] == [10.0, 50.0]
+        assert list(csv_dir.glob("usage_*.csv")) == []
@@ -211,7 +211,7 @@ thresholds:
         
         # プロセス情報が含まれることを確認
         assert "📊 上位プロセス:" in message
-        assert "1. chrome: 1024.5MB" in message
+        assert "1. chrome: 1.0 GB" in message
         assert "2. python: 512.3MB" in message
         assert "3. node: 256.1MB" in message
     
@@ -288,4 +288,29 @@ thresholds:
         assert "ディスク使用率が高いです: 96.7%" in message
         
         # ディスクの場合はプロセス情報が含まれないことを確認
-        assert "📊 上位プロセス:" not in message
\ No newline at end of file
+        assert "📊 上位プロセス:" not in message
+    
+    @patch('main.collect_detailed_resource_usage')
+    @patch('main.analyze_usage_with_levels')
+    @patch('main.validate_threshold_config')
+    @patch('main.rotate_history')
+    @patch('main.save_current_usage')
+    def test_main_with_empty_output_section(
+        self,
+        mock_save_usage,
+        mock_rotate,
+        mock_validate,
+        mock_analyze,
+        mock_collect
+    ):
+        """output: が空（None）の場合もプロセスを名前で集計して実行できることを確認"""
+        mock_validate.return_value = {"cpu": {"warning": 70, "alert": 85, "critical": 95}}
+        mock_collect.return_value = {"cpu": 10.0, "mem": 20.0, "disk": 30.0}
+        mock_analyze.return_value = ([], {})
+        
+        with patch('main.load_config') as mock_load_config:
+            mock_load_config.return_value = {"output": None}
+            main.main()
+        
+        assert mock_collect.call_args.kwargs["group_by"] == "name"
+        mock_save_usage.assert_called_once()
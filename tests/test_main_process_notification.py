@@ -13,6 +13,7 @@ if str(scripts_path) not in sys.path:
     sys.path.insert(0, str(scripts_path))
 
 import main
+from komon import jobs
 
 
 class TestProcessNotification:
@@ -28,7 +29,7 @@ class TestProcessNotification:
             ]
         }
         
-        result = main._get_process_info_for_metric("cpu", usage)
+        result = jobs.get_process_info_for_metric("cpu", usage)
         
         expected = "1. python: 25.5%\n2. node: 15.2%\n3. docker: 8.7%"
         assert result == expected
@@ -43,7 +44,7 @@ class TestProcessNotification:
             ]
         }
         
-        result = main._get_process_info_for_metric("memory", usage)
+        result = jobs.get_process_info_for_metric("memory", usage)
         
         expected = "1. chrome: 512.3MB\n2. python: 256.1MB\n3. node: 128.7MB"
         assert result == expected
@@ -52,7 +53,7 @@ class TestProcessNotification:
         """ディスク用プロセス情報取得のテスト（空文字を返す）"""
         usage = {}
         
-        result = main._get_process_info_for_metric("disk", usage)
+        result = jobs.get_process_info_for_metric("disk", usage)
         
         assert result == ""
     
@@ -60,7 +61,7 @@ class TestProcessNotification:
         """プロセス情報が空の場合のテスト"""
         usage = {"cpu_by_process": []}
         
-        result = main._get_process_info_for_metric("cpu", usage)
+        result = jobs.get_process_info_for_metric("cpu", usage)
         
         assert result == ""
     
@@ -68,7 +69,7 @@ class TestProcessNotification:
         """CPU関連アラートの判定テスト"""
         alert = "CPU使用率が高いです: 85.5%"
         
-        result = main._is_metric_alert(alert, "cpu")
+        result = jobs.is_metric_alert(alert, "cpu")
         
         assert result is True
     
@@ -76,7 +77,7 @@ class TestProcessNotification:
         """メモリ関連アラートの判定テスト"""
         alert = "メモリ使用率が高いです: 92.3%"
         
-        result = main._is_metric_alert(alert, "memory")
+        result = jobs.is_metric_alert(alert, "memory")
         
         assert result is True
     
@@ -84,7 +85,7 @@ class TestProcessNotification:
         """ディスク関連アラートの判定テスト"""
         alert = "ディスク使用率が高いです: 95.2%"
         
-        result = main._is_metric_alert(alert, "disk")
+        result = jobs.is_metric_alert(alert, "disk")
         
         assert result is True
     
@@ -92,16 +93,23 @@ class TestProcessNotification:
         """関連しないアラートの判定テスト"""
         alert = "CPU使用率が高いです: 85.5%"
         
-        result = main._is_metric_alert(alert, "memory")
+        result = jobs.is_metric_alert(alert, "memory")
         
         assert result is False
+    
+    def test_is_metric_alert_cgroup(self):
+        """cgroup単位のアラートの判定テスト"""
+        alert = "nginx.service のCPU使用率: 92.0%"
+        
+        assert jobs.is_metric_alert(alert, "cgroup:nginx.service:cpu") is True
+        assert jobs.is_metric_alert(alert, "cgroup:mysql.service:cpu") is False
 
 
 class TestHandleAlertsWithProcessInfo:
     """プロセス情報付きアラート処理のテスト"""
     
-    @patch('main.send_notification_with_fallback')
-    @patch('main.NotificationThrottle')
+    @patch('komon.jobs.send_notification_with_fallback')
+    @patch('komon.jobs.NotificationThrottle')
     def test_handle_alerts_includes_process_info(self, mock_throttle_class, mock_send_fallback):
         """アラート処理にプロセス情報が含まれることを確認"""
         # モックの設定
@@ -141,8 +149,8 @@ class TestHandleAlertsWithProcessInfo:
         assert "2. node: 25.1%" in message
         assert "3. docker: 15.2%" in message
     
-    @patch('main.send_notification_with_fallback')
-    @patch('main.NotificationThrottle')
+    @patch('komon.jobs.send_notification_with_fallback')
+    @patch('komon.jobs.NotificationThrottle')
     def test_handle_alerts_memory_with_process_info(self, mock_throttle_class, mock_send_fallback):
         """メモリアラートにプロセス情報が含まれることを確認"""
         # モックの設定
@@ -178,12 +186,12 @@ class TestHandleAlertsWithProcessInfo:
         
         # メッセージにプロセス情報が含まれることを確認
         assert "📊 上位プロセス:" in message
-        assert "1. chrome: 1024.5MB" in message
+        assert "1. chrome: 1.0 GB" in message
         assert "2. python: 512.3MB" in message
         assert "3. node: 256.1MB" in message
     
-    @patch('main.send_notification_with_fallback')
-    @patch('main.NotificationThrottle')
+    @patch('komon.jobs.send_notification_with_fallback')
+    @patch('komon.jobs.NotificationThrottle')
     def test_handle_alerts_disk_no_process_info(self, mock_throttle_class, mock_send_fallback):
         """ディスクアラートにはプロセス情報が含まれないことを確認"""
         # モックの設定
@@ -214,8 +222,8 @@ class TestHandleAlertsWithProcessInfo:
         # ディスクの場合はプロセス情報が含まれないことを確認
         assert "📊 上位プロセス:" not in message
     
-    @patch('main.send_notification_with_fallback')
-    @patch('main.NotificationThrottle')
+    @patch('komon.jobs.send_notification_with_fallback')
+    @patch('komon.jobs.NotificationThrottle')
     def test_handle_alerts_no_process_data(self, mock_throttle_class, mock_send_fallback):
         """プロセスデータがない場合の処理"""
         # モックの設定
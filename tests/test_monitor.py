@@ -4,10 +4,47 @@ monitor.py のテスト
 リソース監視機能のテストを行います。
 """
 
+import time
 import pytest
 import psutil
 from unittest.mock import patch, MagicMock
-from komon.monitor import collect_resource_usage, collect_detailed_resource_usage
+from komon.monitor import (
+    collect_resource_usage,
+    collect_detailed_resource_usage,
+    sample_cpu_percent,
+    ProcessSnapshot,
+    ProcfsBackend,
+    PsutilBackend,
+    get_collector_backend,
+    aggregate_top_processes,
+    format_process_entry,
+    TopKAggregator,
+    CPU_FALLBACK_INTERVAL,
+    CPU_SAMPLE_MAX_AGE,
+    PROC_STAT_CPU_FIELDS
+)
+from komon.process_index import ProcessIndex
+
+
+@pytest.fixture(autouse=True)
+def temp_cpu_state(tmp_path, monkeypatch):
+    """CPUカウンタの状態ファイルを一時ディレクトリに向ける"""
+    state_file = tmp_path / "state" / "cpu_times.json"
+    monkeypatch.setattr('komon.monitor.CPU_STATE_FILE', str(state_file))
+    monkeypatch.setattr('komon.monitor.PROC_CPU_STATE_FILE', str(tmp_path / "state" / "proc_cpu_times.json"))
+    monkeypatch.setattr('komon.process_index._process_index', ProcessIndex(str(tmp_path / "state" / "process_index.json")))
+    return state_file
+
+
+def _cpu_times(user, system, idle, iowait=0.0):
+    """psutil.cpu_times() の戻り値を模したモックを作成"""
+    times = MagicMock()
+    times._asdict.return_value = {
+        'user': user, 'nice': 0.0, 'system': system, 'idle': idle,
+        'iowait': iowait, 'irq': 0.0, 'softirq': 0.0, 'steal': 0.0,
+        'guest': 0.0, 'guest_nice': 0.0
+    }
+    return times
 
 
 class TestCollectResourceUsage:
@@ -26,7 +63,8 @@ class TestCollectResourceUsage:
         assert result["cpu"] == 45.5
         assert result["mem"] == 60.2
         assert result["disk"] == 75.8
-        mock_psutil.cpu_percent.assert_called_once_with(interval=1)
+        # 前回サンプルがない場合のみ短時間だけ実測する
+        mock_psutil.cpu_percent.assert_called_once_with(interval=CPU_FALLBACK_INTERVAL)
     
     @patch('komon.monitor.psutil')
     def test_collect_usage_returns_dict(self, mock_psutil):
@@ -80,13 +118,16 @@ class TestCollectDetailedResourceUsage:
         mock_psutil.virtual_memory.return_value = MagicMock(percent=60.0)
         mock_psutil.disk_usage.return_value = MagicMock(percent=70.0)
         
-        # CPU使用率が異なる3つのプロセス
+        # CPU使用率が異なる3つのプロセス（起動から100秒、CPU時間で差をつける）
         procs = []
-        for name, cpu in [('low', 5.0), ('high', 30.0), ('mid', 15.0)]:
+        started = time.time() - 100
+        for pid, (name, cpu) in enumerate([('low', 5.0), ('high', 30.0), ('mid', 15.0)], 1):
             mock_proc = MagicMock()
             mock_proc.info = {
+                'pid': pid,
                 'name': name,
-                'cpu_percent': cpu,
+                'create_time': started,
+                'cpu_times': MagicMock(user=cpu, system=0.0),
                 'memory_info': MagicMock(rss=100*1024*1024)
             }
             procs.append(mock_proc)
@@ -187,3 +228,335 @@ class TestCollectDetailedResourceUsage:
         assert "mem_by_process" in result
         assert len(result["cpu_by_process"]) >= 1
         assert result["cpu_by_process"][0]['name'] == 'chrome'
+
+
+class TestProcessSnapshot:
+    """ProcessSnapshotクラスのテスト"""
+    
+    @patch('komon.monitor.psutil')
+    def test_take_scans_process_table_once(self, mock_psutil):
+        """プロセステーブルは1回だけ走査される"""
+        mock_psutil.virtual_memory.return_value = MagicMock(total=1000 * 1024 * 1024)
+        mock_proc = MagicMock()
+        mock_proc.info = {
+            'pid': 100,
+            'name': 'python',
+            'cmdline': ['python', 'job.py'],
+            'create_time': 1000.0,
+            'cpu_times': None,
+            'memory_info': MagicMock(rss=100 * 1024 * 1024),
+            'cpu_percent': 12.5,
+        }
+        mock_psutil.process_iter.return_value = [mock_proc]
+        
+        snapshot = ProcessSnapshot.take()
+        
+        assert mock_psutil.process_iter.call_count == 1
+        assert len(snapshot) == 1
+        entry = snapshot.processes[0]
+        assert entry['pid'] == 100
+        assert entry['cmdline'] == ['python', 'job.py']
+        assert entry['memory_percent'] == pytest.approx(10.0)
+    
+    def test_top_sorts_descending(self):
+        """topは指定キーの降順で返す"""
+        snapshot = ProcessSnapshot([
+            {'pid': 1, 'name': 'a', 'rss': 10},
+            {'pid': 2, 'name': 'b', 'rss': 30},
+            {'pid': 3, 'name': 'c', 'rss': 20},
+        ])
+        
+        top = snapshot.top('rss', 2)
+        
+        assert [p['name'] for p in top] == ['b', 'c']
+    
+    @patch('komon.monitor.psutil')
+    def test_detailed_usage_reuses_given_snapshot(self, mock_psutil):
+        """スナップショットを渡した場合はプロセスを再走査しない"""
+        mock_psutil.cpu_percent.return_value = 10.0
+        mock_psutil.virtual_memory.return_value = MagicMock(percent=20.0)
+        mock_psutil.disk_usage.return_value = MagicMock(percent=30.0)
+        snapshot = ProcessSnapshot([
+            {'pid': 1, 'name': 'nginx', 'cpu_percent': 5.0, 'rss': 50 * 1024 * 1024},
+        ])
+        
+        result = collect_detailed_resource_usage(snapshot=snapshot)
+        
+        mock_psutil.process_iter.assert_not_called()
+        assert result['cpu_by_process'] == [{'name': 'nginx', 'cpu': 5.0, 'count': 1}]
+        assert result['mem_by_process'] == [{'name': 'nginx', 'mem': 50.0, 'count': 1}]
+
+
+class TestSampleCpuPercent:
+    """sample_cpu_percent関数のテスト"""
+    
+    @patch('komon.monitor.time.time')
+    @patch('komon.monitor.psutil')
+    def test_uses_persisted_counters_without_sleeping(self, mock_psutil, mock_time, temp_cpu_state):
+        """前回カウンタとの差分から使用率を計算し、実測しない"""
+        mock_psutil.cpu_percent.return_value = 0.0
+        mock_psutil.cpu_times.side_effect = [
+            _cpu_times(100.0, 50.0, 850.0),
+            _cpu_times(100.0, 50.0, 850.0),
+            _cpu_times(130.0, 60.0, 910.0),
+        ]
+        mock_time.side_effect = [1000.0, 1000.1, 1060.0]
+        
+        sample_cpu_percent()  # 初回は実測してカウンタを保存
+        cpu = sample_cpu_percent()
+        
+        # busy 40 / total 100
+        assert cpu == 40.0
+        assert mock_psutil.cpu_percent.call_count == 1
+        assert temp_cpu_state.exists()
+    
+    @patch('komon.monitor.time.time')
+    @patch('komon.monitor.psutil')
+    def test_falls_back_when_counters_reset(self, mock_psutil, mock_time, temp_cpu_state):
+        """再起動でカウンタが戻った場合は短時間の実測に切り替える"""
+        temp_cpu_state.parent.mkdir(parents=True)
+        temp_cpu_state.write_text(
+            '{"timestamp": 1000.0, "times": %s}' % str(_cpu_times(500.0, 500.0, 5000.0)._asdict()).replace("'", '"')
+        )
+        mock_psutil.cpu_percent.return_value = 12.0
+        mock_psutil.cpu_times.return_value = _cpu_times(1.0, 1.0, 10.0)
+        mock_time.return_value = 1060.0
+        
+        assert sample_cpu_percent() == 12.0
+        mock_psutil.cpu_percent.assert_called_once_with(interval=CPU_FALLBACK_INTERVAL)
+    
+    @patch('komon.monitor.time.time')
+    @patch('komon.monitor.psutil')
+    def test_falls_back_when_sample_too_old(self, mock_psutil, mock_time, temp_cpu_state):
+        """前回サンプルが古すぎる場合は使わない"""
+        temp_cpu_state.parent.mkdir(parents=True)
+        temp_cpu_state.write_text(
+            '{"timestamp": 0.0, "times": %s}' % str(_cpu_times(1.0, 1.0, 10.0)._asdict()).replace("'", '"')
+        )
+        mock_psutil.cpu_percent.return_value = 7.0
+        mock_psutil.cpu_times.return_value = _cpu_times(100.0, 50.0, 850.0)
+        mock_time.return_value = 100000.0
+        
+        assert sample_cpu_percent() == 7.0
+
+
+class TestProcessCpuCache:
+    """プロセス別CPU時間キャッシュのテスト"""
+    
+    def _snapshot(self, taken_at, procs):
+        return ProcessSnapshot([
+            {'pid': pid, 'create_time': created, 'cpu_times': MagicMock(user=cpu, system=0.0)}
+            for pid, created, cpu in procs
+        ], taken_at=taken_at)
+    
+    def test_delta_from_cached_cpu_times(self, tmp_path):
+        """前回のCPU時間との差分で使用率を計算する"""
+        state_file = str(tmp_path / "proc_cpu.json")
+        self._snapshot(1000.0, [(10, 500.0, 100.0)])._apply_cpu_cache(state_file)
+        
+        snapshot = self._snapshot(1010.0, [(10, 500.0, 105.0)])
+        snapshot._apply_cpu_cache(state_file)
+        
+        assert snapshot.processes[0]['cpu_percent'] == 50.0
+    
+    def test_reused_pid_is_not_diffed(self, tmp_path):
+        """PIDが再利用された場合（create_timeが異なる）は差分を使わない"""
+        state_file = str(tmp_path / "proc_cpu.json")
+        self._snapshot(1000.0, [(10, 500.0, 100.0)])._apply_cpu_cache(state_file)
+        
+        snapshot = self._snapshot(1010.0, [(10, 1005.0, 1.0)])
+        snapshot._apply_cpu_cache(state_file)
+        
+        # 起動からの平均: 1秒 / 5秒
+        assert snapshot.processes[0]['cpu_percent'] == 20.0
+    
+    def test_stale_cache_is_not_diffed(self, tmp_path):
+        """キャッシュが CPU_SAMPLE_MAX_AGE より古い場合は差分を使わない"""
+        state_file = str(tmp_path / "proc_cpu.json")
+        self._snapshot(1000.0, [(10, 500.0, 100.0)])._apply_cpu_cache(state_file)
+        
+        snapshot = self._snapshot(1000.0 + CPU_SAMPLE_MAX_AGE + 500.0, [(10, 500.0, 150.0)])
+        snapshot._apply_cpu_cache(state_file)
+        
+        # 起動からの平均: 150秒 / 4100秒
+        assert snapshot.processes[0]['cpu_percent'] == round(150.0 / (CPU_SAMPLE_MAX_AGE + 1000.0) * 100, 1)
+    
+    def test_vanished_pids_are_dropped(self, tmp_path):
+        """終了したPIDはキャッシュから削除される"""
+        import json
+        state_file = tmp_path / "proc_cpu.json"
+        self._snapshot(1000.0, [(10, 500.0, 1.0), (11, 500.0, 1.0)])._apply_cpu_cache(str(state_file))
+        self._snapshot(1010.0, [(11, 500.0, 2.0)])._apply_cpu_cache(str(state_file))
+        
+        cache = json.loads(state_file.read_text())
+        assert set(cache['procs']) == {'11'}
+
+
+class TestProcfsBackend:
+    """ProcfsBackend（/proc 直接読み込み）のテスト"""
+    
+    @pytest.fixture
+    def proc_root(self, tmp_path):
+        """合成した /proc ツリーを作成"""
+        root = tmp_path / "proc"
+        root.mkdir()
+        (root / "stat").write_text(
+            "cpu  100 0 100 700 100 0 0 0 0 0\n"
+            "btime 1700000000\n"
+        )
+        (root / "meminfo").write_text(
+            "MemTotal:       1000000 kB\n"
+            "MemFree:         200000 kB\n"
+            "MemAvailable:    250000 kB\n"
+        )
+        processes = {
+            100: ("nginx", "/usr/sbin/nginx\0-g\0daemon off;\0"),
+            200: ("some (odd) name", ""),
+            300: ("very-long-proce", "/opt/bin/very-long-process-name\0--flag\0"),
+        }
+        for pid, (name, cmdline) in processes.items():
+            pid_dir = root / str(pid)
+            pid_dir.mkdir()
+            (pid_dir / "stat").write_text(
+                f"{pid} ({name}) S 1 1 1 0 -1 0 0 0 0 0 "
+                f"{pid} 50 0 0 20 0 1 0 500 1000000 10 0 0\n"
+            )
+            (pid_dir / "cmdline").write_bytes(cmdline.encode())
+        (root / "self").mkdir()
+        return root
+    
+    def test_cpu_times_and_memory(self, proc_root):
+        """/proc/stat と /proc/meminfo を psutil と同じ形式で返す"""
+        backend = ProcfsBackend(proc_root=str(proc_root))
+        ticks = backend.clock_ticks
+        
+        times = backend.cpu_times()
+        assert times['user'] == 100 / ticks
+        assert times['idle'] == 700 / ticks
+        assert set(times) == set(PROC_STAT_CPU_FIELDS)
+        
+        memory = backend.virtual_memory()
+        assert memory == {'total': 1000000 * 1024, 'percent': 75.0}
+    
+    def test_iter_processes(self, proc_root):
+        """各PIDの stat / cmdline からプロセス情報を組み立てる"""
+        backend = ProcfsBackend(proc_root=str(proc_root))
+        ticks = backend.clock_ticks
+        
+        processes = {p['pid']: p for p in backend.iter_processes()}
+        
+        assert set(processes) == {100, 200, 300}
+        nginx = processes[100]
+        assert nginx['name'] == "nginx"
+        assert nginx['cmdline'] == ["/usr/sbin/nginx", "-g", "daemon off;"]
+        assert nginx['cpu_times'].user == 100 / ticks
+        assert nginx['cpu_times'].system == 50 / ticks
+        assert nginx['create_time'] == 1700000000 + 500 / ticks
+        assert nginx['rss'] == 10 * backend.page_size
+        # 括弧を含むプロセス名・空のcmdline（カーネルスレッド）
+        assert processes[200]['name'] == "some (odd) name"
+        assert processes[200]['cmdline'] == []
+        # 15文字で切り詰められた名前は cmdline から補う
+        assert processes[300]['name'] == "very-long-process-name"
+        assert processes[100]['ppid'] == 1
+    
+    def test_vanished_process_is_skipped(self, proc_root):
+        """走査中に消えたプロセス（statが読めない）はスキップする"""
+        (proc_root / "200" / "stat").unlink()
+        backend = ProcfsBackend(proc_root=str(proc_root))
+        
+        assert sorted(p['pid'] for p in backend.iter_processes()) == [100, 300]
+    
+    def test_snapshot_with_procfs_backend(self, proc_root):
+        """ProcessSnapshot.take() にバックエンドを渡せる"""
+        backend = ProcfsBackend(proc_root=str(proc_root))
+        
+        snapshot = ProcessSnapshot.take(backend)
+        
+        assert len(snapshot) == 3
+        assert snapshot.total_memory == 1000000 * 1024
+    
+    def test_indexed_processes_skip_cmdline_read(self, proc_root, tmp_path):
+        """インデックス済みのプロセスは cmdline を読み直さない"""
+        backend = ProcfsBackend(proc_root=str(proc_root))
+        index = ProcessIndex(str(tmp_path / "index.json"))
+        ProcessSnapshot.take(backend, index)
+        
+        (proc_root / "100" / "cmdline").write_bytes(b"/changed\0")
+        (proc_root / "200" / "stat").unlink()
+        second = {p['pid']: p for p in ProcessSnapshot.take(backend, index)}
+        
+        assert second[100]['cmdline'] == ["/usr/sbin/nginx", "-g", "daemon off;"]
+        assert index.hits == 2
+        # 終了したプロセスはインデックスから削除される
+        assert len(index.entries) == 2
+    
+    def test_get_collector_backend_from_config(self):
+        """settings.yml の system.collector_backend でバックエンドを選択する"""
+        assert isinstance(get_collector_backend({"system": {"collector_backend": "procfs"}}), ProcfsBackend)
+        assert isinstance(get_collector_backend({"system": {"collector_backend": "psutil"}}), PsutilBackend)
+        assert isinstance(get_collector_backend({"system": {"collector_backend": "unknown"}}), PsutilBackend)
+        assert isinstance(get_collector_backend({}), PsutilBackend)
+
+
+class TestTopKAggregation:
+    """上位プロセスのストリーミング集計のテスト"""
+    
+    def _workers(self):
+        processes = [{'pid': 10, 'ppid': 1, 'uid': 0, 'name': 'php-fpm', 'cpu_percent': 0.5, 'rss': 20}]
+        processes += [
+            {'pid': 100 + i, 'ppid': 10, 'uid': 33, 'name': 'php-fpm', 'cpu_percent': 1.0, 'rss': 10}
+            for i in range(48)
+        ]
+        processes.append({'pid': 20, 'ppid': 1, 'uid': 0, 'name': 'mysqld', 'cpu_percent': 30.0, 'rss': 300})
+        return processes
+    
+    def test_group_by_name_sums_workers(self):
+        """同名のワーカーは1グループにまとめて合計する"""
+        top = aggregate_top_processes(self._workers(), 'rss', count=5)
+        
+        assert top == [
+            {'name': 'php-fpm', 'value': 500, 'count': 49},
+            {'name': 'mysqld', 'value': 300, 'count': 1},
+        ]
+    
+    def test_group_by_parent(self):
+        """親プロセスツリー単位でまとめる（PID 1 直下の祖先がグループ）"""
+        processes = self._workers()
+        processes[1]['name'] = 'php-fpm: pool www'
+        
+        top = aggregate_top_processes(processes, 'cpu_percent', count=5, group_by="parent")
+        
+        assert top[0] == {'name': 'php-fpm', 'value': 48.5, 'count': 49}
+        assert top[1]['name'] == 'mysqld'
+    
+    def test_group_by_none_keeps_individual_processes(self):
+        """グループ化なしではプロセス単位で上位K件を返す"""
+        top = aggregate_top_processes(self._workers(), 'rss', count=3, group_by="none")
+        
+        assert [p['value'] for p in top] == [300, 20, 10]
+        assert all(p['count'] == 1 for p in top)
+    
+    def test_unknown_group_by_falls_back_to_name(self):
+        """不明なグループ化方法は name として扱う"""
+        top = aggregate_top_processes(self._workers(), 'rss', count=1, group_by="bogus")
+        
+        assert top[0]['name'] == 'php-fpm'
+    
+    def test_memory_is_bounded(self):
+        """保持するグループ数は capacity を超えず、大きなグループは残る"""
+        aggregator = TopKAggregator(k=2, capacity=100)
+        aggregator.add('big', 'big', 1000)
+        for i in range(10000):
+            aggregator.add(i, f"p{i}", 1)
+        aggregator.add('big', 'big', 1000)
+        
+        assert len(aggregator._groups) <= 100
+        assert aggregator.top()[0] == {'name': 'big', 'value': 2000, 'count': 2}
+    
+    def test_format_process_entry(self):
+        """ワーカー数とGB単位の表示"""
+        assert format_process_entry({'name': 'php-fpm', 'mem': 2150.0, 'count': 48}, "memory") == \
+            "php-fpm (48 workers): 2.1 GB"
+        assert format_process_entry({'name': 'python', 'mem': 100.0}, "memory") == "python: 100.0MB"
+        assert format_process_entry({'name': 'python', 'cpu': 25.5, 'count': 1}, "cpu") == "python: 25.5%"
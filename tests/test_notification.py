@@ -12,7 +12,7 @@ from komon.notification import send_slack_alert, send_email_alert, send_discord_
 class TestSendSlackAlert:
     """Slack通知のテスト"""
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     def test_send_slack_success(self, mock_post):
         """Slack通知が成功する場合"""
         mock_response = MagicMock()
@@ -30,7 +30,7 @@ class TestSendSlackAlert:
         assert call_args[0][0] == "https://hooks.slack.com/services/TEST"
         assert call_args[1]['json'] == {"text": "テストメッセージ"}
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     def test_send_slack_failure_status_code(self, mock_post):
         """Slack通知が失敗する場合（ステータスコードエラー）"""
         mock_response = MagicMock()
@@ -44,7 +44,7 @@ class TestSendSlackAlert:
         
         assert result is False
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     def test_send_slack_exception(self, mock_post):
         """Slack通知で例外が発生する場合"""
         mock_post.side_effect = Exception("Network error")
@@ -56,7 +56,7 @@ class TestSendSlackAlert:
         
         assert result is False
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     def test_send_slack_timeout(self, mock_post):
         """Slack通知でタイムアウトが発生する場合"""
         import requests
@@ -69,7 +69,7 @@ class TestSendSlackAlert:
         
         assert result is False
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     @patch('komon.notification.os.getenv')
     def test_send_slack_with_env_webhook(self, mock_getenv, mock_post):
         """環境変数からWebhook URLを読み込む場合"""
@@ -105,7 +105,7 @@ class TestSendSlackAlert:
 class TestSendDiscordAlert:
     """Discord通知のテスト"""
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     def test_send_discord_success(self, mock_post):
         """Discord通知が成功する場合"""
         mock_response = MagicMock()
@@ -123,7 +123,7 @@ class TestSendDiscordAlert:
         assert call_args[0][0] == "https://discord.com/api/webhooks/TEST"
         assert call_args[1]['json'] == {"content": "テストメッセージ"}
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     def test_send_discord_failure_status_code(self, mock_post):
         """Discord通知が失敗する場合（ステータスコードエラー）"""
         mock_response = MagicMock()
@@ -137,7 +137,7 @@ class TestSendDiscordAlert:
         
         assert result is False
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     def test_send_discord_exception(self, mock_post):
         """Discord通知で例外が発生する場合"""
         mock_post.side_effect = Exception("Network error")
@@ -149,7 +149,7 @@ class TestSendDiscordAlert:
         
         assert result is False
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     @patch('komon.notification.os.getenv')
     def test_send_discord_with_env_webhook(self, mock_getenv, mock_post):
         """環境変数からWebhook URLを読み込む場合"""
@@ -185,7 +185,7 @@ class TestSendDiscordAlert:
 class TestSendTeamsAlert:
     """Teams通知のテスト"""
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     def test_send_teams_success(self, mock_post):
         """Teams通知が成功する場合"""
         mock_response = MagicMock()
@@ -203,7 +203,7 @@ class TestSendTeamsAlert:
         assert call_args[0][0] == "https://outlook.office.com/webhook/TEST"
         assert call_args[1]['json'] == {"text": "テストメッセージ"}
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     def test_send_teams_failure_status_code(self, mock_post):
         """Teams通知が失敗する場合（ステータスコードエラー）"""
         mock_response = MagicMock()
@@ -217,7 +217,7 @@ class TestSendTeamsAlert:
         
         assert result is False
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     def test_send_teams_exception(self, mock_post):
         """Teams通知で例外が発生する場合"""
         mock_post.side_effect = Exception("Network error")
@@ -229,7 +229,7 @@ class TestSendTeamsAlert:
         
         assert result is False
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     @patch('komon.notification.os.getenv')
     def test_send_teams_with_env_webhook(self, mock_getenv, mock_post):
         """環境変数からWebhook URLを読み込む場合"""
@@ -26,7 +26,7 @@ class TestNotificationIntegration(unittest.TestCase):
         import shutil
         shutil.rmtree(self.temp_dir, ignore_errors=True)
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     def test_slack_notification_saves_history_on_success(self, mock_post):
         """
         Slack通知が成功した場合、履歴が保存されることを確認
@@ -71,7 +71,7 @@ class TestNotificationIntegration(unittest.TestCase):
         self.assertAlmostEqual(history[0]["metric_value"], 90.5, places=1)
         self.assertEqual(history[0]["message"], "Test alert")
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     def test_slack_notification_continues_when_history_save_fails(self, mock_post):
         """
         履歴保存が失敗しても、Slack通知は正常に動作することを確認
@@ -103,7 +103,7 @@ class TestNotificationIntegration(unittest.TestCase):
         # Slack APIが呼ばれたことを確認
         mock_post.assert_called_once()
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     def test_slack_notification_without_metadata(self, mock_post):
         """
         メタデータなしでも通知が正常に動作することを確認（後方互換性）
@@ -217,7 +217,7 @@ class TestNotificationIntegration(unittest.TestCase):
         # SMTPが呼ばれたことを確認
         mock_smtp.assert_called_once()
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     def test_metadata_is_correctly_passed_and_saved(self, mock_post):
         """
         メタデータが正しく渡され、保存されることを確認
@@ -266,7 +266,7 @@ class TestNotificationIntegration(unittest.TestCase):
                 places=1
             )
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     def test_discord_notification_saves_history_on_success(self, mock_post):
         """Discord通知成功時に履歴が保存されることを確認"""
         # Discord通知の成功をモック
@@ -316,7 +316,7 @@ class TestNotificationIntegration(unittest.TestCase):
         self.assertEqual(history[0]["metric_value"], 85.5)
         self.assertEqual(history[0]["message"], "Test Discord alert")
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     def test_teams_notification_saves_history_on_success(self, mock_post):
         """Teams通知成功時に履歴が保存されることを確認"""
         # Teams通知の成功をモック
@@ -366,7 +366,7 @@ class TestNotificationIntegration(unittest.TestCase):
         self.assertEqual(history[0]["metric_value"], 78.2)
         self.assertEqual(history[0]["message"], "Test Teams alert")
     
-    @patch('komon.notification.requests.post')
+    @patch('komon.webhook_notifier.requests.post')
     def test_existing_slack_notification_unaffected(self, mock_post):
         """既存のSlack通知に影響がないことを確認"""
         # Slack通知の成功をモック
@@ -510,3 +510,20 @@ class TestNotificationThrottle:
         finally:
             if history_file.exists():
                 history_file.unlink()
+    
+    def test_cache_history_skips_reload(self, tmp_path):
+        """cache_history=True の場合は記録後の判定でファイルを読み直さない"""
+        history_file = tmp_path / "throttle.json"
+        throttle = NotificationThrottle(
+            {'enabled': True, 'interval_minutes': 60},
+            history_file=history_file,
+            cache_history=True
+        )
+        
+        throttle.record_notification('cpu', 'warning', 75.0)
+        history_file.unlink()
+        
+        should_send, reason = throttle.should_send_notification('cpu', 'warning', 76.0)
+        
+        assert should_send is False
+        assert reason == "throttled"
@@ -0,0 +1,86 @@
+"""
+process_index.py のテスト
+
+(pid, create_time) をキーにしたプロセスインデックスをテストします。
+"""
+
+import pytest
+
+from komon.process_index import ProcessIndex, classify_cmdline, extract_script_name
+
+
+@pytest.fixture
+def index(tmp_path):
+    return ProcessIndex(str(tmp_path / "state" / "process_index.json"))
+
+
+def _proc(pid, cmdline, name="python", create_time=1700000000.0):
+    return {'pid': pid, 'name': name, 'cmdline': cmdline, 'create_time': create_time}
+
+
+class TestProcessIndex:
+    """ProcessIndexのテスト"""
+    
+    def test_observe_sets_script_and_kind(self, index):
+        """解析結果（スクリプト名・種別）をプロセス情報に設定する"""
+        proc = index.observe(_proc(1, ["python", "/opt/backup.py"]))
+        
+        assert proc['script'] == "backup.py"
+        assert proc['kind'] == "script"
+        assert index.misses == 1
+    
+    def test_lookup_hit_and_reused_pid(self, index):
+        """同じ (pid, create_time) のみヒットし、PID再利用は別プロセスとして扱う"""
+        index.observe(_proc(1, ["python", "/opt/backup.py"]))
+        
+        assert index.lookup(1, 1700000000.0, "python") == ["python", "/opt/backup.py"]
+        assert index.lookup(1, 1700000500.0, "python") is None
+        assert index.lookup(2, 1700000000.0, "python") is None
+    
+    def test_lookup_misses_after_exec(self, index):
+        """exec でプロセス名が変わった場合は読み直す"""
+        index.observe(_proc(1, ["bash"], name="bash"))
+        
+        assert index.lookup(1, 1700000000.0, "rsync") is None
+    
+    def test_lookup_accepts_truncated_comm(self, index):
+        """/proc の comm（15文字）で切り詰められた名前も同じプロセスとみなす"""
+        index.observe(_proc(1, ["/usr/bin/very-long-process-name"], name="very-long-process-name"))
+        
+        assert index.lookup(1, 1700000000.0, "very-long-proce") == ["/usr/bin/very-long-process-name"]
+    
+    def test_observe_reclassifies_changed_cmdline(self, index):
+        """同じキーでも cmdline が変わっていれば解析し直す"""
+        index.observe(_proc(1, ["bash"]))
+        proc = index.observe(_proc(1, ["python", "/opt/job.py"]))
+        
+        assert proc['script'] == "job.py"
+        assert index.hits == 0
+    
+    def test_retain_and_persist(self, index):
+        """終了したプロセスを削除し、次回実行に引き継ぐ"""
+        alive = _proc(1, ["python", "/opt/a.py"])
+        index.observe(alive)
+        index.observe(_proc(2, ["python", "/opt/b.py"]))
+        index.retain([alive])
+        index.save()
+        
+        reloaded = ProcessIndex(index.state_file)
+        assert list(reloaded.entries) == ["1:1700000000.00"]
+        reloaded.observe(_proc(1, ["python", "/opt/a.py"]))
+        assert reloaded.hits == 1
+
+
+def test_classify_cmdline():
+    """cmdline から種別を判定する"""
+    assert classify_cmdline([]) == "kernel"
+    assert classify_cmdline(["python", "-m", "http.server"]) == "module"
+    assert classify_cmdline(["/bin/sh", "/etc/cron.daily/run.sh"]) == "script"
+    assert classify_cmdline(["/usr/sbin/nginx"]) == "binary"
+
+
+def test_extract_script_name_with_extensions():
+    """拡張子を指定してスクリプト名を抽出する"""
+    assert extract_script_name(["ruby", "/srv/task.rb"]) == "task.rb"
+    assert extract_script_name(["node", "/srv/app.js"], ('.js',)) == "app.js"
+    assert extract_script_name(["node", "/srv/app.js"]) is None
@@ -9,7 +9,8 @@ from komon.report_formatter import (
     format_resource_status,
     format_trend_indicator,
     get_trend_text,
-    format_alert_summary
+    format_alert_summary,
+    format_percentiles
 )
 
 
@@ -187,3 +188,50 @@ class TestReportFormatter:
         assert '11/20 15:30' in result
         assert 'CPU使用率が高いです' in result
         assert '- なし' not in result
+    
+    def test_format_weekly_report_percentiles(self):
+        """分位点がある場合は使用率の分布セクションを表示する"""
+        data = {
+            'period': {'start': '2025-11-18', 'end': '2025-11-24'},
+            'resources': {
+                'cpu': {'current': 30.0, 'previous': 30.0, 'change': 0.0, 'trend': 'stable'}
+            },
+            'percentiles': {
+                'week': {'cpu': {'count': 2016, 'p50': 22.0, 'p95': 81.44, 'p99': 97.0}},
+                'month': {'cpu': {'count': 8640, 'p50': 20.0, 'p95': 70.0, 'p99': 90.0}}
+            },
+            'alerts': []
+        }
+        
+        result = format_weekly_report(data)
+        
+        assert '【使用率の分布（p50 / p95 / p99）】' in result
+        assert 'CPU使用率: 今週 22.0% / 81.4% / 97.0%（30日間 20.0% / 70.0% / 90.0%）' in result
+        assert result.index('【使用率の分布') < result.index('【今週の警戒情報】')
+    
+    def test_format_weekly_report_mount_forecasts(self):
+        """マウントごとの予測がある場合はセクションを表示する"""
+        data = {
+            'period': {'start': '2025-11-18', 'end': '2025-11-24'},
+            'resources': {},
+            'alerts': [],
+            'mount_forecasts': {
+                '/var': {
+                    'slope': 2.0, 'current_usage': 78.0,
+                    'thresholds': [
+                        {'threshold': 80.0, 'days': 1, 'date': '2025-11-25'},
+                        {'threshold': 90.0, 'days': None, 'date': None},
+                    ],
+                },
+            },
+        }
+        
+        result = format_weekly_report(data)
+        
+        assert '【🗂 マウントごとの予測】' in result
+        assert '- /var: 78.0%（+2.00%/日） 80% まであと1日（2025-11-25）' in result
+    
+    def test_format_percentiles_empty(self):
+        """今週のデータがない場合は空文字列"""
+        assert format_percentiles({'week': {}, 'month': {}}, {}) == ""
+        assert format_percentiles({}, {}) == ""
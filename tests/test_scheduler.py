@@ -0,0 +1,118 @@
+"""
+scheduler.py のテスト
+
+常駐モード用スケジューラーのテストを行います。
+"""
+
+import pytest
+from komon.scheduler import Scheduler
+
+
+class FakeClock:
+    """テスト用の時計"""
+    
+    def __init__(self, now=0.0):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+
+
+class TestScheduler:
+    """Schedulerのテスト"""
+    
+    def test_runs_each_job_on_its_interval(self):
+        """ジョブごとの間隔で実行される"""
+        clock = FakeClock()
+        scheduler = Scheduler(clock=clock)
+        calls = []
+        scheduler.add_job("fast", 10, lambda: calls.append("fast"))
+        scheduler.add_job("slow", 30, lambda: calls.append("slow"))
+        
+        for now in (0, 10, 20, 30):
+            clock.now = now
+            scheduler.run_pending()
+        
+        assert calls.count("fast") == 4
+        assert calls.count("slow") == 2
+    
+    def test_run_immediately_false_waits_one_interval(self):
+        """run_immediately=False の場合は1間隔後に初回実行"""
+        clock = FakeClock()
+        scheduler = Scheduler(clock=clock)
+        scheduler.add_job("job", 60, lambda: None, run_immediately=False)
+        
+        assert scheduler.run_pending() == []
+        clock.now = 60
+        assert scheduler.run_pending() == ["job"]
+    
+    def test_missed_ticks_are_skipped(self):
+        """実行が長引いて過ぎた回は溜め込まずにスキップする"""
+        clock = FakeClock()
+        scheduler = Scheduler(clock=clock)
+        
+        def slow_job():
+            clock.now += 35  # 間隔10秒のジョブが35秒かかる
+        
+        job = scheduler.add_job("slow", 10, slow_job)
+        
+        assert scheduler.run_pending() == ["slow"]
+        assert job.skipped_count == 3
+        assert job.next_run == 40
+        # 予定時刻前は実行されない（まとめて追いかけない）
+        assert scheduler.run_pending() == []
+    
+    def test_job_error_does_not_stop_other_jobs(self):
+        """ジョブの例外は記録され、他のジョブは実行される"""
+        scheduler = Scheduler(clock=FakeClock())
+        calls = []
+        
+        def failing():
+            raise RuntimeError("boom")
+        
+        failing_job = scheduler.add_job("failing", 10, failing)
+        scheduler.add_job("ok", 10, lambda: calls.append("ok"))
+        
+        scheduler.run_pending()
+        
+        assert failing_job.last_error == "boom"
+        assert failing_job.running is False
+        assert calls == ["ok"]
+    
+    def test_invalid_interval(self):
+        """0以下の間隔はエラー"""
+        with pytest.raises(ValueError):
+            Scheduler().add_job("job", 0, lambda: None)
+    
+    def test_stop_ends_run_forever(self):
+        """stop() で run_forever() が終了する"""
+        scheduler = Scheduler()
+        scheduler.add_job("stopper", 3600, scheduler.stop)
+        
+        scheduler.run_forever()
+        
+        assert scheduler.jobs["stopper"].run_count == 1
+    
+    def test_between_ticks_runs_before_jobs(self):
+        """between_ticks はジョブの実行前に呼ばれ、例外が出てもループは続く"""
+        scheduler = Scheduler()
+        calls = []
+        
+        def between_ticks():
+            calls.append("between")
+            raise RuntimeError("boom")
+        
+        scheduler.add_job("stopper", 3600, lambda: (calls.append("job"), scheduler.stop()))
+        
+        scheduler.run_forever(between_ticks=between_ticks)
+        
+        assert calls == ["between", "job"]
+    
+    def test_remove_job(self):
+        """登録を解除したジョブは実行されない"""
+        scheduler = Scheduler(clock=FakeClock())
+        job = scheduler.add_job("job", 10, lambda: None)
+        
+        assert scheduler.remove_job("job") is job
+        assert scheduler.remove_job("job") is None
+        assert scheduler.run_pending() == []
@@ -0,0 +1,142 @@
+"""
+seasonal.py のテスト
+
+日次・週次の周期を持つ Holt–Winters 法による予測をテストします。
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from komon.disk_predictor import format_prediction_message, predict_from_state
+from komon.report_formatter import format_disk_prediction
+from komon.seasonal import (
+    MAX_GAP_HOURS,
+    MIN_HOURS,
+    load_seasonal_states,
+    predict_seasonal,
+    update_seasonal_states,
+    update_state,
+)
+from komon.timeseries import METRICS, TimeSeriesStore
+
+START = datetime(2025, 11, 3)  # 月曜日
+
+
+def _backup_usage(when, hours, growth):
+    """毎日2時に8%増える（夜間のバックアップ）使用率"""
+    return 50.0 + growth * hours / 24 + (8.0 if when.hour == 2 else 0.0)
+
+
+def _train(hours, growth=0.0, seed=0):
+    rng = random.Random(seed)
+    state = None
+    for h in range(hours):
+        when = START + timedelta(hours=h)
+        state = update_state(state, when.timestamp(), _backup_usage(when, h, growth) + rng.gauss(0, 0.2))
+    return state
+
+
+class TestUpdateState:
+    """update_state関数のテスト"""
+    
+    def test_nightly_backup_is_not_trend(self):
+        """夜間のバックアップの増加は周期成分になり、到達予測を出さない"""
+        state = _train(24 * 21 - 21)  # 最後の区間がバックアップ直後（2時）
+        
+        prediction = predict_seasonal(states={'disk': state})
+        
+        assert abs(prediction['slope']) < 0.2
+        assert prediction['days_to_90'] is None
+        assert prediction['current_usage'] > 57.0
+        assert prediction['seasonal_amplitude'] == pytest.approx(8.0, abs=2.0)
+    
+    def test_growth_is_detected(self):
+        """周期に埋もれた増加傾向を検出する"""
+        state = _train(24 * 21, growth=1.0)
+        
+        prediction = predict_seasonal(states={'disk': state})
+        
+        assert prediction['slope'] == pytest.approx(1.0, abs=0.2)
+        assert prediction['trend'] == 'increasing'
+        assert 0 < prediction['days_to_90'] < 20
+        assert prediction['peak_usage'] > prediction['intercept']
+    
+    def test_gaps(self):
+        """短い欠けは傾きに沿って進め、長い欠けは水準と傾きを初期化する"""
+        state = _train(24 * 7, growth=1.0)
+        level = state['level']
+        
+        update_state(state, state['last'] + 3 * 3600, 70.0)
+        assert state['trend'] > 0
+        assert state['level'] > level
+        
+        update_state(state, state['last'] + (MAX_GAP_HOURS + 1) * 3600, 70.0)
+        assert state['trend'] == 0.0
+    
+    def test_older_hour_is_ignored(self):
+        """最後の区間以前の区間は無視する"""
+        state = _train(10)
+        before = dict(state, day=list(state['day']), week=list(state['week']))
+        
+        update_state(state, state['last'] - 3600, 99.0)
+        
+        assert state == before
+    
+    def test_warm_up(self):
+        """1週間分の区間がない場合は予測しない"""
+        assert predict_seasonal(states={'disk': _train(MIN_HOURS - 1)}) is None
+        assert predict_seasonal(states={}) is None
+
+
+class TestStoreStates:
+    """集計段からの状態の更新のテスト"""
+    
+    @pytest.fixture
+    def store(self, tmp_path):
+        store = TimeSeriesStore(str(tmp_path / "metrics"))
+        for h in range(24 * 8):
+            when = START + timedelta(hours=h, minutes=30)
+            store.append({'cpu': 10.0, 'mem': 20.0, 'disk': _backup_usage(when, h, 0.5)}, timestamp=when.timestamp())
+        store.rollup(now=START + timedelta(days=8))
+        return store
+    
+    def test_incremental_update(self, store):
+        """前回より後の区間だけを反映し、全メトリクスの状態を保存する"""
+        now = START + timedelta(days=8)
+        
+        assert update_seasonal_states(store, now=now) == 24 * 8
+        assert update_seasonal_states(store, now=now) == 0
+        
+        states = load_seasonal_states(store)
+        assert set(states) == set(METRICS)
+        assert all(state['hours'] == 24 * 8 for state in states.values())
+        assert predict_seasonal("cpu", store=store)['slope'] == pytest.approx(0.0, abs=0.01)
+    
+    def test_predict_from_state_prefers_seasonal(self, store):
+        """周期を考慮した予測の状態があれば predict_from_state はそれを返す"""
+        assert predict_from_state(days=36500, store=store)[0].get('model') is None
+        update_seasonal_states(store, now=START + timedelta(days=8))
+        
+        prediction, rapid_change = predict_from_state(days=36500, store=store)
+        
+        assert prediction['model'] == 'seasonal'
+        assert rapid_change['is_rapid'] is False
+
+
+class TestFormatting:
+    """予測メッセージの表示のテスト"""
+    
+    def test_seasonal_note(self):
+        """周期を考慮した予測では変動幅とピーク時の使用率を表示する"""
+        prediction = predict_seasonal(states={'disk': _train(24 * 21, growth=1.0)})
+        rapid_change = {'is_rapid': False, 'change_percent': 0.0, 'previous_usage': 0.0, 'current_usage': 0.0}
+        
+        message = format_prediction_message(prediction, rapid_change)
+        section = format_disk_prediction({'prediction': prediction, 'rapid_change': rapid_change})
+        
+        assert "日次・週次の周期" in message
+        assert f"ピーク時の使用率: {prediction['peak_usage']:.1f}%" in message
+        assert section.startswith("【⚠️ ディスク使用量の予測】")
+        assert "日次・週次の周期" in section
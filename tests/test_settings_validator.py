@@ -254,3 +254,49 @@ def test_message_template_consistency():
         assert "prefix" in MESSAGE_TEMPLATES[level]
         assert isinstance(MESSAGE_TEMPLATES[level]["emoji"], str)
         assert isinstance(MESSAGE_TEMPLATES[level]["prefix"], str)
+
+
+def test_cgroup_thresholds():
+    """
+    cgroupごとの閾値は指定された場合のみ正規化される
+    """
+    assert "cgroup" not in validate_threshold_config({"thresholds": {}})
+    
+    config = {
+        "thresholds": {
+            "cgroup": {
+                "cpu": 80,
+                "mem": {"warning": 60, "alert": 75, "critical": 90}
+            }
+        }
+    }
+    result = validate_threshold_config(config)
+    
+    assert result["cgroup"]["cpu"] == {"warning": 70, "alert": 80, "critical": 90}
+    assert result["cgroup"]["mem"] == {"warning": 60, "alert": 75, "critical": 90}
+    
+    with pytest.raises(ValidationError):
+        validate_threshold_config({"thresholds": {"cgroup": {"cpu": "high"}}})
+
+
+def test_anomaly_thresholds():
+    """
+    異常検知の設定は指定された場合のみ正規化され、未指定の項目は既定値になる
+    """
+    assert "anomaly" not in validate_threshold_config({"thresholds": {}})
+    
+    result = validate_threshold_config({"thresholds": {"anomaly": {"metrics": ["cpu"]}}})
+    assert result["anomaly"] == {
+        "metrics": ["cpu"], "method": "ewma", "min_value": None, "allow_downgrade": False,
+        "warning": 3.0, "alert": 4.0, "critical": 5.0
+    }
+    
+    result = validate_threshold_config({
+        "thresholds": {"anomaly": {"method": "mad", "warning": 2, "alert": 3, "critical": 4}}
+    })
+    assert result["anomaly"]["metrics"] == ["cpu", "mem", "disk"]
+    assert result["anomaly"]["critical"] == 4
+    
+    for invalid in ({"metrics": ["net"]}, {"method": "zscore"}, {"min_value": "high"}, {"allow_downgrade": "yes"}, {"warning": 5, "alert": 4, "critical": 6}, True):
+        with pytest.raises(ValidationError):
+            validate_threshold_config({"thresholds": {"anomaly": invalid}})
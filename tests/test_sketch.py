@@ -0,0 +1,66 @@
+"""
+sketch.py のテスト
+
+日ごとに統合できる分位点スケッチをテストします。
+"""
+
+import random
+
+import pytest
+
+from komon.sketch import (
+    SKETCH_MAX,
+    SKETCH_RESOLUTION,
+    add_value,
+    bin_index,
+    merge_sketches,
+    quantile,
+    summarize,
+)
+from komon.timeseries.records import _percentile
+
+
+def _sketch(values):
+    sketch = {}
+    for value in values:
+        add_value(sketch, value)
+    return sketch
+
+
+class TestSketch:
+    """スケッチの更新・統合・分位点のテスト"""
+    
+    def test_quantiles_within_resolution(self):
+        """分位点は生のサンプルから求めた値と区間の幅以内で一致する"""
+        rng = random.Random(0)
+        values = [min(max(rng.lognormvariate(3, 0.6), 0.0), 100.0) for _ in range(5000)]
+        sketch = _sketch(values)
+        
+        for q in (0.01, 0.5, 0.9, 0.95, 0.99, 1.0):
+            assert quantile(sketch, q) == pytest.approx(_percentile(values, q), abs=SKETCH_RESOLUTION)
+        assert len(sketch) <= SKETCH_MAX / SKETCH_RESOLUTION + 1
+    
+    def test_merge_equals_single_sketch(self):
+        """日ごとのスケッチを統合した結果は、全サンプルから作ったスケッチと同じ"""
+        rng = random.Random(1)
+        days = [[rng.uniform(0, 100) for _ in range(300)] for _ in range(7)]
+        
+        merged = merge_sketches(_sketch(values) for values in days)
+        
+        assert merged == _sketch(v for values in days for v in values)
+    
+    def test_out_of_range(self):
+        """範囲外の値は両端の区間に入れる"""
+        assert bin_index(-5.0) == 0
+        assert bin_index(500.0) == bin_index(SKETCH_MAX)
+    
+    def test_summarize(self):
+        """件数と p50 / p95 / p99 をまとめて返し、空のスケッチは None"""
+        summary = summarize(_sketch([10.0] * 99 + [90.0]))
+        
+        assert summary['count'] == 100
+        assert summary['p50'] == pytest.approx(10.0, abs=SKETCH_RESOLUTION)
+        assert summary['p99'] == pytest.approx(10.0, abs=SKETCH_RESOLUTION)
+        assert summarize(_sketch([10.0] * 98 + [90.0] * 2))['p99'] == pytest.approx(90.0, abs=SKETCH_RESOLUTION)
+        assert summarize({}) is None
+        assert quantile({}, 0.5) is None
@@ -0,0 +1,163 @@
+"""
+storage.py のテスト
+
+状態ファイルの一時ファイル経由の置き換えと、batch() による書き込みのまとめをテストします。
+"""
+
+import os
+
+import pytest
+
+from komon import storage
+
+
+def _leftovers(directory):
+    return [name for name in os.listdir(directory) if name.endswith(".tmp")]
+
+
+class TestAtomicWrite:
+    """batch() の外での書き込みのテスト"""
+
+    def test_write_and_read_json(self, tmp_path):
+        """保存した内容を読み込める（ディレクトリがなければ作成）"""
+        path = tmp_path / "state" / "throttle.json"
+        storage.write_json(path, {"cpu": {"level": "warning"}}, indent=2)
+
+        assert storage.read_json(path) == {"cpu": {"level": "warning"}}
+        assert _leftovers(path.parent) == []
+
+    def test_failed_write_keeps_original(self, tmp_path, monkeypatch):
+        """置き換えに失敗しても元のファイルはそのまま残り、一時ファイルも残らない"""
+        path = tmp_path / "queue.json"
+        storage.write_json(path, [1, 2, 3])
+
+        def fail(*args):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(os, "fsync", fail)
+        with pytest.raises(OSError):
+            storage.write_json(path, [4])
+
+        assert storage.read_json(path) == [1, 2, 3]
+        assert _leftovers(tmp_path) == []
+
+    def test_read_missing_file(self, tmp_path):
+        """ないファイルは FileNotFoundError"""
+        assert not storage.exists(tmp_path / "missing.json")
+        with pytest.raises(FileNotFoundError):
+            storage.read_json(tmp_path / "missing.json")
+
+
+class TestBatch:
+    """batch() のテスト"""
+
+    def test_writes_deferred_until_exit(self, tmp_path):
+        """ブロック内の書き込みは抜けるまでディスクに反映されないが、読み込みには見える"""
+        path = tmp_path / "timings.json"
+        with storage.batch():
+            storage.write_json(path, {"runs": 1})
+            assert not path.exists()
+            assert storage.exists(path)
+            assert storage.read_json(path) == {"runs": 1}
+            storage.write_json(path, {"runs": 2})
+
+        assert storage.read_json(path) == {"runs": 2}
+        assert _leftovers(tmp_path) == []
+
+    def test_nested_batch_commits_once(self, tmp_path, monkeypatch):
+        """入れ子にした場合は一番外側を抜けるときに1回だけコミットする"""
+        commits = []
+        original = storage.commit
+        monkeypatch.setattr(storage, "commit", lambda: commits.append(1) or original())
+        path = tmp_path / "state.json"
+
+        with storage.batch():
+            with storage.batch():
+                storage.write_json(path, {"a": 1})
+            assert commits == []
+            assert not path.exists()
+
+        assert commits == [1]
+        assert storage.read_json(path) == {"a": 1}
+
+    def test_commits_on_exception(self, tmp_path):
+        """例外で抜けた場合もそれまでの書き込みを反映する"""
+        path = tmp_path / "state.json"
+        with pytest.raises(RuntimeError):
+            with storage.batch():
+                storage.write_json(path, {"a": 1})
+                raise RuntimeError("boom")
+
+        assert storage.read_json(path) == {"a": 1}
+
+    def test_fsync_grouped(self, tmp_path, monkeypatch):
+        """追記したファイルは重複なく1回ずつ、ディレクトリも1回だけ fsync する"""
+        synced = []
+        monkeypatch.setattr(storage, "_fsync_path", synced.append)
+        appended = tmp_path / "2026-01-01.bin"
+        appended.write_bytes(b"x")
+
+        with storage.batch():
+            for _ in range(3):
+                storage.sync_file(appended)
+            storage.write_json(tmp_path / "a.json", {})
+            storage.write_json(tmp_path / "b.json", {})
+            assert synced == []
+
+        assert sorted(synced) == sorted([str(appended), str(tmp_path)])
+
+    def test_replace_file_is_immediate(self, tmp_path):
+        """replace_file はブロック内でもすぐに書き込む"""
+        path = tmp_path / "2026-01-01.bin"
+        with storage.batch():
+            storage.replace_file(path, b"data")
+            assert path.read_bytes() == b"data"
+
+    def test_remove_applied_after_writes(self, tmp_path, monkeypatch):
+        """ブロック内の削除は書き込みを反映した後で行い、それまでは読み込みに見えない"""
+        index = tmp_path / "manifest.json"
+        old = tmp_path / "2026-01-01.bin"
+        old.write_bytes(b"data")
+        order = []
+        original_replace, original_remove = os.replace, os.remove
+        monkeypatch.setattr(os, "replace", lambda src, dst: order.append("replace") or original_replace(src, dst))
+        monkeypatch.setattr(os, "remove", lambda path: order.append("remove") or original_remove(path))
+
+        with storage.batch():
+            storage.write_json(index, {"partitions": {}})
+            storage.remove(old)
+            assert old.exists()
+            assert not storage.exists(old)
+            assert storage.listdir(tmp_path) == ["manifest.json"]
+            with pytest.raises(FileNotFoundError):
+                storage.read_bytes(old)
+
+        assert order == ["replace", "remove"]
+        assert not old.exists()
+
+    def test_remove_cancels_pending_write_and_vice_versa(self, tmp_path):
+        """削除は溜めている書き込みを取り消し、後からの書き込みは削除を取り消す"""
+        removed, rewritten = tmp_path / "trend.json", tmp_path / "sketch.json"
+        with storage.batch():
+            storage.write_json(removed, {"stale": True})
+            storage.remove(removed)
+            storage.remove(rewritten)
+            storage.write_json(rewritten, {"fresh": True})
+
+        assert not removed.exists()
+        assert storage.read_json(rewritten) == {"fresh": True}
+
+    def test_remove_skipped_when_write_fails(self, tmp_path, monkeypatch):
+        """書き込みに失敗した場合は、古い索引が指すファイルを残すために削除を見送る"""
+        old = tmp_path / "2026-01-01.bin"
+        old.write_bytes(b"data")
+
+        def fail(*args, **kwargs):
+            raise OSError("disk full")
+
+        with storage.batch():
+            storage.write_json(tmp_path / "manifest.json", {})
+            storage.remove(old)
+            monkeypatch.setattr(storage, "_write_temp", fail)
+
+        assert old.exists()
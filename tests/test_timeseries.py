@@ -0,0 +1,676 @@
+"""
+timeseries.py のテスト
+
+日ごとのバイナリパーティションに追記する時系列ストアをテストします。
+"""
+
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from komon import storage, timeseries
+from komon.forecast import fit_sums
+from komon.timeseries import segments
+from komon.timeseries.records import _percentile
+from komon.timeseries import HEADER, RECORD, Sample, SQLiteStore, TimeSeriesStore, get_timeseries_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TimeSeriesStore(str(tmp_path / "metrics"))
+
+
+class TestTimeSeriesStore:
+    """TimeSeriesStoreのテスト"""
+    
+    def test_append_and_read(self, store):
+        """追記したサンプルを読み込める"""
+        when = datetime(2025, 11, 20, 10, 0, 0)
+        path = store.append({'cpu': 12.5, 'mem': 40.0, 'disk': 70.25}, timestamp=when.timestamp())
+        store.append({'cpu': 13.0}, timestamp=when.timestamp() + 300)
+        
+        assert os.path.getsize(path) == HEADER.size + RECORD.size * 2
+        samples = store.read_partition(when.date())
+        assert samples[0] == Sample(when.timestamp(), 12.5, 40.0, 70.25)
+        assert samples[1].mem == 0.0
+    
+    def test_partial_record_is_ignored_and_truncated(self, store):
+        """中断された書き込みの不完全なレコードは読み飛ばし、次の追記で切り詰める"""
+        when = datetime(2025, 11, 20, 10, 0, 0)
+        path = store.append({'cpu': 1.0}, timestamp=when.timestamp())
+        with open(path, "ab") as f:
+            f.write(b"\x00" * 5)
+        
+        assert len(store.read_partition(when.date())) == 1
+        
+        store.append({'cpu': 2.0}, timestamp=when.timestamp() + 60)
+        assert [s.cpu for s in store.read_partition(when.date())] == [1.0, 2.0]
+    
+    def test_query_range_across_partitions(self, store):
+        """期間指定で複数日のサンプルを時刻順に取得できる"""
+        base = datetime(2025, 11, 20, 12, 0, 0)
+        for i in range(5):
+            store.append({'disk': float(i)}, timestamp=(base + timedelta(days=i)).timestamp())
+        
+        result = list(store.query(base + timedelta(days=1), base + timedelta(days=3)))
+        
+        assert [s.disk for s in result] == [1.0, 2.0, 3.0]
+    
+    def test_latest_newest_first(self, store):
+        """新しい順に指定件数だけ取得できる"""
+        base = datetime(2025, 11, 20, 20, 0, 0)
+        for i in range(6):
+            store.append({'cpu': float(i)}, timestamp=(base + timedelta(hours=2 * i)).timestamp())
+        
+        assert [s.cpu for s in store.latest(4)] == [5.0, 4.0, 3.0, 2.0]
+        assert len(store.latest(100)) == 6
+    
+    def test_prune(self, store):
+        """保持期間を過ぎたパーティションのみ削除する"""
+        today = date(2025, 11, 20)
+        for days_ago in range(5):
+            day = today - timedelta(days=days_ago)
+            store.append({'cpu': 1.0}, timestamp=datetime(day.year, day.month, day.day, 12).timestamp())
+        
+        removed = store.prune(3, today=today)
+        
+        assert removed == [date(2025, 11, 16), date(2025, 11, 17)]
+        assert store.partitions() == [date(2025, 11, 18), date(2025, 11, 19), today]
+    
+    def test_missing_directory(self, store):
+        """ディレクトリがなくても空の結果を返す"""
+        assert store.partitions() == []
+        assert store.latest(10) == []
+
+
+class TestManifest:
+    """マニフェスト（パーティションの件数・時刻範囲）のテスト"""
+    
+    def test_manifest_updated_on_write(self, store):
+        """追記のたびにマニフェストが更新される（追記中の日の分位点スケッチを含む）"""
+        base = datetime(2025, 11, 20, 10, 0, 0).timestamp()
+        for i in range(3):
+            store.append({'cpu': float(i)}, timestamp=base + 60 * i)
+        
+        with open(store.manifest_path, encoding="utf-8") as f:
+            entry = json.load(f)["partitions"]["2025-11-20"]
+        assert entry == {
+            "count": 3, "first": base, "last": base + 120, "sorted": True,
+            "sums": {"cpu": 3.0, "mem": 0.0, "disk": 0.0},
+            "sketch": {"cpu": {"0": 1, "10": 1, "20": 1}, "mem": {"0": 3}, "disk": {"0": 3}},
+        }
+    
+    def test_query_reads_exact_range(self, store):
+        """時刻順のパーティションから境界を含む範囲だけを取り出す"""
+        base = datetime(2025, 11, 20, 0, 0, 0)
+        for i in range(100):
+            store.append({'cpu': float(i)}, timestamp=(base + timedelta(minutes=10 * i)).timestamp())
+        
+        result = list(store.query(base + timedelta(minutes=200), base + timedelta(minutes=250)))
+        
+        assert [s.cpu for s in result] == [20.0, 21.0, 22.0, 23.0, 24.0, 25.0]
+    
+    def test_out_of_order_append(self, store):
+        """時刻が前後したパーティションも正しく読み込める"""
+        base = datetime(2025, 11, 20, 10, 0, 0).timestamp()
+        for offset, cpu in ((0, 1.0), (600, 3.0), (300, 2.0)):
+            store.append({'cpu': cpu}, timestamp=base + offset)
+        
+        result = list(store.query(datetime.fromtimestamp(base + 100), datetime.fromtimestamp(base + 700)))
+        
+        assert sorted(s.cpu for s in result) == [2.0, 3.0]
+        assert [s.cpu for s in store.latest(2)] == [3.0, 2.0]
+    
+    def test_manifest_rebuilt_and_refreshed(self, store):
+        """マニフェストがない場合は再構築し、別インスタンスの書き込みも反映する"""
+        when = datetime(2025, 11, 20, 10, 0, 0)
+        store.append({'cpu': 1.0}, timestamp=when.timestamp())
+        os.remove(store.manifest_path)
+        
+        reader = TimeSeriesStore(store.root)
+        assert reader.partitions() == [when.date()]
+        
+        store.append({'cpu': 2.0}, timestamp=when.timestamp() + 60)
+        assert [s.cpu for s in reader.latest(5)] == [2.0, 1.0]
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    return SQLiteStore(str(tmp_path / "metrics"))
+
+
+class TestSQLiteStore:
+    """SQLiteStoreのテスト"""
+    
+    def test_append_and_read(self, sqlite_store):
+        """保存したサンプルを読み込める（WALモード）"""
+        when = datetime(2025, 11, 20, 10, 0, 0)
+        sqlite_store.append({'cpu': 12.5, 'mem': 40.0, 'disk': 70.25}, timestamp=when.timestamp())
+        
+        assert sqlite_store.read_partition(when.date()) == [Sample(when.timestamp(), 12.5, 40.0, 70.25)]
+        with closing(sqlite3.connect(sqlite_store.path)) as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    
+    def test_process_rows_are_normalized(self, sqlite_store):
+        """上位プロセスは process_samples テーブルに保存される"""
+        usage = {
+            'cpu': 50.0, 'mem': 60.0, 'disk': 70.0,
+            'cpu_by_process': [{'name': 'php-fpm', 'cpu': 30.0, 'count': 48}, {'name': 'mysqld', 'cpu': 10.0}],
+            'mem_by_process': [{'name': 'mysqld', 'mem': 512.0, 'count': 1}],
+        }
+        sqlite_store.append(usage, timestamp=1700000000.0)
+        
+        with closing(sqlite3.connect(sqlite_store.path)) as conn:
+            rows = conn.execute(
+                "SELECT metric, rank, name, value, count FROM process_samples ORDER BY metric, rank"
+            ).fetchall()
+        assert rows == [
+            ('cpu', 1, 'php-fpm', 30.0, 48),
+            ('cpu', 2, 'mysqld', 10.0, 1),
+            ('mem', 1, 'mysqld', 512.0, 1),
+        ]
+    
+    def test_latest_and_prune(self, sqlite_store):
+        """新しい順の取得と保持期間を過ぎた日の削除"""
+        today = date(2025, 11, 20)
+        for days_ago in range(5):
+            day = today - timedelta(days=days_ago)
+            sqlite_store.append({'cpu': float(days_ago)}, timestamp=datetime(day.year, day.month, day.day, 12).timestamp())
+        
+        assert [s.cpu for s in sqlite_store.latest(2)] == [0.0, 1.0]
+        assert sqlite_store.prune(3, today=today) == [date(2025, 11, 16), date(2025, 11, 17)]
+        assert sqlite_store.partitions() == [date(2025, 11, 18), date(2025, 11, 19), today]
+    
+    def test_missing_database(self, sqlite_store):
+        """データベースがなくても空の結果を返す"""
+        assert sqlite_store.partitions() == []
+        assert sqlite_store.latest(10) == []
+        assert list(sqlite_store.query(datetime(2025, 1, 1), datetime(2025, 12, 31))) == []
+        assert sqlite_store.average(datetime(2025, 1, 1), datetime(2025, 12, 31)) == {'cpu': 0, 'mem': 0, 'disk': 0}
+
+
+@pytest.mark.parametrize("store_class", [TimeSeriesStore, SQLiteStore])
+def test_aggregates_match_across_engines(tmp_path, store_class):
+    """どちらの保存方式でも期間内の平均・日次平均が同じになる"""
+    store = store_class(str(tmp_path / "metrics"))
+    base = datetime(2025, 11, 20, 6, 0, 0)
+    for i in range(6):
+        when = base + timedelta(hours=8 * i)
+        store.append({'cpu': 10.0 * i, 'mem': 50.0, 'disk': 60.0 + i}, timestamp=when.timestamp())
+    
+    start, end = base, base + timedelta(days=3)
+    
+    assert [tuple(s) for s in store.query(start, end)][0] == (base.timestamp(), 0.0, 50.0, 60.0)
+    assert store.average(start, end) == pytest.approx({'cpu': 25.0, 'mem': 50.0, 'disk': 62.5})
+    assert store.daily_average("disk", start, end) == [
+        (date(2025, 11, 20), pytest.approx(61.0)),
+        (date(2025, 11, 21), pytest.approx(64.0)),
+    ]
+
+
+def test_get_timeseries_store_engine(tmp_path, monkeypatch):
+    """history.storage_engine で保存方式を選択できる"""
+    monkeypatch.setattr(timeseries, 'TIMESERIES_DIR', str(tmp_path / "metrics"))
+    monkeypatch.setattr(timeseries, '_engine', timeseries.DEFAULT_STORAGE_ENGINE)
+    
+    assert get_timeseries_store().engine == "binary"
+    assert isinstance(get_timeseries_store({'history': {'storage_engine': 'sqlite'}}), SQLiteStore)
+    # 設定を渡さない呼び出しは前回選択した保存方式を使う
+    assert get_timeseries_store().engine == "sqlite"
+    assert get_timeseries_store({'history': {'storage_engine': 'unknown'}}).engine == "binary"
+
+
+@pytest.fixture(params=[TimeSeriesStore, SQLiteStore], ids=["binary", "sqlite"])
+def any_store(request, tmp_path):
+    return request.param(str(tmp_path / "metrics"))
+
+
+class TestRollup:
+    """集計段（1h / 1d）のテスト"""
+    
+    def _fill(self, store, base, hours, step_minutes=15):
+        for i in range(hours * 60 // step_minutes):
+            when = base + timedelta(minutes=step_minutes * i)
+            store.append({'cpu': float(i % 4) * 10, 'mem': 50.0, 'disk': 60.0 + i / 100}, timestamp=when.timestamp())
+    
+    def test_rollup_completed_buckets(self, any_store):
+        """終わった区間だけを min / max / avg / p95 にまとめ、再実行しても重複しない"""
+        base = datetime(2025, 11, 20, 0, 0, 0)
+        self._fill(any_store, base, hours=30)
+        now = base + timedelta(hours=30, minutes=5)
+        
+        assert any_store.rollup(now=now) == {'1d': 1, '1h': 30}
+        assert any_store.rollup(now=now) == {'1d': 0, '1h': 0}
+        
+        hour = any_store.rollups("1h", base, base)[0]
+        assert (hour.count, hour.cpu_min, hour.cpu_max, hour.cpu_avg, hour.cpu_p95) == (4, 0.0, 30.0, 15.0, 30.0)
+        day = any_store.rollups("1d", base, now)
+        assert [(r.start, r.count) for r in day] == [(base.timestamp(), 96)]
+    
+    def test_readers_use_rollups_after_raw_pruned(self, any_store):
+        """生のサンプルが削除されても集計段から平均・日次平均を返す"""
+        base = datetime(2025, 11, 20, 0, 0, 0)
+        self._fill(any_store, base, hours=72)
+        start, end = base, base + timedelta(hours=72)
+        expected_average = any_store.average(start, end)
+        expected_daily = any_store.daily_average("disk", start, end)
+        
+        any_store.rollup(now=end)
+        any_store.prune(1, today=date(2025, 11, 23))
+        
+        assert any_store.partitions() == []
+        assert any_store.average(start, end) == pytest.approx(expected_average)
+        assert [day for day, _ in any_store.daily_average("disk", start, end)] == [day for day, _ in expected_daily]
+        assert [v for _, v in any_store.daily_average("disk", start, end)] == pytest.approx([v for _, v in expected_daily])
+    
+    def test_mixed_tiers_and_raw(self, any_store):
+        """集計段で覆えない端の部分は生のサンプルで補う"""
+        base = datetime(2025, 11, 20, 0, 0, 0)
+        self._fill(any_store, base, hours=50)
+        start, end = base + timedelta(hours=3, minutes=30), base + timedelta(hours=49, minutes=10)
+        expected = any_store.average(start, end)
+        
+        any_store.rollup(now=base + timedelta(hours=50))
+        
+        assert any_store.average(start, end) == pytest.approx(expected)
+    
+    def test_prune_rollups(self, any_store):
+        """集計段ごとの保持期間を過ぎた区間を削除する"""
+        base = datetime(2025, 11, 1, 0, 0, 0)
+        for day in range(10):
+            when = base + timedelta(days=day, hours=12)
+            any_store.append({'cpu': 1.0}, timestamp=when.timestamp())
+        any_store.rollup(now=base + timedelta(days=10))
+        
+        removed = any_store.prune_rollups({'1h': 2, '1d': 5}, today=date(2025, 11, 10))
+        
+        assert removed == {'1h': 8, '1d': 5}
+        assert [datetime.fromtimestamp(r.start).date() for r in any_store.rollups("1d", base, base + timedelta(days=10))] == [
+            date(2025, 11, 6), date(2025, 11, 7), date(2025, 11, 8), date(2025, 11, 9), date(2025, 11, 10)
+        ]
+
+
+class TestDailyTotals:
+    """日ごとのサンプル数・合計のテスト"""
+    
+    def test_daily_totals(self, any_store):
+        """書き込みのたびに日ごとの件数と合計が加算される"""
+        base = datetime(2025, 11, 20, 12, 0, 0)
+        for i in range(4):
+            any_store.append({'cpu': 10.0, 'mem': 20.0, 'disk': float(i)}, timestamp=(base + timedelta(hours=6 * i)).timestamp())
+        
+        totals = any_store.daily_totals(date(2025, 11, 20), date(2025, 11, 21))
+        
+        assert totals == {
+            date(2025, 11, 20): (2, {'cpu': 20.0, 'mem': 40.0, 'disk': 1.0}),
+            date(2025, 11, 21): (2, {'cpu': 20.0, 'mem': 40.0, 'disk': 5.0}),
+        }
+        assert list(any_store.daily_totals(date(2025, 11, 21), date(2025, 11, 30))) == [date(2025, 11, 21)]
+    
+    def test_totals_follow_rewrite_and_prune(self, any_store):
+        """パーティションの書き直し・削除に合わせて更新される"""
+        day = date(2025, 11, 20)
+        when = datetime(2025, 11, 20, 9, 0, 0).timestamp()
+        any_store.append({'cpu': 1.0}, timestamp=when)
+        any_store.write_partition(day, [Sample(when, 5.0, 0.0, 0.0), Sample(when + 60, 7.0, 0.0, 0.0)])
+        
+        assert any_store.daily_totals(day, day)[day][0] == 2
+        assert any_store.daily_totals(day, day)[day][1]['cpu'] == 12.0
+        
+        any_store.prune(1, today=date(2025, 11, 21))
+        assert any_store.daily_totals(day, day) == {}
+    
+    def test_sqlite_backfills_existing_database(self, tmp_path):
+        """daily_totals のない既存のデータベースはサンプルから作成する"""
+        store = SQLiteStore(str(tmp_path / "metrics"))
+        when = datetime(2025, 11, 20, 9, 0, 0).timestamp()
+        store.append({'cpu': 4.0}, timestamp=when)
+        with closing(sqlite3.connect(store.path)) as conn, conn:
+            conn.execute("DROP TABLE daily_totals")
+        
+        reopened = SQLiteStore(store.root)
+        
+        assert reopened.daily_totals(date(2025, 11, 20), date(2025, 11, 20)) == {
+            date(2025, 11, 20): (1, {'cpu': 4.0, 'mem': 0.0, 'disk': 0.0})
+        }
+
+
+class TestCompaction:
+    """終わった日の圧縮セグメントのテスト"""
+    
+    def _fill_day(self, store, day, count=3000):
+        base = datetime(day.year, day.month, day.day).timestamp()
+        samples = [Sample(base + 20 * i + (i % 7) * 0.001, float(i % 100), 50.0 + i / 1000, 70.0) for i in range(count)]
+        store.write_partition(day, samples)
+        return samples
+    
+    def test_compact_closed_days(self, store):
+        """当日より前の日だけを可逆に圧縮する"""
+        closed = self._fill_day(store, date(2025, 11, 20))
+        store.append({'cpu': 1.0}, timestamp=datetime(2025, 11, 21, 9).timestamp())
+        raw_size = os.path.getsize(store.partition_path(date(2025, 11, 20)))
+        
+        assert store.compact(today=date(2025, 11, 21)) == [date(2025, 11, 20)]
+        
+        assert not os.path.exists(store.partition_path(date(2025, 11, 20)))
+        assert os.path.getsize(store.segment_path(date(2025, 11, 20))) < raw_size / 2
+        assert store.read_partition(date(2025, 11, 20)) == closed
+        assert store.partitions() == [date(2025, 11, 20), date(2025, 11, 21)]
+        assert store.compact(today=date(2025, 11, 21)) == []
+    
+    def test_partition_removed_after_manifest_commit(self, store):
+        """batch() の中では元のパーティションをマニフェストの反映後に削除し、その間も圧縮済みとして読める"""
+        day = date(2025, 11, 20)
+        closed = self._fill_day(store, day, count=50)
+        
+        with storage.batch():
+            assert store.compact(today=date(2025, 11, 21)) == [day]
+            assert os.path.exists(store.partition_path(day))
+            assert store.read_partition(day) == closed
+            assert store.daily_totals(day, day)[day][0] == 50
+        
+        assert not os.path.exists(store.partition_path(day))
+        with open(store.manifest_path) as f:
+            assert json.load(f)["partitions"][day.isoformat()]["compressed"] is True
+    
+    def test_readers_on_compacted_segment(self, store):
+        """範囲指定・最新・日ごとの合計を圧縮後も同じように読める"""
+        day = date(2025, 11, 20)
+        samples = self._fill_day(store, day)
+        start, end = datetime.fromtimestamp(samples[1500].timestamp), datetime.fromtimestamp(samples[2100].timestamp)
+        before = (list(store.query(start, end)), store.latest(1500), store.daily_totals(day, day))
+        
+        store.compact(today=date(2025, 11, 21))
+        reopened = TimeSeriesStore(store.root)
+        
+        assert list(reopened.query(start, end)) == before[0]
+        assert reopened.latest(1500) == before[1]
+        assert reopened.daily_totals(day, day)[day][0] == before[2][day][0]
+        assert reopened.daily_totals(day, day)[day][1] == pytest.approx(before[2][day][1])
+    
+    def test_decoded_blocks_are_cached(self, store, monkeypatch):
+        """展開したブロックは LRU キャッシュから再利用する"""
+        day = date(2025, 11, 20)
+        self._fill_day(store, day)
+        store.compact(today=date(2025, 11, 21))
+        calls = []
+        original = segments._decode_block
+        monkeypatch.setattr(segments, "_decode_block", lambda data, count: calls.append(count) or original(data, count))
+        
+        store.read_partition(day)
+        store.read_partition(day)
+        
+        assert len(calls) == 3
+    
+    def test_append_to_compacted_day(self, store):
+        """圧縮済みの日に追記すると通常のパーティションに戻す"""
+        day = date(2025, 11, 20)
+        self._fill_day(store, day, count=2)
+        store.compact(today=date(2025, 11, 21))
+        
+        store.append({'cpu': 9.0}, timestamp=datetime(2025, 11, 20, 23).timestamp())
+        
+        assert not os.path.exists(store.segment_path(day))
+        assert [s.cpu for s in store.read_partition(day)] == [0.0, 1.0, 9.0]
+    
+    def test_prune_removes_segments(self, store):
+        """保持期間を過ぎたセグメントも削除する"""
+        self._fill_day(store, date(2025, 11, 20), count=2)
+        store.compact(today=date(2025, 11, 21))
+        
+        assert store.prune(1, today=date(2025, 11, 21)) == [date(2025, 11, 20)]
+        assert os.listdir(store.root) == ["manifest.json"]
+
+
+class TestProcessHistory:
+    """上位プロセスの履歴・集計のテスト"""
+    
+    def _usage(self, cpu_top, mem_top):
+        return {
+            'cpu': 50.0, 'mem': 60.0, 'disk': 70.0,
+            'cpu_by_process': [{'name': name, 'cpu': value, 'count': 1} for name, value in cpu_top],
+            'mem_by_process': [{'name': name, 'mem': value, 'count': 2} for name, value in mem_top],
+        }
+    
+    def test_process_samples_are_structured(self, any_store):
+        """CPUとメモリの上位をプロセス名ごとの1件（時刻, 名前, CPU, メモリ）として保存する"""
+        when = datetime(2025, 11, 20, 10, 0, 0)
+        any_store.append(self._usage([('python', 30.0)], [('python', 512.0), ('mysqld', 256.0)]), timestamp=when.timestamp())
+        
+        samples = any_store.process_samples(when - timedelta(minutes=1), when + timedelta(minutes=1))
+        
+        assert sorted(samples) == [
+            timeseries.ProcessSample(when.timestamp(), 'mysqld', 2, None, 256.0),
+            timeseries.ProcessSample(when.timestamp(), 'python', 2, 30.0, 512.0),
+        ]
+    
+    def test_top_processes_and_trend(self, any_store):
+        """上位に入った回数のランキングとプロセスごとの推移を集計から求める"""
+        base = datetime(2025, 11, 20, 10, 0, 0)
+        for i in range(6):
+            cpu_top = [('nginx', 10.0)] if i % 3 else [('nginx', 10.0), ('backup', 90.0)]
+            any_store.append(self._usage(cpu_top, [('mysqld', 100.0 * (i + 1))]), timestamp=(base + timedelta(minutes=30 * i)).timestamp())
+        
+        ranking = any_store.top_processes('cpu', base, base + timedelta(days=1))
+        trend = any_store.process_trend('mysqld', 'mem', base, base + timedelta(days=1))
+        
+        assert [(r['name'], r['samples'], r['avg']) for r in ranking] == [('nginx', 6, 10.0), ('backup', 2, 90.0)]
+        assert [(datetime.fromtimestamp(t['start']).hour, t['samples'], t['avg'], t['peak']) for t in trend] == [
+            (10, 2, 150.0, 200.0), (11, 2, 350.0, 400.0), (12, 2, 550.0, 600.0),
+        ]
+        daily = any_store.process_trend('mysqld', 'mem', base, base + timedelta(days=1), tier="1d")
+        assert [(t['samples'], t['peak']) for t in daily] == [(6, 600.0)]
+    
+    def test_tallies_outlive_raw_samples(self, any_store):
+        """生のサンプルを削除しても集計は保持期間まで残る"""
+        when = datetime(2025, 11, 20, 10, 0, 0)
+        any_store.append(self._usage([('nginx', 10.0)], []), timestamp=when.timestamp())
+        
+        any_store.prune(1, today=date(2025, 11, 25))
+        
+        assert any_store.process_samples(when - timedelta(days=1), when + timedelta(days=1)) == []
+        assert any_store.top_processes('cpu', when - timedelta(days=1), when + timedelta(days=1))[0]['name'] == 'nginx'
+        assert any_store.prune_process_tallies(3, today=date(2025, 11, 25)) == 1
+        assert any_store.top_processes('cpu', when - timedelta(days=1), when + timedelta(days=1)) == []
+    
+    def test_tallies_rebuilt_from_samples(self, store):
+        """集計ファイルがない場合は上位プロセスのファイルから再構築する"""
+        when = datetime(2025, 11, 20, 10, 0, 0)
+        store.append(self._usage([('nginx', 10.0)], []), timestamp=when.timestamp())
+        os.remove(store.process_tally_path(when.date()))
+        
+        reader = TimeSeriesStore(store.root)
+        
+        assert reader.top_processes('cpu', when, when)[0]['samples'] == 1
+    
+    def test_tally_write_size_is_bounded(self, store, monkeypatch):
+        """1件の追記で書き直す集計は当日分だけで、日数が増えても大きくならない"""
+        written = []
+        write_json = storage.write_json
+        
+        def spy(path, data, **kwargs):
+            if path.startswith(store.process_tally_dir):
+                written.append((path, len(json.dumps(data, ensure_ascii=False, separators=(",", ":")))))
+            return write_json(path, data, **kwargs)
+        
+        monkeypatch.setattr(storage, "write_json", spy)
+        names = [f"proc{i}" for i in range(30)]
+        base = datetime(2025, 11, 1)
+        sizes = []
+        for day in range(10):
+            for hour in range(24):
+                written.clear()
+                when = base + timedelta(days=day, hours=hour)
+                store.append(self._usage([(n, 1.0) for n in names], [(n, 10.0) for n in names]), timestamp=when.timestamp())
+                assert [path for path, _ in written] == [store.process_tally_path(when.date())]
+            sizes.append(written[0][1])
+        
+        assert max(sizes) <= sizes[0] * 1.1
+        assert len(os.listdir(store.process_tally_dir)) == 10
+        
+        reads = []
+        monkeypatch.setattr(store, "_load_process_tallies", lambda day: reads.append(day) or {})
+        store.top_processes('cpu', base + timedelta(days=8), base + timedelta(days=9, hours=23))
+        assert reads == [date(2025, 11, 9), date(2025, 11, 10)]
+    
+    def test_sqlite_replaced_sample_is_not_counted_twice(self, sqlite_store):
+        """同じ時刻のサンプルを置き換えた場合は集計から古い値を差し引く"""
+        when = datetime(2025, 11, 20, 10, 0, 0).timestamp()
+        sqlite_store.append(self._usage([('nginx', 10.0)], []), timestamp=when)
+        sqlite_store.append(self._usage([('nginx', 20.0)], []), timestamp=when)
+        
+        ranking = sqlite_store.top_processes('cpu', datetime.fromtimestamp(when), datetime.fromtimestamp(when))
+        
+        assert [(r['samples'], r['avg']) for r in ranking] == [(1, 20.0)]
+
+
+
+class TestTrend:
+    """回帰の十分統計量（マニフェストの trends）のテスト"""
+    
+    def _fill(self, store, start, hours):
+        """1時間ごとに disk が1日あたり2%ずつ増えるサンプルを追記"""
+        for i in range(hours):
+            ts = (start + timedelta(hours=i)).timestamp()
+            store.append({"cpu": 10.0, "mem": 20.0, "disk": 50.0 + 2.0 * i / 24}, timestamp=ts)
+    
+    def test_updated_on_append(self, any_store):
+        """追記のたびに更新され、傾きと直近2日分の日ごとの合計が求まる"""
+        start = datetime(2025, 11, 20, 0, 0, 0)
+        self._fill(any_store, start, 72)
+        
+        trend = any_store.trend("disk")
+        slope, value = fit_sums(trend)
+        
+        assert slope == pytest.approx(2.0)
+        assert value == pytest.approx(50.0 + 2.0 * 71 / 24)
+        assert [(day, count) for day, count, _ in trend["daily"]] == [("2025-11-21", 24), ("2025-11-22", 24)]
+        assert fit_sums(any_store.trend("cpu"))[0] == pytest.approx(0.0)
+    
+    def test_rebuilt_when_missing(self, store):
+        """十分統計量がない場合（以前の版のマニフェスト）は直近のサンプルから再構築し、trend.json を削除する"""
+        start = datetime.now().replace(microsecond=0) - timedelta(hours=48)
+        self._fill(store, start, 48)
+        expected = store.trend("disk")
+        with open(store.manifest_path) as f:
+            manifest = json.load(f)
+        del manifest["trends"]
+        with open(store.manifest_path, "w") as f:
+            json.dump(manifest, f)
+        legacy_path = os.path.join(store.root, "trend.json")
+        with open(legacy_path, "w") as f:
+            f.write("{}")
+        
+        rebuilt = TimeSeriesStore(store.root).trend("disk")
+        
+        assert rebuilt["daily"] == expected["daily"]
+        assert fit_sums(rebuilt) == pytest.approx(fit_sums(expected))
+        assert not os.path.exists(legacy_path)
+    
+    def test_reset_on_write_partition(self, store):
+        """過去のサンプルを書き直した場合は破棄して再構築する"""
+        self._fill(store, datetime.combine(date.today() - timedelta(days=1), datetime.min.time()), 2)
+        store.write_partition(date(2020, 1, 1), [Sample(datetime(2020, 1, 1, 12).timestamp(), 1.0, 2.0, 3.0)])
+        
+        with open(store.manifest_path) as f:
+            assert "trends" not in json.load(f)
+        assert store.trend("disk")["daily"][-1][1] == 2
+    
+    def test_reset_in_batch(self, store):
+        """batch() の中で破棄した場合、溜めていたマニフェストの書き込みに古い統計量が残らない"""
+        with storage.batch():
+            self._fill(store, datetime.combine(date.today(), datetime.min.time()), 2)
+            store.write_partition(date(2020, 1, 1), [Sample(datetime(2020, 1, 1, 12).timestamp(), 1.0, 2.0, 3.0)])
+        
+        with open(store.manifest_path) as f:
+            assert "trends" not in json.load(f)
+
+
+class TestQuantileSketch:
+    """日ごとの分位点スケッチのテスト"""
+    
+    def _fill(self, store, start, days):
+        """1日あたり96件（15分ごと）、cpu は 0〜95% を順に取る値を追記"""
+        values = []
+        for i in range(days * 96):
+            cpu = (i * 37 % 96) + 0.25
+            values.append(cpu)
+            store.append({"cpu": cpu, "mem": 40.0, "disk": 60.0}, timestamp=(start + timedelta(minutes=15 * i)).timestamp())
+        return values
+    
+    def test_quantiles_match_raw_samples(self, any_store):
+        """日ごとのスケッチを統合した分位点は、生のサンプルから求めた値と区間の幅以内で一致する"""
+        values = self._fill(any_store, datetime(2025, 11, 17), 7)
+        
+        result = any_store.quantiles(date(2025, 11, 17), date(2025, 11, 23))
+        
+        assert result["cpu"]["count"] == len(values)
+        for q, key in ((0.5, "p50"), (0.95, "p95"), (0.99, "p99")):
+            assert result["cpu"][key] == pytest.approx(_percentile(values, q), abs=0.1)
+        assert result["mem"]["p99"] == pytest.approx(40.0, abs=0.1)
+        assert len(any_store.daily_sketches(date(2025, 11, 17), date(2025, 11, 23))) == 7
+        assert any_store.quantiles(date(2025, 12, 1), date(2025, 12, 7)) == {}
+    
+    def test_kept_after_prune(self, any_store):
+        """生のサンプルを削除した後も分位点を求められ、保持期間を過ぎると削除する"""
+        self._fill(any_store, datetime(2025, 11, 17), 2)
+        any_store.prune(1, today=date(2025, 11, 30))
+        
+        assert any_store.quantiles(date(2025, 11, 17), date(2025, 11, 18))["cpu"]["count"] == 192
+        
+        assert any_store.prune_sketches(13, today=date(2025, 11, 30)) == 1
+        assert list(any_store.daily_sketches(date(2025, 11, 1), date(2025, 11, 30))) == [date(2025, 11, 18)]
+    
+    def test_append_writes_manifest_only(self, store):
+        """追記中の日のスケッチはマニフェストに含め、日が変わった最初の追記で日ごとのファイルに移す"""
+        self._fill(store, datetime(2025, 11, 20, 23, 0), 1)
+        
+        assert not os.path.exists(os.path.join(store.root, "trend.json"))
+        with open(store.manifest_path) as f:
+            manifest = json.load(f)
+        assert set(manifest["trends"]) == {"cpu", "mem", "disk"}
+        assert sum(manifest["partitions"]["2025-11-21"]["sketch"]["cpu"].values()) == 92
+        assert "sketch" not in manifest["partitions"]["2025-11-20"]
+        with open(store.sketch_path(date(2025, 11, 20))) as f:
+            assert sum(json.load(f)["metrics"]["cpu"].values()) == 4
+    
+    def test_rewrite_and_replace(self, any_store):
+        """パーティションの書き直しに追従する（SQLite は同じ時刻のサンプルの置き換えも）"""
+        day = date(2025, 11, 20)
+        when = datetime(2025, 11, 20, 9, 0, 0).timestamp()
+        any_store.append({"cpu": 10.0}, timestamp=when)
+        any_store.write_partition(day, [Sample(when, 50.0, 0.0, 0.0), Sample(when + 60, 70.0, 0.0, 0.0)])
+        
+        assert any_store.quantiles(day, day)["cpu"]["count"] == 2
+        assert any_store.quantiles(day, day)["cpu"]["p99"] == pytest.approx(70.0, abs=0.1)
+        
+        if isinstance(any_store, SQLiteStore):
+            any_store.append({"cpu": 20.0}, timestamp=when + 60)
+            assert any_store.quantiles(day, day)["cpu"]["count"] == 2
+            assert any_store.quantiles(day, day)["cpu"]["p99"] == pytest.approx(50.0, abs=0.1)
+    
+    def test_rebuilt_from_samples(self, store, tmp_path):
+        """スケッチがない日（binary）・テーブルがない既存のデータベース（SQLite）はサンプルから作成する"""
+        when = datetime(2025, 11, 20, 9, 0, 0).timestamp()
+        store.append({"cpu": 33.0}, timestamp=when)
+        with open(store.manifest_path) as f:
+            manifest = json.load(f)
+        del manifest["partitions"]["2025-11-20"]["sketch"]
+        with open(store.manifest_path, "w") as f:
+            json.dump(manifest, f)
+        store.append({"cpu": 44.0}, timestamp=when + 60)
+        
+        assert TimeSeriesStore(store.root).quantiles(date(2025, 11, 20), date(2025, 11, 20))["cpu"]["count"] == 2
+        
+        sqlite_store = SQLiteStore(str(tmp_path / "sqlite"))
+        sqlite_store.append({"cpu": 33.0}, timestamp=when)
+        with closing(sqlite3.connect(sqlite_store.path)) as conn, conn:
+            conn.execute("DROP TABLE daily_sketches")
+        
+        result = SQLiteStore(sqlite_store.root).quantiles(date(2025, 11, 20), date(2025, 11, 20))
+        assert result["cpu"]["count"] == 1
+        assert result["cpu"]["p50"] == pytest.approx(33.0, abs=0.1)
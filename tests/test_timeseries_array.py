@@ -0,0 +1,36 @@
+"""
+timeseries_array.py のテスト
+
+ベクトル演算による日ごとの平均のテストを行います。
+NumPy がインストールされていない環境ではスキップします。
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+np = pytest.importorskip("numpy")
+
+from komon.disk_predictor import calculate_daily_average
+from komon.timeseries_array import daily_means
+
+
+class TestDailyMeans:
+    """daily_means関数のテスト"""
+    
+    def test_daily_means_match_python(self):
+        """Python版の calculate_daily_average と同じ結果"""
+        start = datetime(2025, 11, 20, 0, 0, 0)
+        data = [(start + timedelta(minutes=37 * i), float(i % 100)) for i in range(2000)]
+        
+        vectorized = daily_means([dt.timestamp() for dt, _ in data], [v for _, v in data])
+        
+        assert [day for day, _ in vectorized] == [day for day, _ in calculate_daily_average(data)]
+        expected = {}
+        for dt, value in data:
+            expected.setdefault(dt.date(), []).append(value)
+        for day, avg in vectorized:
+            assert avg == pytest.approx(sum(expected[day]) / len(expected[day]))
+    
+    def test_empty(self):
+        """サンプルがない場合は空リスト"""
+        assert daily_means([], []) == []
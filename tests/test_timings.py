@@ -0,0 +1,121 @@
+"""
+timings.py のテスト
+
+処理時間の計測とヒストグラム集計をテストします。
+"""
+
+from datetime import date
+
+import pytest
+
+from komon import timings
+from komon.timings import (
+    TimingRecorder,
+    bucket_index,
+    bucket_upper_ms,
+    summarize_timings,
+    timed_run,
+)
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    return str(tmp_path / "state" / "timings.json")
+
+
+class FakeClock:
+    """呼び出しごとに step 秒ずつ進む時計"""
+    
+    def __init__(self, step):
+        self.now = 0.0
+        self.step = step
+    
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+class TestTimingRecorder:
+    """TimingRecorderのテスト"""
+    
+    def test_span_records_duration(self, state_file):
+        """with ブロックの所要時間をミリ秒で記録する"""
+        recorder = TimingRecorder(state_file, clock=FakeClock(0.25))
+        
+        with recorder.span("process_scan"):
+            pass
+        recorder.flush()
+        
+        summary = summarize_timings(state_file)
+        assert summary["process_scan"]["count"] == 1
+        assert summary["process_scan"]["max"] == 250.0
+    
+    def test_span_records_on_exception(self, state_file):
+        """例外が発生しても計測値は記録する"""
+        recorder = TimingRecorder(state_file)
+        
+        with pytest.raises(RuntimeError):
+            with recorder.span("notification"):
+                raise RuntimeError("boom")
+        
+        assert len(recorder._pending["notification"]) == 1
+    
+    def test_percentiles(self, state_file):
+        """p50/p95 はバケット上限（誤差25%以内）で返す"""
+        recorder = TimingRecorder(state_file)
+        for ms in range(1, 101):
+            recorder.record("cpu_sample", float(ms))
+        recorder.flush()
+        
+        stats = summarize_timings(state_file)["cpu_sample"]
+        assert stats["count"] == 100
+        assert 50 <= stats["p50"] <= 50 * 1.25
+        assert 95 <= stats["p95"] <= 100
+        assert stats["max"] == 100.0
+    
+    def test_flush_accumulates_and_drops_old_days(self, state_file):
+        """複数回の実行分を合算し、保持期間を過ぎた日は削除する"""
+        recorder = TimingRecorder(state_file)
+        recorder.record("history_write", 10.0)
+        recorder.flush(today=date(2025, 1, 1))
+        recorder.record("history_write", 20.0)
+        recorder.flush(today=date(2025, 1, 5))
+        assert summarize_timings(state_file)["history_write"]["count"] == 2
+        
+        recorder.record("history_write", 30.0)
+        recorder.flush(today=date(2025, 1, 10))
+        assert summarize_timings(state_file)["history_write"]["count"] == 2
+    
+    def test_bucket_bounds(self):
+        """バケット上限は計測値以上"""
+        for ms in (0.05, 0.1, 1.0, 123.4, 60000.0):
+            assert bucket_upper_ms(bucket_index(ms)) >= ms
+
+
+def test_timed_run_records_total_and_flushes(state_file, monkeypatch):
+    """timed_run は "<name>.total" を記録し、終了時にファイルへ反映する"""
+    monkeypatch.setattr(timings, "_recorder", TimingRecorder(state_file))
+    
+    @timed_run("main")
+    def main():
+        with timings.span("process_scan"):
+            return 42
+    
+    assert main() == 42
+    assert set(summarize_timings(state_file)) == {"main.total", "process_scan"}
+
+
+def test_summarize_missing_file(state_file):
+    """ファイルがない場合は空の集計を返す"""
+    assert summarize_timings(state_file) == {}
+
+
+def test_default_state_file_is_resolved_at_use(state_file, monkeypatch):
+    """保存先を省略した場合は、作成時ではなく使用時点の TIMINGS_FILE を使う"""
+    recorder = TimingRecorder()
+    monkeypatch.setattr(timings, "TIMINGS_FILE", state_file)
+    
+    recorder.record("process_scan", 1.0)
+    recorder.flush()
+    
+    assert summarize_timings()["process_scan"]["count"] == 1
@@ -3,7 +3,6 @@
 """
 
 import os
-import csv
 import json
 import tempfile
 from datetime import datetime, timedelta
@@ -11,9 +10,11 @@ from pathlib import Path
 
 import pytest
 
+from komon.timeseries import TimeSeriesStore
 from komon.weekly_data import (
     collect_weekly_data,
     calculate_average_usage,
+    calculate_percentiles,
     get_alert_history,
     analyze_trend
 )
@@ -55,7 +56,7 @@ class TestWeeklyData:
     def test_calculate_average_usage_no_data(self, monkeypatch):
         """データがない場合のテスト"""
         # 存在しないディレクトリを指定
-        monkeypatch.setattr('komon.weekly_data.HISTORY_DIR', '/nonexistent/path')
+        monkeypatch.setattr('komon.timeseries.TIMESERIES_DIR', '/nonexistent/path')
         
         result = calculate_average_usage(days=7)
         
@@ -64,9 +65,9 @@ class TestWeeklyData:
     def test_calculate_average_usage_with_data(self, tmp_path, monkeypatch):
         """データがある場合の平均値計算テスト"""
         # 一時ディレクトリを使用
-        history_dir = tmp_path / "usage_history"
-        history_dir.mkdir()
-        monkeypatch.setattr('komon.weekly_data.HISTORY_DIR', str(history_dir))
+        history_dir = tmp_path / "metrics"
+        monkeypatch.setattr('komon.timeseries.TIMESERIES_DIR', str(history_dir))
+        store = TimeSeriesStore(str(history_dir))
         
         # テストデータを作成（3日分）
         now = datetime.now()
@@ -77,13 +78,7 @@ class TestWeeklyData:
         ]
         
         for date, cpu, mem, disk in test_data:
-            filename = f"usage_{date.strftime('%Y%m%d_%H%M%S')}.csv"
-            filepath = history_dir / filename
-            
-            with open(filepath, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['timestamp', 'cpu', 'mem', 'disk'])
-                writer.writerow([date.isoformat(), cpu, mem, disk])
+            store.append({'cpu': cpu, 'mem': mem, 'disk': disk}, timestamp=date.timestamp())
         
         # 平均値を計算
         result = calculate_average_usage(days=7)
@@ -93,6 +88,38 @@ class TestWeeklyData:
         assert abs(result['mem'] - 60.0) < 0.1
         assert abs(result['disk'] - 70.0) < 0.1
     
+    def test_calculate_average_usage_week_boundary(self, tmp_path, monkeypatch):
+        """今週（当日を含む7日間）と先週（その前の7日間）を日単位で分ける"""
+        monkeypatch.setattr('komon.timeseries.TIMESERIES_DIR', str(tmp_path / "metrics"))
+        store = TimeSeriesStore(str(tmp_path / "metrics"))
+        noon = datetime.combine(datetime.now().date(), datetime.min.time()) + timedelta(hours=12)
+        store.append({'cpu': 40.0, 'mem': 40.0, 'disk': 40.0}, timestamp=(noon - timedelta(days=6)).timestamp())
+        store.append({'cpu': 20.0, 'mem': 20.0, 'disk': 20.0}, timestamp=(noon - timedelta(days=7)).timestamp())
+        store.append({'cpu': 10.0, 'mem': 10.0, 'disk': 10.0}, timestamp=(noon - timedelta(days=14)).timestamp())
+        
+        assert calculate_average_usage(days=7)['cpu'] == 40.0
+        assert calculate_average_usage(days=7, offset_days=7)['cpu'] == 20.0
+    
+    def test_calculate_percentiles(self, tmp_path, monkeypatch):
+        """日ごとの分位点スケッチを統合して期間の p50 / p95 / p99 を求める"""
+        monkeypatch.setattr('komon.timeseries.TIMESERIES_DIR', str(tmp_path / "metrics"))
+        store = TimeSeriesStore(str(tmp_path / "metrics"))
+        noon = datetime.combine(datetime.now().date(), datetime.min.time()) + timedelta(hours=12)
+        for i in range(100):
+            when = noon - timedelta(days=i % 5, minutes=i)
+            store.append({'cpu': float(i), 'mem': 50.0, 'disk': 60.0}, timestamp=when.timestamp())
+        store.append({'cpu': 99.0, 'mem': 99.0, 'disk': 99.0}, timestamp=(noon - timedelta(days=20)).timestamp())
+        
+        week = calculate_percentiles(days=7)
+        month = calculate_percentiles(days=30)
+        
+        assert week['cpu']['count'] == 100
+        assert week['cpu']['p50'] == pytest.approx(49.0, abs=0.1)
+        assert week['cpu']['p95'] == pytest.approx(94.0, abs=0.1)
+        assert week['cpu']['p99'] == pytest.approx(98.0, abs=0.1)
+        assert month['mem']['count'] == 101
+        assert calculate_percentiles(days=7, offset_days=30) == {}
+    
     def test_get_alert_history_no_data(self, monkeypatch):
         """通知履歴がない場合のテスト"""
         # load_notification_historyが空リストを返すようにモック
@@ -178,4 +205,5 @@ class TestWeeklyData:
             assert 'change' in result['resources'][resource]
             assert 'trend' in result['resources'][resource]
         
+        assert set(result['percentiles']) == {'week', 'month'}
         assert 'alerts' in result
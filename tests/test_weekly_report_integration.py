@@ -3,7 +3,6 @@
 """
 
 import os
-import csv
 import json
 import tempfile
 from datetime import datetime, timedelta
@@ -12,6 +11,7 @@ from unittest.mock import Mock, patch
 
 import pytest
 
+from komon.timeseries import TimeSeriesStore
 from komon.weekly_data import collect_weekly_data
 from komon.report_formatter import format_weekly_report
 
@@ -22,7 +22,7 @@ class TestWeeklyReportIntegration:
     def test_end_to_end_report_generation_no_data(self, monkeypatch):
         """データなしでのエンドツーエンドレポート生成テスト"""
         # データがない状態をシミュレート
-        monkeypatch.setattr('komon.weekly_data.HISTORY_DIR', '/nonexistent/path')
+        monkeypatch.setattr('komon.timeseries.TIMESERIES_DIR', '/nonexistent/path')
         
         def mock_load():
             return []
@@ -44,32 +44,20 @@ class TestWeeklyReportIntegration:
     def test_end_to_end_report_generation_with_data(self, tmp_path, monkeypatch):
         """データありでのエンドツーエンドレポート生成テスト"""
         # 一時ディレクトリを使用
-        history_dir = tmp_path / "usage_history"
-        history_dir.mkdir()
-        monkeypatch.setattr('komon.weekly_data.HISTORY_DIR', str(history_dir))
+        history_dir = tmp_path / "metrics"
+        monkeypatch.setattr('komon.timeseries.TIMESERIES_DIR', str(history_dir))
+        store = TimeSeriesStore(str(history_dir))
         
         # 今週のテストデータを作成（直近3日分）
         now = datetime.now()
         for i in range(1, 4):
             date = now - timedelta(days=i)
-            filename = f"usage_{date.strftime('%Y%m%d_%H%M%S')}.csv"
-            filepath = history_dir / filename
-            
-            with open(filepath, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['timestamp', 'cpu', 'mem', 'disk'])
-                writer.writerow([date.isoformat(), 50.0, 60.0, 70.0])
+            store.append({'cpu': 50.0, 'mem': 60.0, 'disk': 70.0}, timestamp=date.timestamp())
         
         # 先週のテストデータを作成（8-10日前）
         for i in range(8, 11):
             date = now - timedelta(days=i)
-            filename = f"usage_{date.strftime('%Y%m%d_%H%M%S')}.csv"
-            filepath = history_dir / filename
-            
-            with open(filepath, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['timestamp', 'cpu', 'mem', 'disk'])
-                writer.writerow([date.isoformat(), 48.0, 62.0, 68.0])
+            store.append({'cpu': 48.0, 'mem': 62.0, 'disk': 68.0}, timestamp=date.timestamp())
         
         # 通知履歴のモック
         test_notifications = [
@@ -216,7 +204,7 @@ weekly_report:
     def test_graceful_degradation_missing_data(self, monkeypatch):
         """データ不足時のグレースフルデグラデーションテスト"""
         # データがない状態
-        monkeypatch.setattr('komon.weekly_data.HISTORY_DIR', '/nonexistent/path')
+        monkeypatch.setattr('komon.timeseries.TIMESERIES_DIR', '/nonexistent/path')
         
         def mock_load():
             return []